@@ -1,7 +1,11 @@
+import functools
 import os
+import selectors
 import shlex
 import signal
 import subprocess
+import tempfile
+import threading
 from enum import Enum
 from typing import Tuple, Optional, Union
 import time
@@ -54,6 +58,19 @@ class DUEType(Enum):
         return str(self.name)
 
 
+class EarlyStop(Enum):
+    # Outcome decided by the OutputMonitor before the end of a run
+    SDC = 0
+    DUE = 1
+    TIMEOUT = 2
+
+    def __str__(self) -> str:
+        """Override the str method
+        :return: the name of the enum as string
+        """
+        return str(self.name)
+
+
 class Timer:
     time_measure = 0
 
@@ -88,54 +105,312 @@ def execute_command(command: str, verbose: bool = False) -> Tuple[str, str]:
     return out, err
 
 
-def is_timeout(pr: subprocess.Popen, timeout: float):
-    # check if the process is active every 'factor' sec for timeout threshold
-    factor = 0.5
-    return_code = None
-    to_th = timeout / factor
-    while to_th > 0:
-        return_code = pr.poll()
-        if return_code is not None:
-            break
-        to_th -= 1
-        time.sleep(factor)
+# Time to wait for the simulator to stop after a timeout before killing it
+KILL_GRACE_TIME = 5
+
+# Time between two checks of the output monitor while a run executes
+MONITOR_INTERVAL = 0.5
+
+
+class ProcessExitWaiter:
+    """ Waits for the end of a process without polling it. It uses a pidfd, the systems without them
+    fall back to Popen.wait, which polls waitpid with a short sleep
+    """
+
+    def __init__(self, process: subprocess.Popen):
+        self.process = process
+        self.pidfd = None
+        self.selector = None
+
+    def __enter__(self):
+        try:
+            self.pidfd = os.pidfd_open(self.process.pid)
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.pidfd, selectors.EVENT_READ)
+        except (AttributeError, OSError):
+            self.__exit__()
+        return self
+
+    def __exit__(self, *_):
+        if self.selector is not None:
+            self.selector.close()
+            self.selector = None
+        if self.pidfd is not None:
+            os.close(self.pidfd)
+            self.pidfd = None
+
+    def wait(self, wait_time: float) -> bool:
+        """ Wait at most wait_time seconds, True if the process finished """
+        wait_time = max(wait_time, 0)
+        if self.selector is not None:
+            # The pidfd is readable as soon as the process finishes
+            self.selector.select(timeout=wait_time)
+            wait_time = 0
+        try:
+            self.process.wait(timeout=wait_time)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+
+def is_timeout(pr: subprocess.Popen, timeout: float, monitor: "OutputMonitor" = None):
+    # Wait for the process until the deadline, the monitor is checked every MONITOR_INTERVAL
+    deadline = time.monotonic() + timeout
+    if monitor is not None:
+        # The run is started in a new session
+        monitor.start(session_id=pr.pid)
+    with ProcessExitWaiter(process=pr) as waiter:
+        while True:
+            wait_time = deadline - time.monotonic()
+            if monitor is not None:
+                wait_time = min(wait_time, MONITOR_INTERVAL)
+            if waiter.wait(wait_time=wait_time):
+                return False, pr.returncode
+            if time.monotonic() >= deadline:
+                os.killpg(pr.pid, signal.SIGINT)  # pr.kill()
+                return True, pr.poll()
+            if monitor is not None and monitor.check() is not None:
+                # The outcome is already known, only this run is stopped
+                kill_process_group(pgid=pr.pid)
+                return False, pr.wait()
+
+
+class FollowedOutput:
+    """ Output file of a run that is read while it is written and compared with the golden one """
+
+    def __init__(self, path: str, golden_path: str):
+        self.path = path
+        with open(golden_path, errors='ignore') as golden_fp:
+            self.golden_lines = [line for line in golden_fp.read().splitlines() if "FAULT_INJECTED_HERE" not in line]
+        self.offset = 0
+        self.partial_line = b""
+        self.num_lines = 0
+        self.diverged = False
+
+    def new_lines(self) -> list:
+        """ The complete lines written since the last call, without the FAULT_INJECTED_HERE lines """
+        try:
+            with open(self.path, "rb") as output_fp:
+                output_fp.seek(self.offset)
+                data = output_fp.read()
+        except OSError:
+            return list()
+        self.offset += len(data)
+        *lines, self.partial_line = (self.partial_line + data).split(b"\n")
+        return [line for line in (line.decode(errors='ignore') for line in lines) if "FAULT_INJECTED_HERE" not in line]
+
+    def next_golden_line(self) -> Optional[str]:
+        """ The golden line at the position of the next line of the output, None after the last one """
+        golden_line = self.golden_lines[self.num_lines] if self.num_lines < len(self.golden_lines) else None
+        self.num_lines += 1
+        return golden_line
+
+
+def session_cpu_time(session_id: int) -> Optional[float]:
+    """ CPU seconds used by the processes of a session, including their finished children.
+    None when /proc cannot be read
+    """
+    clock_ticks = os.sysconf("SC_CLK_TCK")
+    ticks = 0
+    try:
+        pids = os.listdir("/proc")
+    except OSError:
+        return None
+    for pid in pids:
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as stat_fp:
+                # The command name can have spaces, the fields are after its closing parenthesis
+                fields = stat_fp.read().rpartition(b")")[2].split()
+        except OSError:
+            # The process finished
+            continue
+        if int(fields[3]) == session_id:
+            # utime, stime, cutime and cstime
+            ticks += sum(int(field) for field in fields[11:15])
+    return ticks / clock_ticks
+
+
+class OutputMonitor:
+    """ Follows the stdout and stderr files of a run while it executes and decides its outcome
+    as soon as waiting for the end would not change it.
+    A run is stalled when it neither writes output nor uses CPU time for stall_time, a run that
+    is slow, for example because other runs share the machine, is not stalled
+    """
+
+    def __init__(self, stdout_file: str, stderr_file: str, golden_stdout_file: str, golden_stderr_file: str,
+                 terminal_markers: list, stall_time: float):
+        self.stdout = FollowedOutput(path=stdout_file, golden_path=golden_stdout_file)
+        self.stderr = FollowedOutput(path=stderr_file, golden_path=golden_stderr_file)
+        self.terminal_markers = terminal_markers
+        self.stall_time = stall_time
+        self.last_progress = time.time()
+        self.session_id = None
+        self.cpu_time = None
+        # (EarlyStop, reason) when the outcome is decided
+        self.decision = None
+
+    def start(self, session_id: int = None):
+        """ The stall time counts from the start of the run, session_id is the session of its processes """
+        self.last_progress = time.time()
+        self.session_id = session_id
+        self.cpu_time = session_cpu_time(session_id) if session_id is not None else None
+
+    def check(self) -> Optional[Tuple[EarlyStop, str]]:
+        if self.decision is not None:
+            return self.decision
+        for output in [self.stdout, self.stderr]:
+            offset = output.offset
+            lines = output.new_lines()
+            if output.offset != offset:
+                self.last_progress = time.time()
+            for line in lines:
+                golden_line = output.next_golden_line()
+                if line != golden_line:
+                    # The run scripts cut the outputs, so the lines after the golden ones are not a divergence
+                    output.diverged = output.diverged or golden_line is not None
+                    crash_signature = next((error for error in ALL_STD_ERRORS if error in line), None)
+                    if crash_signature is not None:
+                        self.decision = EarlyStop.DUE, f"crash signature: {crash_signature}"
+                        return self.decision
+                # An SDC is decided when the app finishes printing its results
+                if output is self.stdout and output.diverged and any(m in line for m in self.terminal_markers):
+                    self.decision = EarlyStop.SDC, f"output diverged: {line.strip()}"
+                    return self.decision
+        if time.time() - self.last_progress > self.stall_time:
+            cpu_time = session_cpu_time(self.session_id) if self.session_id is not None else None
+            if cpu_time is None:
+                # Without a progress signal only the timeout stops the run
+                return self.decision
+            if cpu_time > self.cpu_time:
+                self.cpu_time = cpu_time
+                self.last_progress = time.time()
+            else:
+                self.decision = EarlyStop.TIMEOUT, f"no output or CPU time for {self.stall_time:.1f}s"
+        return self.decision
+
+
+def kill_process_group(pgid: int):
+    """ Force kill all the processes of a group, only the processes started by one execution """
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def kill_processes_with_env(key: str, value: str):
+    """ Force kill the processes that have key=value in their environment.
+    Used for the simulator processes that left the process group of their execution
+    """
+    marker = f"{key}={value}".encode()
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{pid}/environ", "rb") as environ_fp:
+                if marker not in environ_fp.read().split(b"\0"):
+                    continue
+            os.kill(int(pid), signal.SIGKILL)
+        except (OSError, ValueError):
+            # The process finished or belongs to another user
+            pass
+
+
+@functools.lru_cache(maxsize=None)
+def source_environment(gapuino_source_script: str) -> dict:
+    """ Environment set by the SDK source script, it is sourced once per campaign """
+    env_vars_str, _ = execute_command(command=f"env -i bash -c 'source {gapuino_source_script} && env -0'", )
+    # env -0 separates the variables with NUL, so the values can have new lines
+    return dict(var.partition("=")[::2] for var in env_vars_str.split("\0") if "=" in var)
+
+
+class RunStatistics:
+    """ Time spent by the runs of a campaign. The overhead is the time execute_gvsoc spends
+    out of the run itself: environment, process creation, clean up and reading the outputs
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.num_runs = 0
+        self.run_time = 0.0
+        self.overhead = 0.0
+
+    def add(self, run_time: float, overhead: float):
+        with self.lock:
+            self.num_runs += 1
+            self.run_time += run_time
+            self.overhead += overhead
 
-    if to_th == 0:
-        os.killpg(pr.pid, signal.SIGINT)  # pr.kill()
-        return True, pr.poll()
-    else:
-        return False, return_code
+    def __str__(self):
+        num_runs = max(self.num_runs, 1)
+        return (f"runs: {self.num_runs} mean run time: {self.run_time / num_runs:.2f}s "
+                f"mean harness overhead: {self.overhead / num_runs:.3f}s")
 
 
 def execute_gvsoc(command: str, gapuino_source_script: str, gvsoc_fi_env: Optional[Union[dict, list]] = None,
-                  timeout: float = 60) -> Tuple[Union[None, str], Union[None, str], DUEType]:
-    env_vars_str, _ = execute_command(command=f"env -i bash -c 'source {gapuino_source_script} && env'", )
+                  timeout: float = 60, monitor: OutputMonitor = None,
+                  run_times: dict = None) -> Tuple[Union[None, str], Union[None, str], DUEType]:
+    start_time = time.monotonic()
     current_env_vars = os.environ.copy()
-    for line in env_vars_str.split("\n"):
-        (key, _, value) = line.strip().partition("=")
-        current_env_vars[key] = value
+    current_env_vars.update(source_environment(gapuino_source_script=gapuino_source_script))
     if gvsoc_fi_env:
         current_env_vars.update(gvsoc_fi_env)
 
     command = shlex.split(command)
 
-    process = subprocess.Popen(command, env=current_env_vars, shell=True, executable='/bin/bash', preexec_fn=os.setsid,
-                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-    timeout_flag, return_code = is_timeout(pr=process, timeout=timeout)
-    out, err = process.communicate()
-    process.wait()
-    process.terminate()  # send sigterm
-    process.kill()  # send sigkill
+    # The outputs go to files, a pipe that is not read blocks the run when it is full
+    with tempfile.TemporaryFile() as stdout_fp, tempfile.TemporaryFile() as stderr_fp:
+        # start_new_session is the same as preexec_fn=os.setsid, but it is safe when the injections run in threads
+        run_start_time = time.monotonic()
+        process = subprocess.Popen(command, env=current_env_vars, shell=True, executable='/bin/bash',
+                                   start_new_session=True, stdout=stdout_fp, stderr=stderr_fp)
+        timeout_flag, return_code = is_timeout(pr=process, timeout=timeout, monitor=monitor)
+        run_time = time.monotonic() - run_start_time
+        if timeout_flag:
+            try:
+                process.wait(timeout=KILL_GRACE_TIME)
+            except subprocess.TimeoutExpired:
+                # The simulator did not stop on SIGINT
+                pass
+        # Whatever the run script left behind is in its own process group
+        kill_process_group(pgid=process.pid)
+        process.wait()
+
+        stdout_fp.seek(0)
+        stderr_fp.seek(0)
+        out, err = stdout_fp.read().decode(errors='ignore'), stderr_fp.read().decode(errors='ignore')
 
     due_type = DUEType.NO_DUE
     if timeout_flag:
         due_type = DUEType.TIMEOUT_ERROR
+    elif monitor is not None and monitor.decision is not None and monitor.decision[0] != EarlyStop.SDC:
+        due_type = DUEType.GENERAL_DUE if monitor.decision[0] == EarlyStop.DUE else DUEType.TIMEOUT_ERROR
     elif err:
         due_type = DUEType.POSSIBLE_GVSOC_CRASH
 
+    if run_times is not None:
+        run_times["run_time"] = run_time
+        run_times["overhead"] = time.monotonic() - start_time - run_time
     return out, err, due_type
 
 
+# Error messages of the simulator and the apps, any of them in the output is a DUE
+RUNNER_HAS_FAILED = "Runner has failed"
+ILLEGAL_INSTRUCTION = "Reached illegal instruction"
+MEMORY_ALLOCATION_FAILED = "Memory allocation failed"
+CLUSTER_OPEN_FAILED = "Cluster open failed"
+INVALID_ACCESS = "Invalid access"
+INVALID_FETCH_REQUEST = "Invalid fetch request"
+UNABLE_TO_INIT_TIME_DRIVER = "Unable to initialize time driver"
+TIMEOUT_ERROR = "TIMEOUT_ERROR"
+UNICODE_ERROR = "UNICODE_ERROR"
+RUNTIME_ERROR = "RUNTIME_ERROR"
+ALL_STD_ERRORS = [TIMEOUT_ERROR, UNICODE_ERROR, RUNTIME_ERROR, INVALID_FETCH_REQUEST,
+                  RUNNER_HAS_FAILED, ILLEGAL_INSTRUCTION,
+                  MEMORY_ALLOCATION_FAILED, CLUSTER_OPEN_FAILED, INVALID_ACCESS, UNABLE_TO_INIT_TIME_DRIVER]
+
+
 # fault model for the campaigns
 # FAULT_MODEL = FaultModel.SINGLE_BIT_FLIP
 FAULT_MODELS = [
@@ -158,6 +433,13 @@ def parse_args():
     parser = argparse.ArgumentParser(prog='GVSoCFI', description='A GVSoC based Fault Injector')
     parser.add_argument('-f', '--fault_site', default=INSTRUCTION_OUTPUT,
                         help=f"Fault site to inject:{POSSIBLE_FAULT_SITES}")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="Number of injections to run at the same time, default parameters.NUM_WORKERS")
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help="Seed of the sampling of the fault sites, default parameters.SAMPLING_SEED")
+    parser.add_argument('--stratify_by', default=None,
+                        help="Profile column used to stratify the sampled fault sites (e.g. label), "
+                             "default parameters.SAMPLING_STRATIFY_BY")
 
     args = parser.parse_args()
 
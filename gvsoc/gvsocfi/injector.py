@@ -1,14 +1,17 @@
 #!/usr/bin/python3
+import concurrent.futures
 import filecmp
 import os.path
 import shutil
-from typing import Union
+from typing import Optional, Union
 
 import parameters
 import pandas as pd
 import numpy as np
 
 import common
+import results_store
+import sampler
 
 PROBLEMS_LOGGING_FILE = "injection.log"
 
@@ -93,16 +96,20 @@ def create_injection_mask(output_register_val: int, output_register_byte_size: i
     return int("".join(base_string), 2), next_offset_double_cell
 
 
-def kill_simulator_after_injection():
-    kill_program_list = ["gapy", "gvsoc_launcher_debug"]
+def kill_simulator_after_injection(injection_info_file: str):
     # The force killing is necessary here
-    for cmd in kill_program_list:
-        os.system(f"pkill -9 -f {cmd} && killall -9 {cmd}")
+    # execute_gvsoc kills the process group of the injection, this kills the simulator processes
+    # that left it. Only the processes of this injection are killed, the others may still be running
+    common.kill_processes_with_env(key="GVSOCFI_INJECTION_IN_FILE", value=injection_info_file)
 
 
 def verify_output(app_logs_path: str, error_code: common.DUEType,
                   injection_log_file: str, stderr_file: str, stdout_file: str,
-                  exec_stdout: Union[str, None], exec_stderr: Union[str, None]):
+                  exec_stdout: Union[str, None], exec_stderr: Union[str, None],
+                  early_stop: Optional[common.EarlyStop] = None):
+    # The run can be stopped before the run script creates its output files
+    for output_file in [stdout_file, stderr_file]:
+        open(output_file, "a").close()
     # Store any message coming from execution function
     if exec_stdout:
         with open(stdout_file, "a") as stdout_fp:
@@ -129,11 +136,16 @@ def verify_output(app_logs_path: str, error_code: common.DUEType,
 
     # Verify correctness
     sdc = not filecmp.cmp(golden_stdout_file, stdout_file, shallow=False)
-    due = not filecmp.cmp(golden_stderr_file, stderr_file, shallow=False)
+    if early_stop == common.EarlyStop.SDC:
+        # The run was stopped after the app finished, the golden stderr written after that point is missing
+        with open(golden_stderr_file, "rb") as golden_fp, open(stderr_file, "rb") as stderr_fp:
+            due = not golden_fp.read().startswith(stderr_fp.read())
+    else:
+        due = not filecmp.cmp(golden_stderr_file, stderr_file, shallow=False)
     outcome = "Masked"
     if sdc:
         outcome = "SDC"
-    if due or error_code == common.DUEType.TIMEOUT_ERROR:
+    if due or error_code in [common.DUEType.TIMEOUT_ERROR, common.DUEType.GENERAL_DUE]:
         due = True
         with open(stderr_file, errors='ignore') as stderr_fp:
             data_from_stderr = stderr_fp.read()
@@ -152,91 +164,181 @@ def verify_output(app_logs_path: str, error_code: common.DUEType,
     return sdc, due, outcome, was_fault_injected
 
 
-def inject_sample_faults_iter_rows(df: pd.DataFrame, app_name: str, app_parameters: dict,
+def run_injection(injection_it: int, injection_logs_path: str, row_dict: dict, inst_label: str,
+                  app_name: str, app_parameters: dict, fault_model: common.FaultModel,
+                  fault_injection_site: str, statistics: common.RunStatistics = None) -> dict:
+    inj_clock = common.Timer()
+    inj_clock.tic()
+    default_app_path = f"{parameters.GVSOCFI_LOGS_DIR}/{app_name}"
+    run_cmd = app_parameters["run_script"]
+    injection_info_file = f"{injection_logs_path}/{parameters.GVSOCFI_INJECTION_IN_FILE}"
+    injection_log_file = f"{injection_logs_path}/{parameters.GVSOCFI_INJECTION_OUT_FILE}"
+    stdout_file = f"{injection_logs_path}/{parameters.DEFAULT_STDOUT_FILE}"
+    stderr_file = f"{injection_logs_path}/{parameters.DEFAULT_STDERR_FILE}"
+    work_dir = f"{injection_logs_path}/{parameters.INJECTION_WORK_DIR}"
+    os.makedirs(work_dir, exist_ok=True)
+
+    # Inject the fault, all the files of the simulation are private to the injection
+    set_environment_vars = [(fault_injection_site, str(common.RunMode.INST_INJECTOR)),
+                            ("GVSOCFI_INJECTION_IN_FILE", injection_info_file),
+                            ("GVSOCFI_INJECTION_OUT_FILE", injection_log_file),
+                            ("GVSOCFI_WORK_DIR", work_dir),
+                            ("STDOUT_FILE", stdout_file),
+                            ("STDERR_FILE", stderr_file)]
+
+    timeout = app_parameters["expected_run_time"] * parameters.TIMEOUT_THRESHOLD
+    monitor = None
+    if parameters.EARLY_EXIT:
+        monitor = common.OutputMonitor(
+            stdout_file=stdout_file, stderr_file=stderr_file,
+            golden_stdout_file=f"{default_app_path}/{parameters.DEFAULT_GOLDEN_STDOUT_FILE}",
+            golden_stderr_file=f"{default_app_path}/{parameters.DEFAULT_GOLDEN_STDERR_FILE}",
+            terminal_markers=app_parameters.get("terminal_markers", parameters.TERMINAL_MARKERS),
+            stall_time=app_parameters["expected_run_time"] * parameters.STALL_THRESHOLD
+        )
+    # default files
+    run_times = dict()
+    exec_stdout, exec_stderr, error_code = common.execute_gvsoc(
+        command=run_cmd,
+        gapuino_source_script=parameters.GAPUINO_SOURCE_SCRIPT,
+        gvsoc_fi_env=set_environment_vars, timeout=timeout, monitor=monitor, run_times=run_times
+    )
+    if statistics is not None:
+        statistics.add(**run_times)
+    # clean the system before continue
+    kill_simulator_after_injection(injection_info_file=injection_info_file)
+    sdc, due, outcome, was_fault_injected = verify_output(
+        app_logs_path=default_app_path,
+        error_code=error_code,
+        injection_log_file=injection_log_file,
+        stdout_file=stdout_file, stderr_file=stderr_file,
+        exec_stdout=exec_stdout, exec_stderr=exec_stderr,
+        early_stop=monitor.decision[0] if monitor is not None and monitor.decision is not None else None
+    )
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    row_dict["SDC"], row_dict["DUE"] = sdc, due
+    row_dict["was_fault_injected"] = was_fault_injected
+    row_dict["error_code"] = str(error_code)
+    row_dict["inst_label"] = inst_label
+    inj_clock.toc()
+    if monitor is not None and monitor.decision is not None:
+        outcome += f" (stopped early, {monitor.decision[1]})"
+    print("Fault num:", injection_it, "Fault Model:", fault_model, "Fault site:", fault_injection_site,
+          "App:", app_name, "Outcome:", outcome, "exec time:", inj_clock,
+          f"harness overhead: {run_times['overhead']:.3f}s")
+    return row_dict
+
+
+def inject_sample_faults_iter_rows(df: Optional[pd.DataFrame], app_name: str, app_parameters: dict,
                                    num_injections_per_run: int, fault_model: common.FaultModel,
-                                   fault_injection_site: str) -> list:
+                                   fault_injection_site: str, num_workers: int = 1,
+                                   store: results_store.ResultsStore = None, sample_rng_state=None) -> list:
     default_app_path = f"{parameters.GVSOCFI_LOGS_DIR}/{app_name}"
     app_logs_path_fault_model_and_site = f"{default_app_path}/{fault_model}_{fault_injection_site}"
 
-    injection_data = list()
-    for injection_it, (index, row) in enumerate(df.iterrows()):
-        inj_clock = common.Timer()
-        inj_clock.tic()
+    # A campaign that was already planned is resumed, only the injections without a result run
+    plan, completed = None, set()
+    if store is not None:
+        plan = store.get_plan(app=app_name, fault_site=fault_injection_site, fault_model=fault_model)
+        completed = store.completed(app=app_name, fault_site=fault_injection_site, fault_model=fault_model)
+    if plan is None:
+        # The masks are created in the order of the rows, so they are the same
+        # as if the injections were executed one after the other
+        mask_rng_state = results_store.legacy_rng_state()
+        plan = [(injection_it, row.to_dict(), create_injection_row_dict(fault_model=fault_model, row=row,
+                                                                        fault_injection_site=fault_injection_site))
+                for injection_it, (index, row) in enumerate(df.iterrows())]
+        if store is not None:
+            store.save_plan(app=app_name, fault_site=fault_injection_site, fault_model=fault_model, plan=plan,
+                            sample_rng_state=sample_rng_state, mask_rng_state=mask_rng_state)
+    elif completed:
+        print("Resuming:", app_name, "Fault Model:", fault_model, "Fault site:", fault_injection_site,
+              "completed injections:", len(completed), "of", len(plan))
+
+    injections = list()
+    for injection_it, row, row_dict in plan:
+        if injection_it in completed:
+            continue
         injection_logs_path = f"{app_logs_path_fault_model_and_site}/inj-{injection_it}"
         # Create/Clean the output path
-        common.execute_command(command=f"mkdir -p {injection_logs_path}")
-        common.execute_command(command=f"rm {injection_logs_path}/*")
+        shutil.rmtree(injection_logs_path, ignore_errors=True)
+        os.makedirs(injection_logs_path)
 
-        # Inject the fault
-        run_cmd = app_parameters["run_script"]
         injection_info_file = f"{injection_logs_path}/{parameters.GVSOCFI_INJECTION_IN_FILE}"
-        injection_log_file = f"{injection_logs_path}/{parameters.GVSOCFI_INJECTION_OUT_FILE}"
-        stdout_file = f"{injection_logs_path}/{parameters.DEFAULT_STDOUT_FILE}"
-        stderr_file = f"{injection_logs_path}/{parameters.DEFAULT_STDERR_FILE}"
-
-        # Profile the application
-        set_environment_vars = [(fault_injection_site, str(common.RunMode.INST_INJECTOR)),
-                                ("GVSOCFI_INJECTION_IN_FILE", injection_info_file),
-                                ("GVSOCFI_INJECTION_OUT_FILE", injection_log_file),
-                                ("STDOUT_FILE", stdout_file),
-                                ("STDERR_FILE", stderr_file)]
-
         row_dict = write_fault_injection_information_file(fault_model=fault_model,
                                                           injection_info_file=injection_info_file,
                                                           num_injections_per_run=num_injections_per_run, row=row,
-                                                          fault_injection_site=fault_injection_site)
-
-        timeout = app_parameters["expected_run_time"] * parameters.TIMEOUT_THRESHOLD
-        # default files
-        exec_stdout, exec_stderr, error_code = common.execute_gvsoc(
-            command=run_cmd,
-            gapuino_source_script=parameters.GAPUINO_SOURCE_SCRIPT,
-            gvsoc_fi_env=set_environment_vars, timeout=timeout
-        )
-        sdc, due, outcome, was_fault_injected = verify_output(
-            app_logs_path=default_app_path,
-            error_code=error_code,
-            injection_log_file=injection_log_file,
-            stdout_file=stdout_file, stderr_file=stderr_file,
-            exec_stdout=exec_stdout, exec_stderr=exec_stderr
-        )
-
-        row_dict["SDC"], row_dict["DUE"] = sdc, due
-        row_dict["was_fault_injected"] = was_fault_injected
-        row_dict["error_code"] = str(error_code)
+                                                          fault_injection_site=fault_injection_site,
+                                                          row_dict=dict(row_dict))
+        inst_label = row["label"] if fault_injection_site == common.INSTRUCTION_OUTPUT else "mem"
+        injections.append((injection_it, injection_logs_path, row_dict, inst_label))
 
-        row_dict["inst_label"] = row["label"] if fault_injection_site == common.INSTRUCTION_OUTPUT else "mem"
-        injection_data.append(row_dict)
-        # clean the system before continue
-        kill_simulator_after_injection()
-        inj_clock.toc()
-        print("Fault num:", injection_it, "Fault Model:", fault_model, "Fault site:", fault_injection_site,
-              "App:", app_name, "Outcome:", outcome, "exec time:", inj_clock)
-    return injection_data
+    # Each simulation is a separate process, the threads only wait for them
+    statistics = common.RunStatistics()
+    clock = common.Timer()
+    clock.tic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = {
+            executor.submit(run_injection, injection_it=injection_it, injection_logs_path=injection_logs_path,
+                            row_dict=row_dict, inst_label=inst_label, app_name=app_name,
+                            app_parameters=app_parameters, fault_model=fault_model,
+                            fault_injection_site=fault_injection_site,
+                            statistics=statistics): (injection_it, injection_logs_path)
+            for injection_it, injection_logs_path, row_dict, inst_label in injections
+        }
+        # Each result is saved as soon as the injection finishes
+        if store is not None:
+            for future in concurrent.futures.as_completed(futures):
+                injection_it, injection_logs_path = futures[future]
+                store.add_result(app=app_name, fault_site=fault_injection_site, fault_model=fault_model,
+                                 injection_it=injection_it, result=future.result(),
+                                 outputs=results_store.read_injection_outputs(injection_logs_path))
+    clock.toc()
+    if statistics.num_runs:
+        print("Injections finished:", app_name, "Fault Model:", fault_model, "Fault site:", fault_injection_site,
+              statistics, f"throughput: {statistics.num_runs / clock.diff_time:.2f} injections/s")
+    if store is not None:
+        return store.results(app=app_name, fault_site=fault_injection_site, fault_model=fault_model)
+    # Same order as the rows
+    return [future.result() for future in futures]
+
+
+def create_injection_row_dict(fault_model: common.FaultModel, row: Union[pd.Series, dict],
+                              fault_injection_site: str) -> dict:
+    # Create the masks of the injection
+    row_dict = dict(fault_model=fault_model)
+    if fault_injection_site in common.INSTRUCTION_OUTPUT:
+        row_dict["gvsoc_fi_mask"], _ = create_injection_mask(output_register_val=row["out_reg0"],
+                                                             output_register_byte_size=row["size"],
+                                                             fault_model=fault_model)
+    elif fault_injection_site == common.MEMORY:
+        row_dict["gvsoc_fi_mask"], row_dict["next_offset_double_cell"] = create_injection_mask(
+            output_register_val=row["mem_data0"],
+            output_register_byte_size=1, fault_model=fault_model, memory_offset=row["offset"],
+            memory_size=row["total_memory_size"]
+        )
+        # row_dict["second_gvsoc_fi_mask"], row_dict["next_offset_double_cell"] = create_injection_mask(
+        #     output_register_val=row["mem_data1"],
+        #     output_register_byte_size=1,
+        #     fault_model=fault_model
+        # )
+    return row_dict
 
 
 def write_fault_injection_information_file(fault_model: common.FaultModel, injection_info_file: str,
-                                           num_injections_per_run: int, row: pd.Series, fault_injection_site: str):
+                                           num_injections_per_run: int, row: Union[pd.Series, dict],
+                                           fault_injection_site: str, row_dict: dict = None):
+    # The masks are created unless they are already in row_dict
+    if row_dict is None:
+        row_dict = create_injection_row_dict(fault_model=fault_model, row=row,
+                                             fault_injection_site=fault_injection_site)
     # Put the contents in the info file
-    row_dict = dict(fault_model=fault_model)
     with open(injection_info_file, "w") as inj_fp:
         if fault_injection_site in common.INSTRUCTION_OUTPUT:
-            row_dict["gvsoc_fi_mask"], _ = create_injection_mask(output_register_val=row["out_reg0"],
-                                                                 output_register_byte_size=row["size"],
-                                                                 fault_model=fault_model)
             lines_to_write = [num_injections_per_run, row["iteration_counter_gvsocfi"], row_dict["gvsoc_fi_mask"],
                               row["out_reg0"], row["cpu_config_mhartid"], row["label"]]
         elif fault_injection_site == common.MEMORY:
-            row_dict["gvsoc_fi_mask"], row_dict["next_offset_double_cell"] = create_injection_mask(
-                output_register_val=row["mem_data0"],
-                output_register_byte_size=1, fault_model=fault_model, memory_offset=row["offset"],
-                memory_size=row["total_memory_size"]
-            )
-            # row_dict["second_gvsoc_fi_mask"], row_dict["next_offset_double_cell"] = create_injection_mask(
-            #     output_register_val=row["mem_data1"],
-            #     output_register_byte_size=1,
-            #     fault_model=fault_model
-            # )
             is_double_cell_upset = 0
             if (fault_model == common.FaultModel.DOUBLE_CELL_FLIP or (
                     fault_model == common.FaultModel.MEMORY_CELL_BASED_ON_BEAM
@@ -256,10 +358,17 @@ def write_fault_injection_information_file(fault_model: common.FaultModel, injec
 def main():
     args = common.parse_args()
     fault_injection_site = args.fault_site
+    num_workers = args.jobs if args.jobs else parameters.NUM_WORKERS
     fault_models = [common.FaultModel.INSTRUCTION_OUTPUT_95PCT_SINGLE]
     if fault_injection_site == common.MEMORY:
         fault_models = [common.FaultModel.MEMORY_CELL_BASED_ON_BEAM]
 
+    seed = args.seed if args.seed is not None else parameters.SAMPLING_SEED
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    stratify_by = args.stratify_by if args.stratify_by else parameters.SAMPLING_STRATIFY_BY
+    print("Sampling seed:", seed, "Stratified by:", stratify_by)
+
     clock = common.Timer()
     clock.tic()
     # Profiling all the apps on parameters.apps_parameters
@@ -269,26 +378,19 @@ def main():
         profile_app_file = app_logs_path
         profile_app_file += "/" + parameters.PROFILER_FILE.format(injection_site=fault_injection_site)
         profiler_fields = parameters.PROFILER_FIELDS_MEM_INJECTION
+        row_filter = None
         if fault_injection_site == common.INSTRUCTION_OUTPUT:
             profiler_fields = parameters.PROFILER_FIELDS_INST_INJECTION
-        profile_df = pd.read_csv(profile_app_file, sep=";", names=profiler_fields, index_col=False)
+            # Remove the instructions that do not have output
+            # Select instructions that have only one output register
+            # TODO: Add fault injection for more than one output register
+            row_filter = lambda chunk: chunk[chunk["nb_out_reg"] == 1]
 
         # Create the path if it was not created yet
         # injection_logs_path = f"{app_logs_path}/{parameters.APP_INJECTION_FOLDER_BASE}"
         common.execute_command(command=f"mkdir -p {app_logs_path}/")
 
-        # Remove the instructions that do not have output
-        # Select instructions that have only one output register
-        if fault_injection_site == common.INSTRUCTION_OUTPUT:
-            # TODO: Add fault injection for more than one output register
-            profile_df = profile_df[profile_df["nb_out_reg"] == 1]
-
-        random_generator = np.random.MT19937()
-        # Set the number of injections, if the NUM_INJECTIONS < profile rows then allow repetitions of inj sites
-        assert parameters.NUM_INJECTIONS <= profile_df.shape[0], (f"NUM_INJECTIONS must be lower or equal"
-                                                                  f" profiled instructions:"
-                                                                  f" {parameters.NUM_INJECTIONS} > "
-                                                                  f"{profile_df.shape[0]}")
+        random_generator = np.random.Generator(np.random.MT19937(seed))
 
         # Get the golden values, save them for future analysis
         common.execute_gvsoc(command=app_parameters["run_script"],
@@ -297,9 +399,17 @@ def main():
                                            ("STDERR_FILE", f"{app_logs_path}/{parameters.DEFAULT_GOLDEN_STDERR_FILE}")])
         # Inject sampled faults for each fault model
         final_data_list = list()
+        store = results_store.ResultsStore(db_path=f"{app_logs_path}/{parameters.RESULTS_DATABASE}")
         for fault_model in fault_models:
-            sampled_faults_df = profile_df.sample(n=parameters.NUM_INJECTIONS, random_state=random_generator,
-                                                  replace=False, ignore_index=True)
+            # The sampling is done once, a campaign that was already planned is resumed
+            sampled_faults_df, sample_rng_state = None, None
+            if not store.has_plan(app=app_name, fault_site=fault_injection_site, fault_model=fault_model):
+                sample_rng_state = dict(seed=seed, stratify_by=stratify_by, **random_generator.bit_generator.state)
+                # The profile does not fit in memory, it is sampled in one pass
+                sampled_faults_df = sampler.sample_profile(profile_file=profile_app_file, fields=profiler_fields,
+                                                           num_samples=parameters.NUM_INJECTIONS,
+                                                           random_generator=random_generator, row_filter=row_filter,
+                                                           stratify_by=stratify_by)
 
             # profile_df = profile_df.apply(inject_sample_faults, args=(app_name, app_parameters), axis="columns")
             num_injections_per_run = 1  # 2 if common.FaultModel.DOUBLE_BIT_FLIP_2REG else 1
@@ -307,8 +417,11 @@ def main():
                                                           app_parameters=app_parameters,
                                                           num_injections_per_run=num_injections_per_run,
                                                           fault_model=fault_model,
-                                                          fault_injection_site=fault_injection_site)
+                                                          fault_injection_site=fault_injection_site,
+                                                          num_workers=num_workers, store=store,
+                                                          sample_rng_state=sample_rng_state)
             final_data_list.extend(fi_data_list)
+        store.close()
 
         # Save the results
         final_injection_data_path = parameters.FINAL_INJECTION_DATA.format(fault_num=parameters.NUM_INJECTIONS,
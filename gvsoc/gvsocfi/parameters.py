@@ -76,12 +76,38 @@ APP_PARAMETERS = {
 # Num of injections simulations that will execute
 NUM_INJECTIONS = 10000
 
+# Num of injections that run at the same time, can be changed with --jobs
+# Each injection runs gapy with its own work dir (GVSOCFI_WORK_DIR), the run scripts must use it
+NUM_WORKERS = os.cpu_count()
+
+# Name of the private gapy work dir inside each injection log dir
+INJECTION_WORK_DIR = "work"
+
+# Seed of the sampling of the profiled sites, can be changed with --seed. None draws a new seed every campaign
+SAMPLING_SEED = None
+
+# Column of the profile used to stratify the sample (e.g. "label"), can be changed with --stratify_by
+# None draws a uniform sample
+SAMPLING_STRATIFY_BY = None
+
+# Rows of the profile file read at a time by the sampler
+PROFILER_CHUNK_SIZE = 1000000
+
 VERBOSE = False
 
 # Timeout threshold to verify if the app get stuck (it will multiply by expected_run_time
 # the timeout will be calculated by expected_run_time * TIMEOUT_THRESHOLD
 TIMEOUT_THRESHOLD = 3
 
+# Stop an injection as soon as its outcome is known: a crash message in the output, the output diverged
+# from the golden one and the app printed one of its terminal markers, or neither output nor CPU time
+# used by the run for expected_run_time * STALL_THRESHOLD seconds. A run that is only slow keeps
+# using CPU time, so it is stopped by the timeout at the latest
+EARLY_EXIT = True
+STALL_THRESHOLD = 2
+# Lines printed by the apps when they finish, they can be changed with "terminal_markers" on APP_PARAMETERS
+TERMINAL_MARKERS = ["Test success", "Test failed"]
+
 # TODO: check if this is better to set manually outside of the script
 
 # Base root dir
@@ -113,6 +139,8 @@ PROFILER_FIELDS_MEM_INJECTION = [
 GVSOCFI_INJECTION_IN_FILE = "gvsocfi-injection-in.txt"
 GVSOCFI_INJECTION_OUT_FILE = "gvsocfi-injection-out.txt"
 FINAL_INJECTION_DATA = "gvsocfi-injection-data-results-{fault_num}_{fault_site}.csv"
+# Every injection is saved in this database as soon as it finishes, it is used to resume the campaigns
+RESULTS_DATABASE = "gvsocfi-injection-results.sqlite"
 # APP_INJECTION_FOLDER_BASE = "injection-logs"
 
 # Default stdout and stderr files
@@ -8,7 +8,11 @@ sys.path.insert(0, '../')
 
 import common
 import parameters
+import results_store
 import pandas as pd
+from common import (RUNNER_HAS_FAILED, ILLEGAL_INSTRUCTION, MEMORY_ALLOCATION_FAILED, CLUSTER_OPEN_FAILED,
+                    INVALID_ACCESS, INVALID_FETCH_REQUEST, UNABLE_TO_INIT_TIME_DRIVER, TIMEOUT_ERROR, UNICODE_ERROR,
+                    RUNTIME_ERROR, ALL_STD_ERRORS)
 
 MASKED, SINGLE, LINE, SQUARE, RANDOM = "MASKED", "SINGLE", "LINE", "SQUARE", "RANDOM"
 CNN_MATRIX_SIZE = {
@@ -17,20 +21,6 @@ CNN_MATRIX_SIZE = {
     "maxpoolparallel": (int(112 / 2), int(112 / 2)), "maxpoolsequential": (int(112 / 2), int(112 / 2))
 }
 
-RUNNER_HAS_FAILED = "Runner has failed"
-ILLEGAL_INSTRUCTION = "Reached illegal instruction"
-MEMORY_ALLOCATION_FAILED = "Memory allocation failed"
-CLUSTER_OPEN_FAILED = "Cluster open failed"
-INVALID_ACCESS = "Invalid access"
-INVALID_FETCH_REQUEST = "Invalid fetch request"
-UNABLE_TO_INIT_TIME_DRIVER = "Unable to initialize time driver"
-TIMEOUT_ERROR = "TIMEOUT_ERROR"
-UNICODE_ERROR = "UNICODE_ERROR"
-RUNTIME_ERROR = "RUNTIME_ERROR"
-ALL_STD_ERRORS = [TIMEOUT_ERROR, UNICODE_ERROR, RUNTIME_ERROR, INVALID_FETCH_REQUEST,
-                  RUNNER_HAS_FAILED, ILLEGAL_INSTRUCTION,
-                  MEMORY_ALLOCATION_FAILED, CLUSTER_OPEN_FAILED, INVALID_ACCESS, UNABLE_TO_INIT_TIME_DRIVER]
-
 
 def check_gvsocfi_error_messages(stderr_lines: list):
     gvsoc_fi_error = False
@@ -72,28 +62,33 @@ def get_next_element(input_list: list):
     return input_list[idx + 1]
 
 
-def read_outputs(injection_log_path: str):
-    stdout_path = os.path.join(injection_log_path, "stdout.txt")
-    with open(stdout_path, errors='ignore') as stdout_fp:
-        stdout_lines = stdout_fp.readlines()
-    stderr_path = os.path.join(injection_log_path, "stderr.txt")
-    with open(stderr_path) as stderr_fp:
-        stderr_lines = stderr_fp.readlines()
+def read_outputs(outputs: dict):
+    stdout_lines = (outputs["stdout"] or "").splitlines(keepends=True)
+    stderr_lines = (outputs["stderr"] or "").splitlines(keepends=True)
     return stderr_lines, stdout_lines
 
 
-def parse_mnist(injection_log_path: str, fi_data: dict):
-    stderr_lines, stdout_lines = read_outputs(injection_log_path=injection_log_path)
+def load_outputs(injection_log_path: str, store: results_store.ResultsStore, app_name: str, fault_site: str,
+                 fault_model: common.FaultModel, inj_it: int) -> dict:
+    # The outputs are saved in the results store, the log dir is only read for the campaigns without it
+    outputs = None
+    if store is not None:
+        outputs = store.outputs(app=app_name, fault_site=fault_site, fault_model=fault_model, injection_it=inj_it)
+    if outputs is None:
+        outputs = results_store.read_injection_outputs(injection_logs_path=injection_log_path)
+    return outputs
+
+
+def parse_mnist(injection_log_path: str, outputs: dict, fi_data: dict):
+    stderr_lines, stdout_lines = read_outputs(outputs=outputs)
 
     # Search for the layer injection
-    stdout_save_path = os.path.join(injection_log_path, "stdout_save.txt")
     layer_inj_possible_strings = ["1C0", "1M0", "1C1", "1M1", "2C0", "2M0", "3L0", "3R0", "FAULT_INJECTED_HERE"]
     layer_injections = list()
-    if os.path.isfile(stdout_save_path):
-        with open(stdout_save_path, errors='ignore') as stdout_save_fp:
-            for line in stdout_save_fp.readlines():
-                if any([j in line for j in layer_inj_possible_strings]):
-                    layer_injections.append(line.strip())
+    if outputs["stdout_save"] is not None:
+        for line in outputs["stdout_save"].splitlines():
+            if any([j in line for j in layer_inj_possible_strings]):
+                layer_injections.append(line.strip())
 
     injected_layer = get_next_element(input_list=layer_injections)
 
@@ -121,9 +116,8 @@ def parse_mnist(injection_log_path: str, fi_data: dict):
 
     gvsoc_fi_error, gvsoc_crash = check_gvsocfi_error_messages(stderr_lines=stderr_lines)
 
-    gvsocfi_output_log_file = os.path.join(injection_log_path, "gvsocfi-injection-out.txt")
     was_fault_injected = False
-    if gvsoc_fi_error is False and gvsoc_crash is False and os.path.isfile(gvsocfi_output_log_file):
+    if gvsoc_fi_error is False and gvsoc_crash is False and outputs["injection_log"] is not None:
         was_fault_injected = True
 
     due, due_type, crash_str = get_default_due_cases(full_output_lines=stdout_lines + stderr_lines)
@@ -227,8 +221,8 @@ def geometry_comparison(diff):
     return error_format
 
 
-def parse_errors_cnn(injection_log_path: str, cnn_op: str, fi_data: pd.Series):
-    stderr_lines, stdout_lines = read_outputs(injection_log_path=injection_log_path)
+def parse_errors_cnn(outputs: dict, cnn_op: str, fi_data: pd.Series):
+    stderr_lines, stdout_lines = read_outputs(outputs=outputs)
 
     cnn_op_size = CNN_MATRIX_SIZE[cnn_op]
     diff_matrix = np.zeros(cnn_op_size)
@@ -236,9 +230,8 @@ def parse_errors_cnn(injection_log_path: str, cnn_op: str, fi_data: pd.Series):
     log_lines = stdout_lines + stderr_lines
     gvsoc_fi_error, gvsoc_crash = check_gvsocfi_error_messages(stderr_lines=stderr_lines)
 
-    gvsocfi_output_log_file = os.path.join(injection_log_path, "gvsocfi-injection-out.txt")
     was_fault_injected = False
-    if gvsoc_fi_error is False and gvsoc_crash is False and os.path.isfile(gvsocfi_output_log_file):
+    if gvsoc_fi_error is False and gvsoc_crash is False and outputs["injection_log"] is not None:
         was_fault_injected = True
 
     due, due_type, crash_str = get_default_due_cases(full_output_lines=stdout_lines + stderr_lines)
@@ -287,15 +280,17 @@ def parse_errors_cnn(injection_log_path: str, cnn_op: str, fi_data: pd.Series):
 
 
 def parse_injected_fault(df: pd.DataFrame, app_name: str, app_logs_path: str, fault_model: common.FaultModel,
-                         fault_site: str):
+                         fault_site: str, store: results_store.ResultsStore = None):
     series_list = list()
     for inj_it, row in df.iterrows():
         injection_log_path = os.path.join(app_logs_path, f"{fault_model}_{fault_site}", f"inj-{inj_it}")
+        outputs = load_outputs(injection_log_path=injection_log_path, store=store, app_name=app_name,
+                               fault_site=fault_site, fault_model=fault_model, inj_it=inj_it)
         fi_data = row.to_dict()
         if app_name == "Mnist":
-            new_row = parse_mnist(injection_log_path=injection_log_path, fi_data=fi_data)
+            new_row = parse_mnist(injection_log_path=injection_log_path, outputs=outputs, fi_data=fi_data)
         elif app_name in CNN_MATRIX_SIZE:
-            new_row = parse_errors_cnn(injection_log_path=injection_log_path, cnn_op=app_name, fi_data=fi_data)
+            new_row = parse_errors_cnn(outputs=outputs, cnn_op=app_name, fi_data=fi_data)
         else:
             raise ValueError(f"Invalid app name:{app_name}")
 
@@ -322,18 +317,30 @@ def main():
                 f"{app_logs_path}/"
                 f"{parameters.FINAL_INJECTION_DATA.format(fault_num=parameters.NUM_INJECTIONS, fault_site=fault_site)}"
             )
-            fault_injection_df = pd.read_csv(injection_data_path, sep=";", index_col=False)
-            fault_injection_df["fault_site"] = fault_site
-            fault_injection_df["benchmark"] = app_name
+            results_database_path = f"{app_logs_path}/{parameters.RESULTS_DATABASE}"
+            store = None
+            if os.path.isfile(results_database_path):
+                store = results_store.ResultsStore(db_path=results_database_path)
+            else:
+                fault_injection_df = pd.read_csv(injection_data_path, sep=";", index_col=False)
 
             for fault_model in fault_models:
                 print("Parsing code:", app_name, "Fault model:", fault_model, "Fault site:", fault_site)
-                fault_model_df = fault_injection_df[fault_injection_df["fault_model"] == fault_model].reset_index(
-                    drop=True)
+                if store is not None:
+                    # The completed injections of the campaign, indexed by their injection number
+                    fault_model_df = store.results_df(app=app_name, fault_site=fault_site,
+                                                      fault_model=fault_model).set_index("injection_it")
+                else:
+                    fault_model_df = fault_injection_df[fault_injection_df["fault_model"] == fault_model].reset_index(
+                        drop=True)
+                fault_model_df["fault_site"] = fault_site
+                fault_model_df["benchmark"] = app_name
                 # Parse injected faults
                 fault_model_df = parse_injected_fault(df=fault_model_df, app_name=app_name, app_logs_path=app_logs_path,
-                                                      fault_model=fault_model, fault_site=fault_site)
+                                                      fault_model=fault_model, fault_site=fault_site, store=store)
                 final_csv.append(fault_model_df)
+            if store is not None:
+                store.close()
     clock.toc()
     # Save the results
     final_injection_data_path = f"data/gvsocfi_parsed_fi_database_{parameters.NUM_INJECTIONS}_mnist.csv"
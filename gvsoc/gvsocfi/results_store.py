@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+import json
+import os
+import sqlite3
+import time
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+import common
+import parameters
+
+# An injection is stored in two steps:
+# - the plan: the sampled site and the mask written to the injection file, saved for all the
+#   injections of a campaign before they run, with the state of the random generators that made them
+# - the result: the outcome of the run and its outputs, saved as soon as the injection finishes
+# A campaign that stops is resumed from its plan by running only the injections without a result
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    app TEXT NOT NULL, fault_site TEXT NOT NULL, fault_model TEXT NOT NULL,
+    num_injections INTEGER NOT NULL, sample_rng_state TEXT, mask_rng_state TEXT, created REAL NOT NULL,
+    PRIMARY KEY (app, fault_site, fault_model)
+);
+CREATE TABLE IF NOT EXISTS injections (
+    app TEXT NOT NULL, fault_site TEXT NOT NULL, fault_model TEXT NOT NULL, injection_it INTEGER NOT NULL,
+    site TEXT NOT NULL, injection TEXT NOT NULL,
+    PRIMARY KEY (app, fault_site, fault_model, injection_it)
+);
+CREATE TABLE IF NOT EXISTS results (
+    app TEXT NOT NULL, fault_site TEXT NOT NULL, fault_model TEXT NOT NULL, injection_it INTEGER NOT NULL,
+    result TEXT NOT NULL, stdout TEXT, stdout_save TEXT, stderr TEXT, injection_log TEXT, completed REAL NOT NULL,
+    PRIMARY KEY (app, fault_site, fault_model, injection_it)
+);
+"""
+
+
+def to_json(value) -> str:
+    def default(obj):
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return str(obj)
+
+    return json.dumps(value, default=default)
+
+
+def legacy_rng_state() -> list:
+    """ State of the numpy global generator that creates the injection masks """
+    name, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    return [name, keys.tolist(), pos, has_gauss, cached_gaussian]
+
+
+def read_injection_outputs(injection_logs_path: str) -> dict:
+    """ Outputs of an injection that the parsers use """
+    outputs = dict()
+    for key, file_name in [("stdout", parameters.DEFAULT_STDOUT_FILE), ("stdout_save", "stdout_save.txt"),
+                           ("stderr", parameters.DEFAULT_STDERR_FILE),
+                           ("injection_log", parameters.GVSOCFI_INJECTION_OUT_FILE)]:
+        file_path = f"{injection_logs_path}/{file_name}"
+        outputs[key] = None
+        if os.path.isfile(file_path):
+            with open(file_path, errors='ignore') as fp:
+                outputs[key] = fp.read()
+    return outputs
+
+
+class ResultsStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        # The WAL journal makes each result durable without rewriting the database
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def get_plan(self, app: str, fault_site: str, fault_model: Union[str, common.FaultModel]) -> Optional[list]:
+        """ The (injection_it, site, injection) of a campaign in order or None if it was not planned """
+        cursor = self.connection.execute(
+            "SELECT injection_it, site, injection FROM injections "
+            "WHERE app = ? AND fault_site = ? AND fault_model = ? ORDER BY injection_it",
+            (app, fault_site, str(fault_model)))
+        plan = [(injection_it, json.loads(site), json.loads(injection)) for injection_it, site, injection in cursor]
+        return plan if plan else None
+
+    def has_plan(self, app: str, fault_site: str, fault_model: Union[str, common.FaultModel]) -> bool:
+        cursor = self.connection.execute(
+            "SELECT 1 FROM campaigns WHERE app = ? AND fault_site = ? AND fault_model = ?",
+            (app, fault_site, str(fault_model)))
+        return cursor.fetchone() is not None
+
+    def save_plan(self, app: str, fault_site: str, fault_model: Union[str, common.FaultModel], plan: list,
+                  sample_rng_state=None, mask_rng_state=None):
+        """ Save the (injection_it, site, injection) of all the injections of a campaign """
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO campaigns VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (app, fault_site, str(fault_model), len(plan), to_json(sample_rng_state), to_json(mask_rng_state),
+                 time.time()))
+            self.connection.executemany(
+                "INSERT INTO injections VALUES (?, ?, ?, ?, ?, ?)",
+                [(app, fault_site, str(fault_model), injection_it, to_json(site), to_json(injection))
+                 for injection_it, site, injection in plan])
+
+    def completed(self, app: str, fault_site: str, fault_model: Union[str, common.FaultModel]) -> set:
+        cursor = self.connection.execute(
+            "SELECT injection_it FROM results WHERE app = ? AND fault_site = ? AND fault_model = ?",
+            (app, fault_site, str(fault_model)))
+        return {injection_it for injection_it, in cursor}
+
+    def add_result(self, app: str, fault_site: str, fault_model: Union[str, common.FaultModel], injection_it: int,
+                   result: dict, outputs: dict = None):
+        outputs = outputs if outputs else dict()
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (app, fault_site, str(fault_model), injection_it, to_json(result), outputs.get("stdout"),
+                 outputs.get("stdout_save"), outputs.get("stderr"), outputs.get("injection_log"), time.time()))
+
+    def results(self, app: str, fault_site: str, fault_model: Union[str, common.FaultModel] = None) -> list:
+        """ The result rows of the completed injections in order """
+        query = "SELECT result FROM results WHERE app = ? AND fault_site = ?"
+        args = (app, fault_site)
+        if fault_model is not None:
+            query += " AND fault_model = ?"
+            args += (str(fault_model),)
+        cursor = self.connection.execute(query + " ORDER BY fault_model, injection_it", args)
+        return [json.loads(result) for result, in cursor]
+
+    def results_df(self, app: str, fault_site: str,
+                   fault_model: Union[str, common.FaultModel] = None) -> pd.DataFrame:
+        """ Same data as the FINAL_INJECTION_DATA csv of the campaign plus the injection_it """
+        query = "SELECT injection_it, result FROM results WHERE app = ? AND fault_site = ?"
+        args = (app, fault_site)
+        if fault_model is not None:
+            query += " AND fault_model = ?"
+            args += (str(fault_model),)
+        cursor = self.connection.execute(query + " ORDER BY fault_model, injection_it", args)
+        return pd.DataFrame([{**json.loads(result), "injection_it": injection_it} for injection_it, result in cursor])
+
+    def outputs(self, app: str, fault_site: str, fault_model: Union[str, common.FaultModel],
+                injection_it: int) -> Optional[dict]:
+        cursor = self.connection.execute(
+            "SELECT stdout, stdout_save, stderr, injection_log FROM results "
+            "WHERE app = ? AND fault_site = ? AND fault_model = ? AND injection_it = ?",
+            (app, fault_site, str(fault_model), injection_it))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip(["stdout", "stdout_save", "stderr", "injection_log"], row))
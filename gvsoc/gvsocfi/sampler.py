@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+import parameters
+
+# The profile files of the real workloads do not fit in memory, so they are sampled in one pass over chunks.
+# Each row gets a uniform random key and the rows with the smallest keys are kept, which is a uniform
+# sample without replacement. The keys are drawn in the order of the rows, so the sample depends only on
+# the seed and not on the chunk size.
+# When the sample is stratified, the smallest keys of each stratum are kept and the sample size of each
+# stratum is proportional to its number of rows.
+
+
+class ProfileSampler:
+    def __init__(self, num_samples: int, random_generator: np.random.Generator, stratify_by: Optional[str] = None):
+        self.num_samples = num_samples
+        self.random_generator = random_generator
+        self.stratify_by = stratify_by
+        self.num_rows = 0
+        # stratum -> (keys, rows)
+        self.reservoirs = dict()
+        self.stratum_sizes = dict()
+
+    def __keep_smallest(self, stratum, keys: np.ndarray, rows: pd.DataFrame):
+        reservoir_keys, reservoir_rows = self.reservoirs.get(stratum, (np.empty(0), None))
+        if reservoir_rows is not None:
+            # Only the rows that can enter the reservoir are copied
+            if reservoir_keys.size == self.num_samples:
+                is_smaller = keys < reservoir_keys.max()
+                keys, rows = keys[is_smaller], rows[is_smaller]
+            keys = np.concatenate([reservoir_keys, keys])
+            rows = pd.concat([reservoir_rows, rows], ignore_index=True)
+        if keys.size > self.num_samples:
+            smallest = np.argpartition(keys, self.num_samples)[:self.num_samples]
+            keys, rows = keys[smallest], rows.iloc[smallest]
+        self.reservoirs[stratum] = (keys, rows.reset_index(drop=True))
+
+    def add(self, chunk: pd.DataFrame):
+        keys = self.random_generator.random(chunk.shape[0])
+        self.num_rows += chunk.shape[0]
+        if self.stratify_by is None:
+            self.__keep_smallest(stratum=None, keys=keys, rows=chunk)
+            return
+        for stratum, stratum_index in chunk.groupby(self.stratify_by, sort=False, dropna=False).indices.items():
+            self.stratum_sizes[stratum] = self.stratum_sizes.get(stratum, 0) + stratum_index.size
+            self.__keep_smallest(stratum=stratum, keys=keys[stratum_index], rows=chunk.iloc[stratum_index])
+
+    def __stratum_samples(self) -> dict:
+        # Proportional allocation, the samples left by the rounding go to the largest remainders
+        strata = list(self.stratum_sizes.keys())
+        sizes = np.array([self.stratum_sizes[stratum] for stratum in strata])
+        quotas = sizes * self.num_samples / self.num_rows
+        samples = np.floor(quotas).astype(int)
+        for i in np.argsort(-(quotas - samples), kind="stable")[:self.num_samples - samples.sum()]:
+            samples[i] += 1
+        return dict(zip(strata, samples))
+
+    def sample(self) -> pd.DataFrame:
+        """ The sampled rows in random order """
+        assert self.num_samples <= self.num_rows, (f"NUM_INJECTIONS must be lower or equal profiled instructions:"
+                                                   f" {self.num_samples} > {self.num_rows}")
+        stratum_samples = {None: self.num_samples}
+        if self.stratify_by is not None:
+            stratum_samples = self.__stratum_samples()
+        all_keys, all_rows = list(), list()
+        for stratum, num_samples in stratum_samples.items():
+            keys, rows = self.reservoirs[stratum]
+            smallest = np.argsort(keys, kind="stable")[:num_samples]
+            all_keys.append(keys[smallest])
+            all_rows.append(rows.iloc[smallest])
+        order = np.argsort(np.concatenate(all_keys), kind="stable")
+        return pd.concat(all_rows, ignore_index=True).iloc[order].reset_index(drop=True)
+
+
+def sample_profile(profile_file: str, fields: list, num_samples: int, random_generator: np.random.Generator,
+                   row_filter: Callable[[pd.DataFrame], pd.DataFrame] = None, stratify_by: Optional[str] = None,
+                   chunk_size: int = parameters.PROFILER_CHUNK_SIZE) -> pd.DataFrame:
+    """ Sample num_samples rows of the profile file that pass row_filter, reading chunk_size rows at a time """
+    sampler = ProfileSampler(num_samples=num_samples, random_generator=random_generator, stratify_by=stratify_by)
+    with pd.read_csv(profile_file, sep=";", names=fields, index_col=False, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            if row_filter is not None:
+                chunk = row_filter(chunk)
+            sampler.add(chunk=chunk)
+    return sampler.sample()
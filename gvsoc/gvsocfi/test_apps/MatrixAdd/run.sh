@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # Command necessary to run the application from GAPY
-gapy --target=gapuino_v2 --platform=gvsoc --work-dir=/home/fernando/git_research/gap_sdk/examples/autotiler/MatrixAdd/BUILD/GAP8_V2/GCC_RISCV_PULPOS \
+gapy --target=gapuino_v2 --platform=gvsoc --work-dir="${GVSOCFI_WORK_DIR:-/home/fernando/git_research/gap_sdk/examples/autotiler/MatrixAdd/BUILD/GAP8_V2/GCC_RISCV_PULPOS}" \
   --config-opt=**/runner/boot/mode=flash run --exec-prepare \
   --exec --binary=/home/fernando/git_research/gap_sdk/examples/autotiler/MatrixAdd/BUILD/GAP8_V2/GCC_RISCV_PULPOS/MatrixAdd >"${STDOUT_FILE}" 2>"${STDERR_FILE}"
 
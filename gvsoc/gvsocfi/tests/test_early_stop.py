@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+import common
+import injector
+import parameters
+
+GOLDEN_STDOUT = "start\nresult 0\nTest success with 0 error(s) !\n"
+# The simulator writes to stderr when the app starts and after it finishes
+GOLDEN_STDERR = "simulator started\nsimulator finished\n"
+
+# Fake run script, the injected run prints a wrong result, the terminal marker and then hangs
+# before the simulator writes the rest of its stderr
+RUN_SCRIPT = """#!/bin/bash
+{
+echo "simulator started" >&2
+echo start
+if [ -n "$GVSOCFI_INJECTION_IN_FILE" ]; then
+    echo FAULT_INJECTED_HERE
+    echo injected > "$GVSOCFI_INJECTION_OUT_FILE"
+    echo "result 1"
+    echo "Test failed with 1 error(s) !"
+    sleep 20
+else
+    echo "result 0"
+    echo "Test success with 0 error(s) !"
+fi
+echo "simulator finished" >&2
+} > "$STDOUT_FILE" 2> "$STDERR_FILE"
+"""
+
+
+# Fake run script of a run whose fault is masked, it prints nothing while {wait} runs
+QUIET_RUN_SCRIPT = """#!/bin/bash
+{{
+echo "simulator started" >&2
+echo start
+echo FAULT_INJECTED_HERE
+echo injected > "$GVSOCFI_INJECTION_OUT_FILE"
+{wait}
+echo "result 0"
+echo "Test success with 0 error(s) !"
+echo "simulator finished" >&2
+}} > "$STDOUT_FILE" 2> "$STDERR_FILE"
+"""
+
+
+def make_app(tmp_path, monkeypatch, run_script_text=RUN_SCRIPT):
+    run_script = tmp_path / "run.sh"
+    run_script.write_text(run_script_text)
+    run_script.chmod(0o755)
+    source_script = tmp_path / "env.sh"
+    source_script.write_text("export GVSOCFI_TEST=1\n")
+    monkeypatch.setattr(parameters, "GVSOCFI_LOGS_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(parameters, "GAPUINO_SOURCE_SCRIPT", str(source_script))
+    monkeypatch.setattr(parameters, "EARLY_EXIT", True)
+    app_logs_path = tmp_path / "logs" / "App"
+    app_logs_path.mkdir(parents=True)
+    (app_logs_path / parameters.DEFAULT_GOLDEN_STDOUT_FILE).write_text(GOLDEN_STDOUT)
+    (app_logs_path / parameters.DEFAULT_GOLDEN_STDERR_FILE).write_text(GOLDEN_STDERR)
+    injection_logs_path = app_logs_path / "inj-0"
+    injection_logs_path.mkdir()
+    (injection_logs_path / parameters.GVSOCFI_INJECTION_IN_FILE).write_text("1\n0\n1\n0\n0\nadd")
+    return {"run_script": str(run_script), "expected_run_time": 5}, str(injection_logs_path)
+
+
+def test_golden_stderr_after_terminal_marker(tmp_path, monkeypatch):
+    app_parameters, injection_logs_path = make_app(tmp_path, monkeypatch)
+    timer = common.Timer()
+    timer.tic()
+    row_dict = injector.run_injection(injection_it=0, injection_logs_path=injection_logs_path, row_dict=dict(),
+                                      inst_label="add", app_name="App", app_parameters=app_parameters,
+                                      fault_model=common.FaultModel.INSTRUCTION_OUTPUT_95PCT_SINGLE,
+                                      fault_injection_site=common.INSTRUCTION_OUTPUT)
+    timer.toc()
+    # Stopped before the timeout, the stderr that is missing after the marker is not a DUE
+    assert timer.diff_time < app_parameters["expected_run_time"] * parameters.TIMEOUT_THRESHOLD
+    assert row_dict["SDC"]
+    assert not row_dict["DUE"]
+    assert row_dict["error_code"] == str(common.DUEType.NO_DUE)
+
+
+def test_different_stderr_before_terminal_marker(tmp_path, monkeypatch):
+    app_parameters, injection_logs_path = make_app(tmp_path, monkeypatch)
+    golden_stderr_file = tmp_path / "logs" / "App" / parameters.DEFAULT_GOLDEN_STDERR_FILE
+    golden_stderr_file.write_text("other message\n" + GOLDEN_STDERR)
+    row_dict = injector.run_injection(injection_it=0, injection_logs_path=injection_logs_path, row_dict=dict(),
+                                      inst_label="add", app_name="App", app_parameters=app_parameters,
+                                      fault_model=common.FaultModel.INSTRUCTION_OUTPUT_95PCT_SINGLE,
+                                      fault_injection_site=common.INSTRUCTION_OUTPUT)
+    assert row_dict["SDC"]
+    assert row_dict["DUE"]
+
+
+def run_quiet_injection(tmp_path, monkeypatch, wait):
+    app_parameters, injection_logs_path = make_app(tmp_path, monkeypatch, QUIET_RUN_SCRIPT.format(wait=wait))
+    app_parameters["expected_run_time"] = 1
+    monkeypatch.setattr(parameters, "STALL_THRESHOLD", 1)
+    monkeypatch.setattr(parameters, "TIMEOUT_THRESHOLD", 6)
+    timer = common.Timer()
+    timer.tic()
+    row_dict = injector.run_injection(injection_it=0, injection_logs_path=injection_logs_path, row_dict=dict(),
+                                      inst_label="add", app_name="App", app_parameters=app_parameters,
+                                      fault_model=common.FaultModel.INSTRUCTION_OUTPUT_95PCT_SINGLE,
+                                      fault_injection_site=common.INSTRUCTION_OUTPUT)
+    timer.toc()
+    return row_dict, timer.diff_time
+
+
+def test_slow_run_is_not_a_timeout(tmp_path, monkeypatch):
+    # Computes without printing for longer than the stall time but less than the timeout
+    row_dict, _ = run_quiet_injection(tmp_path, monkeypatch, "timeout 3 bash -c 'while :; do :; done'")
+    assert not row_dict["SDC"]
+    assert not row_dict["DUE"]
+    assert row_dict["error_code"] == str(common.DUEType.NO_DUE)
+
+
+def test_stalled_run_is_stopped_early(tmp_path, monkeypatch):
+    row_dict, run_time = run_quiet_injection(tmp_path, monkeypatch, "sleep 20")
+    assert run_time < 6
+    assert row_dict["DUE"]
+    assert row_dict["error_code"] == str(common.DUEType.TIMEOUT_ERROR)
@@ -0,0 +1,245 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Cache of the activations of repeated graph executions
+
+Searches such as auto compression execute the graph on the same inputs many
+times changing the weights or quantization of one node at a time. An
+ActivationCache keeps the outputs of each step keyed on the input sample, a
+fingerprint of the node and its quantization record and the keys of the steps
+feeding it. When the graph is executed again only the steps that changed, and
+the steps below them, are executed. The others are read from the cache.
+
+Fingerprints are calculated from the attributes of the nodes and quantization
+records on every execution so changes made in place are detected. Entries are
+evicted least recently used first to keep the cache under a byte limit.
+"""
+
+import functools
+import hashlib
+import types
+from collections import OrderedDict
+from typing import Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from nntool.execution.execution_plan import ExecutionPlan, PlanStep
+from nntool.execution.quantization_mode import QuantizationMode
+from nntool.utils.graph import GraphView
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+OPAQUE_TYPES = (types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                types.ModuleType, functools.partial)
+
+SCALAR_TYPES = (bool, int, float, complex, str, bytes, np.generic)
+EXACT_SCALAR_TYPES = frozenset((type(None), bool, int, float, complex, str, bytes,
+                                np.float16, np.float32, np.float64, np.int8, np.uint8,
+                                np.int16, np.uint16, np.int32, np.uint32, np.int64, np.uint64,
+                                np.bool_))
+
+
+def _array_digest(arr: np.ndarray) -> str:
+    if arr.dtype.hasobject:
+        return fingerprint(arr.tolist()).hex()
+    return hashlib.blake2b(np.ascontiguousarray(arr).data, digest_size=16).hexdigest()
+
+
+def _walk(parts: list, obj, memo: dict):
+    # appends a description of obj to parts. scalars, the bulk of the attributes
+    # of nodes and qrecs, are described inline to keep the walk cheap
+    cls = type(obj)
+    if cls in EXACT_SCALAR_TYPES or isinstance(obj, SCALAR_TYPES):
+        parts.append(f'{cls.__name__}:{obj!r}')
+        return
+    if isinstance(obj, np.ndarray):
+        parts.append(f'{cls.__name__}:{obj.dtype.str}:{obj.shape}:{_array_digest(obj)}')
+        return
+    ref = memo.get(id(obj))
+    if ref is not None:
+        parts.append(f'ref:{ref[0]}')
+        return
+    # the object is kept so that its id cannot be reused during the walk
+    memo[id(obj)] = (len(memo), obj)
+    if isinstance(obj, dict):
+        parts.append('{')
+        for key, val in obj.items():
+            if type(key) is str:
+                parts.append(key)
+            else:
+                _walk(parts, key, memo)
+            val_cls = type(val)
+            if val_cls in EXACT_SCALAR_TYPES:
+                parts.append(f'{val_cls.__name__}:{val!r}')
+            else:
+                _walk(parts, val, memo)
+        parts.append('}')
+    elif isinstance(obj, (list, tuple)):
+        parts.append('[')
+        for elem in obj:
+            elem_cls = type(elem)
+            if elem_cls in EXACT_SCALAR_TYPES:
+                parts.append(f'{elem_cls.__name__}:{elem!r}')
+            else:
+                _walk(parts, elem, memo)
+        parts.append(']')
+    elif isinstance(obj, type):
+        # named rather than identified so fingerprints are the same in every process
+        parts.append(f'type:{obj.__module__}.{obj.__qualname__}')
+    elif isinstance(obj, OPAQUE_TYPES):
+        parts.append(f'{cls.__name__}:{getattr(obj, "__qualname__", "")}:{id(obj)}')
+    elif isinstance(obj, (set, frozenset)):
+        parts.append('(')
+        parts.extend(sorted(fingerprint(elem).hex() for elem in obj))
+        parts.append(')')
+    elif isinstance(obj, GraphView):
+        # the structure of a subgraph rather than its caches
+        parts.append('<')
+        for node in sorted(obj.nodes(), key=lambda node: node.name):
+            _walk(parts, node, memo)
+        parts.extend(sorted(f'{edge.from_node.name}:{edge.from_idx}:{edge.to_node.name}:{edge.to_idx}'
+                            for edge in obj.edges()))
+        parts.append('>')
+    else:
+        parts.append(f'{cls.__module__}.{cls.__qualname__}(')
+        if hasattr(obj, '__dict__'):
+            _walk(parts, vars(obj), memo)
+        for slot in getattr(cls, '__slots__', ()):
+            if hasattr(obj, slot):
+                parts.append(slot)
+                _walk(parts, getattr(obj, slot), memo)
+        parts.append(')')
+
+
+def fingerprint(obj) -> bytes:
+    """Digest of the value of obj including all the attributes of the objects it references"""
+    parts = []
+    _walk(parts, obj, {})
+    return hashlib.blake2b('\x1f'.join(parts).encode(), digest_size=16).digest()
+
+
+class ActivationCache():
+    """LRU cache of the outputs of graph steps bounded by bytes. Pass it to a
+    GraphExecuter to reuse the outputs of the steps that have not changed since
+    an earlier execution on the same inputs."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._nbytes = 0
+
+    @staticmethod
+    def _step_qrec(step: PlanStep, qrecs, qmode: QuantizationMode):
+        # same selection as GraphExecuter.execute_iterator
+        if step.is_fusion_inout or not qrecs or not qmode.get_quantized(step.node, step.node.step_idx):
+            return None
+        return qrecs[step.nid] if step.nid in qrecs else None
+
+    @classmethod
+    def _feed_quantization(cls, hasher, step: PlanStep, qrecs, qmode: QuantizationMode):
+        qrec = cls._step_qrec(step, qrecs, qmode)
+        if qrec is None:
+            # steps executed in float run identically in all modes
+            hasher.update(b'float;')
+        else:
+            hasher.update(f'{qmode.is_step}:{qmode.dequantize};'.encode())
+            hasher.update(fingerprint(qrec))
+        if step.is_executed_fusion:
+            for fusion_step in step.subplan.steps:
+                cls._feed_quantization(hasher, fusion_step, qrecs, qmode)
+
+    def step_keys(self,
+                  plan: ExecutionPlan,
+                  in_tensors: Sequence[np.ndarray],
+                  qrecs,
+                  qmode: QuantizationMode) -> Mapping[PlanStep, bytes]:
+        """Keys of all the steps of plan for an execution on in_tensors"""
+        sample = fingerprint(list(in_tensors))
+        node_keys = {}
+        keys = {}
+        for step in plan.steps:
+            hasher = hashlib.blake2b(digest_size=16)
+            hasher.update(fingerprint(step.node))
+            self._feed_quantization(hasher, step, qrecs, qmode)
+            if step.is_input:
+                hasher.update(sample)
+            for to_idx, from_node, from_idx in step.in_slots:
+                hasher.update(f'{to_idx}:{from_idx};'.encode())
+                hasher.update(node_keys[from_node])
+            keys[step] = node_keys[step.node] = hasher.digest()
+        return keys
+
+    def get(self, key) -> Optional[Tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    @staticmethod
+    def copy_tensors(tensors):
+        if tensors is None:
+            return None
+        return [np.copy(tensor) if isinstance(tensor, np.ndarray) else tensor for tensor in tensors]
+
+    def put(self, key, output_tensors, yield_tensors, details, fusion_yields):
+        """Store the outputs of a step. The tensors are copied so that changes made to them
+        by the caller do not change the cache."""
+        copied_outputs = self.copy_tensors(output_tensors)
+        if yield_tensors is output_tensors:
+            copied_yields = copied_outputs
+        else:
+            copied_yields = self.copy_tensors(yield_tensors)
+        copied_fusion_yields = [elem[:3] + (self.copy_tensors(elem[3]),) + elem[4:]
+                                for elem in fusion_yields] if fusion_yields else fusion_yields
+        nbytes = sum(tensor.nbytes for tensors in [copied_outputs, copied_yields] +
+                     [elem[3] for elem in copied_fusion_yields or []]
+                     if tensors is not None
+                     for tensor in tensors if isinstance(tensor, np.ndarray))
+        if copied_yields is copied_outputs:
+            nbytes -= sum(tensor.nbytes for tensor in copied_outputs if isinstance(tensor, np.ndarray))
+        if nbytes > self._max_bytes:
+            return
+        old_entry = self._entries.pop(key, None)
+        if old_entry is not None:
+            self._nbytes -= old_entry[0]
+        self._entries[key] = (nbytes, (copied_outputs, copied_yields, details, copied_fusion_yields))
+        self._nbytes += nbytes
+        while self._nbytes > self._max_bytes:
+            _, (evicted_nbytes, _) = self._entries.popitem(last=False)
+            self._nbytes -= evicted_nbytes
+
+    def __repr__(self) -> str:
+        return (f'ActivationCache({len(self._entries)} entries {self._nbytes} bytes '
+                f'hits {self.hits} misses {self.misses})')
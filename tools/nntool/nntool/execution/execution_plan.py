@@ -0,0 +1,135 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Flat, cached execution order of a graph
+
+Walking a graph to execute it needs a topological sort and an edge lookup for
+every input of every node. An ExecutionPlan does this once and keeps the
+ordered steps, the (to_idx, from_node, from_idx) input slots of each node, the
+number of consumers of each node's outputs and a plan for the subgraph of each
+fusion. The plan is cached on the graph and rebuilt when the graph or any
+fusion subgraph has been modified since it was built.
+
+Quantization records are still looked up on each execution since they can be
+changed without modifying the graph. Kernel handlers are resolved once per
+quantization kernel type on each step.
+"""
+
+import logging
+from typing import Optional, Sequence, Tuple
+
+from nntool.execution.kernels.kernel_executer import KernelExecuter
+from nntool.graph.types import (ActivationFusionNodeBase, ConstantInputNode,
+                                FilterFusionNodeBase, FusionInputNode,
+                                FusionOutputNode, InputNode,
+                                MatMulOpFusionNode, NNNodeBase,
+                                PaddedAddFusionNode)
+from nntool.quantization.new_qrec import AllFloatQRec, QRec
+from nntool.utils.graph import GraphView
+
+LOG = logging.getLogger(__name__)
+
+EXECUTED_FUSIONS = (FilterFusionNodeBase, ActivationFusionNodeBase,
+                    PaddedAddFusionNode, MatMulOpFusionNode)
+
+_FLOAT_QREC = AllFloatQRec()
+
+
+class PlanStep():
+    """One node of an ExecutionPlan"""
+    __slots__ = ('node', 'nid', 'in_slots', 'in_edges', 'out_edges', 'is_input', 'is_constant', 'is_fusion_inout',
+                 'is_executed_fusion', 'subplan', 'fusion_outputs', 'num_fusion_outputs',
+                 '_handlers')
+
+    def __init__(self, G: GraphView, node: NNNodeBase, parent_node: Optional[NNNodeBase]) -> None:
+        self.node = node
+        self.nid = (parent_node.name, node.name) if parent_node else node.name
+        self.in_slots: Sequence[Tuple[int, NNNodeBase, int]] = [
+            (edge.to_idx, edge.from_node, edge.from_idx) for edge in G.in_edges(node.name)]
+        self.in_edges = G.indexed_in_edges(node.name)
+        self.out_edges = G.out_edges(node.name)
+        self.is_input = isinstance(node, (InputNode, FusionInputNode))
+        self.is_constant = isinstance(node, ConstantInputNode)
+        self.is_fusion_inout = isinstance(node, (FusionInputNode, FusionOutputNode))
+        self.is_executed_fusion = isinstance(node, EXECUTED_FUSIONS)
+        if self.is_executed_fusion:
+            self.subplan = ExecutionPlan(node.subgraph, parent_node=node)
+            self.fusion_outputs = node.subgraph.outputs()
+            self.num_fusion_outputs = max(f_output.idx for f_output in self.fusion_outputs) + 1
+        else:
+            self.subplan = None
+            self.fusion_outputs = None
+            self.num_fusion_outputs = 0
+        self._handlers = {}
+
+    def handler(self, qrec: Optional[QRec]):
+        """Kernel handler for this node and qrec. Handlers only depend on the node class
+        and the qrec kernel type so are cached by kernel type."""
+        ktype = (_FLOAT_QREC if qrec is None else qrec).ktype
+        handler = self._handlers.get(ktype)
+        if handler is None:
+            handler = self._handlers[ktype] = KernelExecuter.get_handler(
+                self.node, _FLOAT_QREC if qrec is None else qrec)
+        return handler
+
+    def collect_inputs(self, saved_outputs):
+        if self.is_input or self.is_constant:
+            return None
+        inputs = [None]*len(self.node.in_dims)
+        for to_idx, from_node, from_idx in self.in_slots:
+            inputs[to_idx] = saved_outputs[from_node][from_idx]
+        return inputs
+
+    def __repr__(self) -> str:
+        return f'PlanStep({self.node.name})'
+
+
+class ExecutionPlan():
+    """Ordered steps to execute a graph or a fusion subgraph"""
+
+    def __init__(self, G: GraphView, parent_node: Optional[NNNodeBase] = None) -> None:
+        self._G = G
+        self._version = G.version
+        inputs = sorted([node for node in G.inputs() if isinstance(node, (InputNode, FusionInputNode))],
+                        key=lambda node: node.name)
+        inputs.extend(node for node in G.inputs() if isinstance(node, ConstantInputNode))
+        self.steps: Sequence[PlanStep] = [PlanStep(G, node, parent_node)
+                                          for node in G.topological_sort(inputs)]
+        self.consumers = {}
+        for step in self.steps:
+            for _, from_node, _ in step.in_slots:
+                self.consumers[from_node] = self.consumers.get(from_node, 0) + 1
+
+    @property
+    def graph(self) -> GraphView:
+        return self._G
+
+    @property
+    def valid(self) -> bool:
+        """True if neither the graph nor any fusion subgraph has changed since the plan was built"""
+        if self._G.version != self._version:
+            return False
+        return all(step.node.subgraph is step.subplan.graph and step.subplan.valid
+                   for step in self.steps if step.is_executed_fusion)
+
+    @classmethod
+    def get(cls, G: GraphView) -> 'ExecutionPlan':
+        """Returns the cached plan for G building it if it is missing or out of date"""
+        plan = getattr(G, '_execution_plan', None)
+        if plan is None or plan.graph is not G or not plan.valid:
+            LOG.debug("building execution plan for %s", G.name if hasattr(G, 'name') else G)
+            plan = cls(G)
+            G._execution_plan = plan
+        return plan
@@ -17,15 +17,11 @@ import logging
 from typing import Mapping, Optional, Sequence, Union, Tuple
 
 import numpy as np
-from nntool.graph.types.fusions import FusionNodeBase
 from nntool.quantization.new_qrec import QRec
-from nntool.utils.graph import Graph, Node
-from nntool.execution.graph_executer import GraphExecuter
-from nntool.graph.types import (ActivationFusionNodeBase,
-                         ConstantInputNode, FilterFusionNodeBase,
-                         FusionInputNode, FusionOutputNode, OutputNode,
-                         InputNode, MatMulOpFusionNode,
-                         PaddedAddFusionNode, NNNodeBase)
+from nntool.utils.graph import Graph
+from nntool.graph.types import FusionOutputNode, OutputNode
+from nntool.execution.execution_plan import ExecutionPlan, PlanStep
+from nntool.execution.kernel_profiler import KernelProfiler
 from nntool.execution.kernels.kernel_executer import KernelExecuter
 from nntool.execution.quantization_mode import QuantizationMode
 
@@ -40,24 +36,24 @@ class FastGraphExecuter():
         self._qrecs = qrecs
 
     @staticmethod
-    def collect_outputs(saved_outputs, G: Graph, node: Node):
+    def collect_outputs(saved_outputs, step: PlanStep):
         # collect outputs from previous nodes
         # InputNode is already set above
-        if isinstance(node, (InputNode, FusionInputNode, ConstantInputNode)):
+        if step.is_input or step.is_constant:
             inputs = None
         else:
-            inputs = [None]*len(node.in_dims)
-            for i, edge in enumerate(G.indexed_in_edges(node.name)):
+            inputs = [None]*len(step.node.in_dims)
+            for i, edge in enumerate(step.in_edges):
                 inputs[i] = saved_outputs[edge]
                 del saved_outputs[edge]
         return inputs
 
     @staticmethod
-    def save_output(saved_outputs, G: Graph, node: Node, outputs):
-        if isinstance(node, (OutputNode, FusionOutputNode)):
-            saved_outputs[node] = outputs
+    def save_output(saved_outputs, step: PlanStep, outputs):
+        if isinstance(step.node, (OutputNode, FusionOutputNode)):
+            saved_outputs[step.node] = outputs
         else:
-            for edge in G.out_edges(node):
+            for edge in step.out_edges:
                 saved_outputs[edge] = outputs[edge.from_idx]
 
 
@@ -65,26 +61,23 @@ class FastGraphExecuter():
                          in_tensors: Sequence[np.ndarray],
                          qmode: QuantizationMode = QuantizationMode.none(),
                          parent_node=None,
-                         saved_outputs={},
-                         G=None):
-        if G is None:
-            G = self._G
-
-        inputs = sorted([node for node in G.inputs() if isinstance(node, (InputNode, FusionInputNode))], key=lambda node: node.name)
-        inputs.extend(node for node in G.inputs() if isinstance(node, ConstantInputNode))
-        for node in G.topological_sort(inputs):
+                         saved_outputs=None,
+                         plan=None):
+        if plan is None:
+            plan = ExecutionPlan.get(self._G)
+        if saved_outputs is None:
+            saved_outputs = {}
+
+        for step in plan.steps:
+            node = step.node
             step_idx = node.step_idx
 
             # collect outputs from previous nodes
             # InputNode is already set above
-            output_tensors = self.collect_outputs(saved_outputs, G, node)
+            output_tensors = self.collect_outputs(saved_outputs, step)
+            nid = step.nid
 
-            if parent_node:
-                nid = (parent_node.name, node.name)
-            else:
-                nid = node.name
-
-            if isinstance(node, (FusionInputNode, FusionOutputNode)):
+            if step.is_fusion_inout:
                 qrec = None
             else:
                 if self._qrecs and qmode.get_quantized(node, step_idx):
@@ -97,30 +90,32 @@ class FastGraphExecuter():
                 else:
                     qrec = None
 
-            if isinstance(node, (FilterFusionNodeBase, ActivationFusionNodeBase, PaddedAddFusionNode, MatMulOpFusionNode)):
-
+            if step.is_executed_fusion:
+                profiler = KernelProfiler.active()
+                if profiler is not None:
+                    profiler.enter_fusion(node, output_tensors)
                 self.execute_iterator(
                         output_tensors,
                         qmode=qmode,
                         parent_node=node,
-                        G=node.subgraph,
+                        plan=step.subplan,
                         saved_outputs=saved_outputs
                 )
-                f_outputs = node.subgraph.outputs()
-                num_outputs = max(f_output.idx for f_output in f_outputs) + 1
-                output_tensors = [None]*num_outputs
-                for f_output in f_outputs:
+                output_tensors = [None]*step.num_fusion_outputs
+                for f_output in step.fusion_outputs:
                     output_tensors[f_output.idx] = saved_outputs[f_output][0]
                     del saved_outputs[f_output][0]
+                if profiler is not None:
+                    profiler.exit_fusion(node, output_tensors)
 
-            elif isinstance(node, (InputNode, FusionInputNode)):
+            elif step.is_input:
                 output_tensors = KernelExecuter.execute(
-                    node, in_tensors, qrec, details=None)
+                    node, in_tensors, qrec, details=None, handler=step.handler(qrec))
             else:
                 output_tensors = KernelExecuter.execute(
-                    node, output_tensors, qrec, details=None)
+                    node, output_tensors, qrec, details=None, handler=step.handler(qrec))
 
-            self.save_output(saved_outputs, G, node, output_tensors)
+            self.save_output(saved_outputs, step, output_tensors)
         return saved_outputs
 
     def execute(self,
@@ -14,14 +14,16 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import time
 from typing import Mapping, Optional, Sequence, Union, Tuple
 
 import numpy as np
-from nntool.graph.types import (ActivationFusionNodeBase,
-                         ConstantInputNode, FilterFusionNodeBase,
-                         FusionInputNode, FusionOutputNode,
-                         InputNode, MatMulOpFusionNode,
-                         PaddedAddFusionNode, NNNodeBase)
+from nntool.graph.types import (ConstantInputNode, FusionInputNode,
+                         FusionOutputNode, InputNode, MatMulOpFusionNode,
+                         NNNodeBase)
+from nntool.execution.activation_cache import ActivationCache
+from nntool.execution.execution_plan import ExecutionPlan
+from nntool.execution.kernel_profiler import KernelProfiler
 from nntool.execution.kernels.kernel_executer import KernelExecuter
 from nntool.quantization.new_qrec import QRec
 from nntool.utils.graph import Graph
@@ -34,21 +36,70 @@ LOG = logging.getLogger(__name__)
 class GraphExecuter():
     def __init__(self,
                  G: Graph,
-                 qrecs: Optional[Mapping[Union[str, Tuple], QRec]] = None):
+                 qrecs: Optional[Mapping[Union[str, Tuple], QRec]] = None,
+                 free_activations: bool = False,
+                 activation_cache: Optional[ActivationCache] = None):
+        """Executes a graph
+
+        Args:
+            G (Graph): Graph to execute
+            qrecs (Optional[Mapping[Union[str, Tuple], QRec]], optional): Quantization records. Defaults to None.
+            free_activations (bool, optional): If True execute_iterator releases each activation as soon as its
+                last consumer has run rather than keeping all of them until the end of the run. Defaults to False.
+            activation_cache (Optional[ActivationCache], optional): If set the outputs of each step of execute_iterator
+                are kept in this cache and reused by later executions on the same inputs when neither the node, its
+                quantization nor any node above it has changed. Defaults to None.
+        """
         self._G = G
         self._qrecs = qrecs
+        self._free_activations = free_activations
+        self._activation_cache = activation_cache
+        self._resident_bytes = 0
+        self._peak_activation_bytes = 0
+
+    @property
+    def peak_activation_bytes(self) -> int:
+        """Peak bytes of activations held by the last call to execute_iterator"""
+        return self._peak_activation_bytes
+
+    @staticmethod
+    def tensors_nbytes(tensors):
+        return sum(tensor.nbytes for tensor in tensors
+                   if isinstance(tensor, np.ndarray))
+
+    def track_output(self, node, outputs):
+        # constants are held by the graph anyway so are not counted
+        if isinstance(node, ConstantInputNode):
+            return
+        self._resident_bytes += self.tensors_nbytes(outputs)
+        if self._resident_bytes > self._peak_activation_bytes:
+            self._peak_activation_bytes = self._resident_bytes
+
+    def release_output(self, saved_outputs, node):
+        outputs = saved_outputs.pop(node, None)
+        if outputs and not isinstance(node, ConstantInputNode):
+            self._resident_bytes -= self.tensors_nbytes(outputs)
+
+    def release_inputs(self, step, saved_outputs, live_consumers):
+        # release any output that has now been consumed by all of its consumers
+        for _, from_node, _ in step.in_slots:
+            live_consumers[from_node] -= 1
+            if live_consumers[from_node] == 0:
+                self.release_output(saved_outputs, from_node)
 
     @staticmethod
-    def collect_outputs(G, saved_outputs, node):
-        # collect outputs from previous nodes
-        # InputNode is already set above
-        if isinstance(node, (InputNode, FusionInputNode, ConstantInputNode)):
-            inputs = None
+    def copy_cached(cached):
+        # copied so that the cache is not changed by the consumers of the outputs
+        output_tensors, yield_tensors, details, fusion_yields = cached
+        copied_outputs = ActivationCache.copy_tensors(output_tensors)
+        if yield_tensors is output_tensors:
+            copied_yields = copied_outputs
         else:
-            inputs = [None]*len(node.in_dims)
-            for edge in G.in_edges(node.name):
-                inputs[edge.to_idx] = saved_outputs[edge.from_node][edge.from_idx]
-        return inputs
+            copied_yields = ActivationCache.copy_tensors(yield_tensors)
+        if fusion_yields:
+            fusion_yields = [elem[:3] + (ActivationCache.copy_tensors(elem[3]),) + elem[4:]
+                             for elem in fusion_yields]
+        return copied_outputs, copied_yields, details, fusion_yields
 
     @staticmethod
     def save_output(saved_outputs, node, outputs):
@@ -62,18 +113,17 @@ class GraphExecuter():
                               parent_node=None,
                               parent_step_idx=None,
                               saved_outputs=None,
-                              G=None):
+                              plan=None):
 
         if not silent:
             LOG.debug("execute quantization comparison")
             ExecutionProgress.start()
-        if G is None:
-            G = self._G
+        if plan is None:
+            plan = ExecutionPlan.get(self._G)
             saved_outputs = {}
 
-        inputs = sorted([node for node in G.inputs() if isinstance(node, (InputNode, FusionInputNode))], key=lambda node: node.name)
-        inputs.extend(node for node in G.inputs() if isinstance(node, ConstantInputNode))
-        for node in G.topological_sort(inputs):
+        for step in plan.steps:
+            node = step.node
             step_idx = node.step_idx
             if step_idx_limit is not None and step_idx > step_idx_limit:
                 break
@@ -81,18 +131,19 @@ class GraphExecuter():
             if not silent:
                 ExecutionProgress.progress(step_idx, node.name)
 
-            output = self.collect_outputs(G, saved_outputs, node)
-            if parent_node:
-                nid = (parent_node.name, node.name)
-            else:
-                nid = node.name
+            output = step.collect_inputs(saved_outputs)
+            nid = step.nid
 
-            if isinstance(node, (FusionInputNode, FusionOutputNode)):
+            if step.is_fusion_inout:
                 qrec = None
             else:
                 qrec = self._qrecs[nid]
 
-            if isinstance(node, (FilterFusionNodeBase, ActivationFusionNodeBase, PaddedAddFusionNode)):
+            # the comparison has never descended into matmul fusions
+            if step.is_executed_fusion and not isinstance(node, MatMulOpFusionNode):
+                profiler = KernelProfiler.active()
+                if profiler is not None:
+                    profiler.enter_fusion(node, output)
                 for (f_step_idx, f_pnode, f_output, f_details, f_qoutput, f_qdetails, f_node) in self.execute_qnoq_iterator(
                     output,
                     yield_fusions=yield_fusions,
@@ -100,27 +151,28 @@ class GraphExecuter():
                     parent_node=node,
                     parent_step_idx=step_idx,
                     saved_outputs=saved_outputs,
-                    G=node.subgraph
+                    plan=step.subplan
                 ):
                     if yield_fusions and not isinstance(f_node, (FusionInputNode, FusionOutputNode)):
                         yield f_step_idx, f_pnode, f_output, f_details, f_qoutput, f_qdetails, f_node
 
-                f_outputs = node.subgraph.outputs()
-                num_outputs = max(f_out.idx for f_out in f_outputs) + 1
-
-                output = [None]*num_outputs
-                for f_out in f_outputs:
+                output = [None]*step.num_fusion_outputs
+                for f_out in step.fusion_outputs:
                     output[f_out.idx] = saved_outputs[f_out][0]
+                if profiler is not None:
+                    profiler.exit_fusion(node, output)
                 qoutput = []
             else:
                 if isinstance(node, (InputNode, ConstantInputNode)):
                     details = {}
                     output = KernelExecuter.execute(node, in_tensors,
                                                     None,
-                                                    details=details)
+                                                    details=details,
+                                                    handler=step.handler(None))
                     qdetails = {}
                     qoutput = KernelExecuter.execute(
-                        node, in_tensors, qrec, details=qdetails)
+                        node, in_tensors, qrec, details=qdetails,
+                        handler=step.handler(qrec))
                 else:
                     qoutput = []
                     for val_idx, val in enumerate(output):
@@ -128,10 +180,12 @@ class GraphExecuter():
                     details = {}
                     output = KernelExecuter.execute(node, output,
                                                     None,
-                                                    details=details)
+                                                    details=details,
+                                                    handler=step.handler(None))
                     qdetails = {}
                     qoutput = KernelExecuter.execute(
-                        node, qoutput, qrec, details=qdetails)
+                        node, qoutput, qrec, details=qdetails,
+                        handler=step.handler(qrec))
 
                 qoutput = [qrec.out_qs[i].dequantize(
                     out) for i, out in enumerate(qoutput)]
@@ -155,21 +209,31 @@ class GraphExecuter():
                          parent_node=None,
                          parent_step_idx=None,
                          saved_outputs=None,
-                         G=None):
+                         live_consumers=None,
+                         plan=None):
         if qmode is None:
             qmode = QuantizationMode.none()
 
-        if G is None:
-            G = self._G
+        cache_keys = None
+        if plan is None:
+            plan = ExecutionPlan.get(self._G)
             saved_outputs = {}
+            self._resident_bytes = 0
+            self._peak_activation_bytes = 0
+            if self._free_activations:
+                live_consumers = {}
+            if self._activation_cache is not None and start_node is None and record_inputs is None:
+                cache_keys = self._activation_cache.step_keys(plan, in_tensors, self._qrecs, qmode)
+        if live_consumers is not None:
+            for from_node, count in plan.consumers.items():
+                live_consumers[from_node] = live_consumers.get(from_node, 0) + count
 
         if not silent:
             LOG.debug("execute uncached: quantization mode %s", qmode)
             ExecutionProgress.start()
 
-        inputs = sorted([node for node in G.inputs() if isinstance(node, (InputNode, FusionInputNode))], key=lambda node: node.name)
-        inputs.extend(node for node in G.inputs() if isinstance(node, ConstantInputNode))
-        for node in G.topological_sort(inputs):
+        for step in plan.steps:
+            node = step.node
             step_idx = node.step_idx
             if step_idx_limit is not None and step_idx > step_idx_limit:
                 break
@@ -179,21 +243,20 @@ class GraphExecuter():
 
             # collect outputs from previous nodes
             # InputNode is already set above
-            output_tensors = self.collect_outputs(G, saved_outputs, node)
+            output_tensors = step.collect_inputs(saved_outputs)
+            if live_consumers is not None:
+                self.release_inputs(step, saved_outputs, live_consumers)
 
             if not silent:
                 ExecutionProgress.progress(step_idx, node.name)
-            if parent_node:
-                nid = (parent_node.name, node.name)
-            else:
-                nid = node.name
+            nid = step.nid
             if record_inputs is not None:
                 if output_tensors is None:
                     record_inputs[nid] = output_tensors
                 else:
                     record_inputs[nid] = [np.copy(output_tensor)
                                           for output_tensor in output_tensors]
-            if isinstance(node, (FusionInputNode, FusionOutputNode)):
+            if step.is_fusion_inout:
                 qrec = None
             else:
                 if self._qrecs and qmode.get_quantized(node, step_idx):
@@ -211,8 +274,24 @@ class GraphExecuter():
 
             details = {} if yield_details and (
                 not only_yield_step or step_idx == step_idx_limit) else None
-            if isinstance(node, (FilterFusionNodeBase, ActivationFusionNodeBase, PaddedAddFusionNode, MatMulOpFusionNode)):
-
+            if cache_keys is not None:
+                cache_key = (cache_keys[step], details is not None,
+                             yield_fusions and step.is_executed_fusion)
+                cached = self._activation_cache.get(cache_key)
+                if cached is not None:
+                    output_tensors, yield_tensors, details, fusion_yields = self.copy_cached(cached)
+                    if yield_fusions and fusion_yields:
+                        yield from fusion_yields
+                    if not only_yield_step or step_idx == step_idx_limit:
+                        yield step_idx, node, None, yield_tensors, details
+                    self.save_output(saved_outputs, node, output_tensors)
+                    self.track_output(node, output_tensors)
+                    continue
+                fusion_yields = [] if yield_fusions and step.is_executed_fusion else None
+            if step.is_executed_fusion:
+                profiler = KernelProfiler.active()
+                if profiler is not None:
+                    profiler.enter_fusion(node, output_tensors)
                 for f_step_idx, f_pnode, f_node, f_output_tensors, f_details in self.execute_iterator(
                         output_tensors,
                         qmode=qmode,
@@ -222,56 +301,194 @@ class GraphExecuter():
                         parent_node=node,
                         parent_step_idx=step_idx,
                         saved_outputs=saved_outputs,
-                        G=node.subgraph
+                        live_consumers=live_consumers,
+                        plan=step.subplan
                 ):
                     if yield_fusions and not isinstance(f_node, (FusionInputNode, FusionOutputNode)):
+                        if cache_keys is not None:
+                            fusion_yields.append(
+                                (f_step_idx, f_pnode, f_node, f_output_tensors, f_details))
                         yield f_step_idx, f_pnode, f_node, f_output_tensors, f_details
-                f_outputs = node.subgraph.outputs()
-                num_outputs = max(f_output.idx for f_output in f_outputs) + 1
-                output_tensors = [None]*num_outputs
-                for f_output in f_outputs:
+                output_tensors = [None]*step.num_fusion_outputs
+                for f_output in step.fusion_outputs:
                     output_tensors[f_output.idx] = saved_outputs[f_output][0]
+                    if live_consumers is not None:
+                        self.release_output(saved_outputs, f_output)
+                if profiler is not None:
+                    profiler.exit_fusion(node, output_tensors)
 
-            elif isinstance(node, (InputNode, FusionInputNode)):
+            elif step.is_input:
                 output_tensors = KernelExecuter.execute(
-                    node, in_tensors, qrec, details)
+                    node, in_tensors, qrec, details, handler=step.handler(qrec))
             else:
                 output_tensors = KernelExecuter.execute(
-                    node, output_tensors, qrec, details)
+                    node, output_tensors, qrec, details, handler=step.handler(qrec))
 
             if qmode.dequantize and qrec:
-                qoutput_tensors = [qrec.out_qs[i].dequantize(
+                yield_tensors = [qrec.out_qs[i].dequantize(
                     output_tensor) for i, output_tensor in enumerate(output_tensors)]
-                if parent_node:
-                    yield parent_step_idx, parent_node, node, qoutput_tensors, details
-                elif not only_yield_step or step_idx == step_idx_limit:
-                    yield step_idx, node, None, qoutput_tensors, details
                 if qmode.is_step and qmode.get_quantized(node, step_idx):
-                    output_tensors = qoutput_tensors
+                    output_tensors = yield_tensors
             elif qmode.is_float_q_deq and qrec:
                 if qmode.is_step and qmode.get_quantized(node, step_idx):
                     output_tensors = [qrec.out_qs[i].dequantize(
                         output_tensor) for i, output_tensor in enumerate(output_tensors)]
-                qoutput_tensors = [qrec.out_qs[i].dequantize(qrec.out_qs[i].quantize(
+                yield_tensors = [qrec.out_qs[i].dequantize(qrec.out_qs[i].quantize(
                     output_tensor)) for i, output_tensor in enumerate(output_tensors)]
-                if parent_node:
-                    yield parent_step_idx, parent_node, node, qoutput_tensors, details
-                elif not only_yield_step or step_idx == step_idx_limit:
-                    yield step_idx, node, None, qoutput_tensors, details
             else:
                 if qmode.is_step and qmode.get_quantized(node, step_idx) and qrec:
                     output_tensors = [qrec.out_qs[i].dequantize(
                         output_tensor) for i, output_tensor in enumerate(output_tensors)]
-                if parent_node:
-                    yield parent_step_idx, parent_node, node, output_tensors, details
-                elif not only_yield_step or step_idx == step_idx_limit:
-                    yield step_idx, node, None, output_tensors, details
+                yield_tensors = output_tensors
+            if parent_node:
+                yield parent_step_idx, parent_node, node, yield_tensors, details
+            elif not only_yield_step or step_idx == step_idx_limit:
+                yield step_idx, node, None, yield_tensors, details
 
+            if cache_keys is not None:
+                self._activation_cache.put(cache_key, output_tensors, yield_tensors, details, fusion_yields)
             self.save_output(saved_outputs, node, output_tensors)
+            self.track_output(node, output_tensors)
 
         if not silent:
             ExecutionProgress.end()
 
+    @staticmethod
+    def dequantize_batch(qtype, tensor: np.ndarray) -> np.ndarray:
+        # per channel scales are laid out for a single sample
+        if qtype.quantized_dimension is None:
+            return qtype.dequantize(tensor)
+        return np.stack([qtype.dequantize(sample) for sample in tensor])
+
+    @staticmethod
+    def quantize_batch(qtype, tensor: np.ndarray) -> np.ndarray:
+        if qtype.quantized_dimension is None:
+            return qtype.quantize(tensor)
+        return np.stack([qtype.quantize(sample) for sample in tensor])
+
+    def execute_batch_iterator(self,
+                               in_tensors: Sequence[np.ndarray],
+                               qmode: Optional[QuantizationMode] = None,
+                               yield_fusions=True,
+                               parent_node=None,
+                               parent_step_idx=None,
+                               saved_outputs=None,
+                               plan=None):
+        """Executes the graph on a batch of samples. Every input tensor carries a leading
+        batch axis which is carried through every kernel so each node is only visited once
+        per batch. Kernels that are not batch safe are executed per sample by the kernel."""
+        if qmode is None:
+            qmode = QuantizationMode.none()
+        if qmode.is_step or qmode.is_step_all:
+            raise ValueError(
+                "batched execution does not support step quantization modes")
+
+        if plan is None:
+            plan = ExecutionPlan.get(self._G)
+            saved_outputs = {}
+
+        batch_size = len(in_tensors[0])
+        for step in plan.steps:
+            node = step.node
+            step_idx = node.step_idx
+            output_tensors = step.collect_inputs(saved_outputs)
+
+            nid = step.nid
+            if step.is_fusion_inout:
+                qrec = None
+            elif self._qrecs and qmode.get_quantized(node, step_idx):
+                if nid not in self._qrecs:
+                    LOG.warning(
+                        "no quantization parameters on %s", node.name)
+                    qrec = None
+                else:
+                    qrec = self._qrecs[nid]
+            else:
+                qrec = None
+
+            if step.is_executed_fusion:
+                profiler = KernelProfiler.active()
+                if profiler is not None:
+                    profiler.enter_fusion(node, output_tensors)
+                for f_step_idx, f_pnode, f_node, f_output_tensors in self.execute_batch_iterator(
+                        output_tensors,
+                        qmode=qmode,
+                        yield_fusions=yield_fusions,
+                        parent_node=node,
+                        parent_step_idx=step_idx,
+                        saved_outputs=saved_outputs,
+                        plan=step.subplan
+                ):
+                    if yield_fusions and not isinstance(f_node, (FusionInputNode, FusionOutputNode)):
+                        yield f_step_idx, f_pnode, f_node, f_output_tensors
+                output_tensors = [None]*step.num_fusion_outputs
+                for f_output in step.fusion_outputs:
+                    output_tensors[f_output.idx] = saved_outputs[f_output][0]
+                if profiler is not None:
+                    profiler.exit_fusion(node, output_tensors)
+            elif step.is_constant:
+                # constants are the same for every sample so are only executed once
+                output_tensors = [np.broadcast_to(output_tensor, (batch_size,) + output_tensor.shape)
+                                  for output_tensor in KernelExecuter.execute(
+                                      node, None, qrec, handler=step.handler(qrec))]
+            elif step.is_input:
+                output_tensors = KernelExecuter.execute_batch(
+                    node, in_tensors, qrec, handler=step.handler(qrec))
+            else:
+                output_tensors = KernelExecuter.execute_batch(
+                    node, output_tensors, qrec, handler=step.handler(qrec))
+
+            if qmode.dequantize and qrec:
+                yield_tensors = [self.dequantize_batch(qrec.out_qs[i], output_tensor)
+                                 for i, output_tensor in enumerate(output_tensors)]
+            elif qmode.is_float_q_deq and qrec:
+                yield_tensors = [self.dequantize_batch(qrec.out_qs[i], self.quantize_batch(qrec.out_qs[i], output_tensor))
+                                 for i, output_tensor in enumerate(output_tensors)]
+            else:
+                yield_tensors = output_tensors
+            if parent_node:
+                yield parent_step_idx, parent_node, node, yield_tensors
+            else:
+                yield step_idx, node, None, yield_tensors
+
+            self.save_output(saved_outputs, node, output_tensors)
+
+    def execute_batch(self,
+                      in_tensors: Sequence[np.ndarray],
+                      qmode: QuantizationMode = None,
+                      append_fusion_output=False,
+                      batch_stats: Optional[dict] = None):
+        """Executes the graph on a batch of samples
+
+        Args:
+            in_tensors (Sequence[np.ndarray]): One tensor per graph input with a leading batch axis
+            qmode (QuantizationMode, optional): Quantization mode. Step modes are not supported.
+            append_fusion_output (bool, optional): Include outputs of nodes inside fusions.
+            batch_stats (dict, optional): If set filled with batch_size, elapsed time and samples_per_sec
+
+        Returns:
+            List of lists of outputs of each node. Each output has a leading batch axis.
+        """
+        start_time = time.perf_counter()
+        outputs = []
+        for _, _, fnode, output_tensors in self.execute_batch_iterator(
+                in_tensors, qmode=qmode, yield_fusions=append_fusion_output):
+            if fnode and not append_fusion_output:
+                continue
+            outputs.append([np.array(output_tensor) for output_tensor in output_tensors])
+        elapsed = time.perf_counter() - start_time
+        batch_size = len(in_tensors[0])
+        samples_per_sec = batch_size / elapsed if elapsed > 0 else float('inf')
+        LOG.info("executed batch of %s samples in %.3fs (%.1f samples/sec)",
+                 batch_size, elapsed, samples_per_sec)
+        if batch_stats is not None:
+            batch_stats.update({
+                'batch_size': batch_size,
+                'elapsed': elapsed,
+                'samples_per_sec': samples_per_sec
+            })
+        return outputs
+
     def execute_qnoq(self,
                      in_tensors: Sequence[np.ndarray],
                      step_idx_limit=None,
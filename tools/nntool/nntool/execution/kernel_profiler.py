@@ -0,0 +1,265 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Opt in profiling of the kernels run by the simulator
+
+While a KernelProfiler is active every call to KernelExecuter.execute records
+the wall time, the bytes of the input and output tensors and the kernel class
+used. Kernels executed inside a fusion are recorded against the fusion as well
+as individually. Nothing is recorded and there is no overhead when no profiler
+is active::
+
+    with KernelProfiler() as profiler:
+        G.execute(input_tensors)
+    print(profiler.summary('kernel'))
+    profiler.write_chrome_trace('trace.json')
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+
+GROUP_BY_OPTIONS = ('node', 'kernel', 'ktype')
+SORT_OPTIONS = ('time', 'calls', 'avg_time', 'bytes_in', 'bytes_out', 'name')
+
+
+def tensors_nbytes(tensors) -> int:
+    if tensors is None:
+        return 0
+    return sum(tensor.nbytes for tensor in tensors if isinstance(tensor, np.ndarray))
+
+
+class ProfileStat():
+    """Accumulated calls, time and traffic of one node, kernel class or ktype"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.time = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.min_time = float('inf')
+        self.max_time = 0.0
+        self.info = {}
+
+    def add(self, duration: float, bytes_in: int, bytes_out: int):
+        self.calls += 1
+        self.time += duration
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.min_time = min(self.min_time, duration)
+        self.max_time = max(self.max_time, duration)
+
+    @property
+    def avg_time(self) -> float:
+        return self.time / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> dict:
+        res = {
+            'name': self.name,
+            'calls': self.calls,
+            'time': self.time,
+            'avg_time': self.avg_time,
+            'min_time': self.min_time if self.calls else 0.0,
+            'max_time': self.max_time,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+        }
+        res.update(self.info)
+        return res
+
+    def __repr__(self) -> str:
+        return f'{self.name}: {self.calls} calls {self.time * 1000:.3f}ms'
+
+
+class KernelProfiler():
+    """Records kernel executions while active. Profilers are activated with start
+    or by using them as a context manager and only one can be active at a time."""
+    _ACTIVE: Optional['KernelProfiler'] = None
+    _LOCK = threading.Lock()
+
+    def __init__(self, trace=True) -> None:
+        self._trace = trace
+        self.reset()
+
+    def reset(self):
+        self._stats = {key: {} for key in GROUP_BY_OPTIONS}
+        self._events = []
+        self._fusions = []
+        self._origin = time.perf_counter()
+
+    @classmethod
+    def active(cls) -> Optional['KernelProfiler']:
+        return cls._ACTIVE
+
+    def start(self):
+        with self._LOCK:
+            if KernelProfiler._ACTIVE is not None and KernelProfiler._ACTIVE is not self:
+                raise ValueError('another kernel profiler is already active')
+            KernelProfiler._ACTIVE = self
+        return self
+
+    def stop(self):
+        with self._LOCK:
+            if KernelProfiler._ACTIVE is self:
+                KernelProfiler._ACTIVE = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @staticmethod
+    def _stat(stats: dict, name: str) -> ProfileStat:
+        stat = stats.get(name)
+        if stat is None:
+            stat = stats[name] = ProfileStat(name)
+        return stat
+
+    def _node_name(self, node) -> str:
+        if self._fusions:
+            return '/'.join([fusion['node'].name for fusion in self._fusions] + [node.name])
+        return node.name
+
+    def record_kernel(self, node, handler, ktype: str, start: float, end: float,
+                      input_tensors: Sequence[np.ndarray], output_tensors: Sequence[np.ndarray]):
+        """Record one execution of handler on node between start and end (perf_counter seconds)"""
+        duration = end - start
+        bytes_in = tensors_nbytes(input_tensors)
+        bytes_out = tensors_nbytes(output_tensors)
+        name = self._node_name(node)
+        stat = self._stat(self._stats['node'], name)
+        if not stat.calls:
+            stat.info.update({'op': node.__class__.__name__,
+                              'kernel': handler.__name__,
+                              'ktype': ktype})
+        stat.add(duration, bytes_in, bytes_out)
+        self._stat(self._stats['kernel'], handler.__name__).add(
+            duration, bytes_in, bytes_out)
+        self._stat(self._stats['ktype'], ktype).add(
+            duration, bytes_in, bytes_out)
+        for fusion in self._fusions:
+            fusion['time'] += duration
+        if self._trace:
+            self._events.append({
+                'name': node.name,
+                'cat': handler.__name__,
+                'ph': 'X',
+                'ts': (start - self._origin) * 1e6,
+                'dur': duration * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': {'node': name, 'ktype': ktype,
+                         'bytes_in': bytes_in, 'bytes_out': bytes_out}
+            })
+
+    def enter_fusion(self, node, input_tensors: Sequence[np.ndarray]):
+        """Called before the nodes inside a fusion are executed"""
+        self._fusions.append({
+            'node': node,
+            'time': 0.0,
+            'bytes_in': tensors_nbytes(input_tensors),
+            'first_event': len(self._events),
+        })
+
+    def exit_fusion(self, node, output_tensors: Sequence[np.ndarray]):
+        """Called once the outputs of a fusion are gathered. The time of the fusion is
+        the time spent in its kernels so that work done by the consumer of the
+        execution iterator between kernels is not counted."""
+        # fusions left open by an execution iterator that was not run to the end are dropped
+        while self._fusions:
+            fusion = self._fusions.pop()
+            if fusion['node'] is node:
+                break
+        else:
+            return
+        name = self._node_name(node)
+        bytes_out = tensors_nbytes(output_tensors)
+        stat = self._stat(self._stats['node'], name)
+        if not stat.calls:
+            stat.info.update({'op': node.__class__.__name__,
+                              'kernel': 'fusion',
+                              'ktype': ''})
+        stat.add(fusion['time'], fusion['bytes_in'], bytes_out)
+        if self._trace and len(self._events) > fusion['first_event']:
+            events = self._events[fusion['first_event']:]
+            start = min(event['ts'] for event in events)
+            end = max(event['ts'] + event['dur'] for event in events)
+            self._events.append({
+                'name': node.name,
+                'cat': 'fusion',
+                'ph': 'X',
+                'ts': start,
+                'dur': end - start,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': {'node': name, 'kernel_time_us': fusion['time'] * 1e6,
+                         'bytes_in': fusion['bytes_in'], 'bytes_out': bytes_out}
+            })
+
+    @property
+    def total_time(self) -> float:
+        """Total time spent in kernels in seconds"""
+        return sum(stat.time for stat in self._stats['kernel'].values())
+
+    def stats(self, group_by='node') -> Mapping[str, ProfileStat]:
+        if group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f'group_by should be one of {", ".join(GROUP_BY_OPTIONS)}')
+        return self._stats[group_by]
+
+    def summary(self, group_by='node', sort_by='time', reverse=None, top=None) -> Sequence[dict]:
+        """Profile results as a list of dicts
+
+        Args:
+            group_by (str, optional): One of node, kernel or ktype. Defaults to 'node'.
+            sort_by (str, optional): One of time, calls, avg_time, bytes_in, bytes_out or name.
+                Defaults to 'time'.
+            reverse (bool, optional): Sort descending. Defaults to descending for all but name.
+            top (int, optional): Only return this many entries. Defaults to all.
+
+        Returns:
+            Sequence[dict]: one dict per entry with the accumulated values and the percentage
+            of the total kernel time
+        """
+        if sort_by not in SORT_OPTIONS:
+            raise ValueError(f'sort_by should be one of {", ".join(SORT_OPTIONS)}')
+        if reverse is None:
+            reverse = sort_by != 'name'
+        total_time = self.total_time
+        res = []
+        for stat in self.stats(group_by).values():
+            stat_dict = stat.to_dict()
+            stat_dict['percent'] = 100 * stat.time / total_time if total_time else 0.0
+            res.append(stat_dict)
+        res.sort(key=lambda elem: elem[sort_by], reverse=reverse)
+        if top is not None:
+            res = res[:top]
+        return res
+
+    def chrome_trace(self) -> dict:
+        """Kernel executions in the Chrome trace event format (chrome://tracing or Perfetto)"""
+        return {
+            'traceEvents': sorted(self._events, key=lambda event: (event['ts'], -event['dur'])),
+            'displayTimeUnit': 'ms'
+        }
+
+    def write_chrome_trace(self, filename: str):
+        with open(filename, 'w') as fp:
+            json.dump(self.chrome_trace(), fp)
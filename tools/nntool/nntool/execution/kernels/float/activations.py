@@ -19,7 +19,7 @@ from nntool.graph.types import (HSigmoidNode,
                          ReluNode, SigmoidNode)
 from nntool.graph.types.activations import (HTanHNode,
                                      TanHNode)
-from nntool.execution.kernels.kernel_base import KernelBase, params_type, qrec_type
+from nntool.execution.kernels.kernel_base import KernelBase, batch_safe, params_type, qrec_type
 from nntool.quantization.new_qrec import AllFloatQRec, QRec
 from nntool.utils.fast_float import np_fastsigmoid, np_fasttanh
 from nntool.utils.sigmoid_tanh_lut import sigmoid_lut_float, tanh_lut_float
@@ -27,6 +27,7 @@ from nntool.utils.sigmoid_tanh_lut import sigmoid_lut_float, tanh_lut_float
 
 @params_type(HSwishNode)
 @qrec_type('float')
+@batch_safe
 class HSwishFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -44,6 +45,7 @@ class HSwishFloat32(KernelBase):
 
 @params_type(HSigmoidNode)
 @qrec_type('float')
+@batch_safe
 class HSigmoidFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -61,6 +63,7 @@ class HSigmoidFloat32(KernelBase):
 
 @params_type(SigmoidNode)
 @qrec_type('float')
+@batch_safe
 class SigmoidFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -83,6 +86,7 @@ class SigmoidFloat32(KernelBase):
 
 @params_type(TanHNode)
 @qrec_type('float')
+@batch_safe
 class TanHFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -105,6 +109,7 @@ class TanHFloat32(KernelBase):
 
 @params_type(HTanHNode)
 @qrec_type('float')
+@batch_safe
 class HTanHFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -122,6 +127,7 @@ class HTanHFloat32(KernelBase):
 
 @params_type(ReluNode)
 @qrec_type('float')
+@batch_safe
 class ReluFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -147,6 +153,7 @@ class ReluFloat32(KernelBase):
 
 @params_type(LeakyNode)
 @qrec_type('float')
+@batch_safe
 class LeakyFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
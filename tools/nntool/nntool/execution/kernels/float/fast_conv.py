@@ -39,6 +39,8 @@ class Conv2DFloat32(KernelBase):
         '''3D convolution by sub-matrix summing.
         '''
         details = kwargs.get('details')
+        # set by execute_batch when in_tensors[0] carries a leading batch axis
+        batched = kwargs.get('batched', False)
         if qrec is None:
             qrec = AllFloatQRec()
         in_dim, w_dim, out_dim = params.in_dims[0], params.filter_dim, params.out_dims[0]
@@ -53,22 +55,26 @@ class Conv2DFloat32(KernelBase):
             details['max_acc'] = float("-Infinity")
             details['min_pre_mul_bias'] = float("Infinity")
             details['max_pre_mul_bias'] = float("-Infinity")
-        in_rank = len(in_tensor.shape)
+        in_rank = len(in_tensor.shape) - (1 if batched else 0)
         if in_rank == 3:
-            batch = None
             internal_in_order = ['h', 'w', 'c']
             internal_out_order = ['c', 'h', 'w']
         elif in_rank == 4:
-            batch = in_tensor.shape[in_dim.get_order_idx('n')]
             internal_in_order = ['n', 'h', 'w', 'c']
             internal_out_order = ['n', 'c', 'h', 'w']
         else:
             raise NotImplementedError(
                 f'{params.name} input has input rank of {in_rank} shape {in_tensor.shape} '
                 'which is not supported by nntool kernels')
+        in_transpose = in_dim.transpose_to_order(internal_in_order)
+        out_transpose = out_dim.transpose_from_order(internal_out_order)
+        if batched:
+            in_transpose = cls.batch_transpose(in_transpose)
+            out_transpose = cls.batch_transpose(out_transpose)
+        # the batch of samples is convolved in one pass
+        batch = in_tensor.shape[0] if batched or in_rank == 4 else None
 
-        in_tensor = in_tensor.transpose(
-            in_dim.transpose_to_order(internal_in_order))
+        in_tensor = in_tensor.transpose(in_transpose)
 
         in_tensor, pad_w, pad_h = cls.pad_input(params, in_tensor, batch)
 
@@ -104,72 +110,54 @@ class Conv2DFloat32(KernelBase):
             biases = np.zeros((out_c, out_h, out_w),
                               dtype=calc_dtype)
 
-        if details is not None:
-            min_acc, max_acc = details['min_acc'], details['max_acc']
-        else:
-            min_acc, max_acc = qrec.out_qs[0].max, qrec.out_qs[0].min
-
         weights = weights.transpose(w_dim.transpose_to_order(
             ['h', 'w', 'in_c', 'out_c']))
 
-        cur_batch = 0
-        result = None
-        while True:
-            if batch is None:
-                cur_in_tensor = in_tensor
-            else:
-                cur_in_tensor = in_tensor[cur_batch]
-            cur_result, min_acc_tmp, max_acc_tmp = fast_numpy_conv(
-                cur_in_tensor,
-                weights,
-                biases,
-                in_c,
-                out_h,
-                out_w,
-                out_c,
-                dilated_filter_h,
-                dilated_filter_w,
-                filt_h,
-                filt_w,
-                filt_dil_h,
-                filt_dil_w,
-                filt_str_h,
-                filt_str_w,
-                const_h,
-                const_w,
-                params.groups,
-                params.is_depthwise_conv(),
-                calc_dtype
-            )
-            if details is not None:
-                min_acc, max_acc = min(min_acc_tmp, max_acc_tmp), max(
-                    max_acc_tmp, max_acc)
-            if details is not None:
-                details['min_acc'], details['max_acc'] = min_acc, max_acc
-                details['min_pre_mul_bias'] = min(
-                    np.min(cur_result), details['min_pre_mul_bias'])
-                details['max_pre_mul_bias'] = max(
-                    np.max(cur_result), details['max_pre_mul_bias'])
-
-            cur_result = apply_multiplicative_bias(qrec,
-                                                   params, cur_result, axis=0, ktype="float")
-            if batch is None:
-                result = cur_result
-                break
-            if result is None:
-                result = np.expand_dims(cur_result, 0)
-            else:
-                result = np.concatenate(
-                    [result, np.expand_dims(cur_result, 0)], axis=0)
-            cur_batch += 1
-            if cur_batch >= batch:
-                break
-
-        result = result.transpose(
-            out_dim.transpose_from_order(internal_out_order))
+        result, min_acc, max_acc = fast_numpy_conv(
+            in_tensor,
+            weights,
+            biases,
+            in_c,
+            out_h,
+            out_w,
+            out_c,
+            dilated_filter_h,
+            dilated_filter_w,
+            filt_h,
+            filt_w,
+            filt_dil_h,
+            filt_dil_w,
+            filt_str_h,
+            filt_str_w,
+            const_h,
+            const_w,
+            params.groups,
+            params.is_depthwise_conv(),
+            calc_dtype
+        )
+        if details is not None:
+            details['min_acc'], details['max_acc'] = min_acc, max_acc
+            details['min_pre_mul_bias'] = np.min(result)
+            details['max_pre_mul_bias'] = np.max(result)
+
+        result = apply_multiplicative_bias(qrec,
+                                           params, result, axis=result.ndim - 3, ktype="float")
+
+        result = result.transpose(out_transpose)
 
         return qrec.get_outputs(params, [result], ktype="float")
 
+    @classmethod
+    def execute_batch(cls, params: Conv2DNode,
+                      in_tensors,
+                      qrec: QRec,
+                      **kwargs):
+        if len(params.in_dims[0].shape) == 3:
+            sample_in_tensors = cls.unbatch_inputs(in_tensors, qrec, (1, 2))
+            if sample_in_tensors is not None:
+                return cls.execute(params, sample_in_tensors, qrec, batched=True, **kwargs)
+        return super().execute_batch(params, in_tensors, qrec, **kwargs)
+
     @classmethod
     def pad_input(cls, params, in_tensor, batch):
         if (params.padding.h + params.padding.w) > 0:
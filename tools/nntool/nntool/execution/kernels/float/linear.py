@@ -27,6 +27,8 @@ LOG = logging.getLogger(__name__)
 @params_type(LinearNode)
 @qrec_type('float')
 class LinearFloat32(KernelBase):
+    # not batched. one product of the whole batch does not accumulate in the order of
+    # the per sample dot products so execute_batch executes each sample
     @classmethod
     def execute(cls, params,
                 in_tensors,
@@ -22,7 +22,8 @@ from nntool.graph.types import (ExpOpNode, ExpressionFusionNode,
                          SqrtOpNode, LogOpNode)
 from nntool.graph.types.piecewise import ErfOpNode, RSqrtOpNode, SinOpNode, CosOpNode, AbsOpNode
 from nntool.graph.types.tensor_arithmetic import BroadcastableNodeBase, MatMulOpNode, MatMulTransposedNode
-from nntool.execution.kernels.kernel_base import KernelBase, params_type, qrec_type
+from nntool.execution.kernels.kernel_base import (KernelBase, MatMulBatchMixin,
+                                                  params_type, qrec_type)
 from nntool.quantization.new_qrec import AllFloatQRec, QRec
 from nntool.utils.np_erf import np_erf
 
@@ -116,7 +117,7 @@ class MatrixDivFloat32(PieceWiseFloat32Mixin, KernelBase):
 
 @params_type(MatMulOpNode, MatMulTransposedNode)
 @qrec_type('float')
-class MatMulFloat32(KernelBase):
+class MatMulFloat32(MatMulBatchMixin, KernelBase):
     @classmethod
     def execute(cls, params,
                 in_tensors,
@@ -126,6 +127,8 @@ class MatMulFloat32(KernelBase):
         if qrec is None:
             qrec = AllFloatQRec()
         in_tensors = qrec.prepare_inputs(params, in_tensors, ktype="float")
+        # leading batch axis on in_tensors[0]
+        lead = 1 if kwargs.get('batched') else 0
 
         if isinstance(params, MatMulTransposedNode):
             mat1, mat2 = in_tensors[0], np.swapaxes(in_tensors[1], -2, -1)
@@ -134,8 +137,8 @@ class MatMulFloat32(KernelBase):
 
         if len(in_tensors) > 2:
             biases = in_tensors[2]
-            if len(biases.shape) != len(mat1.shape):
-                if biases.shape[0] == mat1.shape[0]:
+            if len(biases.shape) != len(mat1.shape) - lead:
+                if biases.shape[0] == mat1.shape[lead]:
                     biases = np.expand_dims(biases, -1)
         else:
             biases = 0
@@ -188,9 +191,13 @@ class ExpressionFloat32(KernelBase):
         func_col = qrec.cache.get('qfunc_col')
         if func_col is None:
             func_col = params.func_col
-        out_vars = func_col(**in_vars,
-                            calculate_ranges=current_control is not None,
-                            track_results=results)
+        compiled = func_col.compiled if details is None else None
+        if compiled:
+            out_vars = compiled(**in_vars)
+        else:
+            out_vars = func_col(**in_vars,
+                                calculate_ranges=current_control is not None,
+                                track_results=results)
         out_tensors = [out_vars[out_sym_name]
                        for out_sym_name in params.output_symbols]
         if current_control:
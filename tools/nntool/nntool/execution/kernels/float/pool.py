@@ -20,8 +20,10 @@ import numpy as np
 from nntool.graph.types import (AveragePoolNode, GlobalAveragePoolNode,
                          GlobalMaxPoolNode, GlobalMinPoolNode,
                          GlobalSumPoolNode, MaxPoolNode)
-from nntool.execution.kernels.kernel_base import KernelBase, params_type, qrec_type
+from nntool.execution.kernels.kernel_base import (KernelBase, batched_execute,
+                                                  params_type, qrec_type)
 from nntool.quantization.new_qrec import AllFloatQRec, QRec
+from nntool.utils.numpy_pool import max_pool, sum_pool
 
 LOG = logging.getLogger(__name__)
 
@@ -29,6 +31,7 @@ LOG = logging.getLogger(__name__)
 
 @params_type(AveragePoolNode)
 @qrec_type('float')
+@batched_execute
 class AveragePoolingFloat(KernelBase):
 
     @classmethod
@@ -41,6 +44,8 @@ class AveragePoolingFloat(KernelBase):
 
         in_tensor = qrec.prepare_inputs(params, in_tensors, ktype="float")[0]
         in_dims, out_dims = params.in_dims[0], params.out_dims[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
         filter_sz = params.filter_dim.h * params.filter_dim.w
 
         calc_dtype = qrec.out_qs[0].dtype if qrec.ktype.startswith(
@@ -48,44 +53,24 @@ class AveragePoolingFloat(KernelBase):
 
         pool_factor = np.array(1.0/filter_sz, dtype=calc_dtype)
 
-        out_tensor = np.zeros(out_dims.shape, dtype=calc_dtype)
-
         if params.padding.h + params.padding.w > 0:
             in_tensor = np.pad(in_tensor,
-                               params.padding.numpy_pad_shape(in_dims),
+                               [(0, 0)] * lead + params.padding.numpy_pad_shape(in_dims),
                                mode='constant',
                                constant_values=0.0)
-            pad_w = params.padding.w
-            pad_h = params.padding.h
-        else:
-            pad_w = pad_h = 0
-
-        out_h = 0
-        for h_idx in range(0, in_dims.h - params.filter_dim.h + pad_h + 1,
-                           params.stride.h):
-            out_w = 0
-            for w_idx in range(0, in_dims.w - params.filter_dim.w + pad_w + 1,
-                               params.stride.w):
-                # accumulate - potentially with different Q
-                out_slice_args = out_dims.srange(h=out_h, w=out_w)
-                in_slice_args = in_dims.srange(c=[0, out_dims.c, 1],
-                                               h=[h_idx, h_idx +
-                                                   params.filter_dim.h, 1],
-                                               w=[w_idx, w_idx + params.filter_dim.w, 1])
-
-                res_shape = out_tensor[out_slice_args].shape
-                sum_filter = np.sum(in_tensor[in_slice_args], dtype=calc_dtype,
-                                    axis=(out_dims.keys.index('h'), out_dims.keys.index('w'))).reshape(res_shape)
-                sum_filter = np.multiply(sum_filter, pool_factor)
-                out_tensor[out_slice_args] = sum_filter
-                out_w += 1
-            out_h += 1
+
+        sum_filter = sum_pool(in_tensor, in_dims.keys.index('h') + lead, in_dims.keys.index('w') + lead,
+                              out_dims.h, out_dims.w, params.filter_dim.h, params.filter_dim.w,
+                              params.stride.h, params.stride.w, calc_dtype=calc_dtype)
+        out_tensor = np.multiply(sum_filter, pool_factor).reshape(
+            in_tensor.shape[:lead] + tuple(out_dims.shape))
 
         return qrec.get_outputs(params, [out_tensor], ktype="float")
 
 
 @params_type(MaxPoolNode)
 @qrec_type('float')
+@batched_execute
 class MaxPoolingFloat(KernelBase):
 
     @classmethod
@@ -99,45 +84,29 @@ class MaxPoolingFloat(KernelBase):
 
         in_tensor = qrec.prepare_inputs(params, in_tensors, ktype="float")[0]
         in_dims, out_dims = params.in_dims[0], params.out_dims[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
 
         calc_dtype = qrec.out_qs[0].dtype if qrec.ktype.startswith(
             'float') else np.float32
-        out_tensor = np.zeros(out_dims.shape, dtype=calc_dtype)
-
         if params.padding.h + params.padding.w > 0:
             in_tensor = np.pad(in_tensor,
-                               params.padding.numpy_pad_shape(in_dims),
+                               [(0, 0)] * lead + params.padding.numpy_pad_shape(in_dims),
                                mode='constant',
                                constant_values=0.0)
-            pad_w = params.padding.w
-            pad_h = params.padding.h
-        else:
-            pad_w = pad_h = 0
-
-        out_h = 0
-        for h_idx in range(0, in_dims.h - params.filter_dim.h + pad_h + 1,
-                           params.stride.h):
-            out_w = 0
-            for w_idx in range(0, in_dims.w - params.filter_dim.w + pad_w + 1,
-                               params.stride.w):
-                # accumulate - potentially with different Q
-                out_slice_args = out_dims.srange(h=out_h, w=out_w)
-                in_slice_args = in_dims.srange(c=[0, out_dims.c, 1],
-                                               h=[h_idx, h_idx +
-                                                   params.filter_dim.h, 1],
-                                               w=[w_idx, w_idx + params.filter_dim.w, 1])
-
-                res_shape = out_tensor[out_slice_args].shape
-                out_tensor[out_slice_args] = np.max(in_tensor[in_slice_args].view(np.ndarray),
-                                                    axis=(out_dims.keys.index('h'), out_dims.keys.index('w'))).reshape(res_shape)
-                out_w += 1
-            out_h += 1
+
+        out_tensor = max_pool(in_tensor.view(np.ndarray), in_dims.keys.index('h') + lead,
+                              in_dims.keys.index('w') + lead,
+                              out_dims.h, out_dims.w, params.filter_dim.h, params.filter_dim.w,
+                              params.stride.h, params.stride.w)
+        out_tensor = out_tensor.astype(calc_dtype).reshape(in_tensor.shape[:lead] + tuple(out_dims.shape))
 
         return qrec.get_outputs(params, [out_tensor], ktype="float")
 
 
 @params_type(GlobalAveragePoolNode)
 @qrec_type('float')
+@batched_execute
 class GlobalAveragePoolFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -149,19 +118,24 @@ class GlobalAveragePoolFloat32(KernelBase):
             qrec = AllFloatQRec()
         in_tensor = qrec.prepare_inputs(params, in_tensors, ktype="float")[0]
 
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
+        axis = tuple(idx + lead for idx in params.axis)
+
         calc_dtype = qrec.out_qs[0].dtype if qrec.ktype.startswith(
             'float') else np.float32
-        sum_by_chan = np.sum(in_tensor, dtype=calc_dtype, axis=tuple(
-            params.axis), keepdims=params.keep_dims)
+        sum_by_chan = np.sum(in_tensor, dtype=calc_dtype, axis=axis, keepdims=params.keep_dims)
         sz = reduce(lambda x, y: x * y, [i for idx,
-                                         i in enumerate(in_tensor.shape) if idx in params.axis])
+                                         i in enumerate(in_tensor.shape) if idx in axis])
 
         return qrec.get_outputs(params,
-                                [(sum_by_chan / sz).reshape(params.out_dims[0].shape).astype(qrec.out_qs[0].dtype)],
+                                [(sum_by_chan / sz).reshape(
+                                    in_tensor.shape[:lead] + tuple(params.out_dims[0].shape)).astype(qrec.out_qs[0].dtype)],
                                 ktype="float")
 
 @params_type(GlobalMaxPoolNode)
 @qrec_type('float')
+@batched_execute
 class GlobalMaxPoolFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -172,13 +146,16 @@ class GlobalMaxPoolFloat32(KernelBase):
         if qrec is None:
             qrec = AllFloatQRec()
         in_tensor = qrec.prepare_inputs(params, in_tensors, ktype="float")[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
 
         return qrec.get_outputs(params, [np.max(in_tensor,
-                                                axis=tuple(params.axis),
+                                                axis=tuple(idx + lead for idx in params.axis),
                                                 keepdims=params.keep_dims)], ktype="float")
 
 @params_type(GlobalMinPoolNode)
 @qrec_type('float')
+@batched_execute
 class GlobalMinPoolFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -189,13 +166,16 @@ class GlobalMinPoolFloat32(KernelBase):
         if qrec is None:
             qrec = AllFloatQRec()
         in_tensor = qrec.prepare_inputs(params, in_tensors, ktype="float")[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
 
         return qrec.get_outputs(params, [np.min(in_tensor,
-                                                axis=tuple(params.axis),
+                                                axis=tuple(idx + lead for idx in params.axis),
                                                 keepdims=params.keep_dims)], ktype="float")
 
 @params_type(GlobalSumPoolNode)
 @qrec_type('float')
+@batched_execute
 class GlobalSumPoolFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -206,7 +186,9 @@ class GlobalSumPoolFloat32(KernelBase):
         if qrec is None:
             qrec = AllFloatQRec()
         in_tensor = qrec.prepare_inputs(params, in_tensors, ktype="float")[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
 
         return qrec.get_outputs(params, [np.sum(in_tensor,
-                                                axis=tuple(params.axis),
+                                                axis=tuple(idx + lead for idx in params.axis),
                                                 keepdims=params.keep_dims)], ktype="float")
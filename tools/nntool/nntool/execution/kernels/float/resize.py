@@ -13,13 +13,12 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import math
-
 import numpy as np
 from nntool.graph.types import (BilinearResizerNode,
                          NearestNeighborResizerNode)
 from nntool.execution.kernels.kernel_base import KernelBase, params_type, qrec_type
 from nntool.quantization.new_qrec import AllFloatQRec, QRec
+from nntool.utils.numpy_resize import float_bilinear_axis, float_nearest_axis
 
 
 @params_type(BilinearResizerNode)
@@ -37,30 +36,25 @@ class BilinearResizerFloat32(KernelBase):
         in_dim, out_dim = params.in_dims[0], params.out_dims[0]
         in_tensor = in_tensor.transpose(
             in_dim.transpose_to_order(("h", "w", "c")))
-        w_out = out_dim.w
-        h_out = out_dim.h
-        c_out = out_dim.c
-        w_in = in_dim.w
-        h_in = in_dim.h
-        wstep = (w_in - 1) / w_out
-        hstep = (h_in - 1) / h_out
-        out_tensor = np.empty((h_out, w_out, c_out))
         out_dtype = qrec.out_qs[0].dtype if qrec.ktype.startswith(
             'float') else np.float32
-        for i in range(h_out):
-            y_l, y_h = math.floor(hstep * i), math.ceil(hstep * i)
-            hc = out_dtype((hstep * i) - y_l)
-            for j in range(w_out):
-                x_l, x_h = math.floor(wstep * j), math.ceil(wstep * j)
-                wc = out_dtype((wstep * j) - x_l)
-                P1 = in_tensor[y_l, x_l, :]
-                P2 = in_tensor[y_l, x_h, :]
-                P3 = in_tensor[y_h, x_l, :]
-                P4 = in_tensor[y_h, x_h, :]
-                out_tensor[i, j, :] = P1 * (out_dtype(1) - wc) * (out_dtype(1) - hc) \
-                    + P2 * wc * (out_dtype(1) - hc) \
-                    + P3 * (out_dtype(1) - wc) * hc \
-                    + P4 * wc * hc
+        y_l, y_h, hfrac = float_bilinear_axis(in_dim.h, out_dim.h)
+        x_l, x_h, wfrac = float_bilinear_axis(in_dim.w, out_dim.w)
+        # the coefficients are calculated in out_dtype and take the dtype they would
+        # have as scalars multiplying the input so the results match a per pixel loop
+        calc_dtype = np.result_type(in_tensor, out_dtype(1))
+        one = out_dtype(1)
+        hc = hfrac.astype(out_dtype)
+        wc = wfrac.astype(out_dtype)
+        hc, hc_inv = [arr.astype(calc_dtype)[:, None, None] for arr in (hc, one - hc)]
+        wc, wc_inv = [arr.astype(calc_dtype)[None, :, None] for arr in (wc, one - wc)]
+        rows_l = in_tensor[y_l]
+        rows_h = in_tensor[y_h]
+        out_tensor = np.empty((out_dim.h, out_dim.w, out_dim.c))
+        out_tensor[...] = rows_l[:, x_l] * wc_inv * hc_inv \
+            + rows_l[:, x_h] * wc * hc_inv \
+            + rows_h[:, x_l] * wc_inv * hc \
+            + rows_h[:, x_h] * wc * hc
 
         out_tensor = out_tensor.transpose(
             out_dim.transpose_from_order(("h", "w", "c")))
@@ -88,21 +82,9 @@ class NearestNeighborResizerFloat32(KernelBase):
         h_in = in_dim.h
 
         if OLD_LOGIC:
-            c_out = out_dim.c
-            if w_in == 1 and w_out == 1:
-                wstep = 1
-            else:
-                wstep = (w_in - 1) / (w_out - 1)
-            if h_in == 1 and h_out == 1:
-                hstep = 1
-            else:
-                hstep = (h_in - 1) / (h_out - 1)
-            out_tensor = np.empty((h_out, w_out, c_out))
-            for i in range(h_out):
-                h_rounded = int(round(hstep * i))
-                for j in range(w_out):
-                    w_rounded = int(round(wstep * j))
-                    out_tensor[i, j, :] = in_tensor[h_rounded, w_rounded, :]
+            out_tensor = np.empty((h_out, w_out, out_dim.c))
+            out_tensor[...] = in_tensor[float_nearest_axis(h_in, h_out)[:, None],
+                                        float_nearest_axis(w_in, w_out)]
 
         else:
             def per_axis(in_sz, out_sz):
@@ -117,13 +117,22 @@ class RnnFloat32Mixin():
             elif isinstance(params, (GRUNode, RNNNode)):
                 DiagCollector.active_set('__rnn_quant')
 
+        # the input contributions do not depend on the state so are calculated for all the
+        # cells at once. This does not accumulate in the same order as a dot product per cell
+        # so the result can differ in the last bit.
+        inputs = cls.input_kernel(params, args, in_tensor)
+
         for idx in range(params.n_cells):
+            if idx >= params.n_input_cells:
+                cell_inputs = None
+            else:
+                cell_inputs = {gate: val[idx] for gate, val in inputs.items()}
             if isinstance(params, LSTMNode):
                 res, new_i_state, new_c_state = cls.step_kernel(
-                    params, args, idx, in_tensor, details=details)
+                    params, args, idx, in_tensor, details=details, cell_inputs=cell_inputs)
             else:
                 res, new_i_state = cls.step_kernel(
-                    params, args, idx, in_tensor, details=details)
+                    params, args, idx, in_tensor, details=details, cell_inputs=cell_inputs)
             if idx >= (params.n_cells - params.n_output_cells):
                 out_tensor[out_idx] = res
                 out_idx += 1
@@ -197,11 +206,20 @@ class RnnFloat32Mixin():
 @params_type(RNNNode)
 @qrec_type('float')
 class RNNFloat32(RnnFloat32Mixin, KernelBase):
+    @classmethod
+    def input_kernel(cls, params: RNNNode,
+                     args: Mapping[str, np.ndarray],
+                     input_tensor: np.ndarray):
+        inputs = {'i': input_tensor.dot(args['i_2_i_w'].T)}
+        DiagCollector.record_each('input_dot', inputs['i'], node=params)
+        return inputs
+
     @classmethod
     def step_kernel(cls, params: RNNNode,
                     args: Mapping[str, np.ndarray],
                     idx: int,
                     input_tensor: np.ndarray,
+                    cell_inputs=None,
                     **kwargs):
 
         del kwargs
@@ -210,10 +228,8 @@ class RNNFloat32(RnnFloat32Mixin, KernelBase):
         # and the input and state vertically
 
         # For each cell: compute input_weight * input if there is an input
-        if idx < params.n_input_cells:
-            input_gate_scratch = args['i_2_i_w'].dot(input_tensor[idx])
-            DiagCollector.record(
-                'input_dot', input_gate_scratch, node=params)
+        if cell_inputs is not None:
+            input_gate_scratch = cell_inputs['i']
 
         # For each cell: compute recurrent_weight * output_state
         state_scratch = args['r_2_i_w'].dot(args['i_state'])
@@ -238,11 +254,22 @@ class RNNFloat32(RnnFloat32Mixin, KernelBase):
 @params_type(GRUNode)
 @qrec_type('float')
 class GRUFloat32(RnnFloat32Mixin, KernelBase):
+    @classmethod
+    def input_kernel(cls, params: GRUNode,
+                     args: Mapping[str, np.ndarray],
+                     input_tensor: np.ndarray):
+        inputs = {gate: input_tensor.dot(args[f'w_2_{gate}_w'].T)
+                  for gate in ['z', 'r', 'h']}
+        DiagCollector.record_each('z_gate_inp', inputs['z'], node=params)
+        DiagCollector.record_each('r_gate_inp', inputs['r'], node=params)
+        return inputs
+
     @classmethod
     def step_kernel(cls, params: GRUNode,
                     args: Mapping[str, np.ndarray],
                     idx: int,
                     input_tensor: np.ndarray,
+                    cell_inputs=None,
                     **kwargs):
 
         del kwargs
@@ -252,11 +279,9 @@ class GRUFloat32(RnnFloat32Mixin, KernelBase):
         r_gate_scratch = 0
 
         DiagCollector.record('z_weigths', args['w_2_z_w'], node=params)
-        if idx < params.n_input_cells:
-            z_gate_scratch += args['w_2_z_w'].dot(input_tensor[idx])
-            r_gate_scratch += args['w_2_r_w'].dot(input_tensor[idx])
-            DiagCollector.record('z_gate_inp', z_gate_scratch, node=params)
-            DiagCollector.record('r_gate_inp', r_gate_scratch, node=params)
+        if cell_inputs is not None:
+            z_gate_scratch += cell_inputs['z']
+            r_gate_scratch += cell_inputs['r']
 
         # zt = f(Xt*(Wz^T) + Ht-1*(Rz^T) + Wbz + Rbz)
         z_gate_state = args['r_2_z_w'].dot(args['h_state'])
@@ -299,8 +324,8 @@ class GRUFloat32(RnnFloat32Mixin, KernelBase):
                 node=params)
 
         h_gate_input = args['w_h_b'].copy()
-        if idx < params.n_input_cells:
-            h_gate_input += args['w_2_h_w'].dot(input_tensor[idx])
+        if cell_inputs is not None:
+            h_gate_input += cell_inputs['h']
         DiagCollector.record(
             'h_gate_inp', h_gate_input,
             node=params)
@@ -323,11 +348,23 @@ class GRUFloat32(RnnFloat32Mixin, KernelBase):
 @params_type(LSTMNode)
 @qrec_type('float')
 class LSTMFloat32(RnnFloat32Mixin, KernelBase):
+    @classmethod
+    def input_kernel(cls, params: LSTMNode,
+                     args: Mapping[str, np.ndarray],
+                     input_tensor: np.ndarray):
+        inputs = {gate: input_tensor.dot(args[f'i_2_{gate}_w'].T)
+                  for gate in ['i', 'f', 'c', 'o']
+                  if args.get(f'i_2_{gate}_w') is not None}
+        for gate, val in inputs.items():
+            DiagCollector.record_each(f'{gate}_gate_i', val.astype(args[f'{gate}_b'].dtype), node=params)
+        return inputs
+
     @classmethod
     def step_kernel(cls, params: LSTMNode,
                     args: Mapping[str, np.ndarray],
                     idx: int,
                     input_tensor: np.ndarray,
+                    cell_inputs=None,
                     **kwargs):
 
         del kwargs
@@ -355,17 +392,12 @@ class LSTMFloat32(RnnFloat32Mixin, KernelBase):
         # and the input and state vertically
 
         # For each cell: compute input_weight * input if there is an input
-        if idx < params.n_input_cells:
+        if cell_inputs is not None:
             if not use_cifg:
-                input_gate_scratch += args['i_2_i_w'].dot(input_tensor[idx]).astype(input_gate_scratch.dtype)
-            # in = ScaleW * ScaleI
-            forget_gate_scratch += args['i_2_f_w'].dot(input_tensor[idx]).astype(forget_gate_scratch.dtype)
-            cell_scratch += args['i_2_c_w'].dot(input_tensor[idx]).astype(cell_scratch.dtype)
-            output_gate_scratch += args['i_2_o_w'].dot(input_tensor[idx]).astype(output_gate_scratch.dtype)
-            DiagCollector.record('i_gate_i', input_gate_scratch, node=params)
-            DiagCollector.record('f_gate_i', forget_gate_scratch, node=params)
-            DiagCollector.record('c_gate_i', cell_scratch, node=params)
-            DiagCollector.record('o_gate_i', output_gate_scratch, node=params)
+                input_gate_scratch += cell_inputs['i'].astype(input_gate_scratch.dtype)
+            forget_gate_scratch += cell_inputs['f'].astype(forget_gate_scratch.dtype)
+            cell_scratch += cell_inputs['c'].astype(cell_scratch.dtype)
+            output_gate_scratch += cell_inputs['o'].astype(output_gate_scratch.dtype)
 
         # For each cell: compute recurrent_weight * output_state
         if not use_cifg:
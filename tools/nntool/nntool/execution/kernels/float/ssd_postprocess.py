@@ -20,7 +20,8 @@ from nntool.execution.kernels.kernel_base import KernelBase, params_type, qrec_t
 from nntool.quantization.new_qrec import AllFloatQRec, QRec
 from nntool.utils.ssd_utils import (CNTX_IDX, CNTY_IDX, H_IDX, W_IDX, XMAX_IDX,
                              XMIN_IDX, YMAX_IDX, YMIN_IDX, convert_cnts2cors, convert_cors2cnts,
-                             rect_intersect_area, rect_union_area)
+                             nms_alive, nms_indexes, rect_intersect_area, rect_union_area,
+                             sort_scores_descending)
 
 
 @params_type(SSDDetectorNode)
@@ -38,6 +39,57 @@ class SSDDetectorFloat32(KernelBase):
         scores = in_tensors[1]
         anchors = in_tensors[2]
 
+        # candidates are taken class by class until there are more than max_bb_before_nms
+        # the decode is carried out in double since the reference kernel works on scalars
+        class_idx, box_idx = np.nonzero(
+            scores[:, 1:].T.astype(np.float64) > params.nms_score_threshold)
+        class_idx = class_idx[:params.max_bb_before_nms + 1] + 1
+        box_idx = box_idx[:params.max_bb_before_nms + 1]
+        offset = offsets[box_idx].astype(np.float64)
+        anchor = anchors[box_idx].astype(np.float64)
+        xcenter = (offset[:, CNTX_IDX]/params.x_scale) * anchor[:, W_IDX] + anchor[:, CNTX_IDX]
+        ycenter = (offset[:, CNTY_IDX]/params.y_scale) * anchor[:, H_IDX] + anchor[:, CNTY_IDX]
+        half_h = 0.5 * np.exp(offset[:, H_IDX]/params.h_scale) * anchor[:, H_IDX]
+        half_w = 0.5 * np.exp(offset[:, W_IDX]/params.w_scale) * anchor[:, W_IDX]
+        bboxes = np.stack([ycenter-half_h, xcenter-half_w, ycenter+half_h, xcenter+half_w], axis=1)
+        bbox_scores = scores[box_idx, class_idx]
+
+        order = sort_scores_descending(bbox_scores)
+        bboxes, bbox_scores, class_idx = bboxes[order], bbox_scores[order], class_idx[order]
+
+        iou_threshold = params.nms_iou_threshold
+        alive = nms_alive(
+            bboxes,
+            lambda intersection, union: intersection >= (iou_threshold * union),
+            classes=class_idx)
+        alive = np.flatnonzero(alive)[:params.max_detections]
+        out_idx = len(alive)
+
+        out_boxes = np.zeros((params.max_detections, 4), dtype=qrec.out_qs[0].dtype)
+        out_classes = np.zeros(params.max_detections, dtype=qrec.out_qs[1].dtype)
+        out_scores = np.zeros(params.max_detections, dtype=qrec.out_qs[2].dtype)
+        out_boxes[:out_idx] = bboxes[alive]
+        out_classes[:out_idx] = class_idx[alive]
+        out_scores[:out_idx] = bbox_scores[alive]
+
+        outputs = [out_boxes, out_classes, out_scores]
+        if params.output_detection_count:
+            outputs.append(np.array([out_idx]))
+        return qrec.get_outputs(params, outputs, ktype="float")
+
+    @classmethod
+    def execute_reference(cls, params,
+                          in_tensors,
+                          qrec: QRec,
+                          **kwargs):
+        """Scalar implementation kept as the reference for execute"""
+        if qrec is None:
+            qrec = AllFloatQRec()
+        in_tensors = qrec.prepare_inputs(params, in_tensors, ktype="float")
+        offsets = in_tensors[0]
+        scores = in_tensors[1]
+        anchors = in_tensors[2]
+
         anchors_type = "centers"
         if anchors_type == 'centers':
             anchors_cnts = anchors
@@ -123,6 +175,24 @@ class NMSKernelFloat32(KernelBase):
             qrec = AllFloatQRec()
         boxes = in_tensors[0][0] if not params.center_point_box else convert_cnts2cors(in_tensors[0][0])
         scores = in_tensors[1][0]
+        iou_threshold = params.nms_iou_threshold
+        return qrec.get_outputs(
+            params,
+            [nms_indexes(boxes, scores, params.nms_score_threshold, params.max_output_boxes_per_class,
+                         lambda intersection, union: intersection >= (
+                             iou_threshold * union.astype(np.float64)))],
+            ktype="float")
+
+    @classmethod
+    def execute_reference(cls, params,
+                          in_tensors,
+                          qrec: QRec,
+                          **kwargs):
+        """Scalar implementation kept as the reference for execute"""
+        if qrec is None:
+            qrec = AllFloatQRec()
+        boxes = in_tensors[0][0] if not params.center_point_box else convert_cnts2cors(in_tensors[0][0])
+        scores = in_tensors[1][0]
         n_boxes = len(scores[0])
         n_classes = len(scores)
 
@@ -16,8 +16,8 @@
 from typing import cast as typing_cast
 
 import numpy as np
-from nntool.execution.kernels.kernel_base import (KernelBase, params_type,
-                                                  qrec_type)
+from nntool.execution.kernels.kernel_base import (KernelBase, batch_safe,
+                                                  params_type, qrec_type)
 from nntool.graph.types import (BatchToSpaceNode, ConcatNode,
                                 ConstantInputNode, CopyNode, ExpandNode,
                                 GatherNode, InputNode, OutputNode, RepeatNode,
@@ -59,6 +59,7 @@ class InputFloat32(KernelBase):
 
 @params_type(OutputNode)
 @qrec_type('float')
+@batch_safe
 class OutputFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -243,6 +244,7 @@ class GatherAny(KernelBase):
 
 @params_type(CopyNode)
 @qrec_type('any')
+@batch_safe
 class CopyFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -283,6 +285,7 @@ class ExpandFloat32(KernelBase):
 
 @params_type(NoOPNode)
 @qrec_type('any')
+@batch_safe
 class NoOPFloat32(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -28,3 +28,13 @@ class FusionNoopKernel(KernelBase):
         in_tensor = in_tensors[params.idx]
         in_tensor = in_tensor.reshape(params.dims.shape)
         return [in_tensor]
+
+    @classmethod
+    def execute_batch(cls, params,
+                      in_tensors,
+                      qrec: QRec,
+                      **kwargs):
+        # reshaping the sample axes keeps constants broadcast along the batch axis
+        in_tensor = in_tensors[params.idx]
+        in_tensor = in_tensor.reshape((in_tensor.shape[0], ) + tuple(params.dims.shape))
+        return [in_tensor]
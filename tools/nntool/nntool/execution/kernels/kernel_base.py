@@ -13,7 +13,7 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from typing import Sequence
+from typing import Optional, Sequence
 
 import numpy as np
 from nntool.graph.types import NNNodeBase
@@ -23,12 +23,65 @@ from nntool.quantization.new_qrec import QRec
 class KernelBase():
     PARAMS_TYPE = None
     QREC_TYPE = None
+    BATCH_SAFE = False
+    BATCHED_EXECUTE = False
 
     @classmethod
     def execute(cls, params: NNNodeBase, in_tensors: Sequence[np.ndarray],
                 qrec: QRec, **kwargs):
         pass
 
+    @classmethod
+    def execute_batch(cls, params: NNNodeBase, in_tensors: Sequence[np.ndarray],
+                      qrec: QRec, **kwargs):
+        """Execute on tensors that carry a leading batch axis. Kernels marked batch_safe
+        are elementwise so are called once on the whole batch. Kernels marked
+        batched_execute are called once on the whole batch with the batched keyword set.
+        Kernels with weights override this. Otherwise the kernel is called once per
+        sample and the outputs are stacked on the batch axis."""
+        if cls.BATCH_SAFE:
+            return cls.execute(params, in_tensors, qrec, **kwargs)
+        if cls.BATCHED_EXECUTE and cls.unbatch_inputs(in_tensors, qrec, ()) is not None:
+            return cls.execute(params, in_tensors, qrec, batched=True, **kwargs)
+        batch_size = next(len(tensor) for tensor in in_tensors if tensor is not None)
+        sample_outputs = [
+            cls.execute(params,
+                        [tensor[batch_idx] if tensor is not None else None
+                         for tensor in in_tensors],
+                        qrec, **kwargs)
+            for batch_idx in range(batch_size)]
+        return [np.stack([outputs[out_idx] for outputs in sample_outputs])
+                for out_idx in range(len(sample_outputs[0]))]
+
+    @staticmethod
+    def is_batch_invariant(tensor: np.ndarray) -> bool:
+        """True if tensor is the same for every sample of the batch. Constants are
+        broadcast along the batch axis by the graph executer so have a zero stride."""
+        return tensor is None or (tensor.ndim > 0 and tensor.strides[0] == 0)
+
+    @classmethod
+    def unbatch_inputs(cls, in_tensors: Sequence[np.ndarray], qrec: QRec,
+                       shared_idxs: Sequence[int]) -> Optional[Sequence[np.ndarray]]:
+        """Removes the batch axis from the inputs in shared_idxs (weights, biases, etc.)
+        so that the kernel can process the other inputs for the whole batch in one call.
+        Returns None if the kernel must be executed per sample. That is the case if one of
+        the shared inputs differs between samples or if a batched input or the output is
+        quantized per channel since the channel scales are laid out on the sample shape."""
+        if not all(cls.is_batch_invariant(in_tensors[idx])
+                   for idx in shared_idxs if idx < len(in_tensors)):
+            return None
+        batched_qtypes = [qrec.in_qs[idx] for idx, tensor in enumerate(in_tensors)
+                          if idx not in shared_idxs and tensor is not None] + [qrec.out_qs[0]]
+        if any(getattr(qtype, 'quantized_dimension', None) is not None for qtype in batched_qtypes):
+            return None
+        return [tensor[0] if idx in shared_idxs and tensor is not None else tensor
+                for idx, tensor in enumerate(in_tensors)]
+
+    @staticmethod
+    def batch_transpose(transpose: Sequence[int]) -> Sequence[int]:
+        """Extends a transpose of a sample to a tensor with a leading batch axis"""
+        return [0] + [idx + 1 for idx in transpose]
+
     @staticmethod
     def qrec_type(*args):
         return KernelBase.property_register("QREC_TYPE", args)
@@ -37,6 +90,16 @@ class KernelBase():
     def params_type(*args):
         return KernelBase.property_register("PARAMS_TYPE", args)
 
+    @staticmethod
+    def batch_safe(cls):
+        cls.BATCH_SAFE = True
+        return cls
+
+    @staticmethod
+    def batched_execute(cls):
+        cls.BATCHED_EXECUTE = True
+        return cls
+
     @staticmethod
     def property_register(name, value):
 
@@ -51,5 +114,26 @@ class KernelBase():
         return f"execute {cls}: {cls.PARAMS_TYPE} {cls.QREC_TYPE}"
 
 
+class MatMulBatchMixin():
+    @classmethod
+    def execute_batch(cls, params: NNNodeBase, in_tensors: Sequence[np.ndarray],
+                      qrec: QRec, **kwargs):
+        """Matrix multiplications broadcast over leading axes so the batch axis is
+        carried through in one call. The second matrix and the biases lose their batch
+        axis if they are constants. Inputs of a rank that changes the meaning of the
+        product once a batch axis is added are executed per sample."""
+        mat2_shared = cls.is_batch_invariant(in_tensors[1])
+        sample_ranks = [tensor.ndim - 1 for tensor in in_tensors[0:2]]
+        if (min(sample_ranks) >= 2 and
+                (sample_ranks[0] >= sample_ranks[1] if mat2_shared else sample_ranks[0] == sample_ranks[1])):
+            sample_in_tensors = cls.unbatch_inputs(
+                in_tensors, qrec, (1, 2) if mat2_shared else (2, ))
+            if sample_in_tensors is not None:
+                return cls.execute(params, sample_in_tensors, qrec, batched=True, **kwargs)
+        return super().execute_batch(params, in_tensors, qrec, **kwargs)
+
+
 params_type = KernelBase.params_type
 qrec_type = KernelBase.qrec_type
+batch_safe = KernelBase.batch_safe
+batched_execute = KernelBase.batched_execute
@@ -14,9 +14,11 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import time
 from typing import Sequence
 
 import numpy as np
+from nntool.execution.kernel_profiler import KernelProfiler
 from nntool.graph.types import NNNodeBase
 from nntool.quantization.handlers_helpers import get_all_subclasses
 from nntool.quantization.new_qrec import AllFloatQRec, QRec
@@ -48,23 +50,56 @@ HANDLERS = get_all_backend_handlers()
 
 class KernelExecuter():
     @classmethod
-    def execute(cls, params: NNNodeBase, input_tensors: Sequence[np.ndarray],
-                qrec: QRec, details: str = None) -> Sequence[np.ndarray]:
+    def get_handler(cls, params: NNNodeBase, qrec: QRec):
         if params.__class__ not in HANDLERS:
             raise ValueError(
                 f"no handlers found for {params.__class__.__name__}")
         handlers = HANDLERS[params.__class__]
-        if qrec is None:
-            qrec = AllFloatQRec()
         handler = handlers.get(qrec.ktype)
         if handler is None:
             handler = handlers.get('any')
         if handler is None:
             raise ValueError(
                 f"no handlers found for {params.__class__.__name__} quantization {qrec.ktype}")
+        return handler
+
+    @classmethod
+    def execute(cls, params: NNNodeBase, input_tensors: Sequence[np.ndarray],
+                qrec: QRec, details: str = None, handler=None) -> Sequence[np.ndarray]:
+        if qrec is None:
+            qrec = AllFloatQRec()
+        if handler is None:
+            handler = cls.get_handler(params, qrec)
 
+        profiler = KernelProfiler.active()
+        if profiler is not None:
+            start = time.perf_counter()
         output_tensors = handler.execute(params, input_tensors,
                                          qrec, details=details,
                                          qname=qrec.ktype)
+        if profiler is not None:
+            profiler.record_kernel(params, handler, qrec.ktype, start, time.perf_counter(),
+                                   input_tensors, output_tensors)
+
+        return output_tensors
+
+    @classmethod
+    def execute_batch(cls, params: NNNodeBase, input_tensors: Sequence[np.ndarray],
+                      qrec: QRec, handler=None) -> Sequence[np.ndarray]:
+        """Execute a node on input tensors that carry a leading batch axis"""
+        if qrec is None:
+            qrec = AllFloatQRec()
+        if handler is None:
+            handler = cls.get_handler(params, qrec)
+
+        profiler = KernelProfiler.active()
+        if profiler is not None:
+            start = time.perf_counter()
+        output_tensors = handler.execute_batch(params, input_tensors,
+                                               qrec, details=None,
+                                               qname=qrec.ktype)
+        if profiler is not None:
+            profiler.record_kernel(params, handler, qrec.ktype, start, time.perf_counter(),
+                                   input_tensors, output_tensors)
 
         return output_tensors
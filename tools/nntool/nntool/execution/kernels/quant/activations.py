@@ -21,7 +21,7 @@ from nntool.graph.types import (HSigmoidNode,
                          ReluNode, SigmoidNode)
 from nntool.graph.types.activations import (HTanHNode,
                                      TanHNode)
-from nntool.execution.kernels.kernel_base import KernelBase, params_type, qrec_type
+from nntool.execution.kernels.kernel_base import KernelBase, batch_safe, params_type, qrec_type
 from nntool.quantization.multiplicative.mulbias import compute_in_out_scale
 from nntool.quantization.multiplicative.utils.scale import compute_scales
 from nntool.quantization.new_qrec import QRec
@@ -61,6 +61,7 @@ class LeakySymmetric(KernelBase):
 
 @params_type(LeakyNode)
 @qrec_type('scaled')
+@batch_safe
 class LeakySymmetricMult(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -94,6 +95,7 @@ def sigmoid(params,
 
 @params_type(ReluNode)
 @qrec_type('scaled')
+@batch_safe
 class ReluSymmetricMult(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -117,6 +119,7 @@ class ReluSymmetricMult(KernelBase):
 
 @params_type(ReluNode)
 @qrec_type('symmetric')
+@batch_safe
 class ReluSymmetric(KernelBase):
     @classmethod
     def execute(cls, params,
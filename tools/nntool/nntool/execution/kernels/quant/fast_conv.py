@@ -124,6 +124,8 @@ class Conv2DSymmetric(KernelBase):
         '''3D convolution by sub-matrix summing.
         '''
         details = kwargs.get('details')
+        # set by execute_batch when in_tensors[0] carries a leading batch axis
+        batched = kwargs.get('batched', False)
 
         in_dims, w_dims, out_dims = params.in_dims[0], params.filter_dim, params.out_dims[0]
         prepared_in_tensors = qrec.prepare_inputs(
@@ -142,19 +144,24 @@ class Conv2DSymmetric(KernelBase):
             details['min_acc'] = float("Infinity")
             details['max_acc'] = float("-Infinity")
 
-        in_tensor = in_tensor.transpose(
-            in_dims.transpose_to_order(['h', 'w', 'c']))
+        in_transpose = in_dims.transpose_to_order(['h', 'w', 'c'])
+        out_transpose = out_dims.transpose_from_order(['c', 'h', 'w'])
+        if batched:
+            in_transpose = cls.batch_transpose(in_transpose)
+            out_transpose = cls.batch_transpose(out_transpose)
+        in_tensor = in_tensor.transpose(in_transpose)
         if params.padding.h + params.padding.w > 0:
             if hasattr(qrec.in_qs[0], 'zero_point'):
                 const_pad = qrec.in_qs[0].zero_point[0].astype(np.int32)
             else:
                 const_pad = np.int32(0)
             in_tensor = np.pad(in_tensor,
-                               ([params.padding.t,
-                                 params.padding.b],
-                                [params.padding.l,
-                                 params.padding.r])
-                               + ([0, 0], ) * (np.ndim(in_tensor)-2),
+                               ([0, 0], ) * (1 if batched else 0)
+                               + ([params.padding.t,
+                                   params.padding.b],
+                                  [params.padding.l,
+                                   params.padding.r])
+                               + ([0, 0], ) * (np.ndim(in_tensor)-(3 if batched else 2)),
                                mode='constant',
                                constant_values=const_pad)
             pad_w = params.padding.w
@@ -245,13 +252,26 @@ class Conv2DSymmetric(KernelBase):
                 details['min_acc'], details['max_acc'] = min_acc, max_acc
 
         result = apply_multiplicative_bias(
-            qrec, params, result, 0, ktype="symmetric")
+            qrec, params, result, result.ndim - 3, ktype="symmetric")
 
-        result = result.transpose(
-            out_dims.transpose_from_order(['c', 'h', 'w']))
+        result = result.transpose(out_transpose)
 
         if qrec.out_qs[0] != acc_q:
             result = qrec.out_qs[0].reduce_from(
                 result, acc_q, allow_zero_adjust=True)
 
         return qrec.get_outputs(params, [result], ktype="symmetric")
+
+    @classmethod
+    def execute_batch(cls, params: Conv2DNode,
+                      in_tensors,
+                      qrec: QRec,
+                      **kwargs):
+        # the convolution with an intermediate reduction of the accumulator is per sample
+        acc_q = qrec.cache.get('acc_q') or qrec.in_qs[2]
+        calc_q = qrec.cache.get('calc_q') or qrec.in_qs[2]
+        if calc_q == acc_q:
+            sample_in_tensors = cls.unbatch_inputs(in_tensors, qrec, (1, 2))
+            if sample_in_tensors is not None:
+                return cls.execute(params, sample_in_tensors, qrec, batched=True, **kwargs)
+        return super().execute_batch(params, in_tensors, qrec, **kwargs)
@@ -33,6 +33,8 @@ class LinearSymmetric(KernelBase):
                 qrec: QRec,
                 **kwargs):
         details = kwargs.get('details')
+        # set by execute_batch when in_tensors[0] carries a leading batch axis
+        batched = kwargs.get('batched', False)
 
         in_dims, out_dims = params.in_dims[0], params.out_dims[0]
         prepared_in_tensors = qrec.prepare_inputs(
@@ -58,7 +60,20 @@ class LinearSymmetric(KernelBase):
             acc_tensor = np.zeros(out_dims.shape,
                                   dtype=acc_q.dtype)
 
-        if params.batch_size > 1:
+        if batched:
+            batch_size = in_tensor.shape[0]
+            acc_tensor = np.broadcast_to(acc_tensor, (batch_size, ) + acc_tensor.shape).copy()
+            # one product of the batch of input rows by the weight matrix in the calc precision
+            in_tensor = in_tensor.astype(calc_q.dtype).reshape((batch_size, in_dims.size()))
+            filt = params.filter_dim.get_filter_dims()
+            weights = weights.reshape(filt.shape).transpose(filt.transpose_to_order(['sz', 'out_c']))
+            acc_tensor += np.matmul(in_tensor, weights).reshape(acc_tensor.shape)
+            if details is not None:
+                details['min_acc'] = np.min(acc_tensor)
+                details['max_acc'] = np.max(acc_tensor)
+            acc_tensor = apply_multiplicative_bias(qrec,
+                                                   params, acc_tensor, 1, ktype="symmetric")
+        elif params.batch_size > 1:
             in_tensor = in_tensor.reshape(
                 (params.batch_size, in_dims.size()//params.batch_size)).astype(calc_q.dtype)
             acc_tensor = calc_q.expand_from(acc_tensor, acc_q)
@@ -116,3 +131,17 @@ class LinearSymmetric(KernelBase):
             acc_tensor = out_q.reduce_from(acc_tensor, acc_q, allow_zero_adjust=True)
 
         return qrec.get_outputs(params, [acc_tensor], ktype="symmetric")
+
+    @classmethod
+    def execute_batch(cls, params,
+                      in_tensors,
+                      qrec: QRec,
+                      **kwargs):
+        acc_q = qrec.cache.get('acc_q') or qrec.in_qs[2]
+        calc_q = qrec.cache.get('calc_q') or qrec.in_qs[2]
+        # the accumulation with an intermediate reduction is per sample
+        if params.batch_size == 1 and calc_q == acc_q:
+            sample_in_tensors = cls.unbatch_inputs(in_tensors, qrec, (1, 2))
+            if sample_in_tensors is not None:
+                return cls.execute(params, sample_in_tensors, qrec, batched=True, **kwargs)
+        return super().execute_batch(params, in_tensors, qrec, **kwargs)
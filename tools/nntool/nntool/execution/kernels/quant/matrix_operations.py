@@ -22,8 +22,8 @@ from nntool.graph.types import (MatMulOpNode, MatrixAddNode,
 from nntool.graph.types.expression_fusion import ExpressionFusionNode
 from nntool.graph.types.fusions import MatScaleFusionNode
 from nntool.graph.types.tensor_arithmetic import BroadcastableNodeBase, MatMulTransposedNode
-from nntool.execution.kernels.kernel_base import (KernelBase, params_type,
-                                              qrec_type)
+from nntool.execution.kernels.kernel_base import (KernelBase, MatMulBatchMixin,
+                                              params_type, qrec_type)
 from nntool.quantization.qtype import QType
 from nntool.quantization.new_qrec import QRec
 from nntool.utils.at_norm import at_norm
@@ -173,7 +173,12 @@ class ExpressionSymmetric(KernelBase):
 
         in_vars = {params.input_symbols[i]: in_tensor.copy()
                    for i, in_tensor in enumerate(in_tensors)}
-        out_vars = qrec.cache['qfunc_col'](**in_vars, track_results=results)
+        func_col = qrec.cache['qfunc_col']
+        compiled = func_col.compiled if details is None else None
+        if compiled:
+            out_vars = compiled(**in_vars)
+        else:
+            out_vars = func_col(**in_vars, track_results=results)
         out_tensors = [out_vars[out_sym_name]
                        for out_sym_name in params.output_symbols]
         if details is not None:
@@ -182,7 +187,7 @@ class ExpressionSymmetric(KernelBase):
 
 @params_type(MatMulOpNode, MatMulTransposedNode)
 @qrec_type('scaled')
-class MatMulScaled(KernelBase):
+class MatMulScaled(MatMulBatchMixin, KernelBase):
     @classmethod
     def execute(cls, params,
                 in_tensors,
@@ -191,6 +196,8 @@ class MatMulScaled(KernelBase):
 
         in_tensors = [in_tensor.astype(np.int32) for in_tensor in qrec.prepare_inputs(
             params, in_tensors, ktype="symmetric")]
+        # leading batch axis on in_tensors[0]
+        lead = 1 if kwargs.get('batched') else 0
         if isinstance(params, MatMulTransposedNode):
             mat1, mat2 = in_tensors[0], np.swapaxes(in_tensors[1], -2, -1)
         else:
@@ -201,7 +208,7 @@ class MatMulScaled(KernelBase):
         if len(in_tensors) > 2:
             biases = in_tensors[2]
             if len(biases.shape) == 1:
-                if biases.shape[0] == mat1.shape[0]:
+                if biases.shape[0] == mat1.shape[lead]:
                     biases = np.expand_dims(biases, -1)
         else:
             biases = 0
@@ -217,7 +224,7 @@ class MatMulScaled(KernelBase):
 
 @params_type(MatMulOpNode, MatMulTransposedNode)
 @qrec_type('symmetric')
-class MatMulSymmetric(KernelBase):
+class MatMulSymmetric(MatMulBatchMixin, KernelBase):
     @classmethod
     def execute(cls, params,
                 in_tensors,
@@ -226,6 +233,8 @@ class MatMulSymmetric(KernelBase):
 
         in_tensors = [in_tensor.astype(np.int32) for in_tensor in qrec.prepare_inputs(
             params, in_tensors, ktype="symmetric")]
+        # leading batch axis on in_tensors[0]
+        lead = 1 if kwargs.get('batched') else 0
 
         if isinstance(params, MatMulTransposedNode):
             mat1, mat2 = in_tensors[0], np.swapaxes(in_tensors[1], -2, -1)
@@ -235,7 +244,7 @@ class MatMulSymmetric(KernelBase):
         if len(in_tensors) > 2:
             biases = in_tensors[2]
             if len(biases.shape) == 1:
-                if biases.shape[0] == mat1.shape[0]:
+                if biases.shape[0] == mat1.shape[lead]:
                     biases = np.expand_dims(biases, -1)
         else:
             biases = 0
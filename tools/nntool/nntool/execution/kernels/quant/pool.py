@@ -20,10 +20,12 @@ from functools import reduce
 import numpy as np
 from nntool.graph.types import (AveragePoolNode, GlobalPoolingNodeBase,
                          MaxPoolNode)
-from nntool.execution.kernels.kernel_base import KernelBase, params_type, qrec_type
+from nntool.execution.kernels.kernel_base import (KernelBase, batched_execute,
+                                                  params_type, qrec_type)
 from nntool.quantization.multiplicative.mulbias import compute_in_out_scale
 from nntool.quantization.new_qrec import QRec
 from nntool.utils.at_norm import at_norm
+from nntool.utils.numpy_pool import max_pool, sum_pool
 
 LOG = logging.getLogger(__name__)
 
@@ -32,6 +34,7 @@ LOG = logging.getLogger(__name__)
 
 @params_type(AveragePoolNode)
 @qrec_type('symmetric', 'scaled')
+@batched_execute
 class AveragePoolingSymmetric(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -43,42 +46,23 @@ class AveragePoolingSymmetric(KernelBase):
         in_tensor = qrec.prepare_inputs(
             params, in_tensors, ktype="symmetric")[0]
         in_dims, out_dims = params.in_dims[0], params.out_dims[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
         filter_sz = params.filter_dim.h * params.filter_dim.w
 
         pool_factor = (1 << 16)//filter_sz
 
-        out_tensor = np.zeros(out_dims.shape, dtype=np.int32)
-
         if params.padding.h + params.padding.w > 0:
             in_tensor = np.pad(in_tensor,
-                               params.padding.numpy_pad_shape(in_dims),
+                               [(0, 0)] * lead + params.padding.numpy_pad_shape(in_dims),
                                mode='constant',
                                constant_values=qrec.in_qs[0].zero_point)
-            pad_w = params.padding.w
-            pad_h = params.padding.h
-        else:
-            pad_w = pad_h = 0
-
-        out_h = 0
-        for h_idx in range(0, in_dims.h - params.filter_dim.h + pad_h + 1,
-                           params.stride.h):
-            out_w = 0
-            for w_idx in range(0, in_dims.w - params.filter_dim.w + pad_w + 1,
-                               params.stride.w):
-                # accumulate - potentially with different Q
-                out_slice_args = out_dims.srange(h=out_h, w=out_w)
-                in_slice_args = in_dims.srange(c=[0, out_dims.c, 1],
-                                               h=[h_idx, h_idx +
-                                                   params.filter_dim.h, 1],
-                                               w=[w_idx, w_idx + params.filter_dim.w, 1])
-
-                res_shape = out_tensor[out_slice_args].shape
-                sum_filter = np.sum(in_tensor[in_slice_args], dtype=np.int32,
-                                    axis=(out_dims.keys.index('h'), out_dims.keys.index('w'))).reshape(res_shape)
-                sum_filter = np.multiply(sum_filter, pool_factor)
-                out_tensor[out_slice_args] = sum_filter
-                out_w += 1
-            out_h += 1
+
+        sum_filter = sum_pool(in_tensor, in_dims.keys.index('h') + lead, in_dims.keys.index('w') + lead,
+                              out_dims.h, out_dims.w, params.filter_dim.h, params.filter_dim.w,
+                              params.stride.h, params.stride.w, calc_dtype=np.int32)
+        out_tensor = np.multiply(sum_filter, pool_factor,
+                                 dtype=np.int32).reshape(in_tensor.shape[:lead] + tuple(out_dims.shape))
 
         return qrec.get_outputs(params, [qrec.out_qs[0].clip(at_norm(out_tensor, 16),
                                                              qrec.out_qs[0].dtype)],
@@ -87,6 +71,7 @@ class AveragePoolingSymmetric(KernelBase):
 
 @params_type(MaxPoolNode)
 @qrec_type('symmetric', 'scaled')
+@batched_execute
 class MaxPoolingSymmetric(KernelBase):
 
     @classmethod
@@ -100,37 +85,20 @@ class MaxPoolingSymmetric(KernelBase):
         in_tensor = qrec.prepare_inputs(
             params, in_tensors, ktype="symmetric")[0]
         in_dims, out_dims = params.in_dims[0], params.out_dims[0]
-
-        out_tensor = np.zeros(out_dims.shape, dtype=qrec.out_qs[0].dtype)
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
 
         if params.padding.h + params.padding.w > 0:
             in_tensor = np.pad(in_tensor,
-                               params.padding.numpy_pad_shape(in_dims),
+                               [(0, 0)] * lead + params.padding.numpy_pad_shape(in_dims),
                                mode='constant',
                                constant_values=qrec.in_qs[0].zero_point)
-            pad_w = params.padding.w
-            pad_h = params.padding.h
-        else:
-            pad_w = pad_h = 0
-
-        out_h = 0
-        for h_idx in range(0, in_dims.h - params.filter_dim.h + pad_h + 1,
-                           params.stride.h):
-            out_w = 0
-            for w_idx in range(0, in_dims.w - params.filter_dim.w + pad_w + 1,
-                               params.stride.w):
-                # accumulate - potentially with different Q
-                out_slice_args = out_dims.srange(h=out_h, w=out_w)
-                in_slice_args = in_dims.srange(c=[0, out_dims.c, 1],
-                                               h=[h_idx, h_idx +
-                                                   params.filter_dim.h, 1],
-                                               w=[w_idx, w_idx + params.filter_dim.w, 1])
-
-                res_shape = out_tensor[out_slice_args].shape
-                out_tensor[out_slice_args] = np.max(in_tensor[in_slice_args].view(np.ndarray),
-                                                    axis=(out_dims.keys.index('h'), out_dims.keys.index('w'))).reshape(res_shape)
-                out_w += 1
-            out_h += 1
+
+        out_tensor = max_pool(in_tensor.view(np.ndarray), in_dims.keys.index('h') + lead,
+                              in_dims.keys.index('w') + lead,
+                              out_dims.h, out_dims.w, params.filter_dim.h, params.filter_dim.w,
+                              params.stride.h, params.stride.w)
+        out_tensor = out_tensor.astype(qrec.out_qs[0].dtype).reshape(in_tensor.shape[:lead] + tuple(out_dims.shape))
 
         return qrec.get_outputs(params, [out_tensor], ktype="symmetric")
 
@@ -143,6 +111,7 @@ def gap_clb(sum_):
 
 @params_type(GlobalAveragePoolNode)
 @qrec_type('scaled')
+@batched_execute
 class GlobalAveragePoolSymmetricScaled(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -154,23 +123,26 @@ class GlobalAveragePoolSymmetricScaled(KernelBase):
         in_tensor = qrec.prepare_inputs(
             params, in_tensors, ktype="symmetric")[0]
         out_dims = params.out_dims[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
+        axis = tuple(idx + lead for idx in params.axis)
         # compute_in_out_scale(qrec, in_idx=0, out_idx=0)
 
-        sum_by_chan = np.sum(in_tensor, dtype=np.int32, axis=tuple(
-            params.axis), keepdims=params.keep_dims)
+        sum_by_chan = np.sum(in_tensor, dtype=np.int32, axis=axis, keepdims=params.keep_dims)
         sz = reduce(lambda x, y: x * y, [i for idx,
-                                         i in enumerate(in_tensor.shape) if idx in params.axis])
+                                         i in enumerate(in_tensor.shape) if idx in axis])
         #res = at_norm(((sum_by_chan << 7) / sz).astype(np.int32), 7)
         res = ((sum_by_chan << 7) / sz).astype(np.int32)
         scale_mul_biases_q = qrec.cache['scale_mul_biases_q']
         res = out_tensor = scale_mul_biases_q.apply_scales(res)
         return qrec.get_outputs(params,
-                                [out_tensor.reshape(out_dims.shape)],
+                                [out_tensor.reshape(in_tensor.shape[:lead] + tuple(out_dims.shape))],
                                 ktype="symmetric")
 
 
 @params_type(GlobalAveragePoolNode)
 @qrec_type('symmetric')
+@batched_execute
 class GlobalAveragePoolSymmetricPow2(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -182,25 +154,28 @@ class GlobalAveragePoolSymmetricPow2(KernelBase):
         in_tensor = qrec.prepare_inputs(
             params, in_tensors, ktype="symmetric")[0]
         out_dims = params.out_dims[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
+        axis = tuple(idx + lead for idx in params.axis)
 
-        sum_by_chan = np.sum(in_tensor, dtype=np.int32, axis=tuple(
-            params.axis), keepdims=params.keep_dims)
+        sum_by_chan = np.sum(in_tensor, dtype=np.int32, axis=axis, keepdims=params.keep_dims)
 
         norm = (np.array([31], dtype=np.int32) -
                 gap_clb(sum_by_chan.flatten())).astype(np.int32)
         sz = reduce(lambda x, y: x * y, [i for idx,
-                                         i in enumerate(in_tensor.shape) if idx in params.axis])
+                                         i in enumerate(in_tensor.shape) if idx in axis])
         inv_wh = ((1 << norm) // sz).reshape(sum_by_chan.shape)
         out_tensor = at_norm((inv_wh * sum_by_chan),
                              norm.reshape(sum_by_chan.shape))
         return qrec.get_outputs(params,
                                 [qrec.out_qs[0].clip(
-                                    out_tensor).reshape(out_dims.shape)],
+                                    out_tensor).reshape(in_tensor.shape[:lead] + tuple(out_dims.shape))],
                                 ktype="symmetric")
 
 
 @params_type(GlobalMaxPoolNode)
 @qrec_type('symmetric', 'scaled')
+@batched_execute
 class GlobalMaxPoolSymmetric(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -211,15 +186,18 @@ class GlobalMaxPoolSymmetric(KernelBase):
         # Prepare the quantization levels
         in_tensor = qrec.prepare_inputs(
             params, in_tensors, ktype="symmetric")[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
         # if qrec.ktype == 'scaled':
         #     compute_in_out_scale(qrec, in_idx=0, out_idx=0)
         return qrec.get_outputs(params, [np.max(in_tensor,
-                                                axis=tuple(params.axis),
+                                                axis=tuple(idx + lead for idx in params.axis),
                                                 keepdims=params.keep_dims)], ktype="symmetric")
 
 
 @params_type(GlobalSumPoolNode)
 @qrec_type('symmetric', 'scaled')
+@batched_execute
 class GlobalSumPoolSymmetric(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -229,10 +207,12 @@ class GlobalSumPoolSymmetric(KernelBase):
 
         in_tensor = qrec.prepare_inputs(
             params, in_tensors, ktype="symmetric")[0]
+        # leading batch axis
+        lead = 1 if kwargs.get('batched') else 0
         # if qrec.ktype == 'scaled':
         #     compute_in_out_scale(qrec, in_idx=0, out_idx=0)
         res = np.sum(in_tensor,
-                     axis=tuple(params.axis),
+                     axis=tuple(idx + lead for idx in params.axis),
                      keepdims=params.keep_dims,
                      dtype=np.int32)
 
@@ -19,6 +19,7 @@ from nntool.graph.types import (BilinearResizerNode,
                          NearestNeighborResizerNode)
 from nntool.execution.kernels.kernel_base import KernelBase, params_type, qrec_type
 from nntool.quantization.new_qrec import QRec
+from nntool.utils.numpy_resize import fixed_bilinear_axis, fixed_nearest_axis
 
 
 @params_type(BilinearResizerNode)
@@ -34,34 +35,15 @@ class BilinearResizerSymmetric(KernelBase):
         in_dim, out_dim = params.in_dims[0], params.out_dims[0]
         in_tensor = in_tensor.transpose(
             in_dim.transpose_to_order(("h", "w", "c")))
-        w_out = out_dim.w
-        h_out = out_dim.h
-        c_out = out_dim.c
-        w_in = in_dim.w
-        h_in = in_dim.h
-        wstep = ((w_in - 1) << 16) // w_out
-        hstep = ((h_in - 1) << 16) // h_out
-        hcoeff = wcoeff = 0
-        out_tensor = np.zeros((h_out, w_out, c_out), dtype=np.int32)
-        for i in range(h_out):
-            offsetY = hcoeff >> 16
-            hc2 = (hcoeff >> 9) & 127
-            hc1 = 128 - hc2
-            wcoeff = 0
-            for j in range(w_out):
-                offsetX = wcoeff >> 16
-                wc2 = (wcoeff >> 9) & 127
-                wc1 = 128 - wc2
-                P1 = in_tensor[offsetY, offsetX, :].astype(np.int32)
-                P2 = in_tensor[offsetY+1, offsetX, :].astype(np.int32)
-                P3 = in_tensor[offsetY, offsetX+1, :].astype(np.int32)
-                P4 = in_tensor[offsetY+1, offsetX+1, :].astype(np.int32)
-                out_tensor[i, j, :] = (P1 * wc1 * hc1
-                                       + P2 * wc1 * hc2
-                                       + P3 * wc2 * hc1
-                                       + P4 * wc2 * hc2).astype(np.int32) >> 14
-                wcoeff += wstep
-            hcoeff += hstep
+        h_off, hc1, hc2 = fixed_bilinear_axis(in_dim.h, out_dim.h)
+        w_off, wc1, wc2 = fixed_bilinear_axis(in_dim.w, out_dim.w)
+        in_tensor = in_tensor.astype(np.int32)
+        # blend the two source rows then the two source columns. the integer sums are
+        # the same as blending the four corners with the product of the coefficients
+        rows = (in_tensor[h_off] * hc1[:, None, None] +
+                in_tensor[h_off + 1] * hc2[:, None, None])
+        out_tensor = (rows[:, w_off] * wc1[None, :, None] +
+                      rows[:, w_off + 1] * wc2[None, :, None]) >> 14
 
         out_tensor = out_tensor.transpose(
             out_dim.transpose_from_order(("h", "w", "c")))
@@ -81,19 +63,9 @@ class NearestNeighbourResizerSymmetric(KernelBase):
         in_dim, out_dim = params.in_dims[0], params.out_dims[0]
         in_tensor = in_tensor.transpose(
             in_dim.transpose_to_order(("h", "w", "c")))
-        w_out = out_dim.w
-        h_out = out_dim.h
-        c_out = out_dim.c
-        w_in = in_dim.w
-        h_in = in_dim.h
-        wstep = ((w_in - 1) << 16) // (w_out - 1)
-        hstep = ((h_in - 1) << 16) // (h_out - 1)
-        out_tensor = np.zeros((h_out, w_out, c_out), dtype=np.int32)
-        for i in range(h_out):
-            h_rounded = ((hstep * i) + (1 << (16 - 1))) >> 16
-            for j in range(w_out):
-                w_rounded = ((wstep * j) + (1 << (16 - 1))) >> 16
-                out_tensor[i, j, :] = in_tensor[h_rounded, w_rounded, :]
+        h_idx = fixed_nearest_axis(in_dim.h, out_dim.h)
+        w_idx = fixed_nearest_axis(in_dim.w, out_dim.w)
+        out_tensor = in_tensor[h_idx[:, None], w_idx].astype(np.int32)
 
         out_tensor = out_tensor.transpose(
             out_dim.transpose_from_order(("h", "w", "c")))
@@ -140,12 +140,23 @@ class RnnSymmetricMixin():
             [params.n_output_cells, params.n_states], dtype=qrec.out_qs[0].dtype)
         out_idx = 0
 
+        # the input contributions do not depend on the state so are calculated for all the
+        # cells at once
+        inputs = cls.input_kernel(params, args, in_tensor, qrec)
+
         for idx in range(params.n_cells):
+            if idx >= params.n_input_cells:
+                cell_inputs = None
+            elif isinstance(inputs, dict):
+                cell_inputs = {gate: val[idx] for gate, val in inputs.items()}
+            else:
+                cell_inputs = inputs[idx]
             if isinstance(params, LSTMNode):
                 res, new_i_state, new_c_state = cls.step_kernel(
-                    params, args, idx, in_tensor, qrec)
+                    params, args, idx, in_tensor, qrec, cell_inputs=cell_inputs)
             else:
-                res, new_i_state = cls.step_kernel(params, args, idx, in_tensor, qrec)
+                res, new_i_state = cls.step_kernel(
+                    params, args, idx, in_tensor, qrec, cell_inputs=cell_inputs)
             if idx >= (params.n_cells - params.n_output_cells):
                 out_tensor[out_idx] = res
                 out_idx += 1
@@ -195,50 +206,128 @@ def weights_zp(weights, zp):
     return -np.sum(weights * zp, axis=1)
 
 
+def input_zero_correction(weights_arg, input_tensor: np.ndarray):
+    """minus the sum of each cell in input_tensor times the weights zero point"""
+    return -np.sum(input_tensor.astype(INT_DTYPE) * weights_arg[1].zero_point.astype(INT_DTYPE),
+                   axis=1, keepdims=True)
+
+
+def input_dot(weights_arg, input_tensor: np.ndarray, zero_point=False):
+    """weights.dot(cell) for every cell in input_tensor less the sum of the cell times the
+    weights zero point if zero_point is set. The result is indexed by cell and is in INT_DTYPE
+    wrapping exactly as the same calculation done one cell at a time."""
+    res = input_tensor.astype(INT_DTYPE).dot(weights_arg[0].astype(INT_DTYPE).T)
+    if zero_point:
+        res = (res + input_zero_correction(weights_arg, input_tensor)).astype(INT_DTYPE)
+    return res
+
+
 @params_type(RNNNode)
 @qrec_type('scaled')
 class RNNSymmetric(RnnSymmetricMixin, KernelBase):
     @classmethod
-    def step_kernel(cls, params: GRUNode,
+    def step_kernel(cls, params: RNNNode,
                     args: Mapping[str, np.ndarray],
                     idx: int,
                     input_tensor: np.ndarray,
-                    qrec):
+                    qrec,
+                    cell_inputs=None):
         if args['i_state'][1].dtype == np.uint8:
-            return cls.step_kernelu8_u8(params, args, idx, input_tensor, qrec)
+            return cls.step_kernelu8_u8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
         if args['i_state'][1].dtype == np.uint16:
-            return cls.step_kernelu16_u8(params, args, idx, input_tensor, qrec)
+            return cls.step_kernelu16_u8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
         if args['i_state'][1].dtype == np.int16:
-            return cls.step_kernel16_8(params, args, idx, input_tensor, qrec)
-        return cls.step_kernel8_8(params, args, idx, input_tensor, qrec)
+            return cls.step_kernel16_8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
+        return cls.step_kernel8_8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
 
     @classmethod
-    def step_kernelu8_u8(cls, params: GRUNode,
+    def input_kernel(cls, params: RNNNode,
+                     args: Mapping[str, np.ndarray],
+                     input_tensor: np.ndarray,
+                     qrec):
+        """Input contributions of all the input cells indexed by cell. Intermediate values
+        are recorded one cell at a time in the same way as the values recorded by the step kernels"""
+        if args['i_state'][1].dtype == np.uint8:
+            return cls.input_kernelu8_u8(params, args, input_tensor, qrec)
+        if args['i_state'][1].dtype == np.uint16:
+            return cls.input_kernelu16_u8(params, args, input_tensor, qrec)
+        if args['i_state'][1].dtype == np.int16:
+            return cls.input_kernel16_8(params, args, input_tensor, qrec)
+        return cls.input_kernel8_8(params, args, input_tensor, qrec)
+
+    @classmethod
+    def input_kernelu8_u8(cls, params: RNNNode,
+                          args: Mapping[str, np.ndarray],
+                          input_tensor: np.ndarray,
+                          qrec):
+        scales = qrec.cache['scales']
+        input_gate_scratch = input_dot(args['i_2_i_w'], input_tensor, zero_point=True)
+        DiagCollector.record_each(
+            'input_in_inputscale', input_gate_scratch, scale=scales['inp_before_scale'], node=params)
+        input_gate_scratch = input_gate_scratch * \
+            qrec.cache['i_2_s_q'].qbiases
+        input_gate_scratch = input_gate_scratch + \
+            args['i_b'][1].attr.interleaved_values[0]
+        input_gate_scratch = input_gate_scratch >> qrec.cache['i_2_s_q'].qnorms
+        DiagCollector.record_each(
+            'input_in_statescale', input_gate_scratch, scale=scales['inp_after_scale'], node=params)
+        return input_gate_scratch
+
+    @classmethod
+    def input_kernelu16_u8(cls, params: RNNNode,
+                           args: Mapping[str, np.ndarray],
+                           input_tensor: np.ndarray,
+                           qrec):
+        scales = qrec.cache['scales']
+        # i_zp_b contains the input zero_point offset
+        # the weights zp offset is calculated as in NE16
+        input_biases = args['i_b'][1].attr.interleaved_values[0].astype(INT_DTYPE)
+        DiagCollector.record_each(
+            'input_biases', [input_biases] * len(input_tensor), scale=scales['inp_before_scale'], node=params)
+        input_gate_scratch = input_biases + input_zero_correction(args['i_2_i_w'], input_tensor)
+        DiagCollector.record_each(
+            'input_zero_correction', input_gate_scratch, scale=scales['inp_before_scale'], node=params)
+        input_gate_scratch = (input_gate_scratch + input_dot(args['i_2_i_w'], input_tensor)).astype(INT_DTYPE)
+        DiagCollector.record_each(
+            'input_in_inputscale', input_gate_scratch, scale=scales['inp_before_scale'], node=params)
+        input_gate_scratch = at_norm(
+            input_gate_scratch, qrec.cache['i_2_s_q'].pre_normalization)
+        input_gate_scratch = input_gate_scratch * \
+            qrec.cache['i_2_s_q'].qbiases
+        input_gate_scratch = at_norm(
+            input_gate_scratch, qrec.cache['i_2_s_q'].qnorms)
+        DiagCollector.record_each(
+            'input_preact', input_gate_scratch, scale=scales['act_input_scale'], node=params)
+        return input_gate_scratch
+
+    @classmethod
+    def input_kernel8_8(cls, params: RNNNode,
+                        args: Mapping[str, np.ndarray],
+                        input_tensor: np.ndarray,
+                        qrec):
+        # scale result to recurrent_weight * input_state scale
+        return scale_rnn_input(qrec, input_dot(args['i_2_i_w'], input_tensor), 1)
+
+    @classmethod
+    def input_kernel16_8(cls, params: RNNNode,
                          args: Mapping[str, np.ndarray],
-                         idx: int,
                          input_tensor: np.ndarray,
                          qrec):
+        return scale_rnn_input(qrec, input_dot(args['i_2_i_w'], input_tensor), 1)
+
+    @classmethod
+    def step_kernelu8_u8(cls, params: RNNNode,
+                         args: Mapping[str, np.ndarray],
+                         idx: int,
+                         input_tensor: np.ndarray,
+                         qrec,
+                         cell_inputs=None):
 
         scales = qrec.cache['scales']
 
         # For each cell: compute input_weight * input if there is an input
-        if idx < params.n_input_cells:
-            # calculate weights zero point * input
-            inp_weights = args['i_2_i_w'][0].astype(INT_DTYPE)
-            in_t = input_tensor[idx].astype(INT_DTYPE)
-            input_gate_scratch = - \
-                np.sum(in_t * args['i_2_i_w'][1].zero_point.astype(INT_DTYPE))
-            # now calculate gate
-            input_gate_scratch = input_gate_scratch + inp_weights.dot(in_t)
-            DiagCollector.record(
-                'input_in_inputscale', input_gate_scratch, scale=scales['inp_before_scale'], node=params)
-            input_gate_scratch = input_gate_scratch * \
-                qrec.cache['i_2_s_q'].qbiases
-            input_gate_scratch = input_gate_scratch + \
-                args['i_b'][1].attr.interleaved_values[0]
-            input_gate_scratch = input_gate_scratch >> qrec.cache['i_2_s_q'].qnorms
-            DiagCollector.record(
-                'input_in_statescale', input_gate_scratch, scale=scales['inp_after_scale'], node=params)
+        if cell_inputs is not None:
+            input_gate_scratch = cell_inputs
 
         # state * state weights
         DiagCollector.record(
@@ -288,38 +377,18 @@ class RNNSymmetric(RnnSymmetricMixin, KernelBase):
         return output_gate_scratch, args['i_state'][0]
 
     @classmethod
-    def step_kernelu16_u8(cls, params: GRUNode,
+    def step_kernelu16_u8(cls, params: RNNNode,
                           args: Mapping[str, np.ndarray],
                           idx: int,
                           input_tensor: np.ndarray,
-                          qrec):
+                          qrec,
+                          cell_inputs=None):
 
         scales = qrec.cache['scales']
 
         # For each cell: compute input_weight * input if there is an input
-        if idx < params.n_input_cells:
-            # scale result to recurrent_weight * input_state scale
-            inp_weights = args['i_2_i_w'][0].astype(INT_DTYPE)
-            in_t = input_tensor[idx].astype(INT_DTYPE)
-            # i_zp_b contains the input zero_point offset
-            # the weights zp offset is calculated as in NE16
-            DiagCollector.record(
-                'input_biases', args['i_b'][1].attr.interleaved_values[0], scale=scales['inp_before_scale'], node=params)
-            input_gate_scratch = args['i_b'][1].attr.interleaved_values[0].astype(
-                INT_DTYPE) - np.sum(in_t * args['i_2_i_w'][1].zero_point.astype(INT_DTYPE))
-            DiagCollector.record(
-                'input_zero_correction', input_gate_scratch, scale=scales['inp_before_scale'], node=params)
-            input_gate_scratch += inp_weights.dot(in_t)
-            DiagCollector.record(
-                'input_in_inputscale', input_gate_scratch, scale=scales['inp_before_scale'], node=params)
-            input_gate_scratch = at_norm(
-                input_gate_scratch, qrec.cache['i_2_s_q'].pre_normalization)
-            input_gate_scratch = input_gate_scratch * \
-                qrec.cache['i_2_s_q'].qbiases
-            input_gate_scratch = at_norm(
-                input_gate_scratch, qrec.cache['i_2_s_q'].qnorms)
-            DiagCollector.record(
-                'input_preact', input_gate_scratch, scale=scales['act_input_scale'], node=params)
+        if cell_inputs is not None:
+            input_gate_scratch = cell_inputs
 
         # For each cell: compute recurrent_weight * input_state
         state_weights = args['r_2_i_w'][0].astype(INT_DTYPE)
@@ -381,24 +450,20 @@ class RNNSymmetric(RnnSymmetricMixin, KernelBase):
         return output_gate_scratch, args['i_state'][0]
 
     @classmethod
-    def step_kernel8_8(cls, params: GRUNode,
+    def step_kernel8_8(cls, params: RNNNode,
                        args: Mapping[str, np.ndarray],
                        idx: int,
                        input_tensor: np.ndarray,
-                       qrec):
+                       qrec,
+                       cell_inputs=None):
 
         # These two sections could be combined by stacking the weights horizontally
         # and the input and state vertically
         scales = qrec.cache['scales']
 
         # For each cell: compute input_weight * input if there is an input
-        if idx < params.n_input_cells:
-            # scale result to recurrent_weight * input_state scale
-            input_gate_scratch = scale_rnn_input(
-                qrec,
-                args['i_2_i_w'][0].astype(INT_DTYPE).dot(
-                    input_tensor[idx].astype(INT_DTYPE)),
-                0)
+        if cell_inputs is not None:
+            input_gate_scratch = cell_inputs
         # biases already in recurrent_weight * input_state scale
         input_gate_scratch_state = args['i_b'][0].copy()
 
@@ -426,24 +491,20 @@ class RNNSymmetric(RnnSymmetricMixin, KernelBase):
         return output_gate_scratch, args['i_state'][0]
 
     @classmethod
-    def step_kernel16_8(cls, params: GRUNode,
+    def step_kernel16_8(cls, params: RNNNode,
                         args: Mapping[str, np.ndarray],
                         idx: int,
                         input_tensor: np.ndarray,
-                        qrec):
+                        qrec,
+                        cell_inputs=None):
 
         # These two sections could be combined by stacking the weights horizontally
         # and the input and state vertically
         scales = qrec.cache['scales']
 
         # For each cell: compute input_weight * input if there is an input
-        if idx < params.n_input_cells:
-            # scale result to recurrent_weight * input_state scale
-            input_gate_scratch = scale_rnn_input(
-                qrec,
-                args['i_2_i_w'][0].astype(INT_DTYPE).dot(
-                    input_tensor[idx].astype(INT_DTYPE)),
-                0)
+        if cell_inputs is not None:
+            input_gate_scratch = cell_inputs
         # biases already in recurrent_weight * input_state scale
         input_gate_scratch_state = args['i_b'][0].copy()
 
@@ -520,21 +581,121 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
                     args: Mapping[str, np.ndarray],
                     idx: int,
                     input_tensor: np.ndarray,
-                    qrec):
+                    qrec,
+                    cell_inputs=None):
+        if args['h_state'][1].dtype == np.uint8:
+            return cls.step_kernelu8_u8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
+        if args['h_state'][1].dtype == np.uint16:
+            return cls.step_kernelu16_u8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
+        if args['h_state'][1].dtype == np.int16:
+            return cls.step_kernel16_8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
+        return cls.step_kernel8_8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
+
+    @classmethod
+    def input_kernel(cls, params: GRUNode,
+                     args: Mapping[str, np.ndarray],
+                     input_tensor: np.ndarray,
+                     qrec):
+        """Input contributions of all the input cells indexed by cell. Intermediate values
+        are recorded one cell at a time in the same way as the values recorded by the step kernels"""
         if args['h_state'][1].dtype == np.uint8:
-            return cls.step_kernelu8_u8(params, args, idx, input_tensor, qrec)
+            return cls.input_kernelu8_u8(params, args, input_tensor, qrec)
         if args['h_state'][1].dtype == np.uint16:
-            return cls.step_kernelu16_u8(params, args, idx, input_tensor, qrec)
+            return cls.input_kernelu16_u8(params, args, input_tensor, qrec)
         if args['h_state'][1].dtype == np.int16:
-            return cls.step_kernel16_8(params, args, idx, input_tensor, qrec)
-        return cls.step_kernel8_8(params, args, idx, input_tensor, qrec)
+            return cls.input_kernel16_8(params, args, input_tensor, qrec)
+        return cls.input_kernel8_8(params, args, input_tensor, qrec)
+
+    @classmethod
+    def input_kernelu8_u8(cls, params: GRUNode,
+                          args: Mapping[str, np.ndarray],
+                          input_tensor: np.ndarray,
+                          qrec):
+        scales = qrec.cache['scales']
+        cell_inputs = {}
+        for gate in ['z', 'r', 'h']:
+            bias = args['w_h_b'][0] if gate == 'h' else args[f'{gate}_b'][1].attr.interleaved_values[0]
+            # NE16 8 bit
+            cell_inputs[gate] = input_dot(args[f'w_2_{gate}_w'], input_tensor, zero_point=True)
+            if gate != 'h':
+                DiagCollector.record_each(f'{gate}_gate_inp_before_scale', cell_inputs[gate],
+                                          scale=scales['i'][gate], node=params)
+            # add zero offset bias + norm rounding in i_2_gate_q
+            # scales z and r to r * r_w of gate and h to Q12
+            cell_inputs[gate] = cell_inputs[gate] * \
+                qrec.cache[f'w_2_{gate}_q'].qbiases
+            cell_inputs[gate] = cell_inputs[gate] + bias
+            cell_inputs[gate] = cell_inputs[gate] >> qrec.cache[f'w_2_{gate}_q'].qnorms
+            DiagCollector.record_each(f'{gate}_gate_inp', cell_inputs[gate],
+                                      scale=scales['act_in'] if gate == 'h' else scales['r'][gate],
+                                      node=params)
+        return cell_inputs
+
+    @classmethod
+    def input_kernelu16_u8(cls, params: GRUNode,
+                           args: Mapping[str, np.ndarray],
+                           input_tensor: np.ndarray,
+                           qrec):
+        scales = qrec.cache['scales']
+        cell_inputs = {}
+        for gate in ['z', 'r', 'h']:
+            bias = args['w_h_b'][0] if gate == 'h' else args[f'{gate}_b'][1].attr.interleaved_values[0]
+            cell_inputs[gate] = input_dot(args[f'w_2_{gate}_w'], input_tensor, zero_point=True) + bias
+            DiagCollector.record_each(f'{gate}_gate_inp_before_scale', cell_inputs[gate],
+                                      scale=scales['i'][gate], node=params)
+            cell_inputs[gate] = qrec.cache[f'w_2_{gate}_q'].apply_scales(cell_inputs[gate], 1)
+            if gate == 'h':
+                DiagCollector.record_each('h_gate_inp', cell_inputs[gate],
+                                          scale=scales['act_in'], node=params)
+            else:
+                DiagCollector.record_each(f'{gate}_gate_inp_after_scale', cell_inputs[gate],
+                                          scale=scales['i'][gate], node=params)
+        return cell_inputs
+
+    @classmethod
+    def input_kernel8_8(cls, params: GRUNode,
+                        args: Mapping[str, np.ndarray],
+                        input_tensor: np.ndarray,
+                        qrec):
+        scales = qrec.cache['scales']
+        cell_inputs = {gate: input_dot(args[f'w_2_{gate}_w'], input_tensor)
+                       for gate in ['z', 'r', 'h']}
+        DiagCollector.record_each('z_gate_inp', cell_inputs['z'],
+                                  scale=scales['w_2_z_w'] * scales['state'], node=params)
+        DiagCollector.record_each('r_gate_inp', cell_inputs['r'],
+                                  scale=scales['w_2_r_w'] * scales['state'], node=params)
+        cell_inputs['h'] = cell_inputs['h'] + args['w_h_b'][0]
+        if not params.rnn_same_inout_scale:
+            # scale to recurrent * state scale
+            cell_inputs['z'] = scale_gru_z_input2_z_HtxW(qrec, cell_inputs['z'], 1)
+            cell_inputs['r'] = scale_gru_r_input2_r_HtxW(qrec, cell_inputs['r'], 1)
+            cell_inputs['h'] = scale_gru_h_input2_h_HtxW(qrec, cell_inputs['h'], 1)
+        return cell_inputs
+
+    @classmethod
+    def input_kernel16_8(cls, params: GRUNode,
+                         args: Mapping[str, np.ndarray],
+                         input_tensor: np.ndarray,
+                         qrec):
+        scales = qrec.cache['scales']
+        cell_inputs = {gate: input_dot(args[f'w_2_{gate}_w'], input_tensor)
+                       for gate in ['z', 'r', 'h']}
+        DiagCollector.record_each('z_gate_inp', cell_inputs['z'],
+                                  scale=scales['w_2_z_w'] * scales['in'][0], node=params)
+        DiagCollector.record_each('r_gate_inp', cell_inputs['r'],
+                                  scale=scales['w_2_r_w'] * scales['in'][0], node=params)
+        cell_inputs['h'] = cell_inputs['h'] + args['w_h_b'][0]
+        # scale to internal
+        return {gate: scale_to(qrec, f"input_{gate}_w_internal", val, 1)
+                for gate, val in cell_inputs.items()}
 
     @classmethod
     def step_kernelu8_u8(cls, params: GRUNode,
                        args: Mapping[str, np.ndarray],
                        idx: int,
                        input_tensor: np.ndarray,
-                       qrec):
+                       qrec,
+                       cell_inputs=None):
 
         gate_scratch = {}
 
@@ -546,7 +707,6 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
         DiagCollector.record(
             'input', input_tensor[idx], scale=scales['in'][0], node=params, zero_point=qrec.in_qs[0].zero_point)
 
-        in_tensor = input_tensor[idx].astype(INT_DTYPE)
         state_tensor = args['h_state'][0].astype(INT_DTYPE)
 
         # for gate in ['z', 'h', 'r']:
@@ -554,22 +714,9 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
         #                         scale=args[f'r_2_{gate}_w'][1].scale,
         #                         node=params,
         #                         zero_point=args[f'r_2_{gate}_w'][1].zero_point)
-        if idx < params.n_input_cells:
-            for gate in ['z', 'r']:
-                # NE16 8 bit
-                gate_scratch[gate] = np.sum(in_tensor * -args[f'w_2_{gate}_w'][1].zero_point.astype(INT_DTYPE))
-                gate_scratch[gate] += args[f'w_2_{gate}_w'][0].astype(INT_DTYPE).dot(in_tensor)
-                # add zero offset bias + norm rounding in i_2_gate_q
-                # scales to r * r_w of gate
-                DiagCollector.record(f'{gate}_gate_inp_before_scale', gate_scratch[gate],
-                                    scale=scales['i'][gate], node=params)
-                gate_scratch[gate] = gate_scratch[gate] * \
-                    qrec.cache[f'w_2_{gate}_q'].qbiases
-                gate_scratch[gate] = gate_scratch[gate] + \
-                    args[f'{gate}_b'][1].attr.interleaved_values[0]
-                gate_scratch[gate] = gate_scratch[gate] >> qrec.cache[f'w_2_{gate}_q'].qnorms
-                DiagCollector.record(f'{gate}_gate_inp', gate_scratch[gate],
-                                    scale=scales['r'][gate], node=params)
+        if cell_inputs is not None:
+            gate_scratch['z'] = cell_inputs['z']
+            gate_scratch['r'] = cell_inputs['r']
         
         for gate in ['z', 'h', 'r'] if params.linear_before_reset else ['z', 'r']:
             # NE16 8 bit with streamin
@@ -651,18 +798,8 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
                 scale=scales['act_in'],
                 node=params)
 
-        if idx < params.n_input_cells:
-            # NE16 8 bit
-            gate_scratch['hi'] = np.sum(in_tensor * -args['w_2_h_w'][1].zero_point.astype(INT_DTYPE))
-            gate_scratch['hi'] += args['w_2_h_w'][0].astype(INT_DTYPE).dot(in_tensor)
-            # scale to Q12
-            gate_scratch['hi'] = gate_scratch['hi'] * \
-                qrec.cache['w_2_h_q'].qbiases
-            gate_scratch['hi'] = gate_scratch['hi'] + args['w_h_b'][0]
-            gate_scratch['hi'] = gate_scratch['hi'] >> qrec.cache['w_2_h_q'].qnorms
-            DiagCollector.record('h_gate_inp', gate_scratch['hi'],
-                                scale=scales['act_in'], node=params)
-            gate_scratch['h'] += gate_scratch['hi']
+        if cell_inputs is not None:
+            gate_scratch['h'] += cell_inputs['h']
         else:
             # Is this correct if there is no input (and below)? This is not a mode that
             # exists in any framework and will not ever be used at present
@@ -710,7 +847,8 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
                        args: Mapping[str, np.ndarray],
                        idx: int,
                        input_tensor: np.ndarray,
-                       qrec):
+                       qrec,
+                       cell_inputs=None):
 
         input_scratch = {}
         state_scratch = {}
@@ -723,7 +861,6 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
         DiagCollector.record(
             'input', input_tensor[idx], scale=scales['in'][0], node=params, zero_point=qrec.in_qs[0].zero_point)
 
-        in_tensor = input_tensor[idx].astype(INT_DTYPE)
         state_tensor = args['h_state'][0].astype(INT_DTYPE)
         state_tensor_signed = (args['h_state'][0] + 0x8000).astype(np.int16).astype(np.int32)
 
@@ -732,19 +869,8 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
         #                         scale=args[f'r_2_{gate}_w'][1].scale,
         #                         node=params,
         #                         zero_point=args[f'r_2_{gate}_w'][1].zero_point)
-        if idx < params.n_input_cells:
-            for gate in ['z', 'r']:
-                # NE16 8 bit
-                input_scratch[gate] = np.sum(in_tensor * -args[f'w_2_{gate}_w'][1].zero_point.astype(INT_DTYPE))
-                input_scratch[gate] += args[f'{gate}_b'][1].attr.interleaved_values[0]
-                input_scratch[gate] += args[f'w_2_{gate}_w'][0].astype(INT_DTYPE).dot(in_tensor)
-                # add zero offset bias + norm rounding in i_2_gate_q
-                # scales to r * r_w of gate
-                DiagCollector.record(f'{gate}_gate_inp_before_scale', input_scratch[gate],
-                                    scale=scales['i'][gate], node=params)
-                input_scratch[gate] = qrec.cache[f'w_2_{gate}_q'].apply_scales(input_scratch[gate], 0)
-                DiagCollector.record(f'{gate}_gate_inp_after_scale', input_scratch[gate],
-                                    scale=scales['i'][gate], node=params)
+        if cell_inputs is not None:
+            input_scratch.update(cell_inputs)
         
         for gate in ['z', 'h', 'r'] if params.linear_before_reset else ['z', 'r']:
             prefix = 'r_' if gate == 'h' else ''
@@ -818,18 +944,7 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
                 scale=scales['act_in'],
                 node=params)
 
-        if idx < params.n_input_cells:
-            input_scratch['h'] = np.sum(in_tensor * -args['w_2_h_w'][1].zero_point.astype(INT_DTYPE))
-            input_scratch['h'] += args['w_h_b'][0]
-            input_scratch['h'] += args['w_2_h_w'][0].astype(INT_DTYPE).dot(in_tensor)
-            DiagCollector.record(f'h_gate_inp_before_scale', input_scratch['h'],
-                                scale=scales['i']['h'], node=params)
-            # scale to Q12
-            input_scratch['h'] = qrec.cache['w_2_h_q'].apply_scales(input_scratch['h'], 0)
-            DiagCollector.record(
-                'h_gate_inp', input_scratch['h'],
-                scale=scales['act_in'],
-                node=params)
+        if cell_inputs is not None:
             state_scratch['h'] += input_scratch['h']
         else:
             # Is this correct if there is no input (and below)? This is not a mode that
@@ -877,7 +992,8 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
                        args: Mapping[str, np.ndarray],
                        idx: int,
                        input_tensor: np.ndarray,
-                       qrec):
+                       qrec,
+                       cell_inputs=None):
 
         z_gate_scratch = 0
         hr_gate_scratch = 0
@@ -888,28 +1004,13 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
         DiagCollector.record(
             'input', input_tensor[idx], scale=scales['in'][0], node=params)
 
-        in_tensor = input_tensor[idx].astype(INT_DTYPE)
         state_tensor = args['h_state'][0].astype(INT_DTYPE)
 
         DiagCollector.record('z_weigths', args['w_2_z_w'][0],
                              scale=scales['r_2_z_w'], node=params)
-        if idx < params.n_input_cells:
-            # calculate z gate on input
-            z_gate_scratch += args['w_2_z_w'][0].astype(
-                INT_DTYPE).dot(in_tensor)
-            # calculate r gate on input
-            hr_gate_scratch += args['w_2_r_w'][0].astype(
-                INT_DTYPE).dot(in_tensor)
-            # scale to recurrent * state scale if input scale is different
-            DiagCollector.record('z_gate_inp', z_gate_scratch,
-                                 scale=scales['w_2_z_w'] * scales['state'], node=params)
-            DiagCollector.record('r_gate_inp', hr_gate_scratch,
-                                 scale=scales['w_2_r_w'] * scales['state'], node=params)
-            if not params.rnn_same_inout_scale:
-                z_gate_scratch = scale_gru_z_input2_z_HtxW(qrec,
-                                                           z_gate_scratch, 0)
-                hr_gate_scratch = scale_gru_r_input2_r_HtxW(qrec,
-                                                            hr_gate_scratch, 0)
+        if cell_inputs is not None:
+            z_gate_scratch = cell_inputs['z']
+            hr_gate_scratch = cell_inputs['r']
 
         # calculate z gate on recurrent
         z_gate_scratch += args['r_2_z_w'][0].astype(
@@ -960,18 +1061,8 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
             hr_gate_scratch = at_norm(hr_gate_scratch, internal_qtype(qrec).q)
 
             # ht = g(Xt*(Wh^T) + (rt (.) (Ht-1*(Rh^T) + Rbh)) + Wbh) # when linear_before_reset != 0
-            if idx < params.n_input_cells:
-                if not params.rnn_same_inout_scale:
-                    # scale input_scale * h_input_weights_scale to state_q_scale * h_recurrent_weights_scale
-                    hr_gate_input = scale_gru_h_input2_h_HtxW(qrec,
-                                                              (args['w_2_h_w'][0].astype(INT_DTYPE).dot(
-                                                                  in_tensor) + args['w_h_b'][0]),
-                                                              0)
-                else:
-                    # since input_scale == state scale and h_input_weights_scale == h_recurrent_weights_scale
-                    # no scaling is necessary
-                    hr_gate_input = args['w_2_h_w'][0].astype(
-                        INT_DTYPE).dot(in_tensor) + args['w_h_b'][0]
+            if cell_inputs is not None:
+                hr_gate_input = cell_inputs['h']
             else:
                 # Is this correct if there is no input (and below)? This is not a mode that
                 # exists in any framework and will not ever be used at present
@@ -998,16 +1089,8 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
                 scale=math.pow(2, -7) * scales['r_2_h_w'],
                 node=params)
 
-            if idx < params.n_input_cells:
-                if not params.rnn_same_inout_scale:
-                    # scale input_scale * h_input_weights_scale to state_q_scale * h_recurrent_weights_scale
-                    hr_gate_input = scale_gru_h_input2_h_HtxW(
-                        qrec,
-                        args['w_2_h_w'][0].dot(in_tensor) + args['w_h_b'][0],
-                        0)
-                else:
-                    hr_gate_input = args['w_2_h_w'][0].astype(
-                        INT_DTYPE).dot(in_tensor) + args['w_h_b'][0]
+            if cell_inputs is not None:
+                hr_gate_input = cell_inputs['h']
             else:
                 if not params.rnn_same_inout_scale:
                     hr_gate_input = qrec.scale_h_input2_h_HtxW(
@@ -1063,7 +1146,8 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
                         args: Mapping[str, np.ndarray],
                         idx: int,
                         input_tensor: np.ndarray,
-                        qrec):
+                        qrec,
+                        cell_inputs=None):
 
         z_gate_scratch = 0
         hr_gate_scratch = 0
@@ -1073,30 +1157,13 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
         DiagCollector.record(
             'input', input_tensor[idx], scale=scales['in'][0], node=params)
 
-        in_tensor = input_tensor[idx].astype(INT_DTYPE)
         state_tensor = args['h_state'][0]
 
         DiagCollector.record('z_weigths', args['w_2_z_w'][0],
                              scale=scales['r_2_z_w'], node=params)
-        if idx < params.n_input_cells:
-            # calculate z gate on input
-            z_gate_scratch += args['w_2_z_w'][0].astype(
-                INT_DTYPE).dot(in_tensor)
-            # calculate r gate on input
-            hr_gate_scratch += args['w_2_r_w'][0].astype(
-                INT_DTYPE).dot(in_tensor)
-            # scale to recurrent * state scale if input scale is different
-            DiagCollector.record('z_gate_inp', z_gate_scratch,
-                                 scale=scales['w_2_z_w'] * scales['in'][0], node=params)
-            DiagCollector.record('r_gate_inp', hr_gate_scratch,
-                                 scale=scales['w_2_r_w'] * scales['in'][0], node=params)
-
-            z_gate_scratch = scale_to(qrec,
-                                      "input_z_w_internal",
-                                      z_gate_scratch, 0)
-            hr_gate_scratch = scale_to(qrec,
-                                       "input_r_w_internal",
-                                       hr_gate_scratch, 0)
+        if cell_inputs is not None:
+            z_gate_scratch = cell_inputs['z']
+            hr_gate_scratch = cell_inputs['r']
 
         # calculate z gate on recurrent
         z_gate_state_scratch = args['r_2_z_w'][0].astype(
@@ -1159,15 +1226,9 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
             hr_gate_scratch = at_norm(hr_gate_scratch, 15)
 
             # ht = g(Xt*(Wh^T) + (rt (.) (Ht-1*(Rh^T) + Rbh)) + Wbh) # when linear_before_reset != 0
+            # input_scale * h_input_weights_scale scaled to Q12
             assert idx < params.n_input_cells
-            # scale input_scale * h_input_weights_scale to Q12
-            # h bias is in input_scale * h_w scale NOT Q12
-            hr_gate_scratch += scale_to(
-                qrec,
-                "input_h_w_internal",
-                args['w_2_h_w'][0].astype(INT_DTYPE).dot(
-                    in_tensor) + args['w_h_b'][0],
-                0)
+            hr_gate_scratch += cell_inputs['h']
         else:
             # haddamard on state before linear
             # r_gate_scratch = (rt (.) Ht-1)*(Rh^T) + Rbh + Wbh
@@ -1185,14 +1246,9 @@ class GRUSymmetric(RnnSymmetricMixin, KernelBase):
             hr_gate_scratch = scale_to(
                 qrec, "state_h_w_internal", h_gate_recurrent, 0)
 
+            # input_scale * h_input_weights_scale scaled to internal
             assert idx < params.n_input_cells
-            # scale input_scale * h_input_weights_scale to internal
-            hr_gate_scratch += scale_to(
-                qrec,
-                "input_h_w_internal",
-                args['w_2_h_w'][0].astype(INT_DTYPE).dot(
-                    in_tensor) + args['w_h_b'][0],
-                0)
+            hr_gate_scratch += cell_inputs['h']
 
         # outputs q15
         hr_gate_scratch = get_activation(params.activation, False)(
@@ -1306,6 +1362,19 @@ def check_unsupported(args):
         raise NotImplementedError("LSTMP is not yet supported by kernel")
 
 
+def lstm_scaled_inputs(params, args, input_tensor: np.ndarray, qrec, gate_scales):
+    """Input contributions of all the cells scaled to the internal scale of each gate. gate_scales
+    are the scales that the contributions are recorded at"""
+    check_unsupported(args)
+    cell_inputs = {}
+    for gate in ['i', 'f', 'c', 'o']:
+        cell_inputs[gate] = scale_to(qrec, f'i_2_{gate}_q',
+                                     input_dot(args[f'i_2_{gate}_w'], input_tensor), 1)
+        DiagCollector.record_each(
+            f'{gate}_gate_i', cell_inputs[gate], scale=gate_scales[gate], node=params)
+    return cell_inputs
+
+
 @ params_type(LSTMNode)
 @ qrec_type('scaled')
 class LSTMSymmetric(RnnSymmetricMixin, KernelBase):
@@ -1314,14 +1383,105 @@ class LSTMSymmetric(RnnSymmetricMixin, KernelBase):
                     args: Mapping[str, np.ndarray],
                     idx: int,
                     input_tensor: np.ndarray,
-                    qrec):
+                    qrec,
+                    cell_inputs=None):
+        if args['i_state'][1].dtype == np.uint8:
+            return cls.step_kernelu8_u8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
+        if args['i_state'][1].dtype == np.uint16:
+            return cls.step_kernelu16_u8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
+        if args['i_state'][1].dtype == np.int16:
+            return cls.step_kernel16_8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
+        return cls.step_kernel8_8(params, args, idx, input_tensor, qrec, cell_inputs=cell_inputs)
+
+    @ classmethod
+    def input_kernel(cls, params: LSTMNode,
+                     args: Mapping[str, np.ndarray],
+                     input_tensor: np.ndarray,
+                     qrec):
+        """Input contributions of all the input cells indexed by cell. Intermediate values
+        are recorded one cell at a time in the same way as the values recorded by the step kernels"""
         if args['i_state'][1].dtype == np.uint8:
-            return cls.step_kernelu8_u8(params, args, idx, input_tensor, qrec)
+            return cls.input_kernelu8_u8(params, args, input_tensor, qrec)
         if args['i_state'][1].dtype == np.uint16:
-            return cls.step_kernelu16_u8(params, args, idx, input_tensor, qrec)
+            return cls.input_kernelu16_u8(params, args, input_tensor, qrec)
         if args['i_state'][1].dtype == np.int16:
-            return cls.step_kernel16_8(params, args, idx, input_tensor, qrec)
-        return cls.step_kernel8_8(params, args, idx, input_tensor, qrec)
+            return cls.input_kernel16_8(params, args, input_tensor, qrec)
+        return cls.input_kernel8_8(params, args, input_tensor, qrec)
+
+    @ classmethod
+    def input_kernelu8_u8(cls, params: LSTMNode,
+                          args: Mapping[str, np.ndarray],
+                          input_tensor: np.ndarray,
+                          qrec):
+        check_unsupported(args)
+        r_pscales = qrec.cache['r_pscales']
+        i_pscales = qrec.cache['i_pscales']
+        cell_inputs = {}
+        for gate in ['i', 'f', 'c', 'o']:
+            cell_inputs[gate] = input_dot(args[f'i_2_{gate}_w'], input_tensor, zero_point=True)
+            DiagCollector.record_each(
+                f'input_{gate}_in_inputscale',
+                cell_inputs[gate],
+                scale=i_pscales[gate],
+                node=params)
+            cell_inputs[gate] = cell_inputs[gate] * \
+                qrec.cache[f'i_2_{gate}_q'].qbiases
+            cell_inputs[gate] = cell_inputs[gate] + \
+                args[f'{gate}_b'][1].attr.interleaved_values[0]
+            cell_inputs[gate] = cell_inputs[gate] >> qrec.cache[f'i_2_{gate}_q'].qnorms
+            DiagCollector.record_each(
+                f'input_{gate}_in_statescale',
+                cell_inputs[gate],
+                scale=r_pscales[gate],
+                node=params)
+        return cell_inputs
+
+    @ classmethod
+    def input_kernelu16_u8(cls, params: LSTMNode,
+                           args: Mapping[str, np.ndarray],
+                           input_tensor: np.ndarray,
+                           qrec):
+        check_unsupported(args)
+        r_pscales = qrec.cache['r_pscales']
+        i_pscales = qrec.cache['i_pscales']
+        cell_inputs = {}
+        for gate in ['i', 'f', 'c', 'o']:
+            cell_inputs[gate] = args[f'{gate}_b'][1].attr.interleaved_values[0] + \
+                input_dot(args[f'i_2_{gate}_w'], input_tensor, zero_point=True)
+            DiagCollector.record_each(
+                f'input_{gate}_in_inputscale',
+                cell_inputs[gate],
+                scale=i_pscales[gate],
+                node=params)
+            if qrec.cache[f'i_2_{gate}_q'].pre_normalization > 0:
+                cell_inputs[gate] = at_norm(
+                    cell_inputs[gate],
+                    qrec.cache[f'i_2_{gate}_q'].pre_normalization)
+            cell_inputs[gate] = at_norm(
+                cell_inputs[gate] * qrec.cache[f'i_2_{gate}_q'].qbiases,
+                qrec.cache[f'i_2_{gate}_q'].qnorms)
+            DiagCollector.record_each(
+                f'input_{gate}_in_statescale',
+                cell_inputs[gate],
+                scale=r_pscales['int_scale'],
+                node=params)
+        return cell_inputs
+
+    @ classmethod
+    def input_kernel8_8(cls, params: LSTMNode,
+                        args: Mapping[str, np.ndarray],
+                        input_tensor: np.ndarray,
+                        qrec):
+        return lstm_scaled_inputs(params, args, input_tensor, qrec, qrec.cache['i_pscales'])
+
+    @ classmethod
+    def input_kernel16_8(cls, params: LSTMNode,
+                         args: Mapping[str, np.ndarray],
+                         input_tensor: np.ndarray,
+                         qrec):
+        int_scale = internal_qtype(qrec).scale
+        return lstm_scaled_inputs(params, args, input_tensor, qrec,
+                                  {gate: int_scale for gate in ['i', 'f', 'c', 'o']})
 
     # NE16 8 bit kernel
     @ classmethod
@@ -1329,40 +1489,16 @@ class LSTMSymmetric(RnnSymmetricMixin, KernelBase):
                          args: Mapping[str, np.ndarray],
                          idx: int,
                          input_tensor: np.ndarray,
-                         qrec):
+                         qrec,
+                         cell_inputs=None):
 
         check_unsupported(args)
 
         r_pscales = qrec.cache['r_pscales']
         i_pscales = qrec.cache['i_pscales']
         input_scratch = {}
-        if idx < params.n_input_cells:
-            in_t = input_tensor[idx].astype(INT_DTYPE)
-            for gate in ['i', 'f', 'c', 'o']:
-                name = f'i_2_{gate}_w'
-                # calculate weights zero point * input
-                w_val = args[name][0].astype(INT_DTYPE)
-                w_qtype = args[name][1]
-                input_scratch[gate] = - \
-                    np.sum(in_t * w_qtype.zero_point.astype(INT_DTYPE))
-                # now calculate gate
-                input_scratch[gate] = input_scratch[gate] + w_val.dot(in_t)
-                DiagCollector.record(
-                    f'input_{gate}_in_inputscale',
-                    input_scratch[gate],
-                    scale=i_pscales[gate],
-                    node=params)
-
-                input_scratch[gate] = input_scratch[gate] * \
-                    qrec.cache[f'i_2_{gate}_q'].qbiases
-                input_scratch[gate] = input_scratch[gate] + \
-                    args[f'{gate}_b'][1].attr.interleaved_values[0]
-                input_scratch[gate] = input_scratch[gate] >> qrec.cache[f'i_2_{gate}_q'].qnorms
-                DiagCollector.record(
-                    f'input_{gate}_in_statescale',
-                    input_scratch[gate],
-                    scale=r_pscales[gate],
-                    node=params)
+        if cell_inputs is not None:
+            input_scratch.update(cell_inputs)
 
         state_t = args['i_state'][0].astype(INT_DTYPE)
         for gate in ['i', 'f', 'c', 'o']:
@@ -1468,43 +1604,16 @@ class LSTMSymmetric(RnnSymmetricMixin, KernelBase):
                          args: Mapping[str, np.ndarray],
                          idx: int,
                          input_tensor: np.ndarray,
-                         qrec):
+                         qrec,
+                         cell_inputs=None):
 
         check_unsupported(args)
 
         r_pscales = qrec.cache['r_pscales']
         i_pscales = qrec.cache['i_pscales']
         input_scratch = {}
-        if idx < params.n_input_cells:
-            in_t = input_tensor[idx].astype(INT_DTYPE)
-            for gate in ['i', 'f', 'c', 'o']:
-                name = f'i_2_{gate}_w'
-                # calculate weights zero point * input
-                w_val = args[name][0].astype(INT_DTYPE)
-                w_qtype = args[name][1]
-                input_scratch[gate] = args[f'{gate}_b'][1].attr.interleaved_values[0] - \
-                    np.sum(in_t * w_qtype.zero_point.astype(INT_DTYPE))
-                # now calculate gate
-                input_scratch[gate] = input_scratch[gate] + w_val.dot(in_t)
-                DiagCollector.record(
-                    f'input_{gate}_in_inputscale',
-                    input_scratch[gate],
-                    scale=i_pscales[gate],
-                    node=params)
-
-                if qrec.cache[f'i_2_{gate}_q'].pre_normalization > 0:
-                    input_scratch[gate] = at_norm(
-                        input_scratch[gate],
-                        qrec.cache[f'i_2_{gate}_q'].pre_normalization)
-                input_scratch[gate] = at_norm(
-                    input_scratch[gate] * qrec.cache[f'i_2_{gate}_q'].qbiases,
-                    qrec.cache[f'i_2_{gate}_q'].qnorms)
-
-                DiagCollector.record(
-                    f'input_{gate}_in_statescale',
-                    input_scratch[gate],
-                    scale=r_pscales['int_scale'],
-                    node=params)
+        if cell_inputs is not None:
+            input_scratch.update(cell_inputs)
 
         state_t = args['i_state'][0].astype(INT_DTYPE)
         state_scratch = {}
@@ -1612,7 +1721,8 @@ class LSTMSymmetric(RnnSymmetricMixin, KernelBase):
                        args: Mapping[str, np.ndarray],
                        idx: int,
                        input_tensor: np.ndarray,
-                       qrec):
+                       qrec,
+                       cell_inputs=None):
         use_cifg = 'i_2_i_w' in args and args['i_2_i_w'][0] is None
         use_peephole = 'c_2_o_w' in args and args['c_2_o_w'][0] is not None
         use_layer_norm = 'f_norm' in args and args['f_norm'][0] is not None
@@ -1641,32 +1751,11 @@ class LSTMSymmetric(RnnSymmetricMixin, KernelBase):
             'input', input_tensor[idx], scale=qrec.in_qs[0].scale, node=params)
 
         r_pscales = qrec.cache['r_pscales']
-        i_pscales = qrec.cache['i_pscales']
-        if idx < params.n_input_cells:
-            input_gate_scratch += scale_lstm_input_input(qrec,
-                                                         args['i_2_i_w'][0].astype(INT_DTYPE).dot(
-                                                             input_tensor[idx].astype(INT_DTYPE)),
-                                                         0)
-            forget_gate_scratch += scale_lstm_input_forget(qrec,
-                                                           args['i_2_f_w'][0].astype(INT_DTYPE).dot(
-                                                               input_tensor[idx].astype(INT_DTYPE)),
-                                                           0)
-            cell_scratch += scale_lstm_input_cell(qrec,
-                                                  args['i_2_c_w'][0].astype(INT_DTYPE).dot(
-                                                      input_tensor[idx].astype(INT_DTYPE)),
-                                                  0)
-            output_gate_scratch += scale_lstm_input_output(qrec,
-                                                           args['i_2_o_w'][0].astype(INT_DTYPE).dot(
-                                                               input_tensor[idx].astype(INT_DTYPE)),
-                                                           0)
-            DiagCollector.record(
-                'i_gate_i', input_gate_scratch, scale=i_pscales['i'], node=params)
-            DiagCollector.record(
-                'f_gate_i', forget_gate_scratch, scale=i_pscales['f'], node=params)
-            DiagCollector.record(
-                'c_gate_i', cell_scratch, scale=i_pscales['c'], node=params)
-            DiagCollector.record(
-                'o_gate_i', output_gate_scratch, scale=i_pscales['o'], node=params)
+        if cell_inputs is not None:
+            input_gate_scratch = cell_inputs['i']
+            forget_gate_scratch = cell_inputs['f']
+            cell_scratch = cell_inputs['c']
+            output_gate_scratch = cell_inputs['o']
 
         # perceptron scaling
         # 16 bit act(scale(scale(i*iw) + scale(r*rw) + b)) - internal max_accum
@@ -1828,7 +1917,8 @@ class LSTMSymmetric(RnnSymmetricMixin, KernelBase):
                         args: Mapping[str, np.ndarray],
                         idx: int,
                         input_tensor: np.ndarray,
-                        qrec):
+                        qrec,
+                        cell_inputs=None):
 
         use_cifg = 'i_2_i_w' in args and args['i_2_i_w'][0] is None
         use_peephole = 'c_2_o_w' in args and args['c_2_o_w'][0] is not None
@@ -1853,17 +1943,10 @@ class LSTMSymmetric(RnnSymmetricMixin, KernelBase):
             'input', input_tensor[idx], scale=qrec.in_qs[0].scale, node=params)
 
         r_pscales = qrec.cache['r_pscales']
-        i_pscales = qrec.cache['i_pscales']
         int_qtype = internal_qtype(qrec)
 
-        if idx < params.n_input_cells:
-            for k in ['i', 'f', 'c', 'o']:
-                input_scratch[k] += args[f'i_2_{k}_w'][0].astype(INT_DTYPE).dot(
-                    input_tensor[idx].astype(INT_DTYPE))
-                input_scratch[k] = scale_to(
-                    qrec, f'i_2_{k}_q', input_scratch[k], 0)
-                DiagCollector.record(
-                    f'{k}_gate_i', input_scratch[k], scale=int_qtype.scale, node=params)
+        if cell_inputs is not None:
+            input_scratch.update(cell_inputs)
 
         state_scratch = {}
         for k in ['i', 'f', 'c', 'o']:
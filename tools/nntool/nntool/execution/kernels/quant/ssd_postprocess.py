@@ -23,8 +23,9 @@ from nntool.utils.at_norm import at_norm
 from nntool.utils.exp_17_15 import exp_fp_17_15
 from nntool.utils.ssd_utils import (CNTX_IDX, CNTY_IDX, H_IDX, W_IDX, XMAX_IDX,
                              XMIN_IDX, YMAX_IDX, YMIN_IDX, convert_cnts2cors,
-                             convert_cors2cnts, rect_intersect_area,
-                             rect_union_area)
+                             convert_cors2cnts, nms_alive, nms_indexes,
+                             rect_intersect_area, rect_union_area,
+                             sort_scores_descending)
 
 
 @params_type(SSDDetectorNode)
@@ -41,6 +42,73 @@ class SSDDetectorSymmetric(KernelBase):
         anchors = in_tensors[2]
         # decoded_bboxes: Q14
         # valid_scores: Q7
+        set_ssd_scales(qrec, params)
+        scores_q = qrec.in_qs[1]
+        score_threshold = scores_q.quantize(params.nms_score_threshold)
+
+        # candidates are taken class by class until there are more than max_bb_before_nms
+        class_idx, box_idx = np.nonzero(scores[:, 1:].T > score_threshold)
+        class_idx = class_idx[:params.max_bb_before_nms + 1] + 1
+        box_idx = box_idx[:params.max_bb_before_nms + 1]
+        offset = offsets[box_idx]
+        anchor = anchors[box_idx]
+        # same fixed point decode as execute_reference applied to all the candidates
+        xcenter = qrec.cache['scale_x_q'].apply_scales(
+            np.multiply(offset[:, CNTX_IDX], anchor[:, W_IDX], dtype=np.int32) +
+            qrec.cache['scale_x_anc_q'].apply_scales(anchor[:, CNTX_IDX])
+        )
+        ycenter = qrec.cache['scale_y_q'].apply_scales(
+            np.multiply(offset[:, CNTY_IDX], anchor[:, H_IDX], dtype=np.int32) +
+            qrec.cache['scale_y_anc_q'].apply_scales(anchor[:, CNTY_IDX])
+        )
+        norm_h = (15 - qrec.cache['scale_h_q'].qnorms).astype(np.int32)
+        norm_w = (15 - qrec.cache['scale_w_q'].qnorms).astype(np.int32)
+        exp_h = exp_fp_17_15(np.multiply(offset[:, H_IDX], int(
+            qrec.cache['scale_h_q'].qbiases), dtype=np.int32) << norm_h)
+        exp_w = exp_fp_17_15(np.multiply(offset[:, W_IDX], int(
+            qrec.cache['scale_w_q'].qbiases), dtype=np.int32) << norm_w)
+        half_h = qrec.cache['scale_ao_q'].apply_scales(np.multiply(
+            exp_h, anchor[:, H_IDX], dtype=np.int32)) >> 1
+        half_w = qrec.cache['scale_ao_q'].apply_scales(np.multiply(
+            exp_w, anchor[:, W_IDX], dtype=np.int32)) >> 1
+        bboxes = np.stack([ycenter-half_h, xcenter-half_w, ycenter+half_h, xcenter+half_w], axis=1)
+        bbox_scores = scores[box_idx, class_idx]
+
+        order = sort_scores_descending(bbox_scores)
+        bboxes, bbox_scores, class_idx = bboxes[order], bbox_scores[order], class_idx[order]
+
+        iou_threshold = scores_q.quantize(params.nms_iou_threshold)
+        alive = nms_alive(
+            bboxes,
+            lambda intersection, union: intersection >= at_norm(iou_threshold * union, 7),
+            classes=class_idx)
+        alive = np.flatnonzero(alive)[:params.max_detections]
+        out_idx = len(alive)
+
+        out_boxes = np.zeros((params.max_detections, 4), dtype=qrec.out_qs[0].dtype)
+        out_classes = np.zeros(params.max_detections, dtype=qrec.out_qs[1].dtype)
+        out_scores = np.zeros(params.max_detections, dtype=qrec.out_qs[2].dtype)
+        out_boxes[:out_idx] = bboxes[alive]
+        out_classes[:out_idx] = class_idx[alive]
+        out_scores[:out_idx] = bbox_scores[alive]
+
+        outputs = [out_boxes, out_classes, out_scores]
+        if params.output_detection_count:
+            outputs.append(np.array([out_idx], dtype=np.int32))
+        return qrec.get_outputs(params, outputs, ktype="symmetric")
+
+    @classmethod
+    def execute_reference(cls, params,
+                          in_tensors,
+                          qrec: QRec,
+                          **kwargs):
+        """Scalar implementation kept as the reference for execute"""
+        in_tensors = qrec.prepare_inputs(params, in_tensors, ktype="symmetric")
+        offsets = in_tensors[0]
+        scores = in_tensors[1]
+        anchors = in_tensors[2]
+        # decoded_bboxes: Q14
+        # valid_scores: Q7
         anchors_type = "centers"
         if anchors_type == 'centers':
             anchors_cnts = anchors
@@ -75,8 +143,8 @@ class SSDDetectorSymmetric(KernelBase):
                 #  half_h = exp(So*Off / params.h_scale) * Sa*A = Sa/So * exp(So/params.h_scale *O) * A =
                 #           (scale_ao * (A* exp17.15(scale_h*O<<15-scale_hNorm))>>scale_aoNorm) =
                 #           at_norm(scale_ao*(A*exp17.15(scale_h*O<<15-scale_hNorm)), scale_aoNorm)
-                norm_h = 15 - qrec.cache['scale_h_q'].qnorms
-                norm_w = 15 - qrec.cache['scale_w_q'].qnorms
+                norm_h = (15 - qrec.cache['scale_h_q'].qnorms).astype(np.int32)
+                norm_w = (15 - qrec.cache['scale_w_q'].qnorms).astype(np.int32)
                 exp_h = exp_fp_17_15(np.multiply(offset[H_IDX], int(
                     qrec.cache['scale_h_q'].qbiases), dtype=np.int32) << norm_h)
                 exp_w = exp_fp_17_15(np.multiply(offset[W_IDX], int(
@@ -123,7 +191,7 @@ class SSDDetectorSymmetric(KernelBase):
                 break
             bbox = decoded_bboxes[i]
             if bbox['alive']:
-                out_boxes[out_idx] = bbox['bbox']
+                out_boxes[out_idx] = np.ravel(bbox['bbox'])
                 out_classes[out_idx] = bbox['class']
                 out_scores[out_idx] = bbox['score']
                 out_idx += 1
@@ -146,6 +214,23 @@ class NMSKernelSymmetric(KernelBase):
                 **kwargs):
         boxes = in_tensors[0][0] if not params.center_point_box else convert_cnts2cors(in_tensors[0][0])
         scores = in_tensors[1][0]
+        scores_q = qrec.in_qs[1]
+        iou_threshold = scores_q.quantize(params.nms_iou_threshold).astype(np.int32)
+        return qrec.get_outputs(
+            params,
+            [nms_indexes(boxes, scores, scores_q.quantize(params.nms_score_threshold),
+                         params.max_output_boxes_per_class,
+                         lambda intersection, union: intersection >= (iou_threshold * union))],
+            ktype="float")
+
+    @classmethod
+    def execute_reference(cls, params,
+                          in_tensors,
+                          qrec: QRec,
+                          **kwargs):
+        """Scalar implementation kept as the reference for execute"""
+        boxes = in_tensors[0][0] if not params.center_point_box else convert_cnts2cors(in_tensors[0][0])
+        scores = in_tensors[1][0]
         n_boxes = len(scores[0])
         n_classes = len(scores)
         scores_q = qrec.in_qs[1]
@@ -157,7 +242,7 @@ class NMSKernelSymmetric(KernelBase):
             counter = 0
             for box_id in range(n_boxes):
                 class_score = scores[class_id, box_id]
-                if class_score > scores_q.quanize(params.nms_score_threshold):
+                if class_score > scores_q.quantize(params.nms_score_threshold):
                     bbox_buff.append({
                         "index": box_id,
                         "score": class_score,
@@ -184,7 +269,7 @@ class NMSKernelSymmetric(KernelBase):
                         continue
                     intersection = rect_intersect_area(bbox_buff[idx]["box"], bbox_buff[idx_int]["box"])
                     union = rect_union_area(bbox_buff[idx]["box"], bbox_buff[idx_int]["box"])
-                    if intersection >= (scores_q.quanize(params.nms_iou_threshold) * union):
+                    if intersection >= (scores_q.quantize(params.nms_iou_threshold).astype(np.int32) * union):
                         bbox_buff[idx_int]["alive"] = False
 
             class_idxs_count_start = idxs_count
@@ -15,7 +15,7 @@
 
 from nntool.graph.types import (ConstantInputNode, InputNode,
                          OutputNode)
-from nntool.execution.kernels.kernel_base import KernelBase, params_type, qrec_type
+from nntool.execution.kernels.kernel_base import KernelBase, batch_safe, params_type, qrec_type
 from nntool.quantization.new_qrec import QRec
 
 
@@ -50,6 +50,7 @@ class InputSymmetric(KernelBase):
 
 @params_type(OutputNode)
 @qrec_type('symmetric', 'scaled')
+@batch_safe
 class OutputSymmetric(KernelBase):
     @classmethod
     def execute(cls, params,
@@ -20,6 +20,7 @@ from nntool.expressions.symbolic.quantization_base import QuantizationHandlerBas
 from nntool.generation.code_block import CodeBlock
 from nntool.utils.disjoint_reduction import disjoint_reduction
 
+from .compiled_assignments import compile_assignments
 from .symbol import Symbol, Variable
 
 # Vec levels
@@ -44,6 +45,7 @@ class Assignments(ABCSequence):
         self._qrecs = qrecs
         self._infos = None
         self._output_shapes = None
+        self._compiled = None
         if assignments:
             for assignment in assignments:
                 self.add(*assignment)
@@ -129,6 +131,20 @@ class Assignments(ABCSequence):
         return set.union(*[assignment[1].dtypes_in_use
                            for assignment in self._assignments])
 
+    def __getstate__(self):
+        # the compiled function refers to these symbols so copies must build their own
+        state = self.__dict__.copy()
+        state['_compiled'] = None
+        return state
+
+    @property
+    def compiled(self):
+        """The assignments lowered to a single python function. This is built on first use
+        and dropped if the assignments are modified. None if they cannot be compiled."""
+        if self._compiled is None:
+            self._compiled = compile_assignments(self) or False
+        return self._compiled or None
+
     def variable(self, name):
         return self._vars[name]
 
@@ -150,6 +166,7 @@ class Assignments(ABCSequence):
 
     def update(self):
         self._output_shapes = None
+        self._compiled = None
         self._vars = {}
         free_var_names = set()
         for var, func in self._assignments:
@@ -0,0 +1,167 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Lowers Assignments to a single generated Python function
+
+Calculating an Assignments walks the symbol tree for every call creating a
+Constant for each intermediate result. The compiled version visits the tree once
+and emits one line per function node that calls its _impl directly on NumPy
+arrays. Constants are evaluated at compile time. Results are identical to
+calling the Assignments since the same _impl methods are used. Range collection
+and result tracking are not supported and must use the interpreted version.
+"""
+
+import logging
+from typing import Callable, Mapping
+
+import numpy as np
+
+from .basic import CompoundFunction
+from .function import Function
+from .symbol import Constant, InfosRef, Symbol, Variable
+
+LOG = logging.getLogger(__name__)
+
+
+class CompilationError(Exception):
+    pass
+
+
+def _variable_loader(var: Variable) -> Callable:
+    shape = var.shape
+
+    # same conversions as Variable._calculate
+    def load(val):
+        val = np.array(val)
+        if shape is not None:
+            val = np.reshape(val, shape)
+        return np.atleast_1d(val).astype(val.dtype)
+    return load
+
+
+def _evaluator(sym: Function) -> Callable:
+    # the function overrides _eval so call it as the interpreter would
+    def evaluate(*args):
+        return sym._eval(*[Constant(arg) for arg in args]).value
+    return evaluate
+
+
+def _dtype_error(name):
+    raise ArithmeticError(f"Expression {name} evaluated to incorrect dtype")
+
+
+class _Lowering():
+    def __init__(self) -> None:
+        self.env = {
+            'np': np,
+            '_atleast_1d': np.atleast_1d,
+            '_dtype_error': _dtype_error,
+        }
+        self.lines = []
+        self.variables = {}
+        self._counter = 0
+
+    def _new(self, prefix, val=None):
+        name = f'{prefix}{self._counter}'
+        self._counter += 1
+        if val is not None:
+            self.env[name] = val
+        return name
+
+    def variable(self, var: Variable) -> str:
+        # variables produced by earlier assignments or inputs
+        if var.name not in self.variables:
+            loader = self._new('load', _variable_loader(var))
+            name = self._new('v')
+            self.lines.append(f'{name} = {loader}(subs[{var.name!r}])')
+            self.variables[var.name] = name
+        return self.variables[var.name]
+
+    def alias(self, var: Variable) -> str:
+        # assigning a variable directly is not converted in the interpreter
+        name = self._new('v')
+        self.lines.append(f'{name} = np.array(subs[{var.name!r}])')
+        if var.shape is not None:
+            shape = self._new('s', var.shape)
+            self.lines.append(f'{name} = np.reshape({name}, {shape})')
+        return name
+
+    def symbol(self, sym: Symbol) -> str:
+        if isinstance(sym, Variable):
+            return self.variable(sym)
+        if isinstance(sym, (Constant, InfosRef)):
+            return self._new('c', sym.calculate().value)
+        if isinstance(sym, CompoundFunction):
+            return self.symbol(sym.inner_function)
+        if not isinstance(sym, Function):
+            raise CompilationError(
+                f'cannot compile symbol {sym.name} of class {sym.__class__.__name__}')
+        args = [self.symbol(elem) for elem in sym.contents]
+        name = self._new('v')
+        if type(sym)._eval is Function._eval:
+            func = self._new('f', sym._impl)
+            dtype = self._new('d', sym.dtype)
+            self.lines.append(f'{name} = {func}({", ".join(args)})')
+            self.lines.append(f'if {name}.dtype != {dtype}: _dtype_error({sym.name!r})')
+            self.lines.append(f'{name} = _atleast_1d({name})')
+        else:
+            func = self._new('f', _evaluator(sym))
+            self.lines.append(f'{name} = {func}({", ".join(args)})')
+        return name
+
+
+class CompiledAssignments():
+    """Callable returning the outputs of an Assignments for a set of input arrays"""
+
+    def __init__(self, assignments) -> None:
+        lowering = _Lowering()
+        produced = {}
+        for var, func in assignments:
+            if isinstance(func, Variable):
+                produced[var.name] = lowering.alias(func)
+            elif isinstance(func, Function):
+                produced[var.name] = lowering.symbol(func)
+            else:
+                raise CompilationError(
+                    f'cannot compile assignment to {var.name} of {func.__class__.__name__}')
+            # later assignments load the result like any other variable
+            lowering.lines.append(f'subs[{var.name!r}] = {produced[var.name]}')
+        outputs = {}
+        for name in assignments.output_names:
+            shape = lowering._new('s', assignments.output_shapes[name])
+            outputs[name] = f'{produced[name]}.reshape({shape})'
+        body = lowering.lines + [
+            'return {%s}' % ", ".join(f'{name!r}: {expr}' for name, expr in outputs.items())]
+        self._source = 'def compiled(subs):\n' + '\n'.join(f'    {line}' for line in body)
+        env = lowering.env
+# pylint: disable=exec-used
+        exec(compile(self._source, '<compiled assignments>', 'exec'), env)
+        self._func = env['compiled']
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    def __call__(self, **subs) -> Mapping[str, np.ndarray]:
+        return self._func(subs)
+
+
+def compile_assignments(assignments):
+    """Compile an Assignments returning None if some of it cannot be compiled"""
+    try:
+        return CompiledAssignments(assignments)
+    except CompilationError as ex:
+        LOG.debug('expression not compiled: %s', ex)
+        return None
@@ -0,0 +1,240 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Cache of the projects built by NNGraph.execute_on_target
+
+Each project is built in a directory named after a fingerprint of the graph,
+its quantization, the generator settings and the build options. When the same
+model is executed again the project is reused. Only the main application file
+and the input files are written again so make recompiles the main file and
+relinks the application. The AutoTiler model, its generated code and the
+constants are not rebuilt.
+
+Set NNTOOL_BUILD_CACHE to a directory to move the cache or to an empty string
+to disable it. The least recently used projects are removed when there are more
+than BUILD_CACHE_ENTRIES.
+
+Code generation memoizes values in the graph and its quantization so the key of a
+model can change after its first build. The key after the build is recorded in the
+index of the cache as an alias of the entry that was built.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from nntool.execution.activation_cache import fingerprint
+
+LOG = logging.getLogger(__name__)
+
+BUILD_CACHE_DIR = os.environ.get(
+    'NNTOOL_BUILD_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'nntool', 'builds')) or None
+
+BUILD_CACHE_ENTRIES = 8
+
+# bump when the layout of the generated projects changes
+BUILD_CACHE_VERSION = 1
+
+BUILT_MARKER = '.nntool_build'
+AT_LOG_FILE = '.nntool_at_log'
+INDEX_FILE = 'index.json'
+INDEX_LOCK_FILE = 'index.lck'
+
+# numbering of the inputs, outputs and constants that code generation sets on the nodes
+GENERATION_NUMBERING = frozenset(['_index'])
+
+
+def _environment(target):
+    # the parts of the environment that are exported into the build script
+    env = {var: val for var, val in os.environ.items()
+           if var.startswith('TILER') or var in ('GAP_SDK_HOME', 'NNTOOL_DIR')}
+    if 'GAP_SDK_HOME' in os.environ:
+        config = os.path.join(os.environ['GAP_SDK_HOME'], f'configs/{target}.sh')
+        try:
+            env['config_mtime'] = os.stat(config).st_mtime_ns
+        except OSError:
+            pass
+    return env
+
+
+def graph_fingerprint(G) -> bytes:
+    """Fingerprint of the nodes and edges of G that leaves out the numbering set by code
+    generation so that it is the same before and after the first build. G is not changed."""
+    nodes = [(type(node), {name: val for name, val in vars(node).items()
+                           if name not in GENERATION_NUMBERING})
+             for node in sorted(G.nodes(), key=lambda node: node.name)]
+    edges = sorted(f'{edge.from_node.name}:{edge.from_idx}:{edge.to_node.name}:{edge.to_idx}'
+                   for edge in G.edges())
+    return fingerprint([nodes, edges])
+
+
+def build_key(G, settings, script, target, **build_args) -> str:
+    """Key of the project built for G with settings and the make options in build_args"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f'{BUILD_CACHE_VERSION}:{target}'.encode())
+    hasher.update(graph_fingerprint(G))
+    hasher.update(fingerprint([G.quantization, dict(settings), list(script),
+                               sorted(build_args.items()), sorted(_environment(target).items())]))
+    return hasher.hexdigest()
+
+
+class BuildCacheEntry():
+    """Project directory of one build. Entering it locks the directory so that
+    concurrent executions of the same model build it once."""
+
+    def __init__(self, G, settings, script, target, cache_dir=None, max_entries=BUILD_CACHE_ENTRIES,
+                 **build_args):
+        if cache_dir is None:
+            cache_dir = BUILD_CACHE_DIR
+        self._cache_dir = cache_dir
+        self._max_entries = max_entries
+        self._key_args = (G, settings, script, target)
+        self._build_args = build_args
+        self._key = self._resolve(build_key(*self._key_args, **self._build_args))
+        self._lock_fp = None
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self._cache_dir, INDEX_FILE)) as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_index(self, update):
+        """Apply update to the aliases in the index of the cache and save them"""
+        os.makedirs(self._cache_dir, exist_ok=True)
+        with open(os.path.join(self._cache_dir, INDEX_LOCK_FILE), 'a') as lock_fp:
+            fcntl.flock(lock_fp, fcntl.LOCK_EX)
+            index = self._read_index()
+            aliases = index.setdefault('aliases', {})
+            if update(aliases):
+                path = os.path.join(self._cache_dir, INDEX_FILE)
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w') as fp:
+                    json.dump(index, fp, indent=1, sort_keys=True)
+                os.replace(tmp_path, path)
+
+    def _resolve(self, key):
+        # a key can be an alias of the entry of another key
+        return self._read_index().get('aliases', {}).get(key, key)
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def path(self):
+        return os.path.join(self._cache_dir, self._key)
+
+    @property
+    def is_built(self):
+        try:
+            with open(os.path.join(self.path, BUILT_MARKER)) as fp:
+                return json.load(fp).get('key') == self._key
+        except (OSError, ValueError):
+            return False
+
+    @property
+    def at_log(self):
+        """AutoTiler log saved when the project was built"""
+        try:
+            with open(os.path.join(self.path, AT_LOG_FILE)) as fp:
+                return fp.read().split('\n')
+        except OSError:
+            return None
+
+    def mark_built(self, at_log=None):
+        if at_log is not None:
+            self._write(AT_LOG_FILE, '\n'.join(at_log))
+        self._write(BUILT_MARKER, json.dumps({'key': self._key}))
+        self._add_alias(build_key(*self._key_args, **self._build_args))
+
+    def _add_alias(self, key):
+        if key == self._key:
+            return
+
+        def add(aliases):
+            if aliases.get(key) == self._key:
+                return False
+            aliases[key] = self._key
+            return True
+        self._update_index(add)
+
+    def invalidate(self):
+        for name in (BUILT_MARKER, AT_LOG_FILE):
+            if os.path.exists(os.path.join(self.path, name)):
+                os.unlink(os.path.join(self.path, name))
+
+    def _write(self, name, contents):
+        path = os.path.join(self.path, name)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as fp:
+            fp.write(contents)
+        os.replace(tmp_path, path)
+
+    def __enter__(self):
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._lock_fp = open(f'{self.path}.lock', 'a')
+        fcntl.flock(self._lock_fp, fcntl.LOCK_EX)
+        os.makedirs(self.path, exist_ok=True)
+        # the modification time of the lock records the last use of the entry
+        os.utime(self._lock_fp.fileno())
+        return self
+
+    def __exit__(self, *_):
+        fcntl.flock(self._lock_fp, fcntl.LOCK_UN)
+        self._lock_fp.close()
+        self._lock_fp = None
+        self.prune()
+
+    def prune(self):
+        """Remove the least recently used entries over the maximum number of entries"""
+        try:
+            locks = [os.path.join(self._cache_dir, name) for name in os.listdir(self._cache_dir)
+                     if name.endswith('.lock')]
+        except OSError:
+            return
+        locks.sort(key=lambda path: os.stat(path).st_mtime_ns if os.path.exists(path) else 0, reverse=True)
+        for lock in locks[self._max_entries:]:
+            with open(lock, 'a') as lock_fp:
+                try:
+                    fcntl.flock(lock_fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    # in use
+                    continue
+                LOG.debug('removing cached build %s', lock[:-len('.lock')])
+                shutil.rmtree(lock[:-len('.lock')], ignore_errors=True)
+                os.unlink(lock)
+
+        def remove_dangling(aliases):
+            dangling = [alias for alias, key in aliases.items()
+                        if not os.path.isdir(os.path.join(self._cache_dir, key))]
+            for alias in dangling:
+                del aliases[alias]
+            return bool(dangling)
+        self._update_index(remove_dangling)
+
+
+def build_cache_entry(G, settings, script, target, cache_dir=None, **build_args):
+    """Entry for the build of G or None if the cache is disabled"""
+    if cache_dir is None:
+        cache_dir = BUILD_CACHE_DIR
+    if not cache_dir:
+        return None
+    return BuildCacheEntry(G, settings, script, target, cache_dir=cache_dir, **build_args)
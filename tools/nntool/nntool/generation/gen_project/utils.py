@@ -44,6 +44,20 @@ def skip_existing_files(destdir):
     return func
 
 
+def write_if_changed(path, contents, mode='w'):
+    """Write contents to path unless it already contains them so that make does
+    not rebuild what depends on it"""
+    try:
+        with open(path, mode.replace('w', 'r')) as fp:
+            if fp.read() == contents:
+                return False
+    except OSError:
+        pass
+    with open(path, mode) as fp:
+        fp.write(contents)
+    return True
+
+
 def parse_last_open(history):
     args = None
     for command in reversed(history):
@@ -145,7 +159,10 @@ def process_script(script):
 
 def gen_project(G, settings, project_folder, script_commands, overwrite=False, performance=False,
                 quantized=False, test_results=False, input_file=None, input_args=None,
-                gen_atproject=False, dump_tensors=False, finput_tensors=None, input_tensors=None, tolerance=0.0):
+                gen_atproject=False, dump_tensors=False, finput_tensors=None, input_tensors=None, tolerance=0.0,
+                inputs_only=False):
+    """Generate a project that builds and runs G. If inputs_only is set the project has already
+    been generated for G and only the main application file and the input files are written."""
     if not os.path.exists(project_folder):
         os.mkdir(project_folder)
 
@@ -206,21 +223,24 @@ def gen_project(G, settings, project_folder, script_commands, overwrite=False, p
     common_mk = os.path.join(project_folder, "common.mk")
     nntool_script = os.path.join(project_folder, "nntool_script")
     if overwrite or not os.path.exists(main_c):
-        with open(os.path.join(project_folder, f"{code_gen.project_name}.c"), "w") as output_fp:
-            output_fp.write(generate_main_appl_template(
-                G, code_gen, input_tensors, qoutput_tensors, tolerance))
+        write_if_changed(main_c, generate_main_appl_template(
+            G, code_gen, input_tensors, qoutput_tensors, tolerance))
     if overwrite or not os.path.exists(main_h):
-        with open(os.path.join(project_folder, f"{code_gen.project_name}.h"), "w") as output_fp:
-            output_fp.write(generate_main_appl_header(G, code_gen))
+        write_if_changed(main_h, generate_main_appl_header(G, code_gen))
 
     if input_tensors:
         for i, node in enumerate(code_gen.input_nodes):
             inp = input_tensors[i]
             name = node.name.capitalize()
             if overwrite or not os.path.exists(f"{name}.bin"):
-                with open(os.path.join(project_folder, f"{name}.bin"), "wb") as in_f:
-                    inp.astype(G.quantization[node.name].out_qs[0].dtype, order='C', casting='unsafe', copy=True)\
-                        .tofile(in_f)
+                write_if_changed(
+                    os.path.join(project_folder, f"{name}.bin"),
+                    inp.astype(G.quantization[node.name].out_qs[0].dtype, order='C', casting='unsafe', copy=True)
+                    .tobytes(),
+                    mode='wb')
+
+    if inputs_only:
+        return
 
     if gen_atproject:
         if dump_tensors:
@@ -13,18 +13,164 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import hashlib
+import json
+import logging
 import os
+import shutil
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+# records the contents of the files written to a tensor directory so that
+# regenerating a model only writes the files that changed
+MANIFEST_FILE = '.nntool_constants.json'
+
+# tensors are converted to their file type this many elements at a time
+CHUNK_ELEMENTS = 1 << 20
+
+
+class ConstantEmitter():
+    """Writes the constant files of a generated model
+
+    The AutoTiler reads one file per constant so each constant keeps its own
+    file. Identical tensors are converted and written once and the other files
+    are hard links to the first one. If a tensor directory is given a manifest in
+    it records a digest of each file so files that have not changed since the
+    last generation are not written again. Without one every file is written.
+    """
+    def __init__(self, tensor_directory=None):
+        if tensor_directory is None:
+            # the file names are relative to the working directory which is not
+            # ours to leave a manifest in
+            self._tensor_directory = "."
+            self._manifest_path = None
+        else:
+            if tensor_directory != ".":
+                os.makedirs(tensor_directory, mode=0o750, exist_ok=True)
+            self._tensor_directory = tensor_directory
+            self._manifest_path = os.path.join(tensor_directory, MANIFEST_FILE)
+        self._manifest = self._load_manifest()
+        self._emitted = {}
+        self._digests = {}
+        self.written = 0
+        self.linked = 0
+        self.skipped = 0
+
+    def _load_manifest(self):
+        if self._manifest_path is None:
+            return {}
+        try:
+            with open(self._manifest_path) as fp:
+                manifest = json.load(fp)
+            return manifest if isinstance(manifest, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        if self._manifest_path is None:
+            return
+        try:
+            tmp_path = self._tmp_path(self._manifest_path)
+            with open(tmp_path, 'w') as fp:
+                json.dump(self._manifest, fp, sort_keys=True)
+            os.replace(tmp_path, self._manifest_path)
+        except OSError as ex:
+            LOG.debug('unable to save constant manifest - %s', ex)
+
+    @staticmethod
+    def digest(contents: np.ndarray, dtype) -> str:
+        """Digest of the file written for contents converted to dtype. The conversion
+        is deterministic so the source values are hashed rather than the converted ones."""
+        contents = np.asarray(contents)
+        # sha256 is the fastest of the hashlib digests on cpus with sha extensions
+        hasher = hashlib.sha256()
+        hasher.update(f'{contents.dtype.str}:{np.dtype(dtype).str}:'.encode())
+        hasher.update(np.ascontiguousarray(contents).reshape(-1).view(np.uint8).data)
+        return hasher.hexdigest()
+
+    def _digest(self, contents, dtype):
+        # the same array is often shared by several constants. it is kept in the
+        # memo so that its id cannot be reused
+        key = (id(contents), np.dtype(dtype).str)
+        memo = self._digests.get(key)
+        if memo is None:
+            memo = self._digests[key] = (contents, self.digest(contents, dtype))
+        return memo[1]
+
+    def _unchanged(self, file_name, path, digest):
+        entry = self._manifest.get(file_name)
+        if not entry or entry.get('digest') != digest:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime_ns')
+
+    @staticmethod
+    def _tmp_path(path):
+        return f'{path}.{os.getpid()}.tmp'
+
+    @classmethod
+    def _write_file(cls, path, contents: np.ndarray, dtype):
+        # written to a temporary file and renamed so that an interrupted generation
+        # never leaves a partial file and hard links to the old file are broken
+        tmp_path = cls._tmp_path(path)
+        try:
+            with open(tmp_path, 'wb') as t_fp:
+                flat = np.asarray(contents).reshape(-1)
+                if flat.dtype == np.dtype(dtype):
+                    flat.tofile(t_fp)
+                else:
+                    for start in range(0, flat.size, CHUNK_ELEMENTS):
+                        flat[start:start + CHUNK_ELEMENTS].astype(dtype, casting='unsafe').tofile(t_fp)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def _link_file(cls, src_path, path):
+        tmp_path = cls._tmp_path(path)
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+        try:
+            os.link(src_path, tmp_path)
+        except OSError:
+            shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def emit(self, const_info):
+        file_name = const_info.file_name
+        path = os.path.join(self._tensor_directory, file_name)
+        dtype = const_info.qtype.dtype
+        digest = self._digest(const_info.contents, dtype)
+        if self._unchanged(file_name, path, digest):
+            self.skipped += 1
+        elif digest in self._emitted and os.path.abspath(self._emitted[digest]) != os.path.abspath(path):
+            self._link_file(self._emitted[digest], path)
+            self.linked += 1
+        else:
+            self._write_file(path, const_info.contents, dtype)
+            self.written += 1
+        self._emitted.setdefault(digest, path)
+        stat = os.stat(path)
+        self._manifest[file_name] = {'digest': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def emit_all(self, global_recs):
+        for global_rec in global_recs:
+            if global_rec.const_info is None:
+                continue
+            self.emit(global_rec.const_info)
+        self._save_manifest()
+        LOG.debug('constants: %s written %s linked to identical constants %s unchanged',
+                  self.written, self.linked, self.skipped)
 
 
 def write_constants(global_recs, tensor_directory=None):
-    if tensor_directory is None:
-        tensor_directory = "."
-    elif tensor_directory != ".":
-        os.makedirs(tensor_directory, mode=0o750, exist_ok=True)
-    for global_rec in global_recs:
-        if global_rec.const_info is None:
-            continue
-        const_info = global_rec.const_info
-        with open(os.path.join(tensor_directory, const_info.file_name), 'wb') as t_fp:
-            const_info.contents.astype(const_info.qtype.dtype, order='C', casting='unsafe', copy=True)\
-                .tofile(t_fp)
+    emitter = ConstantEmitter(tensor_directory=tensor_directory)
+    emitter.emit_all(global_recs)
+    return emitter
@@ -14,7 +14,6 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
-import pickle
 import tempfile
 import typing
 import zipfile
@@ -30,6 +29,7 @@ from nntool.quantization.multiplicative.scaling_qtypes import (MultMulBiasScaleQ
 from nntool.quantization.new_qrec import QRec
 from nntool.quantization.qtype import QType
 from nntool.quantization.quantization_set import QuantizationSet
+from nntool.utils.tensor_store import write_zip_tensor_store
 
 if typing.TYPE_CHECKING:
     from nntool.graph.nngraph import NNGraph
@@ -40,8 +40,8 @@ def write_headers(G: 'NNGraph', has_tensors: bool, code_block: StreamCodeBlock):
     code_block.comment(f'{G.name} graph exported from NNTool')
     code_block.nl().nl()
     if has_tensors:
-        code_block.write('import pickle')
         code_block.write('import os')
+        code_block.write('from nntool.utils.tensor_store import read_zip_tensor_store')
     code_block.write(
         'from numpy import (array, float16, float32, float64, int64, int32, int16,')
     code_block.write('                   int8, uint64, uint32, uint16, uint8)')
@@ -76,7 +76,7 @@ def write_graph_function_header(has_tensors: bool, has_quantization: bool, graph
             graph_base = graph_base[:-len('.zip')]
         code_block.write('if tensors is None:').indent()
         code_block.write(
-            f'tensors = pickle.loads(__loader__.get_data("{graph_base}/tensors.pickle"))').deindent()
+            f'tensors = read_zip_tensor_store(__loader__.archive, "{graph_base}/tensors.bin")').deindent()
 
 
 def write_graph(
@@ -137,17 +137,14 @@ __all__ = ['{graph_base}']
 """)
         with open(os.path.join(temp_dir, '__init__.py'), 'wt') as file_stream:
             file_stream.write('')
-        if tensors:
-            tensor_dump_path = os.path.join(temp_dir, graph_base, 'tensors.pickle')
-            with open(tensor_dump_path, 'wb') as file_stream:
-                pickle.dump(tensors, file_stream)
         if not graphpath.endswith('.zip'):
             graphpath = f'{graphpath}.zip'
         with zipfile.PyZipFile(graphpath, mode="w") as zip_pkg:
             zip_pkg.writepy(os.path.join(temp_dir, '__init__.py'))
             zip_pkg.writepy(os.path.join(temp_dir, graph_base))
             if tensors:
-                zip_pkg.write(tensor_dump_path, f'{graph_base}/tensors.pickle')
+                # tensors are stored uncompressed and aligned so they are memory mapped on load
+                write_zip_tensor_store(zip_pkg, f'{graph_base}/tensors.bin', tensors)
 
 
 def dump_scaleqtype(tensors, key: Union[Tuple, str], qtype: ScalingQType, code_block: StreamCodeBlock, indent=True, nl='\n'):
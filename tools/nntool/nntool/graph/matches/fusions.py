@@ -36,8 +36,8 @@ def fusions(
             if exclude_match_names:
                 match_group.exclude_matches(*exclude_match_names)
             nngraph.add_dimensions(quiet=True)
+            # the match group leaves the dimensions up to date
             match_group.match(nngraph)
-            nngraph.add_dimensions(quiet=True)
             if no_postprocess:
                 break
             if match_group.run_qtune:
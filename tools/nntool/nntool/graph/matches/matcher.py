@@ -46,12 +46,17 @@ class Matcher(ABC):
     RUN_AGAIN_ON_MATCH = []
     RUN_QTUNE_ON_MATCH = False
     RUN_ADJUST_ON_MATCH = False
+    # The matcher only looks for matches starting from nodes of these classes so
+    # cannot match while the graph contains none of them
+    ANCHOR_NODE_CLASSES = None
 
     def __init__(self, identity: str = None):
         if identity is None:
             self._identity = self.NAME
         else:
             self._identity = identity
+        # (graph, version, anchors present) after the last run that did not modify the graph
+        self._last_run = None
 
     @property
     def name(self):
@@ -83,6 +88,34 @@ class Matcher(ABC):
     def match(self, G: GraphView, **kwargs) -> bool:
         return self._match(G, **kwargs)
 
+    def has_anchors(self, G: GraphView) -> bool:
+        return self.ANCHOR_NODE_CLASSES is None or bool(G.nodes(node_classes=self.ANCHOR_NODE_CLASSES))
+
+    def record_run(self, G: GraphView, has_modified_graph: bool):
+        """Record the state of the graph after a run of this matcher"""
+        if has_modified_graph:
+            self._last_run = None
+        else:
+            self._last_run = (G, G.version, self.has_anchors(G))
+
+    def can_skip(self, G: GraphView) -> bool:
+        """True if running the matcher again cannot modify the graph. This is the case if
+        nothing has changed since its last run or if there were no anchor nodes in the graph
+        on its last run and none have been added since."""
+        if self._last_run is None:
+            return False
+        last_graph, last_version, had_anchors = self._last_run
+        if last_graph is not G:
+            return False
+        if last_version == G.version:
+            return True
+        if had_anchors:
+            return False
+        added_nodes = G.added_nodes_since(last_version)
+        if added_nodes is None:
+            return False
+        return not any(isinstance(node, self.ANCHOR_NODE_CLASSES) for node in added_nodes)
+
     @staticmethod
     def match_name(val):
         return Matcher.property_register("NAME", val)
@@ -125,6 +158,10 @@ class Matcher(ABC):
     def groups(*args):
         return Matcher.property_register("GROUPS", args)
 
+    @staticmethod
+    def anchor_node_classes(*args):
+        return Matcher.property_register("ANCHOR_NODE_CLASSES", args)
+
     @staticmethod
     def property_register(name, value):
 
@@ -143,6 +180,7 @@ run_after = Matcher.run_after
 run_again_on_match = Matcher.run_again_on_match
 run_qtune_on_match = Matcher.run_qtune_on_match
 run_adjust_on_match = Matcher.run_adjust_on_match
+anchor_node_classes = Matcher.anchor_node_classes
 
 groups = Matcher.groups
 
@@ -188,41 +226,52 @@ class MatchGroup(Matcher):
 
     def _match(self, G: 'NNGraph', **kwargs):
         # Note: assumption is that dimensions are valid when a match is called
+        # and they are left valid on return. Matches are run in order until none
+        # of them modifies the graph. Matches that cannot find anything new since
+        # their last run are skipped.
         found_match = True
-        dimensions_set = True
+        dimensions_version = G.version
         self._matches_pending = []
         self._adjust_pending = False
         self._qtune_pending = False
         any_found_match = False
-        while found_match:
-            found_match = False
-            matches = list(self._matches.values())
-            while matches:
-                match = matches.pop(0)
-                # if this match was queued by another match remove it since we run here
-                if match.name in self._matches_pending:
-                    self._matches_pending.remove(match.name)
-                LOG.debug("fusions - start %s", match.name)
-                if match.NEEDS_VALID_DIMENSION and not dimensions_set:
-                    G.add_dimensions(quiet=True)
-                    dimensions_set = True
-                has_modified_graph = match.match(
-                    G, group_identity=self._identity)
-                if has_modified_graph:
-                    LOG.info("++ fusion %s modified graph", match.name)
-                    found_match = True
-                    G.add_dimensions(quiet=True)
-                    dimensions_set = True
-                    for required_match in match.run_again:
-                        if match not in self._matches_pending:
-                            self._matches_pending.append(required_match)
-                    self._adjust_pending = self._adjust_pending or match.run_adjust
-                    if G.quantization:
-                        self._qtune_pending = self._qtune_pending or match.run_qtune
-
-                if dimensions_set and has_modified_graph:
-                    dimensions_set = False
-            if found_match:
-                any_found_match = True 
+        with G.track_added_nodes():
+            while found_match:
+                found_match = False
+                for match in list(self._matches.values()):
+                    # if this match was queued by another match remove it since we run here
+                    if match.name in self._matches_pending:
+                        self._matches_pending.remove(match.name)
+                    if match.can_skip(G):
+                        LOG.debug("fusions - skip %s", match.name)
+                        continue
+                    LOG.debug("fusions - start %s", match.name)
+                    if match.NEEDS_VALID_DIMENSION and dimensions_version != G.version:
+                        G.add_dimensions(quiet=True)
+                        dimensions_version = G.version
+                    has_modified_graph = match.match(
+                        G, group_identity=self._identity)
+                    if has_modified_graph:
+                        LOG.info("++ fusion %s modified graph", match.name)
+                        found_match = True
+                        if isinstance(match, MatchGroup):
+                            # groups update the dimensions after their last modification
+                            dimensions_version = G.version
+                        else:
+                            # the match may only have modified nodes in place
+                            G.mark_changed()
+                            G.add_dimensions(quiet=True)
+                            dimensions_version = G.version
+                        for required_match in match.run_again:
+                            if match not in self._matches_pending:
+                                self._matches_pending.append(required_match)
+                        self._adjust_pending = self._adjust_pending or match.run_adjust
+                        if G.quantization:
+                            self._qtune_pending = self._qtune_pending or match.run_qtune
+                    match.record_run(G, has_modified_graph)
+                if found_match:
+                    any_found_match = True
+        if dimensions_version != G.version:
+            G.add_dimensions(quiet=True)
 
         return any_found_match
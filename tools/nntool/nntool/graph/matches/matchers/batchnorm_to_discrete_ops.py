@@ -23,7 +23,7 @@ from nntool.graph.types.conv2d import BatchNormalizationNode
 from nntool.graph.types.tensor_arithmetic import MatrixMulNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, groups, run_qtune_on_match
+from ..matcher import Matcher, anchor_node_classes, match_name, description, groups, run_qtune_on_match
 
 LOG = logging.getLogger(__name__)
 
@@ -31,6 +31,7 @@ LOG = logging.getLogger(__name__)
 @match_name('batchnorm_to_discrete_ops')
 @description('Convert BatchNormParameters into a set of broadcasted operations')
 @groups('scaled', 'symmetric')
+@anchor_node_classes(BatchNormalizationNode)
 class FuseBatchnorm(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
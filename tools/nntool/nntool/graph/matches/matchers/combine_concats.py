@@ -19,7 +19,7 @@ from nntool.graph.types import (ConcatNode, CopyNode, InputNode,
                          NNEdge, ReshapeNode, NNNodeBase)
 from nntool.utils.graph import GraphView, Node
 
-from ..matcher import (Matcher, description, groups, match_name,
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name,
                        modifies_dimensions, needs_valid_dimension, run_before)
 
 LOG = logging.getLogger(__name__)
@@ -118,6 +118,7 @@ def remove_internal_graph(G, subgraph):
 @ groups('*')
 @ needs_valid_dimension(True)
 @ modifies_dimensions(True)
+@anchor_node_classes(ConcatNode)
 class CombineConcats(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
@@ -19,7 +19,7 @@ from nntool.graph.dim import Dim
 from nntool.graph.types import GlobalPoolingNodeBase, NNEdge, ReshapeNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, groups, match_name, description
+from ..matcher import Matcher, anchor_node_classes, groups, match_name, description
 
 LOG = logging.getLogger(__name__)
 
@@ -50,6 +50,7 @@ def reduce_reduction(state, params):
 @groups('*')
 @match_name("combine_reductions")
 @description("""Combine reduction steps""")
+@anchor_node_classes(GlobalPoolingNodeBase)
 class CombineReductions(Matcher):
 
     @staticmethod
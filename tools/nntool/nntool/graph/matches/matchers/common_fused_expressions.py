@@ -21,7 +21,7 @@ from nntool.graph.types import (ConvFusionNode, ExpressionFusionNode,
 from nntool.utils.exception import NNToolInternelError
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, description, match_name, run_after, needs_valid_dimension
+from ..matcher import Matcher, anchor_node_classes, description, match_name, run_after, needs_valid_dimension
 
 LOG = logging.getLogger(__name__)
 
@@ -29,6 +29,7 @@ LOG = logging.getLogger(__name__)
 @description("finds fused expressions that can be reduced to a single kernel with info parameters")
 @run_after('fuse_gap_convs', 'fuse_gap_linear')
 @needs_valid_dimension(True)
+@anchor_node_classes(ConvFusionNode, LinearFusionNode)
 class CommonFusedExpressios(Matcher):
 
     def _match(self, G: GraphView, **kwargs) -> bool:
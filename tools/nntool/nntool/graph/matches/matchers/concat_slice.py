@@ -22,7 +22,7 @@ from nntool.graph.types.misc import (NoOPNode)
 from nntool.utils.compatible_transposes import find_combination
 from nntool.utils.graph import GraphView
 
-from ..matcher import (Matcher, description, groups, match_name,
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name,
                        needs_valid_dimension, run_qtune_on_match)
 
 LOG = logging.getLogger(__name__)
@@ -84,6 +84,7 @@ def up_from_slice(G, edge, axis, shape, remove_nodes=None, removing=True, reshap
 @needs_valid_dimension(True)
 @match_name("concat_slice")
 @description("removes slices after concats that match an input of the concat")
+@anchor_node_classes(StridedSliceNode)
 class ConcatSliceMatch(Matcher):
 
     def _match(self, G: GraphView, **kwargs) -> bool:
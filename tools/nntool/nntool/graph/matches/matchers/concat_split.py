@@ -20,7 +20,7 @@ from nntool.graph.types import ConcatNode, NNEdge, SplitNode
 from nntool.graph.types.misc import CopyNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, description, groups, match_name, run_before
+from ..matcher import Matcher, anchor_node_classes, description, groups, match_name, run_before
 
 LOG = logging.getLogger(__name__)
 
@@ -29,6 +29,7 @@ LOG = logging.getLogger(__name__)
 @match_name("concat_split")
 @description("removes concat/split pair where all in edges on the concat match the out edges on the split")
 @run_before('insert_copies')
+@anchor_node_classes(SplitNode)
 class ConcatSplitMatch(Matcher):
 
     def _match(self, G: GraphView, **kwargs) -> bool:
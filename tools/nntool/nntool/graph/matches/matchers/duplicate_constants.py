@@ -18,7 +18,7 @@ from nntool.graph.dim import Dim
 from nntool.graph.types import ConstantInputNode, NNEdge
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, run_before, groups
+from ..matcher import Matcher, anchor_node_classes, match_name, description, run_before, groups
 
 LOG = logging.getLogger(__name__)
 
@@ -26,6 +26,7 @@ LOG = logging.getLogger(__name__)
 @description("""Find constants that are linked to more than one node and duplicate them""")
 @run_before('*')
 @groups('symmetric', 'scaled')
+@anchor_node_classes(ConstantInputNode)
 class MatchDuplicateConstants(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
@@ -21,7 +21,7 @@ from nntool.graph.types import (ConstantInputNode, MatMulOpNode, MatMulTranspose
 from nntool.graph.types.conv2d import BatchNormalizationNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, groups, run_qtune_on_match
+from ..matcher import Matcher, anchor_node_classes, match_name, description, groups, run_qtune_on_match
 
 LOG = logging.getLogger(__name__)
 
@@ -30,6 +30,7 @@ LOG = logging.getLogger(__name__)
 @description('Fuse batch normalization into MatMul')
 @groups('scaled', 'symmetric')
 @run_qtune_on_match
+@anchor_node_classes(BatchNormalizationNode)
 class FuseBatchnorm(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
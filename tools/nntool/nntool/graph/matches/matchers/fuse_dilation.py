@@ -22,7 +22,7 @@ from nntool.graph.types.tensor_shape import (BatchToSpaceNode,
                                              SpaceToBatchNode,
                                              StridedSliceNode)
 
-from ..matcher import Matcher, description, groups, match_name, run_before
+from ..matcher import Matcher, anchor_node_classes, description, groups, match_name, run_before
 
 if typing.TYPE_CHECKING:
     from nntool.graph.nngraph import NNGraph
@@ -61,6 +61,7 @@ def decompose(nodes, *clses):
 @match_name("fuse_dilation")
 @description("""Fuse dilation patterns with space to batch and batch to space into convs""")
 @run_before('*')
+@anchor_node_classes(SpaceToBatchNode)
 class FuseDilation(Matcher):
 
     def _match(self, G: 'NNGraph', **kwargs):
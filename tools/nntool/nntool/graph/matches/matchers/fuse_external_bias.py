@@ -20,7 +20,7 @@ from nntool.graph.types import (ConstantInputNode, FilterNodeBase,
                          MatrixAddNode, MatrixMulNode, NNEdge, ReshapeNode)
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, groups, run_before, run_qtune_on_match
+from ..matcher import Matcher, anchor_node_classes, match_name, description, groups, run_before, run_qtune_on_match
 
 LOG = logging.getLogger(__name__)
 
@@ -39,6 +39,7 @@ OPS = {
             'fuse_gap_linear',
             'move_activations_up')
 @run_qtune_on_match
+@anchor_node_classes(FilterNodeBase)
 class MatchExternalBias(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
@@ -24,7 +24,7 @@ from nntool.graph.types.tensor_arithmetic import MatMulOpNode, MatMulTransposedN
 from nntool.quantization.quantizer.new_quantizer import NewQuantizer
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, description, groups, match_name, run_before
+from ..matcher import Matcher, anchor_node_classes, description, groups, match_name, run_before
 
 LOG = logging.getLogger(__name__)
 
@@ -64,6 +64,7 @@ def reverse_matmul(G: GraphView, params):
 @description('Fuse bias addition after matmul')
 @groups('scaled', 'symmetric')
 @run_before('fuse_op_activation_scale8', 'fuse_op_activation_pow2', 'move_pooling_scale8', 'move_activations_up', 'fuse_op_activation_scale8', 'fuse_op_activation_pow2')
+@anchor_node_classes(MatMulOpNode)
 class MatchExternalBiasMatmul(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
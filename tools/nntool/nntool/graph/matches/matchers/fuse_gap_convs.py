@@ -31,7 +31,7 @@ from nntool.graph.types.linear import LinearNode
 from nntool.utils.exception import NNToolInternelError
 from nntool.utils.graph import GraphView
 
-from ..matcher import (Matcher, description, groups, match_name,
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name,
                        run_again_on_match, run_qtune_on_match)
 
 LOG = logging.getLogger(__name__)
@@ -245,6 +245,7 @@ def fuse_expression_activation(params: ExpressionFusionNode):
 @description(
     'Fuse convolutions, pools and activations to match GAP AutoTiler operations. Pooling and activation nodes'
     ' are also fused into existing convolution fusions.')
+@anchor_node_classes(Conv2DNode, ConvFusionNode)
 class MatchAllGapConv(Matcher):
     def _match(self, G: GraphView, **kwargs):
         has_modified_graph = False
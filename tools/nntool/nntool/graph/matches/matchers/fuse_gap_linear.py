@@ -24,7 +24,7 @@ from nntool.graph.types import (ExpressionFusionNode, LinearNode,
 from nntool.graph.types.activations import TanHNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import (Matcher, description, groups, match_name,
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name,
                        run_adjust_on_match, run_again_on_match,
                        run_qtune_on_match)
 
@@ -53,6 +53,7 @@ VALID_ACTIVATIONS_POW2 = (
 @run_again_on_match('common_fused_expressions')
 @match_name("fuse_gap_linear")
 @description('Fuse linear layers and activations to match GAP AutoTiler operations')
+@anchor_node_classes(LinearNode)
 class MatchGapLinear(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
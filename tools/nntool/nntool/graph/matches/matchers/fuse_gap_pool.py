@@ -24,7 +24,7 @@ from nntool.graph.types.fusions import ActivationFusionNode
 from nntool.graph.types.global_pooling import GlobalPoolingNodeBase
 from nntool.utils.graph import GraphView
 
-from ..matcher import (Matcher, description, groups, match_name,
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name,
                        run_adjust_on_match, run_after, run_again_on_match,
                        run_qtune_on_match)
 from .fuse_gap_convs import fuse_expression_activation
@@ -96,6 +96,7 @@ class FusionMatch():
 @description('Fuse pooling layers and activations to match GAP AutoTiler operations')
 @run_after('fuse_gap_convs')
 @run_again_on_match('common_fused_expressions')
+@anchor_node_classes(PoolingNodeBase, GlobalPoolingNodeBase)
 class MatchGapPool(Matcher):
 
     def get_node_list(self, G, params, valid_activations, valid_activations_wo_pool, result=None):
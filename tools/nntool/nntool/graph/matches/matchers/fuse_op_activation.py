@@ -27,7 +27,7 @@ from nntool.graph.types import (ActivationFusionNode, ActivationNodeBase,
 from nntool.graph.types.tensor_arithmetic import MatMulTransposedNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import (Matcher, description, groups, match_name,
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name,
                        run_adjust_on_match, run_after, run_again_on_match,
                        run_qtune_on_match)
 from .fuse_gap_convs import fuse_expression_activation
@@ -144,6 +144,7 @@ class FusionMatch():
 @run_qtune_on_match
 @run_adjust_on_match
 @run_again_on_match('common_fused_expressions')
+@anchor_node_classes(*VALID_FUSIONS)
 class MatchOpActivation(Matcher):
 
     @abstractproperty
@@ -20,7 +20,7 @@ from nntool.graph.types import FilterLikeNodeBase, PadNode, ReshapeNode
 from nntool.graph.types.base import NNEdge
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, run_before, groups
+from ..matcher import Matcher, anchor_node_classes, match_name, description, run_before, groups
 
 LOG = logging.getLogger(__name__)
 
@@ -53,6 +53,7 @@ def expand_padding(from_shape, to_shape, padding):
 @description('Fuse pad operation to subsequent Convolution or Pool')
 @groups('*')
 @run_before('fuse_gap_convs', 'fuse_gap_pool')
+@anchor_node_classes(PadNode)
 class MatchFusePad(Matcher):
     @staticmethod
     def remove_padding(shape, padding):
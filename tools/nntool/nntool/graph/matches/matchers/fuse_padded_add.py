@@ -21,7 +21,7 @@ from nntool.graph.types.base import NNEdge
 from nntool.quantization.new_qrec import QRec
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, groups, run_before, run_qtune_on_match
+from ..matcher import Matcher, anchor_node_classes, match_name, description, groups, run_before, run_qtune_on_match
 
 LOG = logging.getLogger(__name__)
 
@@ -66,6 +66,7 @@ class FusionMatch():
 @run_before('fuse_op_activation_scale8')
 @run_qtune_on_match
 @groups('scaled')
+@anchor_node_classes(PadNode)
 class MatchPadAddAct(Matcher):
 
     def get_node_list(self, G, params, result=None):
@@ -18,7 +18,7 @@ import logging
 from nntool.graph.types import GatherNode, NNEdge, SplitNode, TransposeNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, groups, run_before
+from ..matcher import Matcher, anchor_node_classes, match_name, description, groups, run_before
 
 LOG = logging.getLogger(__name__)
 
@@ -26,6 +26,7 @@ LOG = logging.getLogger(__name__)
 @description("collects gathers from a single node and converts to a split")
 @groups('*')
 @run_before('concat_split')
+@anchor_node_classes(GatherNode)
 class GatherToSplitMatch(Matcher):
 
     def _match(self, G: GraphView, **kwargs) -> bool:
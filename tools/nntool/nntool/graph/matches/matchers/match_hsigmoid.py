@@ -24,7 +24,7 @@ from nntool.graph.types import (ConstantInputNode, HSigmoidNode,
 from nntool.quantization.new_qrec import QRec
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, description, groups, match_name, run_before
+from ..matcher import Matcher, anchor_node_classes, description, groups, match_name, run_before
 
 LOG = logging.getLogger(__name__)
 
@@ -49,6 +49,7 @@ def check_equals(G, node, val):
 @description('Match relu6 followed by matmul with 1/6 constant and replaces with hsigmoid activation')
 @groups('scaled')
 @run_before('fuse_gap_convs', 'fuse_gap_linear')
+@anchor_node_classes(ReluNode)
 class MatchCloseHSigmoid(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
@@ -17,7 +17,7 @@ from nntool.graph.types.base import ComparableNodeMixin
 from nntool.quantization.quantizer.new_quantizer import NewQuantizer
 from nntool.utils.graph import GraphView
 
-from ..matcher import (Matcher, description, groups, match_name,
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name,
                        needs_valid_dimension, run_before)
 
 LOG = logging.getLogger(__name__)
@@ -28,6 +28,7 @@ LOG = logging.getLogger(__name__)
 @description("Tries to move idenical nodes on all branches of a split before the split")
 @needs_valid_dimension(True)
 @run_before('fuse_gap_convs', 'fuse_gap_linear', 'fuse_gap_pool', 'fuse_op_activation_scale8')
+@anchor_node_classes(SplitNode)
 class MoveNodesBeforeSplit(Matcher):
     @staticmethod
     def moveable_same_operation_edges(G, node):
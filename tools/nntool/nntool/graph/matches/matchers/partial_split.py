@@ -18,7 +18,7 @@ import logging
 from nntool.graph.types import NNEdge, SplitNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import (Matcher, description, groups, match_name, run_before)
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name, run_before)
 
 LOG = logging.getLogger(__name__)
 
@@ -27,6 +27,7 @@ LOG = logging.getLogger(__name__)
 @match_name("partial_split")
 @run_before('insert_copies')
 @description("add fake output to partial split")
+@anchor_node_classes(SplitNode)
 class PartialSplitMatch(Matcher):
     def _match(self, G: GraphView, **kwargs) -> bool:
         has_modified_graph = False
@@ -22,7 +22,7 @@ from nntool.graph.types import (ConcatNode, ConstantInputNode,
 from nntool.utils.graph import GraphView
 
 from ..match_utils import search_down, search_up
-from ..matcher import (Matcher, description, groups, match_name,
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name,
                        modifies_dimensions, run_after)
 
 LOG = logging.getLogger(__name__)
@@ -33,6 +33,7 @@ LOG = logging.getLogger(__name__)
 @modifies_dimensions(True)
 @groups('*')
 @run_after('remove_noops')
+@anchor_node_classes(CopyNode)
 class RemoveCopies(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
@@ -21,13 +21,14 @@ from nntool.graph.types import (InputNode, InsensitiveToQuantizationMixin, NNEdg
                          OutputNode, QuantizeNode)
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, description, match_name, run_before
+from ..matcher import Matcher, anchor_node_classes, description, match_name, run_before
 
 LOG = logging.getLogger(__name__)
 
 @match_name("remove_quantize_operators")
 @description("Remove quantize, dequantize and casts where possible")
 @run_before('*')
+@anchor_node_classes(QuantizeNode)
 class RemoveQuantizeOperators(Matcher):
 
     def propagate_up(self, G, node, qtype, starting=True):
@@ -18,7 +18,7 @@ from nntool.graph.dim import Dim
 from nntool.graph.types import NNEdge, ReshapeNode, TransposeNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, run_before, groups, needs_valid_dimension
+from ..matcher import Matcher, anchor_node_classes, match_name, description, run_before, groups, needs_valid_dimension
 
 LOG = logging.getLogger(__name__)
 
@@ -27,6 +27,7 @@ LOG = logging.getLogger(__name__)
 @run_before('*')
 @groups('*')
 @needs_valid_dimension(True)
+@anchor_node_classes(ReshapeNode)
 class RemoveReshapes(Matcher):
 
     @staticmethod
@@ -17,7 +17,7 @@ import logging
 from nntool.graph.types import LinearNode, NNEdge, ReshapeNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, run_before, groups
+from ..matcher import Matcher, anchor_node_classes, match_name, description, run_before, groups
 
 LOG = logging.getLogger(__name__)
 
@@ -25,6 +25,7 @@ LOG = logging.getLogger(__name__)
 @description("Remove unnecessary reshapes that flatten linear inputs")
 @run_before('fuse_gap_linear')
 @groups('*')
+@anchor_node_classes(ReshapeNode)
 class RemoveReshapesBeforeLinear(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
@@ -17,7 +17,7 @@ import logging
 from nntool.graph.types import NNEdge, ReshapeNode, StridedSliceNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, run_before, groups
+from ..matcher import Matcher, anchor_node_classes, match_name, description, run_before, groups
 
 LOG = logging.getLogger(__name__)
 
@@ -26,6 +26,7 @@ LOG = logging.getLogger(__name__)
 @description("Removes slices that are doing nothing and may insert a reshape if necessary.")
 @run_before('*')
 @groups('symmetric', 'scaled')
+@anchor_node_classes(StridedSliceNode)
 class RemoveSlice(Matcher):
 
     def _match(self, G: GraphView, **kwargs) -> bool:
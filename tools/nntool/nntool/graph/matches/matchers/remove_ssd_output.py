@@ -19,7 +19,7 @@ from copy import deepcopy
 from nntool.graph.types import SSDDetectorNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import (Matcher, description, groups, match_name, run_qtune_on_match,
+from ..matcher import (Matcher, anchor_node_classes, description, groups, match_name, run_qtune_on_match,
                        needs_valid_dimension)
 
 LOG = logging.getLogger(__name__)
@@ -31,6 +31,7 @@ LOG = logging.getLogger(__name__)
 @groups('*')
 @needs_valid_dimension(True)
 @run_qtune_on_match
+@anchor_node_classes(SSDDetectorNode)
 class RemoveSSDOutput(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
@@ -19,13 +19,14 @@ from nntool.graph.types.base import NNEdge
 from nntool.graph.types.misc import QuantizeNode
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, match_name, description, run_before
+from ..matcher import Matcher, anchor_node_classes, match_name, description, run_before
 
 LOG = logging.getLogger(__name__)
 
 @match_name("remove_unnecessary_quantize_operators")
 @description("Remove quantize, dequantize and casts where duplicated")
 @run_before('*')
+@anchor_node_classes(QuantizeNode)
 class RemoveUnnecessaryQuantizeOperators(Matcher):
 
     @staticmethod
@@ -18,7 +18,7 @@ import logging
 from nntool.graph.types import NNEdge, ReverseNode, RNNNodeBase
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, groups, match_name, description, run_before, needs_valid_dimension
+from ..matcher import Matcher, anchor_node_classes, groups, match_name, description, run_before, needs_valid_dimension
 
 LOG = logging.getLogger(__name__)
 
@@ -27,6 +27,7 @@ LOG = logging.getLogger(__name__)
 @description('Fuse reverse operation into RNN/LSTM')
 @run_before('rnn_unpack')
 @needs_valid_dimension(True)
+@anchor_node_classes(ReverseNode)
 class MatchReversedRnn(Matcher):
 
     def _match(self, G: GraphView, **kwargs):
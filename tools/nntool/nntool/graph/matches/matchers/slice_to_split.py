@@ -27,7 +27,7 @@ from nntool.graph.types import (NNEdge, OutputNode, ReshapeNode,
 from nntool.quantization.quantizer.new_quantizer import NewQuantizer
 from nntool.utils.graph import GraphView
 
-from ..matcher import Matcher, description, groups, match_name, run_before, run_adjust_on_match, run_again_on_match
+from ..matcher import Matcher, anchor_node_classes, description, groups, match_name, run_before, run_adjust_on_match, run_again_on_match
 from .remove_unnecessary_quantize_operators import \
     RemoveUnnecessaryQuantizeOperators
 
@@ -121,6 +121,7 @@ def slices_to_sizes(slices_and_shapes, shape_rest):
 @groups('*')
 @run_adjust_on_match
 @run_again_on_match('split_concat', 'concat_split')
+@anchor_node_classes(StridedSliceNode)
 class SliceToSplitMatch(Matcher):
     @ staticmethod
     def slice_to_split(G, slice_nodes, slices):
@@ -22,7 +22,7 @@ from nntool.graph.types.misc import (CopyNode, NoOPNode)
 from nntool.utils.graph import GraphView
 
 from ..match_utils import search_down
-from ..matcher import Matcher, description, groups, match_name, run_before, run_again_on_match
+from ..matcher import Matcher, anchor_node_classes, description, groups, match_name, run_before, run_again_on_match
 
 LOG = logging.getLogger(__name__)
 
@@ -106,6 +106,7 @@ def search_concat(G, edge: NNEdge, axes: Tuple[int]):
 @run_before('remove_noops', 'remove_copies')
 @description("removes splits that go to concats where all the out edges of the split are in sequence in the concat")
 @run_again_on_match('remove_noops')
+@anchor_node_classes(SplitNode)
 class SplitConcatMatch(Matcher):
     def _match(self, G: GraphView, **kwargs) -> bool:
         edge_groups = []
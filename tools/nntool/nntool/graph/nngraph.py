@@ -14,6 +14,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import fcntl
+from contextlib import nullcontext
 from functools import reduce
 import importlib
 import json
@@ -33,6 +34,7 @@ from itertools import groupby
 import numpy as np
 import texttable
 from nntool.execution.graph_executer import GraphExecuter
+from nntool.execution.kernel_profiler import KernelProfiler
 from nntool.execution.quantization_mode import QuantizationMode
 from nntool.generation.autotiler_options import DEFAULT_GEN_OPTS
 from nntool.generation.code_generator import CodeGenerator
@@ -40,6 +42,7 @@ from nntool.generation.default_template import (basic_kernel_header_template,
                                                 basic_kernel_source_template,
                                                 default_template,
                                                 dynamic_template)
+from nntool.generation.gen_project.build_cache import build_cache_entry
 from nntool.generation.gen_project.utils import gen_project, make_script
 from nntool.generation.naming_convension import DefaultNamingConvension
 from nntool.graph.dim import Dim
@@ -74,6 +77,7 @@ from nntool.reports.draw_graph_reporter import DrawGraphReporter
 from nntool.reports.graph_reporter import GraphReporter
 from nntool.reports.quantization_reporter import QuantizationReporter
 from nntool.stats.activation_ranges_collector import ActivationRangesCollector
+from nntool.stats.parallel_ranges_collector import collect_stats_parallel
 from nntool.utils.at_tensor_loader import at_map_tensors, at_tensor_loader_int
 from nntool.utils.graph import Graph, Node
 from nntool.utils.json_serializable import JsonSerializableStateDecoder
@@ -210,6 +214,12 @@ class NNGraph(Graph):
         Returns:
             NNGraph: Loaded graph
         """
+        # saved states (.json or binary .nnstate) replay the commands that created them
+        if isinstance(filepath_or_model, str) and filepath_or_model.endswith('.nnstate'):
+            nntool = importlib.import_module(
+                'nntool.interpreter.nntool_shell').NNToolShell()
+            nntool.load_state_file(filepath_or_model)
+            return nntool.G
         if isinstance(filepath_or_model, str) and filepath_or_model.endswith('.json'):
             with open(filepath_or_model) as fp:
                 history = json.load(fp, cls=JsonSerializableStateDecoder)
@@ -864,7 +874,9 @@ class NNGraph(Graph):
     def collect_statistics(
         self,
         input_tensors_iterator: Union[Sequence[Sequence[np.ndarray]],
-                                      Sequence[np.ndarray]]
+                                      Sequence[np.ndarray]],
+        num_workers: int = 1,
+        collect_percentiles: bool = False
     ) -> Mapping[Union[str, Tuple[str, str]], Mapping]:
         """Collect tensor statistics for quantization
 
@@ -872,11 +884,21 @@ class NNGraph(Graph):
             input_tensors_iterator (Union[Sequence[Sequence[np.ndarray]], Sequence[np.ndarray]]):
                 If the graph has a single input this can just be an iterator over numpy arrays. If the graph has
                 multiple inputs then it should be an iterator over sequences of numpy arrays.
+            num_workers (int, optional):
+                Number of processes to collect statistics with. If greater than 1 the inputs are split between
+                a pool of worker processes and the partial statistics reduced. The result is the same as serial
+                collection. Defaults to 1.
+            collect_percentiles (bool, optional):
+                Collect quantile sketches of all activations. These are needed by the percentile based
+                clip_type options. Defaults to False.
 
         Returns:
             Mapping[Union[str, Tuple[str, str]], Mapping]: Mapping of statistics for each node's inputs and outputs
         """
-        stats_collector = ActivationRangesCollector()
+        if num_workers > 1:
+            return collect_stats_parallel(self, input_tensors_iterator, num_workers=num_workers,
+                                          collect_percentiles=collect_percentiles)
+        stats_collector = ActivationRangesCollector(collect_percentiles=collect_percentiles)
         for input_tensors in input_tensors_iterator:
             if isinstance(input_tensors, np.ndarray):
                 input_tensors = [input_tensors]
@@ -1041,6 +1063,100 @@ class NNGraph(Graph):
         executer = GraphExecuter(self, self.quantization)
         return executer.execute(input_tensors, qmode=qmode, append_fusion_output=output_fusion_tensors)
 
+    def execute_batch(
+            self,
+            input_tensors: Union[np.ndarray, Sequence[np.ndarray]],
+            quantize=False,
+            dequantize=False,
+            output_fusion_tensors=False,
+            check_quantization=True,
+            batch_stats: Mapping[str, Any] = None
+    ) -> Sequence[Sequence[np.ndarray]]:
+        """Runs inference on a batch of samples in one pass over the graph. The results are
+        identical to calling execute on each sample.
+
+        Args:
+            input_tensors (Union[np.ndarray, Sequence[np.ndarray]]):
+                Numpy arrays containing inputs with a leading batch axis (which should be normalized and in float)
+                If there is only one input it can be specified without a sequence.
+            quantize (bool, optional):
+                Run the graph using quantization parameters. Defaults to False.
+            dequantize (bool, optional):
+                Dequantize outputs. Implies quantize. Defaults to False.
+            output_fusion_tensors (bool, optional):
+                Output outputs from nodes that have been fused. Defaults to False.
+            check_quantization (bool, optional):
+                Run a check that quantization is consistent before executing. Defaults to True.
+            batch_stats (Mapping[str, Any], optional):
+                If a dict is supplied it is filled with the batch size, elapsed time and samples/sec.
+
+        Raises:
+            ValueError: Incorrect parameters
+
+        Returns:
+            Sequence[Sequence[np.ndarray]]:
+                List of lists of outputs of each node in the graph. Every output has a leading batch axis.
+        """
+        if dequantize:
+            quantize = True
+        if quantize:
+            if check_quantization and (self.quantization is None or not self.quantization.verify_quantization(self)):
+                raise ValueError('graph is not quantized')
+            if dequantize:
+                qmode = QuantizationMode.all_dequantize()
+            else:
+                qmode = QuantizationMode.all()
+        else:
+            qmode = QuantizationMode.none()
+        if isinstance(input_tensors, np.ndarray):
+            input_tensors = [input_tensors]
+        if len(set(len(input_tensor) for input_tensor in input_tensors)) != 1:
+            raise ValueError('all inputs must have the same batch size')
+        executer = GraphExecuter(self, self.quantization)
+        return executer.execute_batch(input_tensors, qmode=qmode,
+                                      append_fusion_output=output_fusion_tensors,
+                                      batch_stats=batch_stats)
+
+    def profile(
+            self,
+            input_tensors_iterator: Union[Sequence[Sequence[np.ndarray]], Sequence[np.ndarray]],
+            quantize=False,
+            dequantize=False,
+            check_quantization=True,
+            trace=True
+    ) -> KernelProfiler:
+        """Runs inference on one or more sets of inputs recording the time and tensor
+        traffic of every kernel executed
+
+        Args:
+            input_tensors_iterator (Union[Sequence[Sequence[np.ndarray]], Sequence[np.ndarray]]):
+                An iterator of lists of input tensors or of single input tensors
+                for graphs with one input
+            quantize (bool, optional):
+                Run the graph using quantization parameters. Defaults to False.
+            dequantize (bool, optional):
+                Dequantize outputs. Implies quantize. Defaults to False.
+            check_quantization (bool, optional):
+                Run a check that quantization is consistent before executing. Defaults to True.
+            trace (bool, optional):
+                Record each kernel execution for the Chrome trace. Defaults to True.
+
+        Raises:
+            ValueError: Incorrect parameters
+
+        Returns:
+            KernelProfiler:
+                The profiler. Use summary for the results and write_chrome_trace to save
+                the kernel executions in Chrome trace format
+        """
+        profiler = KernelProfiler(trace=trace)
+        with profiler:
+            for input_tensors in input_tensors_iterator:
+                self.execute(input_tensors, quantize=quantize, dequantize=dequantize,
+                             check_quantization=check_quantization)
+                check_quantization = False
+        return profiler
+
     def balance_filters(
         self,
         step_idx: int = None,
@@ -1175,7 +1291,8 @@ class NNGraph(Graph):
                           pmsis_os='freertos',
                           source='gap9_v2',
                           platform='gvsoc',
-                          do_clean=True) -> CompletedProcess:
+                          do_clean=True,
+                          use_cache=True) -> CompletedProcess:
         """Execute the model using SDK. Builds a project in a directory and executes it.
 
         Args:
@@ -1214,6 +1331,10 @@ class NNGraph(Graph):
                 GAP9 evk use gap9_evk_audio. Defaults to 'gap9_v2'.
             do_clean (bool, optional):
                 Do not clean the project when run a second time. Default: False
+            use_cache (bool, optional):
+                If no directory is given build the project in the build cache. A project
+                already built for the same graph, quantization, settings and build options
+                is reused and only the inputs are written again. Defaults to True.
 
         Raises:
             ValueError: SDK not sourced
@@ -1234,8 +1355,24 @@ class NNGraph(Graph):
         if pretty:
             performance = True
 
-        with tempfile.TemporaryDirectory() as tempdir:
-            if directory is None:
+        cache_entry = None
+        if directory is None and use_cache:
+            cache_entry = build_cache_entry(self, settings, script, source,
+                                            platform=platform, pmsis_os=pmsis_os,
+                                            at_loglevel=at_loglevel, profile=profile,
+                                            dump_tensors=output_tensors)
+
+        with tempfile.TemporaryDirectory() as tempdir, cache_entry or nullcontext():
+            built = False
+            if cache_entry:
+                directory = cache_entry.path
+                built = cache_entry.is_built and (not at_log or cache_entry.at_log is not None)
+                if built:
+                    LOG.info('reusing project built in %s', directory)
+                    do_clean = False
+                else:
+                    cache_entry.invalidate()
+            elif directory is None:
                 directory = tempdir
             gen_project(self,
                         settings,
@@ -1245,7 +1382,8 @@ class NNGraph(Graph):
                         gen_atproject=not script,
                         dump_tensors=output_tensors,
                         input_tensors=input_tensors,
-                        overwrite=True)
+                        overwrite=True,
+                        inputs_only=built)
             if jobs is None:
                 jobs = int(subprocess.getoutput('nproc --all'))
 
@@ -1304,19 +1442,29 @@ class NNGraph(Graph):
                 with StringIO(log_output) as fp:
                     parsed_output_tensors = at_map_tensors(
                         self, at_tensor_loader_int(fp))
-            if at_log:
+            if at_log or (cache_entry and not built):
                 at_log_start = None
                 try:
                     at_log_start = log_output.index(
                         "RUNNING AUTOTILER MODEL - START") + len("RUNNING AUTOTILER MODEL - START")
                     at_log_end = log_output.index(
                         "RUNNING AUTOTILER MODEL - FINISH")
-                    at_log = log_output[at_log_start:at_log_end].split('\n')
+                    at_log_lines = log_output[at_log_start:at_log_end].split('\n')
                 except ValueError:
                     if at_log_start is None:
-                        at_log = None
+                        at_log_lines = None
                     else:
-                        at_log = log_output[at_log_start:].split('\n')
+                        at_log_lines = log_output[at_log_start:].split('\n')
+                if cache_entry and built:
+                    # the AutoTiler did not run again
+                    at_log_lines = cache_entry.at_log
+                if at_log:
+                    at_log = at_log_lines
+            if cache_entry and not built:
+                if retcode == 0:
+                    cache_entry.mark_built(at_log=at_log_lines)
+                else:
+                    cache_entry.invalidate()
             if performance:
                 match_perf = r" +((?:S\d+)[^:]+): *Cycles: +(\d+)[^:]+: +(\d+.\d+)[^:]+: +(\d+)[^:]+: +(\d+.\d+)[^:]+: +([\d<.]+)"
                 matcher = re.compile(match_perf)
@@ -1561,6 +1709,10 @@ class NNGraph(Graph):
     def read_graph_state(graphpath: str) -> 'NNGraph':
         """Read a graph zip module created by write_graph_state.
 
+        The constants and quantization tensors are memory mapped from the archive
+        and are only read from disk when they are accessed. Archives written with
+        the older tensors.pickle format are still read.
+
         Args:
             graphpath (str): path to archive file
 
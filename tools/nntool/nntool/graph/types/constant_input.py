@@ -157,6 +157,10 @@ class ConstantInputNode(InputNNNodeBase):
             value = self._compressed_value.value
         else:
             value = self._value
+            if isinstance(value, np.ndarray) and not value.flags.writeable:
+                # constants imported as views of the model file or of the buffers of the
+                # model are read only and are copied on first use
+                value = self._value = np.array(value)
 
         if self._always_copy and isinstance(value, np.ndarray):
             return value.copy()
@@ -166,6 +170,14 @@ class ConstantInputNode(InputNNNodeBase):
     def value(self, val):
         self._value = val
 
+    @property
+    def read_only_value(self):
+        """The value without the copy of a value mapped from the model file. It must not
+        be modified."""
+        if self._use_fake or (self._use_compressed and self._compressed_value is not None):
+            return self.value
+        return self._value
+
     def reshape(self, shape):
         self._value = np.reshape(self._value, shape)
         self.dims = Dim.unnamed(shape)
@@ -180,8 +192,9 @@ class ConstantInputNode(InputNNNodeBase):
         # need to dequantize maybe need to quantize
         return qtype.quantize(self.dqvalue) if qtype else self.dqvalue
 
-    def compress_value(self, qtype=None, bits=None, min_qsnr=None, force_sparse=False,
-                       allow_sparse=True, threshold=None):
+    def compression_args(self, qtype=None, bits=None, min_qsnr=None, force_sparse=False,
+                         allow_sparse=True, threshold=None):
+        """Value and keyword arguments to pass to compress to compress this constant"""
         if qtype:
             if (qtype.attr.no_compression or np.any(qtype.offset) or np.any(qtype.attr.interleaved_values)):
                 raise CompressionError(f'{self.name} quantization parameters prevent compression')
@@ -189,8 +202,14 @@ class ConstantInputNode(InputNNNodeBase):
         else:
             qbits = 8
         value = self._qtype.dequantize(self._value) if self._qtype else self._value
-        self._compressed_value = compress(value, bits=bits, min_qsnr=min_qsnr, force_sparse=force_sparse,
-                                          allow_sparse=allow_sparse, qbits=qbits, threshold=threshold)
+        return value, {'bits': bits, 'min_qsnr': min_qsnr, 'force_sparse': force_sparse,
+                       'allow_sparse': allow_sparse, 'qbits': qbits, 'threshold': threshold}
+
+    def compress_value(self, qtype=None, bits=None, min_qsnr=None, force_sparse=False,
+                       allow_sparse=True, threshold=None):
+        value, kwargs = self.compression_args(qtype=qtype, bits=bits, min_qsnr=min_qsnr, force_sparse=force_sparse,
+                                              allow_sparse=allow_sparse, threshold=threshold)
+        self._compressed_value = compress(value, **kwargs)
 
     @property
     def always_copy(self):
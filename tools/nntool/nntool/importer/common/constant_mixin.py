@@ -28,7 +28,8 @@ class ConstantMixin():
         params = inp[0]
         if not isinstance(params, ConstantInputNode):
             raise ValueError("expected node %s to be constant input"%inp[0].name)
-        return params.value
+        # reading a constant does not copy a value mapped from the model file
+        return params.read_only_value
 
     @classmethod
     def optional_constant_scalar(cls, inputs, idx, default, dtype=np.float32):
@@ -14,11 +14,14 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
 import re
 from typing import Union
 
 import onnx
 from onnx import defs, numpy_helper, shape_inference
+from onnx.external_data_helper import (load_external_data_for_tensor,
+                                       uses_external_data)
 from onnx.helper import make_opsetid
 
 import numpy as np
@@ -33,6 +36,7 @@ from nntool.quantization.new_qrec import QRec
 from nntool.quantization.qtype import QType
 from nntool.quantization.quantization_set import QuantizationSet
 from nntool.quantization.quantizer.new_quantizer import NewQuantizer
+from nntool.utils.mapped_file import map_file, mapped_array
 
 from ..common.provisional_dim import ProvisionalDim
 from ..importer_base import ImporterBase
@@ -42,19 +46,37 @@ from .common.onnx_node import OnnxNode
 
 # pylint: disable=E1101
 
+# initializers larger than this are removed from the model before shape inference
+# which would otherwise copy them. smaller ones may be shape inputs that it reads.
+INFERENCE_MAX_INITIALIZER_BYTES = 4096
+
+# types whose external data can be used in place. others are converted when loaded
+MAPPABLE_TENSOR_TYPES = {
+    onnx.TensorProto.FLOAT, onnx.TensorProto.DOUBLE, onnx.TensorProto.FLOAT16,
+    onnx.TensorProto.INT8, onnx.TensorProto.INT16, onnx.TensorProto.INT32, onnx.TensorProto.INT64,
+    onnx.TensorProto.UINT8, onnx.TensorProto.UINT16, onnx.TensorProto.UINT32, onnx.TensorProto.UINT64,
+    onnx.TensorProto.BOOL
+}
+
 
 class OnnxImporter(ImporterBase):
     def __init__(self, *args, **kwargs) -> None:
         super(OnnxImporter, self).__init__(*args, **kwargs)
         self._name_cache = None
         self._handlers = None
+        self._base_dir = ""
 
     def create_graph(self, filename, opts) -> NNGraph:
         opts = self.get_opts(opts)
         if isinstance(filename, onnx.ModelProto):
             model = filename
+            values = None
+            self._base_dir = ""
         else:
-            model = onnx.load(filename)
+            # external data is memory mapped rather than loaded
+            model = onnx.load(filename, load_external_data=False)
+            self._base_dir = os.path.dirname(filename)
+            values = self._detach_initializers(model.graph, self._base_dir)
 
         # onnx.checker.check_model(model)
         try:
@@ -73,7 +95,7 @@ class OnnxImporter(ImporterBase):
         G = NNGraph(filename=filename,
                     name=opts.get('name'))
         G, qrecs, qopts = self._import_onnx_model(
-            G, model.graph, opset_import, opts)
+            G, model.graph, opset_import, opts, values=values)
         G.add_dimensions(quiet=True)
         if qrecs:
             propagate_qrecs(G, qrecs)
@@ -121,10 +143,10 @@ class OnnxImporter(ImporterBase):
                     out_min, out_max, dtype=dtype, bits=bits, quantized_dimension=channel)
             qrec.out_qs[idx] = qtype
 
-    def _import_onnx_model(self, G, graph, opset, opts):
+    def _import_onnx_model(self, G, graph, opset, opts, values=None):
         self._handlers = self._get_handlers(opset)
         all_nodes = {}
-        constants = self._get_initializers(G, graph.initializer)
+        constants = self._get_initializers(G, graph.initializer, values=values)
         all_nodes.update(constants)
         inputs = self._get_input_nodes(G, graph.input, constants,
                                        batch_hint=opts.get('batch_hint', None),
@@ -182,19 +204,61 @@ class OnnxImporter(ImporterBase):
         return get_all_backend_handlers(opset_dict)
 
     @staticmethod
-    def _get_numpy_array(val):
-        val = numpy_helper.to_array(val)
+    def _get_numpy_array(val, base_dir=""):
+        val = numpy_helper.to_array(val, base_dir=base_dir)
         if val.shape == ():
             val = val.reshape([1])
         return val
 
-    def _get_initializers(self, G, initializer):
+    @classmethod
+    def _map_external_data(cls, init, base_dir, mapped_files):
+        if init.data_type not in MAPPABLE_TENSOR_TYPES:
+            return None
+        info = {entry.key: entry.value for entry in init.external_data}
+        dtype = cls.get_onnx_tensor_dtype(init)
+        shape = list(init.dims) or [1]
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        offset = int(info.get('offset', 0))
+        if int(info.get('length', nbytes)) != nbytes:
+            return None
+        path = os.path.join(base_dir, info['location'])
+        if path not in mapped_files:
+            mapped_files[path] = map_file(path)
+        if offset + nbytes > len(mapped_files[path]):
+            return None
+        return mapped_array(mapped_files[path], dtype.newbyteorder('<'), shape, offset=offset)
+
+    @classmethod
+    def _detach_initializers(cls, graph, base_dir):
+        """Returns the values of the initializers of graph. External data is memory mapped. The
+        data of large initializers is removed from the model so that shape inference does not
+        copy it."""
+        values = {}
+        mapped_files = {}
+        for init in graph.initializer:
+            if uses_external_data(init):
+                value = cls._map_external_data(init, base_dir, mapped_files)
+                if value is not None and value.nbytes > INFERENCE_MAX_INITIALIZER_BYTES:
+                    values[init.name] = value
+                    continue
+                load_external_data_for_tensor(init, base_dir)
+                init.data_location = onnx.TensorProto.DEFAULT
+                del init.external_data[:]
+            value = cls._get_numpy_array(init)
+            values[init.name] = value
+            if init.HasField('raw_data') and value.nbytes > INFERENCE_MAX_INITIALIZER_BYTES:
+                init.ClearField('raw_data')
+        return values
+
+    def _get_initializers(self, G, initializer, values=None):
+        if values is None:
+            values = {}
         return {
             init.name: (
                 ConstantInputNode(
                     f'constant_{self._validate_name(init.name)}',
                     dims=Dim.unnamed(init.dims or [1]),
-                    value=self._get_numpy_array(init),
+                    value=values[init.name] if init.name in values else self._get_numpy_array(init, base_dir=self._base_dir),
                     imported_dtype=self.get_onnx_tensor_dtype(init)),
                 0,
                 ProvisionalDim(init.dims),
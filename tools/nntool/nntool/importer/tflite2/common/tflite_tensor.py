@@ -243,8 +243,9 @@ class TFLiteTensorWrapper(TensorBase):
                 return None
             return np.zeros(self.shape, dtype=self.dtype().newbyteorder('L'))
         tf_buffer = self._model.Buffers(self.buffer_idx)
+        # a view of the model buffer. it is only copied if its size does not match the shape
         np_buffer = np.frombuffer(tf_buffer.DataAsNumpy(), dtype=self.dtype().newbyteorder('L'))
-        if not (isinstance(self.shape, int) or len(self.shape) == 0):
+        if not (isinstance(self.shape, int) or len(self.shape) == 0) and np_buffer.size != np.prod(self.shape):
             np_buffer = np.resize(np_buffer, self.shape)
         else:
             np_buffer = np.reshape(np_buffer, self.shape)
@@ -17,6 +17,7 @@
 import os
 from copy import deepcopy
 
+import numpy as np
 from nntool.graph.dim import Dim
 from nntool.graph.matches.matchers.duplicate_constants import MatchDuplicateConstants
 from nntool.graph.matches.matchers.remove_quantize_operators import \
@@ -33,6 +34,7 @@ from nntool.quantization.new_qrec import QRec
 from nntool.quantization.quantization_set import QuantizationSet
 from nntool.quantization.quantizer.new_quantizer import NewQuantizer
 from nntool.utils.add_sys_path import add_sys_path
+from nntool.utils.mapped_file import map_file
 
 from ..common.provisional_dim import ProvisionalDim
 from ..importer_base import ImporterBase
@@ -80,7 +82,7 @@ class TFLiteImporter(ImporterBase):
         opts = self.get_opts(opts)
         self._name_cache = {}
         add_sys_path(os.path.dirname(__file__))
-        buf = open(filename, "rb").read()
+        buf = map_file(filename)
         model = Model.GetRootAsModel(buf, 0)
         LOG.info("Importing TFLITE model version %s", model.Version())
         check(model.Version() == 3, "Only support version 3 graphs at present")
@@ -173,13 +175,14 @@ class TFLiteImporter(ImporterBase):
                     in_qs=[qtype], out_qs=[qtype])
 
     def _get_all_constants(self, G, tensors, load_quantization=False, anonymise=False, name_cache=None):
+        # float32 values are kept as views of the model rather than dequantized copies
         node_recs = {
             tensor: (
                 ConstantInputNode(
                     get_reasonable_name(
                         tensor.name, name_cache=name_cache, anonymise=anonymise),
                     dims=Dim.unnamed(tensor.shape),
-                    value=tensor.value if load_quantization else tensor.dqvalue,
+                    value=tensor.value if load_quantization or tensor.dtype == np.float32 else tensor.dqvalue,
                     qtype=tensor.qtype if load_quantization else None),
                 0,
                 ProvisionalDim.from_tflite_shape(tensor.shape)
@@ -28,11 +28,12 @@ from nntool.interpreter.shell_utils import glob_input_files, input_options
 from nntool.quantization.handlers_helpers import (add_options_to_parser,
                                            get_options_from_args)
 from nntool.quantization.quantizer.new_quantizer import NewQuantizer
-from nntool.utils.data_importer import import_data
+from nntool.utils.data_importer import import_data_files
 from nntool.utils.stats_funcs import STATS_BITS
 
 from nntool.graph.types import ConstantInputNode
 from nntool.stats.activation_ranges_collector import ActivationRangesCollector
+from nntool.stats.parallel_ranges_collector import collect_stats_parallel
 
 LOG = logging.getLogger(__name__)
 
@@ -56,6 +57,12 @@ class AquantCommand(NNToolShellBase):
     parser_aquant.add_argument('--json',
                                completer_method=Cmd.path_complete,
                                help='json file file containing saved quantization options using qtunesave command')
+    parser_aquant.add_argument('-j', '--num_workers',
+                               type=int, default=1,
+                               help='number of processes to collect statistics with. 0 uses all cpus')
+    parser_aquant.add_argument('--percentiles',
+                               action='store_true',
+                               help='collect activation percentiles needed by the percentile clip types')
     add_options_to_parser(parser_aquant)
     input_options(parser_aquant)
 
@@ -65,7 +72,7 @@ class AquantCommand(NNToolShellBase):
         """
 Attempt to calculate quantization for graph using one or more sample input files."""
         self._check_graph()
-        stats_collector = ActivationRangesCollector()
+        stats_collector = ActivationRangesCollector(collect_percentiles=args.percentiles)
         # if replaying state file then load the activation stats if they are present
         graph_options = get_options_from_args(args)
         node_options = {}
@@ -92,17 +99,28 @@ Attempt to calculate quantization for graph using one or more sample input files
                 astats = self.history_stats
             else:
                 input_args = self._get_input_args(args)
-                processed_input = False
-                for file_per_input in glob_input_files(args.input_files, self.G.num_inputs):
-                    LOG.debug("input file %s", file_per_input)
-                    processed_input = True
-                    data = [import_data(input_file, **input_args)
-                            for input_file in file_per_input]
-                    stats_collector.collect_stats(self.G, data)
-                if not processed_input:
+                input_files = glob_input_files(args.input_files, self.G.num_inputs)
+                if not input_files:
                     self.perror("No input files found")
                     return
-                astats = stats_collector.stats
+                if args.num_workers != 1:
+                    collector_info = {}
+                    astats = collect_stats_parallel(
+                        self.G, input_files,
+                        num_workers=args.num_workers if args.num_workers > 0 else None,
+                        loader=import_data_files,
+                        loader_kwargs=dict(input_args, cache_dir=self.settings['input_cache_dir']),
+                        collect_percentiles=args.percentiles,
+                        collector_info=collector_info)
+                    peak_activation_bytes = collector_info['peak_activation_bytes']
+                else:
+                    for file_per_input, data in self._get_input_pipeline(input_files, input_args):
+                        LOG.debug("input file %s", file_per_input)
+                        stats_collector.collect_stats(self.G, data)
+                    astats = stats_collector.stats
+                    peak_activation_bytes = stats_collector.peak_activation_bytes
+                LOG.info("peak resident activation memory %s bytes",
+                         peak_activation_bytes)
                 self._record_stats(astats)
 
             if args.force_width:
@@ -25,6 +25,7 @@ from nntool.interpreter.nntool_shell_base import (NODE_SELECTOR_HELP,
 from nntool.interpreter.shell_utils import input_options
 from nntool.quantization.compression.auto_compress import AutoCompress, FileDataLoader
 from nntool.quantization.compression.compress import CompressionError
+from nntool.quantization.compression.parallel_compress import compress_nodes
 
 from nntool.graph.types import ConstantInputNode
 
@@ -50,6 +51,10 @@ class CompressCommand(NNToolShellBase):
         '--threshold', type=float,
         help='set values val>x>-val to 0 before clustering'
     )
+    parser_compress.add_argument(
+        '--workers', type=int,
+        help='number of processes used to compress constants. Defaults to the number of cpus'
+    )
     parser_compress_sub = parser_compress.add_subparsers(
         title='compress subcommands', help='compression strategy for the selected layers')
     parser_compress_bits = parser_compress_sub.add_parser(
@@ -222,8 +227,11 @@ The threshold argument can be used to clip values to zero before compression.
             input_args = self._get_input_args(args)
             autocompress = AutoCompress(
                 self.G,
-                FileDataLoader(args.input_files, self.G.num_inputs, input_args=input_args),
-                get_validator(args))
+                FileDataLoader(args.input_files, self.G.num_inputs, input_args=input_args,
+                               prefetch=self.settings['input_prefetch'],
+                               cache_dir=self.settings['input_cache_dir']),
+                get_validator(args),
+                num_workers=args.workers)
 
             def progress(msg, newline):
                 print(msg, end='\n' if newline else '', flush=True)
@@ -238,39 +246,30 @@ The threshold argument can be used to clip values to zero before compression.
                 pass
             report_nodes = [node for node in nodes if node.use_compressed]
         else:
-            for node in nodes:
-                self.pfeedback(f"Evaluating {node.name}")
-
-                nid = node.name
-                if self.G.quantization and nid in self.G.quantization:
-                    qtype = self.G.quantization[nid].out_qs[0]
-                else:
-                    qtype = None
-
-                try:
-                    kwargs = {
-                        'qtype': qtype,
-                        'threshold': args.threshold,
-                        'allow_sparse': not args.no_sparse,
-                        'force_sparse': args.force_sparse
-                    }
-                    if args.operation == "bits":
-                        kwargs['bits'] = int(args.num_bits)
-                    elif args.operation == "min_qsnr":
-                        kwargs['min_qsnr'] = args.qsnr
-                    elif args.operation == "auto":
-                        pass
-                    else:
-                        raise ValueError('strange operation')
-                    node.compress_value(**kwargs)
-                    comp_val = node.compressed_value
+            kwargs = {
+                'threshold': args.threshold,
+                'allow_sparse': not args.no_sparse,
+                'force_sparse': args.force_sparse
+            }
+            if args.operation == "bits":
+                kwargs['bits'] = int(args.num_bits)
+            elif args.operation == "min_qsnr":
+                kwargs['min_qsnr'] = args.qsnr
+            else:
+                raise ValueError('strange operation')
+            if self.G.quantization:
+                qtypes = {node: self.G.quantization[node.name].out_qs[0]
+                          for node in nodes if node.name in self.G.quantization}
+            else:
+                qtypes = {}
+            self.pfeedback(f"Evaluating {len(nodes)} constants")
+            errors = compress_nodes(nodes, qtypes=qtypes, num_workers=args.workers, **kwargs)
+            for node, error in zip(nodes, errors):
+                if error is None:
                     node.use_compressed = True
-                except CompressionError as ex:
-                    self.pfeedback(f'unable to compress {node.name} - {ex}')
-                    comp_val = None
-
-                if comp_val:
                     report_nodes.append(node)
+                else:
+                    self.pfeedback(f'unable to compress {node.name} - {error}')
 
         self.compress_make_table(report_nodes)
 
@@ -24,6 +24,8 @@ from nntool.importer.onnx.handlers.backend import *
 from nntool.importer.tflite2.handlers.backend import *
 
 STATE_EXTENSION = '.json'
+# state with its statistics stored as raw buffers (see utils/tensor_store.py)
+BINARY_STATE_EXTENSION = '.nnstate'
 
 NO_GRAPH = {
     'G': None,
@@ -115,7 +117,7 @@ def parse_open_options(file_path, args, settings):
     _, ext = os.path.splitext(file_path)
     ext = ext.lower()
 
-    if ext == STATE_EXTENSION:
+    if ext in (STATE_EXTENSION, BINARY_STATE_EXTENSION):
         return True, file_path, {'orgmodel_path': args.orgmodel_path}
     else:
         opts = {k: getattr(args, k) if (option['val_type'] != bool or not option['default'])
@@ -132,5 +134,5 @@ def parse_open_options(file_path, args, settings):
         opts['anonymise'] = settings['anonymise']
         return False, file_path, opts
 
-def get_state_extension():
-    return STATE_EXTENSION
+def get_state_extension(binary=False):
+    return BINARY_STATE_EXTENSION if binary else STATE_EXTENSION
@@ -0,0 +1,91 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import argparse
+import logging
+
+from cmd2 import Cmd, Cmd2ArgumentParser, with_argparser
+from nntool.execution.graph_executer import GraphExecuter
+from nntool.execution.kernel_profiler import (GROUP_BY_OPTIONS, SORT_OPTIONS,
+                                              KernelProfiler)
+from nntool.execution.quantization_mode import QuantizationMode
+from nntool.interpreter.nntool_shell_base import NNToolShellBase, no_history
+from nntool.interpreter.shell_utils import (glob_input_files, input_options,
+                                            output_table, table_options)
+from nntool.reports.kernel_profile_reporter import KernelProfileReporter
+from nntool.utils.data_importer import import_data
+
+LOG = logging.getLogger(__name__)
+
+
+class ProfileCommand(NNToolShellBase):
+    # PROFILE COMMAND
+    parser_profile = Cmd2ArgumentParser()
+    parser_profile.add_argument('-q', '--quantize', action='store_true',
+                                help='profile the quantized graph (must have already set quantization)')
+    parser_profile.add_argument('-g', '--group_by',
+                                choices=GROUP_BY_OPTIONS, default='node',
+                                help='accumulate results by node, kernel class or quantization kernel type')
+    parser_profile.add_argument('-s', '--sort',
+                                choices=SORT_OPTIONS, default='time',
+                                help='column to sort by. all but name are sorted in descending order')
+    parser_profile.add_argument('-n', '--top',
+                                type=int, default=None,
+                                help='only show the first TOP entries')
+    parser_profile.add_argument('--repeat',
+                                type=int, default=1,
+                                help='execute each input this many times')
+    parser_profile.add_argument('--chrome_trace',
+                                completer_method=Cmd.path_complete,
+                                help='write the kernel executions to this file in Chrome trace JSON format. '
+                                'Open it in chrome://tracing or Perfetto')
+    table_options(parser_profile, default_width=180)
+    input_options(parser_profile)
+
+    @with_argparser(parser_profile)
+    @no_history
+    def do_profile(self, args: argparse.Namespace):
+        """
+Profile the kernels used to execute the graph on one or more input files.
+Records the wall time, calls and the bytes of the input and output tensors of
+each kernel and shows them by node, kernel class or quantization kernel type.
+The times of fusions are the sum of the times of the kernels inside them."""
+        self._check_graph()
+        if args.quantize:
+            self._check_quantized()
+            qmode = QuantizationMode.all()
+        else:
+            qmode = QuantizationMode.none()
+        input_args = self._get_input_args(args)
+        executer = GraphExecuter(
+            self.G, qrecs=None if qmode.is_none else self.G.quantization)
+        profiler = KernelProfiler(trace=bool(args.chrome_trace))
+        input_files = glob_input_files(args.input_files, self.G.num_inputs)
+        if not input_files:
+            self.perror('no input files found')
+            return
+        for file_per_input in input_files:
+            data = [import_data(input_file, **input_args)
+                    for input_file in file_per_input]
+            for _ in range(args.repeat):
+                with profiler:
+                    executer.execute(data, qmode=qmode, silent=True)
+        if args.chrome_trace:
+            profiler.write_chrome_trace(args.chrome_trace)
+            LOG.info("chrome trace written to %s", args.chrome_trace)
+        fmt = ('tab' if args.output is None else args.output['fmt'])
+        table = KernelProfileReporter(group_by=args.group_by, sort_by=args.sort,
+                                      top=args.top, do_totals=(fmt != "csv")).report(self.G, profiler)
+        output_table(table, args)
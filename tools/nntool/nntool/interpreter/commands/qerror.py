@@ -17,7 +17,6 @@ from cmd2 import Cmd2ArgumentParser, with_argparser
 from nntool.interpreter.nntool_shell_base import NNToolShellBase, no_history
 from nntool.interpreter.shell_utils import (glob_input_files, input_options,
                                      output_table, table_options)
-from nntool.utils.data_importer import import_data
 from nntool.stats.step_error_stats_collector import StepErrorStatsCollector
 from nntool.stats.error_stats_collector import ErrorStatsCollector
 from nntool.reports.error_reporter import ErrorReporter
@@ -51,12 +50,13 @@ Show quantization error introduced by processing one or more input files."""
         if args.step:
             stats_collector = StepErrorStatsCollector(quant_compare=args.compare_quantized)
         else:
-            stats_collector = ErrorStatsCollector(quant_compare=args.compare_quantized)
+            stats_collector = ErrorStatsCollector(quant_compare=args.compare_quantized,
+                                                  activation_cache=self.activation_cache)
         cnt = 0
-        for file_per_input in glob_input_files(args.input_files, self.G.num_inputs):
+        input_files = glob_input_files(args.input_files, self.G.num_inputs)
+        for file_per_input, data in self._get_input_pipeline(input_files, input_args):
             cnt += 1
 
-            data = [import_data(input_file, **input_args) for input_file in file_per_input]
             stat = stats_collector.collect_stats(self.G, data)
             if args.report_lowest is not None:
                 lowest = min((elem['qsnr'] for elem in stat.values()))
@@ -22,6 +22,7 @@ from cmd2 import Cmd, Cmd2ArgumentParser, with_argparser
 from nntool.interpreter.commands.open_parser import get_state_extension
 from nntool.interpreter.nntool_shell_base import NNToolShellBase, no_history
 from nntool.utils.json_serializable import JsonSerializableStateEncoder
+from nntool.utils.tensor_store import write_tensor_store
 
 LOG = logging.getLogger("nntool")
 
@@ -33,6 +34,10 @@ class SaveStateCommand(NNToolShellBase):
                                    completer_method=Cmd.path_complete,
                                    nargs=argparse.OPTIONAL,
                                    help='file to write to')
+    parser_save_state.add_argument('-b', '--binary',
+                                   action='store_true',
+                                   help='save in the binary state format. The statistics arrays are '
+                                   'stored as raw buffers which is much faster to save and open for large models')
 
     @with_argparser(parser_save_state)
     @no_history
@@ -44,7 +49,8 @@ a build script. If no argument is given then the state files
 will be saved in the same directory as the graph. If a directory is
 given then the state files will be saved in it with the graph
 basename. If a filename is given, its basename will be used to
-save the state files."""
+save the state files. The binary format is written to a .nnstate file
+and can be opened in the same way as a .json state file."""
         self._check_graph()
         self._check_quantized()
         if args.output is not None:
@@ -54,8 +60,11 @@ save the state files."""
                                           os.path.basename(self.G.filename))
         else:
             graph_base, _ = os.path.splitext(self.G.filename)
-        state_filename = graph_base + get_state_extension()
-        with open(state_filename, mode='w+') as fp:
-            json.dump(self.graph_history, fp, indent=2,
-                      cls=JsonSerializableStateEncoder)
+        state_filename = graph_base + get_state_extension(binary=args.binary)
+        if args.binary:
+            write_tensor_store(state_filename, {}, meta=self.graph_history)
+        else:
+            with open(state_filename, mode='w+') as fp:
+                json.dump(self.graph_history, fp, indent=2,
+                          cls=JsonSerializableStateEncoder)
         LOG.info("saved state to %s", state_filename)
@@ -25,7 +25,6 @@ from nntool.execution.execution_progress import ExecutionProgress
 from nntool.interpreter.nntool_shell_base import NNToolShellBase, no_history
 from nntool.interpreter.shell_utils import (glob_input_files,
                                      input_options)
-from nntool.utils.data_importer import import_data
 from nntool.utils.validation_utils import ValidateFromJSON, ValidateFromName, ValidateFromClass, ValidateFromVWWInstances
 
 LOG = logging.getLogger(__name__)
@@ -121,11 +120,10 @@ must be 3, "file_45.png" will raise an error) or can be written in a .json objec
 
         try:
             ExecutionProgress.start()
-            for i, file_per_input in enumerate(glob_input_files(args.input_files, self.G.num_inputs)):
+            input_files = glob_input_files(args.input_files, self.G.num_inputs)
+            for i, (file_per_input, data) in enumerate(self._get_input_pipeline(input_files, input_args)):
                 if not args.silent:
                     LOG.info("input file %s", file_per_input)
-                data = [import_data(input_file, **input_args)
-                        for input_file in file_per_input]
 
                 executer = GraphExecuter(self.G, qrecs=self.G.quantization)
                 outputs = executer.execute(
@@ -23,9 +23,11 @@ from typing import Any, TYPE_CHECKING
 
 import numpy as np
 from cmd2 import Cmd, Cmd2ArgumentParser, CompletionItem, plugin
+from nntool.execution.activation_cache import ActivationCache
 from nntool.execution.execution_progress import ExecutionProgress
 from nntool.importer.common.handler_options import HandlerOptions
 from nntool.utils.json_serializable import JsonSerializableStateDecoder
+from nntool.utils.tensor_store import is_tensor_store, read_tensor_store
 from nntool.utils.make_var import make_expand, make_vars
 
 if TYPE_CHECKING:
@@ -371,8 +373,12 @@ class NNToolShellBase(NNToolShellSettings, Cmd):
         self.replay_history()
 
     def load_state_file(self, filepath, orgmodel_path=None):
-        with open(filepath) as fp:
-            history = json.load(fp, cls=JsonSerializableStateDecoder)
+        if is_tensor_store(filepath):
+            # binary states keep their statistics memory mapped
+            _, history = read_tensor_store(filepath)
+        else:
+            with open(filepath) as fp:
+                history = json.load(fp, cls=JsonSerializableStateDecoder)
         if orgmodel_path:
             idxs = [i for i, cmd in enumerate(history['history']) if "open" in cmd]
             for idx in idxs:
@@ -442,9 +448,20 @@ class NNToolShellBase(NNToolShellSettings, Cmd):
     @G.setter
     def G(self, val: 'NNGraph'):
         self._graphs[self._graph_idx]['G'] = val
+        self._graphs[self._graph_idx].pop('activation_cache', None)
         # graph settings track nntool settings
         val.settings = self.settings
 
+    @property
+    def activation_cache(self) -> ActivationCache:
+        """Activations of the open graph kept between commands. Entries are keyed on the
+        nodes and quantization so they are only reused for the steps that have not been
+        changed since, for example by qtune."""
+        graph = self._graphs[self._graph_idx]
+        if graph.get('activation_cache') is None:
+            graph['activation_cache'] = ActivationCache()
+        return graph['activation_cache']
+
     @property
     def graph_name(self):
         if self._graph_idx is None:
@@ -15,9 +15,10 @@
 
 from copy import deepcopy
 import logging
+import os
 from cmd2 import Cmd, Settable
 from nntool.generation.autotiler_options import DEFAULT_GEN_OPTS, DEFAULT_GEN_OPTS_DESCRIPTIONS
-from nntool.utils.data_importer import MODES
+from nntool.utils.data_importer import DEFAULT_PREFETCH, MODES, InputPipeline
 from .shell_utils import find_choice
 
 LOG = logging.getLogger("nntool")
@@ -45,6 +46,9 @@ DEFAULT_OPT_DESCRIPTIONS = {
     'input_divisor': {'type': float, 'descr': 'divide input tensor values by this value'},
     'input_offset': {'type': float, 'descr': 'add this value to input tensor values'},
     'input_norm_func': {'type': str, 'descr': 'lambda function in the form x: fn(x) where x is any input'},
+    'input_prefetch': {'type': int, 'descr': 'number of input files imported in the background ahead of use'},
+    'input_cache_dir': {'type': str, 'descr': 'directory to cache imported input tensors in. empty disables the cache'},
+    'codebook_cache_dir': {'type': str, 'descr': 'directory to cache compression codebooks in. empty disables the cache'},
     'graph_name': {'type': str, 'descr': 'name of the graph used for code generation'},
     'template_file': {'type': str, 'descr': 'template file used for code generation'},
 }
@@ -64,6 +68,9 @@ DEFAULT_NNTOOL_SETTINGS={
     'input_divisor': 1,
     'input_offset': 0,
     'input_shift': 0,
+    'input_prefetch': DEFAULT_PREFETCH,
+    'input_cache_dir': "",
+    'codebook_cache_dir': os.environ.get('NNTOOL_CODEBOOK_CACHE', ""),
     'log_level': 'INFO',
     'graph_file': "",
     'tensor_file': "",
@@ -250,6 +257,46 @@ class NNToolShellSettings(Cmd):
     def input_offset(self, val):
         self.settings['input_offset'] = int(val)
 
+    # INPUT_PREFETCH PROPERTY
+
+    @property
+    def input_prefetch(self):
+        return self.settings['input_prefetch']
+
+    @input_prefetch.setter
+    def input_prefetch(self, val):
+        try:
+            val = int(val)
+            if val < 0:
+                raise ValueError()
+        except ValueError:
+            raise ValueError("value should be zero or a positive integer")
+        self.settings['input_prefetch'] = val
+
+    # INPUT_CACHE_DIR PROPERTY
+
+    @property
+    def input_cache_dir(self):
+        return self.settings['input_cache_dir']
+
+    @input_cache_dir.setter
+    def input_cache_dir(self, val):
+        self.settings['input_cache_dir'] = str(val)
+
+    # CODEBOOK_CACHE_DIR PROPERTY
+
+    @property
+    def codebook_cache_dir(self):
+        return self.settings['codebook_cache_dir']
+
+    @codebook_cache_dir.setter
+    def codebook_cache_dir(self, val):
+        # imported here since the compression module loads sklearn
+        from nntool.quantization.compression.compress import set_codebook_cache_dir
+        val = str(val)
+        set_codebook_cache_dir(val or None)
+        self.settings['codebook_cache_dir'] = val
+
     @property
     def template_file(self):
         return self.settings['template_file']
@@ -301,3 +348,7 @@ class NNToolShellSettings(Cmd):
             res['nptype'] = args.nptype
 
         return res
+
+    def _get_input_pipeline(self, files, input_args) -> InputPipeline:
+        return InputPipeline(files, prefetch=self.settings['input_prefetch'],
+                             cache_dir=self.settings['input_cache_dir'], **input_args)
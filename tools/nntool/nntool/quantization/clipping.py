@@ -71,9 +71,21 @@ def mse_gaussian(sigma, alpha, num_bits):
 #     return delta, min_value
 
 def get_whiskers(percentiles, whisker_mult=1.5):
-    iqr = percentiles[0] - percentiles[2]
+    lower_quartile, upper_quartile = percentiles.quantiles([0.25, 0.75])
+    iqr = upper_quartile - lower_quartile
     margin = whisker_mult * iqr
-    return percentiles[2] - margin, percentiles[0] + margin
+    return lower_quartile - margin, upper_quartile + margin
+
+
+def get_percentile_clip(percentiles, percentile):
+    return percentiles.quantile(1 - percentile / 100), percentiles.quantile(percentile / 100)
+
+
+def get_percentiles(stat, clip_type):
+    if 'percentiles' not in stat:
+        raise ValueError(f'clip type {clip_type} needs percentile statistics. '
+                         'Collect statistics with percentiles enabled (aquant --percentiles).')
+    return stat['percentiles']
 
 
 def get_clip(shape, num_bits, stat, clip_type):
@@ -95,8 +107,11 @@ def get_clip(shape, num_bits, stat, clip_type):
                 alpha = alpha_laplace
             else:
                 alpha = alpha_gaus
-    # elif clip_type == "whiskers":
-    #     return get_whiskers(stat['percentiles'])
+    elif clip_type == "whiskers":
+        min_value, max_value = get_whiskers(get_percentiles(stat, clip_type))
+        return max(min_max[0], min_value), min(min_max[1], max_value)
+    elif clip_type.startswith("pct"):
+        return get_percentile_clip(get_percentiles(stat, clip_type), float(clip_type[3:]))
     elif clip_type.startswith("std"):
         offset = float(clip_type[3:]) * stat['std']
         return stat['mean'] - offset, stat['mean'] + offset 
@@ -116,11 +131,14 @@ def get_clip(shape, num_bits, stat, clip_type):
 CLIP_TYPE_OPTION = {
     'name': 'clip_type',
     'type': str,
-    'choices': ['laplace', 'gaus', 'mix', 'std3', 'std5', 'none'],
+    'choices': ['laplace', 'gaus', 'mix', 'std3', 'std5', 'pct99', 'pct99.9', 'pct99.99', 'whiskers', 'none'],
     'help': """Clipping method for any node that modifies its input:
 none - the minimum and maximum observed values are used.
 laplace, gaus - Values chosen based on laplace or gaussian distribution
 mix - MSE is used to estimate if distribution is laplace or gaussian
-std3, std5 - 3 or 5 times standard deviation from mean""",
+std3, std5 - 3 or 5 times standard deviation from mean
+pct99, pct99.9, pct99.99 - symmetric percentiles of the observed values
+whiskers - 1.5 times the interquartile range beyond the quartiles
+The percentile based types need statistics collected with percentiles (aquant --percentiles)""",
     'default': 'none'
 }
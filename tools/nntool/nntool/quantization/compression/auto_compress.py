@@ -21,14 +21,17 @@ from collections.abc import Iterable, Sized
 from typing import Any, Sequence, Tuple
 
 import numpy as np
+from nntool.execution.activation_cache import (DEFAULT_MAX_BYTES,
+                                               ActivationCache)
 from nntool.execution.graph_executer import GraphExecuter
 from nntool.execution.quantization_mode import QuantizationMode
 from nntool.interpreter.shell_utils import glob_input_files
-from nntool.utils.data_importer import import_data
+from nntool.utils.data_importer import DEFAULT_PREFETCH, InputPipeline
 from nntool.utils.maximizer import Maximizer
 from nntool.utils.validation_utils import ValidateBase
 
 from .compress import CompressionError
+from .parallel_compress import compress_nodes
 
 if typing.TYPE_CHECKING:
     from nntool.graph.nngraph import NNGraph
@@ -49,29 +52,22 @@ class DataLoaderBase(ABC, Sized, Iterable):
         pass
 
 class FileDataLoader(DataLoaderBase):
-    def __init__(self, input_files, num_inputs, input_args=None):
+    def __init__(self, input_files, num_inputs, input_args=None, prefetch=DEFAULT_PREFETCH, cache_dir=None):
         self._input_files = list(glob_input_files(input_files, num_inputs))
-        self._idx = 0
         if input_args is None:
             input_args = {}
         self._input_args = input_args
+        self._prefetch = prefetch
+        self._cache_dir = cache_dir
         self._filter = None
 
     def __iter__(self):
-        self._idx = 0
-        return self
-
-    def __next__(self):
-        while True:
-            if self._idx >= len(self._input_files):
-                raise StopIteration()
-            idx = self._idx
-            self._idx += 1
-            label = "_".join(self._input_files[idx])
-            if self._filter is None or label in self._filter:
-                break
-        data = [import_data(input_file, **self._input_args) for input_file in self._input_files[idx]]
-        return label, data
+        input_files = [files for files in self._input_files
+                       if self._filter is None or "_".join(files) in self._filter]
+        pipeline = InputPipeline(input_files, prefetch=self._prefetch,
+                                 cache_dir=self._cache_dir, **self._input_args)
+        for files, data in pipeline:
+            yield "_".join(files), data
 
     def __len__(self):
         return len(self._input_files)
@@ -90,13 +86,20 @@ class AutoCompress():
                  validation: ValidateBase,
                  start_qsnr=30,
                  min_step=0.5,
-                 base_inputs=None) -> None:
+                 base_inputs=None,
+                 activation_cache_bytes=DEFAULT_MAX_BYTES,
+                 num_workers=None) -> None:
         self._graph = graph
         self._labels_and_inputs = labels_and_inputs
         self._validation = validation
         self._start_qsnr = start_qsnr
         self._min_step = min_step
         self._base_inputs = base_inputs
+        self._num_workers = num_workers
+        # the search executes the same inputs again after each change to the compression
+        # of a node so everything above the first changed node is reused
+        self._activation_cache = ActivationCache(
+            max_bytes=activation_cache_bytes) if activation_cache_bytes else None
 
 
     @property
@@ -105,16 +108,16 @@ class AutoCompress():
 
     def tune_compression(self, nodes, progress=None, **kwargs):
         compression = 0
-        for node in nodes:
-            nid = node.name
-            if self._graph.quantization and nid in self._graph.quantization:
-                qtype = self._graph.quantization[nid].out_qs[0]
-            else:
-                qtype = None
-
-            try:
-                kwargs['qtype'] = qtype
-                node.compress_value(**kwargs)
+        nodes = list(nodes)
+        if self._graph.quantization:
+            qtypes = {node: self._graph.quantization[node.name].out_qs[0]
+                      for node in nodes if node.name in self._graph.quantization}
+        else:
+            qtypes = {}
+        errors = compress_nodes(nodes, qtypes=qtypes, num_workers=self._num_workers, **kwargs)
+        for node, error in zip(nodes, errors):
+            if error is None:
+                qtype = qtypes.get(node)
                 comp_val = node.compressed_value
                 qbits = qtype.bits if qtype else 8
                 compression += math.ceil(node.value.size *
@@ -122,9 +125,7 @@ class AutoCompress():
                 node.use_compressed = True
                 if progress:
                     progress(node, True)
-
-            except CompressionError:
-                comp_val = None
+            else:
                 node.clear_compression()
                 if progress:
                     progress(node, False)
@@ -148,7 +149,8 @@ class AutoCompress():
         for label, data in labels_and_inputs:
 
             executer = GraphExecuter(
-                self._graph, qrecs=self._graph.quantization)
+                self._graph, qrecs=self._graph.quantization,
+                activation_cache=self._activation_cache)
             outputs = executer.execute(data, qmode=qmode, silent=True)
             res = self._validation.validate(data,
                                             outputs,
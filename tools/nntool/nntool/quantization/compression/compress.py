@@ -15,8 +15,11 @@
 #
 # author: martin.croome@greenwaves-technologies.com
 
+import hashlib
 import logging
 import math
+import os
+import tempfile
 from collections import namedtuple
 
 import numpy as np
@@ -43,6 +46,20 @@ if USE_KMEANS_1D:
 
 LOG = logging.getLogger(__name__)
 
+# codebooks can be memoized on disk by tensor, number of bins and clustering method
+# so compressing an unchanged tensor again does not cluster it again. The cache is
+# off unless NNTOOL_CODEBOOK_CACHE or the codebook_cache_dir shell setting names a
+# directory. The least recently used codebooks are removed to keep the cache under
+# CODEBOOK_CACHE_BYTES.
+CODEBOOK_CACHE_DIR = os.environ.get('NNTOOL_CODEBOOK_CACHE') or None
+
+CODEBOOK_CACHE_BYTES = 64 * 1024 * 1024
+
+# tensors with more values than this are clustered on their histogram if they have
+# few distinct values or on a sample of their values otherwise
+LARGE_TENSOR_VALUES = 1 << 16
+HISTOGRAM_MAX_UNIQUE = 512
+
 CompressedVal = namedtuple(
     'CompressedVal', [
         'value', 'uncompressed_bits', 'bits', 'codebook',
@@ -102,8 +119,7 @@ def compress(orig_val, bits=None, min_qsnr=None, force_sparse=False,
                 break
             compressed_val, codes, codebook = cluster(
                 bins, flattened_val, val, inertia=inertia)
-            silhouette.append(silhouette_score(flattened_val.reshape(-1, 1),
-                                               compressed_val.flatten()))
+            silhouette.append(silhouette_1d(flattened_val, compressed_val.flatten()))
         if len(inertia) <= 1:
             compressed_val, codes, codebook = encode_shorter(
                 flattened_val, val)
@@ -171,7 +187,128 @@ def encode_shorter(flattened_val, val):
     return compressed_val, codes, codebook
 
 
-def cluster(bins, flattened_val, val, inertia=None):
+def set_codebook_cache_dir(path, max_bytes=None):
+    """Sets the directory codebooks are memoized in. None disables the cache. If
+    max_bytes is set it replaces the size limit of the cache."""
+    global CODEBOOK_CACHE_DIR, CODEBOOK_CACHE_BYTES
+    CODEBOOK_CACHE_DIR = path
+    if max_bytes is not None:
+        CODEBOOK_CACHE_BYTES = max_bytes
+
+
+def clustering_method():
+    if USE_KMEANS_CUDA and kmeans_cuda:
+        return 'kmeans_cuda'
+    if USE_KMEANS_1D and kmeans1d:
+        return 'kmeans1d'
+    return 'sklearn'
+
+
+def codebook_key(bins, flattened_val):
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(f'{clustering_method()}:{bins}:{flattened_val.dtype.str}:'.encode())
+    hasher.update(np.ascontiguousarray(flattened_val).data)
+    return hasher.hexdigest()
+
+
+def load_codebook(key):
+    if not CODEBOOK_CACHE_DIR:
+        return None
+    path = os.path.join(CODEBOOK_CACHE_DIR, f'{key}.npz')
+    try:
+        with np.load(path) as cached:
+            inertia = cached['inertia']
+            res = cached['codebook'], (inertia[0] if inertia.size else None)
+    except (OSError, KeyError, ValueError):
+        return None
+    try:
+        # the modification time orders the entries for pruning
+        os.utime(path)
+    except OSError:
+        pass
+    return res
+
+
+def save_codebook(key, codebook, inertia):
+    if not CODEBOOK_CACHE_DIR:
+        return
+    try:
+        os.makedirs(CODEBOOK_CACHE_DIR, exist_ok=True)
+        # written to a temporary file and renamed so that concurrent compressions
+        # never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=CODEBOOK_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fp:
+            # the inertia keeps its dtype since the elbow search compares them
+            np.savez(fp, codebook=codebook,
+                     inertia=np.array([] if inertia is None else [inertia]))
+        os.replace(tmp_path, os.path.join(CODEBOOK_CACHE_DIR, f'{key}.npz'))
+    except OSError as ex:
+        LOG.debug('unable to save codebook - %s', ex)
+        return
+    prune_codebook_cache()
+
+
+def prune_codebook_cache():
+    """Remove the least recently used codebooks over CODEBOOK_CACHE_BYTES"""
+    if not CODEBOOK_CACHE_DIR:
+        return
+    entries = []
+    try:
+        with os.scandir(CODEBOOK_CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith('.npz'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        # removed by a concurrent prune
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    except OSError:
+        return
+    entries.sort(reverse=True)
+    total = 0
+    for _, size, path in entries:
+        total += size
+        if total > CODEBOOK_CACHE_BYTES:
+            LOG.debug('removing cached codebook %s', path)
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def kmeans_1d_weighted(values, weights, bins):
+    """Optimal clustering of sorted distinct values with weights into bins contiguous
+    clusters by dynamic programming over the prefix sums of the histogram. Returns
+    the centroids and the cluster of each value."""
+    num_vals = values.size
+    values = values.astype(np.float64)
+    weights = weights.astype(np.float64)
+    psum_w = np.concatenate(([0.0], np.cumsum(weights)))
+    psum_wv = np.concatenate(([0.0], np.cumsum(weights * values)))
+    psum_wv2 = np.concatenate(([0.0], np.cumsum(weights * values * values)))
+    # cost[i, j] is the squared error of a cluster of values i to j - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost = ((psum_wv2[None, :] - psum_wv2[:, None]) -
+                np.square(psum_wv[None, :] - psum_wv[:, None]) / (psum_w[None, :] - psum_w[:, None]))
+    cost[np.tril_indices(num_vals + 1)] = np.inf
+    best = cost[0]
+    splits = []
+    for _ in range(1, bins):
+        candidates = best[:, None] + cost
+        split = np.argmin(candidates, axis=0)
+        best = candidates[split, np.arange(num_vals + 1)]
+        splits.append(split)
+    bounds = [num_vals]
+    for split in reversed(splits):
+        bounds.append(split[bounds[-1]])
+    bounds = np.array([0] + bounds[::-1])
+    counts = np.diff(bounds)
+    centroids = (psum_wv[bounds[1:]] - psum_wv[bounds[:-1]]) / (psum_w[bounds[1:]] - psum_w[bounds[:-1]])
+    return centroids, np.repeat(np.arange(counts.size), counts)
+
+
+def cluster_codebook(bins, flattened_val):
     if USE_KMEANS_CUDA and kmeans_cuda:
         invalids = None
         int_bins = bins
@@ -187,18 +324,45 @@ def cluster(bins, flattened_val, val, inertia=None):
         codebook = codebook[~np.isnan(codebook).any(axis=1)]
         codebook = codebook[~np.isneginf(codebook).any(axis=1)]
         codebook = codebook[~np.isposinf(codebook).any(axis=1)]
-        last_inertia = None
-    elif USE_KMEANS_1D and kmeans1d:
-        clustered = kmeans1d.cluster(flattened_val, bins)
+        return codebook, None
+    sample = flattened_val
+    if flattened_val.size > LARGE_TENSOR_VALUES:
+        uniques, inverse, counts = np.unique(flattened_val, return_inverse=True, return_counts=True)
+        if bins < uniques.size <= HISTOGRAM_MAX_UNIQUE:
+            # large tensors of few distinct values, typically dequantized weights, are clustered
+            # on their histogram which has the same optimum as clustering every value
+            codebook, clusters = kmeans_1d_weighted(uniques, counts, bins)
+            encoded = codebook[clusters[inverse]]
+            return codebook, np.sum(np.power(flattened_val, 2) - np.power(encoded, 2))
+        # otherwise evenly spaced order statistics keep the distribution of the values
+        sample = np.sort(flattened_val)[
+            np.linspace(0, flattened_val.size - 1, LARGE_TENSOR_VALUES).astype(np.int64)]
+        LOG.debug('clustering %s of %s values', sample.size, flattened_val.size)
+    if USE_KMEANS_1D and kmeans1d:
+        clustered = kmeans1d.cluster(sample, bins)
         codebook = np.array(clustered.centroids)
-        encoded = codebook[clustered.clusters]
+        if sample is flattened_val:
+            encoded = codebook[clustered.clusters]
+        else:
+            encoded = codebook[vq(flattened_val.astype(codebook.dtype), codebook)[0]]
         last_inertia = np.sum(np.power(flattened_val, 2) - np.power(encoded, 2))
     else:
         # scipy is horribly slow
         kmeans = KMeans(n_clusters=bins)
-        kmeans.fit(flattened_val.reshape((-1, 1)))
+        kmeans.fit(sample.reshape((-1, 1)))
         codebook = kmeans.cluster_centers_
         last_inertia = kmeans.inertia_
+    return codebook, last_inertia
+
+
+def cluster(bins, flattened_val, val, inertia=None):
+    key = codebook_key(bins, flattened_val)
+    cached = load_codebook(key)
+    if cached is None:
+        codebook, last_inertia = cluster_codebook(bins, flattened_val)
+        save_codebook(key, codebook, last_inertia)
+    else:
+        codebook, last_inertia = cached
     codebook = codebook.astype(val.dtype).flatten()
     compressed_val, codes = codes_and_compressed(
         flattened_val, codebook, val.shape)
@@ -207,8 +371,49 @@ def cluster(bins, flattened_val, val, inertia=None):
     return compressed_val, codes, codebook
 
 
+def silhouette_1d(values, labels):
+    """Mean silhouette coefficient of a clustering of 1D values where each cluster is
+    an interval of the values, as assigning each value to its nearest codebook entry
+    gives. The mean distance of a value to a cluster on one side of it is its distance
+    to the cluster mean so only the clusters next to its own are candidates for the
+    nearest cluster and all the distances come from prefix sums of the sorted values.
+    Matches sklearn's silhouette_score, which is quadratic in the number of values, to
+    float32 precision."""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    _, labels = np.unique(labels, return_inverse=True)
+    num_labels = labels.max() + 1 if labels.size else 0
+    if not 1 < num_labels < values.size:
+        raise ValueError(f"Number of labels is {num_labels}. Valid values are 2 "
+                         "to n_samples - 1 (inclusive)")
+    order = np.argsort(values, kind='stable')
+    values = values[order]
+    labels = labels[order]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(labels)) + 1))
+    if len(starts) != num_labels:
+        # clusters are not intervals of the values
+        return float(silhouette_score(values.reshape(-1, 1), labels))
+    ends = np.concatenate((starts[1:], [values.size]))
+    psum = np.concatenate(([0.0], np.cumsum(values)))
+    seg = np.repeat(np.arange(num_labels), ends - starts)
+    seg_start = starts[seg]
+    seg_end = ends[seg]
+    idx = np.arange(values.size)
+    intra = (values * (idx - seg_start) - (psum[idx] - psum[seg_start]) +
+             (psum[seg_end] - psum[idx + 1]) - values * (seg_end - idx - 1))
+    means = (psum[ends] - psum[starts]) / (ends - starts)
+    nearest = np.full(values.size, np.inf)
+    has_left = seg > 0
+    nearest[has_left] = values[has_left] - means[seg[has_left] - 1]
+    has_right = seg < num_labels - 1
+    nearest[has_right] = np.minimum(nearest[has_right], means[seg[has_right] + 1] - values[has_right])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        intra /= seg_end - seg_start - 1
+        sil = np.nan_to_num((nearest - intra) / np.maximum(intra, nearest))
+    sil[seg_end - seg_start == 1] = 0
+    return float(np.mean(sil))
+
+
 def codes_and_compressed(flattened_val, codebook, val_shape):
     codes = vq(flattened_val, codebook)[0]
-    compressed_val = np.array(
-        [codebook[code] for code in codes]).reshape(val_shape)
+    compressed_val = codebook[codes].reshape(val_shape)
     return compressed_val, codes
@@ -0,0 +1,107 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from . import compress as compress_module
+from .compress import (CompressedVal, CompressionError, compress,
+                       set_codebook_cache_dir)
+
+LOG = logging.getLogger(__name__)
+
+# below this many values in total the pool costs more than it saves
+PARALLEL_MIN_VALUES = 1 << 16
+
+
+def _compress_job(value: np.ndarray, kwargs: Mapping) -> Union[CompressedVal, CompressionError]:
+    try:
+        return compress(value, **kwargs)
+    except CompressionError as ex:
+        return ex
+
+
+def compress_parallel(jobs: Sequence[Tuple[np.ndarray, Mapping]],
+                      num_workers: Optional[int] = None) -> Sequence[Union[CompressedVal, CompressionError]]:
+    """Runs compress on each (value, kwargs) job over a process pool
+
+    Args:
+        jobs (Sequence[Tuple[np.ndarray, Mapping]]): value and keyword arguments for compress
+        num_workers (Optional[int], optional): Number of worker processes. Defaults to the cpu count.
+
+    Returns:
+        Sequence[Union[CompressedVal, CompressionError]]: the compressed value or the error raised
+        for each job in order
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    num_workers = min(num_workers, len(jobs))
+    if num_workers <= 1 or sum(value.size for value, _ in jobs) < PARALLEL_MIN_VALUES:
+        return [_compress_job(value, kwargs) for value, kwargs in jobs]
+    LOG.info("compressing %s values with %s workers", len(jobs), num_workers)
+    if 'fork' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('fork')
+    else:
+        mp_context = None
+    # workers that are not forked do not inherit a cache directory set at run time
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context,
+                             initializer=set_codebook_cache_dir,
+                             initargs=(compress_module.CODEBOOK_CACHE_DIR,
+                                       compress_module.CODEBOOK_CACHE_BYTES)) as executor:
+        # largest first so that a big tensor does not start last
+        order = sorted(range(len(jobs)), key=lambda idx: -jobs[idx][0].size)
+        futures = {idx: executor.submit(_compress_job, *jobs[idx]) for idx in order}
+        return [futures[idx].result() for idx in range(len(jobs))]
+
+
+def compress_nodes(nodes: Sequence,
+                   qtypes: Optional[Mapping] = None,
+                   num_workers: Optional[int] = None,
+                   **kwargs) -> Sequence[Optional[CompressionError]]:
+    """Compresses the values of constant nodes over a process pool. The compressed value of
+    each node that compresses is set. The other nodes are left unchanged.
+
+    Args:
+        nodes (Sequence): ConstantInputNodes to compress
+        qtypes (Optional[Mapping], optional): Output qtype of each node if quantized
+        num_workers (Optional[int], optional): Number of worker processes. Defaults to the cpu count.
+        kwargs: passed to ConstantInputNode.compress_value
+
+    Returns:
+        Sequence[Optional[CompressionError]]: None for each node that was compressed or the error
+    """
+    nodes = list(nodes)
+    if qtypes is None:
+        qtypes = {}
+    results = [None] * len(nodes)
+    job_idxs = []
+    jobs = []
+    for idx, node in enumerate(nodes):
+        try:
+            jobs.append(node.compression_args(qtype=qtypes.get(node), **kwargs))
+            job_idxs.append(idx)
+        except CompressionError as ex:
+            results[idx] = ex
+    for idx, comp_val in zip(job_idxs, compress_parallel(jobs, num_workers=num_workers)):
+        if isinstance(comp_val, CompressionError):
+            results[idx] = comp_val
+        else:
+            nodes[idx].compressed_value = comp_val
+    return results
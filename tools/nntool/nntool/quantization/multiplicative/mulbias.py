@@ -74,7 +74,7 @@ def apply_multiplicative_bias(qrec, params: FilterNodeBase, input_tensor: np.nda
     if ktype == 'float':
         if hasattr(params, 'has_mul_bias') and params.has_mul_bias:
             shape = [params.filter_dim.out_c if idx ==
-                     axis else 1 for idx in range(3)]
+                     axis else 1 for idx in range(input_tensor.ndim)]
             input_tensor *= params.mul_biases.reshape(shape)
         return input_tensor
     if ktype == 'symmetric' and qrec.ktype.startswith('scaled'):
@@ -86,7 +86,7 @@ def apply_multiplicative_bias(qrec, params: FilterNodeBase, input_tensor: np.nda
             mul_biases_q = qrec.cache.get('mul_biases_q')
             mul_biases = mul_biases_q.quantize(params.mul_biases)
             shape = [params.filter_dim.out_c if idx ==
-                     axis else 1 for idx in range(3)]
+                     axis else 1 for idx in range(input_tensor.ndim)]
             input_tensor *= mul_biases.reshape(shape)
             input_tensor = at_norm(input_tensor, mul_biases_q.q)
     return input_tensor.astype(np.int32)
@@ -0,0 +1,84 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from nntool.execution.kernel_profiler import KernelProfiler
+from nntool.utils.tabular import Tabular, TabularColumn
+
+from .reporter import Reporter
+
+
+class KernelProfileReporter(Reporter):
+    def __init__(self, group_by='node', sort_by='time', top=None, do_totals=True):
+        self._group_by = group_by
+        self._sort_by = sort_by
+        self._top = top
+        self._do_totals = do_totals
+
+    def report(self, G, stats: KernelProfiler) -> Tabular:
+        table = Tabular()
+        header = [TabularColumn(self._group_by)]
+        if self._group_by == 'node':
+            header.extend([
+                TabularColumn("op type"),
+                TabularColumn("kernel"),
+                TabularColumn("ktype"),
+            ])
+        header.extend([
+            TabularColumn("calls", fmt=">d"),
+            TabularColumn("total ms", fmt=">.3f"),
+            TabularColumn("avg ms", fmt=">.3f"),
+            TabularColumn("max ms", fmt=">.3f"),
+            TabularColumn("%", fmt=">.1f"),
+            TabularColumn("bytes in", fmt=">d"),
+            TabularColumn("bytes out", fmt=">d"),
+            TabularColumn("MB/s", fmt=">.1f"),
+        ])
+        table.add_row(header)
+        summary = stats.summary(group_by=self._group_by, sort_by=self._sort_by, top=self._top)
+        for stat in summary:
+            row = [stat['name']]
+            if self._group_by == 'node':
+                row.extend([stat['op'], stat['kernel'], stat['ktype']])
+            row.extend([
+                stat['calls'],
+                stat['time'] * 1000,
+                stat['avg_time'] * 1000,
+                stat['max_time'] * 1000,
+                stat['percent'],
+                stat['bytes_in'],
+                stat['bytes_out'],
+                (stat['bytes_in'] + stat['bytes_out']) / stat['time'] / 1e6 if stat['time'] else 0.0
+            ])
+            table.add_row(row)
+        if self._do_totals:
+            # fusions are not included since their kernels are already counted
+            kernels = stats.stats('kernel').values()
+            row = ["Total"]
+            if self._group_by == 'node':
+                row.extend(["", "", ""])
+            total_time = stats.total_time
+            total_bytes = sum(stat.bytes_in + stat.bytes_out for stat in kernels)
+            row.extend([
+                sum(stat.calls for stat in kernels),
+                total_time * 1000,
+                "",
+                "",
+                "",
+                sum(stat.bytes_in for stat in kernels),
+                sum(stat.bytes_out for stat in kernels),
+                total_bytes / total_time / 1e6 if total_time else 0.0
+            ])
+            table.add_row(row)
+        return table
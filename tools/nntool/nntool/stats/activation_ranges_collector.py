@@ -19,25 +19,14 @@ import numpy as np
 from nntool.execution.graph_executer import GraphExecuter
 from nntool.graph.types.fusions import FusionNodeBase, FusionInputNode
 from nntool.stats.ranges_utils import collect_stat, update_ranges
+from nntool.stats.streaming_stats import (PerAxisRange, QuantileSketch,
+                                          StreamingStat, tensor_axis_ranges,
+                                          tensor_moments)
 from nntool.utils.json_serializable import JsonSerializable
 
 from .stats_collector import GraphStatsCollector
 
 
-def update_peraxis(var, arr: np.ndarray):
-    per_axis = var.get('per_axis')
-    if not per_axis:
-        per_axis = [{'min': np.array(
-            [float('inf')] * sz), 'max': np.array(float('-inf') * sz)} for sz in arr.shape]
-        var['per_axis'] = per_axis
-    for i, _ in enumerate(arr.shape):
-        per_axis_elem = per_axis[i]
-        other_axis = tuple(j for j in range(len(arr.shape)) if i != j)
-        per_axis_elem['min'] = np.minimum(
-            per_axis_elem['min'], arr.min(axis=other_axis))
-        per_axis_elem['max'] = np.maximum(
-            per_axis_elem['max'], arr.max(axis=other_axis))
-
 class Rolling(JsonSerializable):
     def __init__(self) -> None:
         self._values = []
@@ -50,6 +39,9 @@ class Rolling(JsonSerializable):
     def add_val(self, val: float):
         self._values.append(val)
 
+    def merge(self, other: 'Rolling'):
+        self._values.extend(other._values)
+
     def _encapsulate(self):
         return float(self)
 
@@ -109,13 +101,96 @@ class Rolling(JsonSerializable):
         return f'{float(self)}'
 
 
+def merge_range_stat(base, other, visited):
+    """Merges partial statistics collected on a later shard of inputs into base"""
+    if isinstance(base, (Rolling, StreamingStat)):
+        base.merge(other)
+    elif isinstance(base, dict):
+        if 'ema_history' in base:
+            base['ema_history'].extend(other['ema_history'])
+        elif 'min' in base and 'max' in base:
+            if isinstance(base['min'], np.ndarray):
+                base['min'] = np.minimum(base['min'], other['min'])
+                base['max'] = np.maximum(base['max'], other['max'])
+            else:
+                base['min'] = min(base['min'], other['min'])
+                base['max'] = max(base['max'], other['max'])
+        for key, other_val in other.items():
+            if key in ('min', 'max', 'ema_history', 'results'):
+                continue
+            if key not in base:
+                base[key] = other_val
+                continue
+            base_val = base[key]
+            # range_in entries are shared with the range_out of the producing node
+            if id(base_val) in visited:
+                continue
+            visited.add(id(base_val))
+            merge_range_stat(base_val, other_val, visited)
+    elif isinstance(base, list):
+        for base_val, other_val in zip(base, other):
+            if base_val is None or id(base_val) in visited:
+                continue
+            visited.add(id(base_val))
+            merge_range_stat(base_val, other_val, visited)
+
+
+def replay_ema_history(stat, ema_decay, visited):
+    if isinstance(stat, dict):
+        history = stat.pop('ema_history', None)
+        if history is not None:
+            stat['min'], stat['max'] = float('inf'), float('-inf')
+            for tensor_min, tensor_max in history:
+                update_ranges(stat, tensor_min, tensor_max, ema_decay=ema_decay)
+        vals = stat.values()
+    elif isinstance(stat, list):
+        vals = stat
+    else:
+        return
+    for val in vals:
+        if isinstance(val, (dict, list)) and id(val) not in visited:
+            visited.add(id(val))
+            replay_ema_history(val, ema_decay, visited)
+
+
 class ActivationRangesCollector(GraphStatsCollector):
-    def __init__(self, graph_execution=None, use_ema=False, ema_decay=0.999):
+    def __init__(self, graph_execution=None, use_ema=False, ema_decay=0.999,
+                 record_ema_history=False, collect_percentiles=False):
+        """Collects activation statistics
+
+        Args:
+            graph_execution (optional): Alternative graph execution iterator. Defaults to None.
+            use_ema (bool, optional): Track output ranges using an exponential moving average. Defaults to False.
+            ema_decay (float, optional): EMA decay. Defaults to 0.999.
+            record_ema_history (bool, optional): Record the per sample output ranges rather than applying
+                the EMA so that partial statistics can be reduced with reduce_partial_stats. Defaults to False.
+            collect_percentiles (bool, optional): Collect a quantile sketch of each output which is
+                needed by the percentile based clip types. Defaults to False.
+        """
         super(ActivationRangesCollector, self).__init__()
         self._graph_execution = graph_execution
         self.stats = OrderedDict()
         self.use_ema = use_ema
         self.ema_decay = ema_decay
+        self.record_ema_history = record_ema_history
+        self.collect_percentiles = collect_percentiles
+        self.peak_activation_bytes = 0
+
+    @staticmethod
+    def reduce_partial_stats(partial_stats, use_ema=False, ema_decay=0.999):
+        """Reduces statistics collected over consecutive shards of the input data. The
+        result is the same as collecting over all of the inputs in order. If use_ema is
+        set the partial statistics must have been collected with record_ema_history."""
+        partial_stats = list(partial_stats)
+        stats = partial_stats[0]
+        for other_stats in partial_stats[1:]:
+            visited = set()
+            for key, stat in stats.items():
+                merge_range_stat(stat, other_stats[key], visited)
+        visited = set()
+        for stat in stats.values():
+            replay_ema_history(stat, ema_decay if use_ema else None, visited)
+        return stats
 
 
     def collect_stat(self, stat: dict, name, details, details_name=None):
@@ -128,9 +203,12 @@ class ActivationRangesCollector(GraphStatsCollector):
                 quantization = G.quantization
             else:
                 quantization = None
-            graph_executor = GraphExecuter(G, qrecs=quantization)
+            # statistics are collected from the yielded tensors so activations can be
+            # released as soon as they are consumed
+            graph_executor = GraphExecuter(G, qrecs=quantization, free_activations=True)
             graph_execution = graph_executor.execute_iterator
         else:
+            graph_executor = None
             graph_execution = self._graph_execution
 
         limit = step_idx[0] if isinstance(step_idx, tuple) else step_idx
@@ -152,8 +230,10 @@ class ActivationRangesCollector(GraphStatsCollector):
                         'std': Rolling(),
                         'mean': Rolling(),
                         'b': Rolling(),
-                        # 'percentiles': RunningPercentiles([0.25, 0.5, 0.75])
                     } for _ in output_tensors]
+                if self.collect_percentiles:
+                    for elem in range_out:
+                        elem['percentiles'] = QuantileSketch()
                 stat = {
                     'range_in': range_in,
                     'range_out': range_out,
@@ -184,14 +264,27 @@ class ActivationRangesCollector(GraphStatsCollector):
 
             for idx, tensor in enumerate(output_tensors):
                 range_out = stat['range_out'][idx]
-                ema_decay = self.ema_decay if self.use_ema else None
-                update_ranges(range_out, tensor.min(), tensor.max(), ema_decay=ema_decay)
-                range_out['std'].add_val(np.std(tensor))
-                mean = np.mean(tensor)
+                axis_ranges = tensor_axis_ranges(tensor)
+                if axis_ranges[0]:
+                    tensor_min, tensor_max = axis_ranges[0][0].min(), axis_ranges[1][0].max()
+                else:
+                    tensor_min, tensor_max = tensor.min(), tensor.max()
+                if self.record_ema_history:
+                    range_out.setdefault('ema_history', []).append(
+                        (tensor_min, tensor_max))
+                else:
+                    ema_decay = self.ema_decay if self.use_ema else None
+                    update_ranges(range_out, tensor_min, tensor_max, ema_decay=ema_decay)
+                mean, std, mean_abs_dev = tensor_moments(tensor)
+                range_out['std'].add_val(std)
                 range_out['mean'].add_val(mean)
-                range_out['b'].add_val(np.mean(np.abs(tensor - mean)))
-                # range_out['percentiles'].push(tensor)
-                update_peraxis(range_out, tensor)
+                range_out['b'].add_val(mean_abs_dev)
+                if 'percentiles' in range_out:
+                    range_out['percentiles'].push(tensor)
+                per_axis = range_out.get('per_axis')
+                if per_axis is None:
+                    per_axis = range_out['per_axis'] = PerAxisRange()
+                per_axis.push_ranges(*axis_ranges)
 
             if details:
                 node.details_collector(self.stats, stat, details)
@@ -203,4 +296,7 @@ class ActivationRangesCollector(GraphStatsCollector):
                         fstat = self.stats[(node.name, edge.to_node.name)]
                         fstat['range_in'][edge.to_idx] = finput_in_stat
 
+        if graph_executor is not None:
+            self.peak_activation_bytes = max(
+                self.peak_activation_bytes, graph_executor.peak_activation_bytes)
         return self.stats
@@ -21,6 +21,7 @@ import numpy as np
 
 from nntool.utils.stats_funcs import qsnr, cos_similarity
 
+from nntool.execution.activation_cache import ActivationCache
 from nntool.execution.graph_executer import GraphExecuter
 from nntool.execution.quantization_mode import QuantizationMode
 
@@ -30,10 +31,13 @@ LOG = logging.getLogger('nntool.' + __name__)
 
 
 class ErrorStatsCollector(ReductionStatsCollector):
-    def __init__(self, limit=None, quant_compare=False):
+    def __init__(self, limit=None, quant_compare=False, activation_cache: ActivationCache = None):
         super().__init__()
         self._limit = limit
         self._quant_compare = quant_compare
+        # reuses the activations of earlier collections on the same inputs that are
+        # not affected by quantization changes made since
+        self._activation_cache = activation_cache
 
     def _prepare(self, G):
         pass
@@ -96,9 +100,9 @@ class ErrorStatsCollector(ReductionStatsCollector):
             quantization = G.quantization
         else:
             quantization = None
-        executer = GraphExecuter(G, qrecs=quantization)
+        executer = GraphExecuter(G, qrecs=quantization, activation_cache=self._activation_cache)
         foutputs = self._collect_execution(executer, input_tensors, quantization)
-        executer = GraphExecuter(G, qrecs=G.quantization)
+        executer = GraphExecuter(G, qrecs=G.quantization, activation_cache=self._activation_cache)
         qoutputs = self._collect_execution(executer,
                                            input_tensors,
                                            G.quantization,
@@ -0,0 +1,135 @@
+# Copyright (C) 2020  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .activation_ranges_collector import ActivationRangesCollector
+
+LOG = logging.getLogger(__name__)
+
+# graph shared with the worker processes by the pool initializer
+_WORKER_GRAPH = None
+
+
+def _init_worker(G):
+    global _WORKER_GRAPH
+    _WORKER_GRAPH = G
+
+
+def _collect_shard(shard: Sequence[Any],
+                   loader: Optional[Callable],
+                   loader_kwargs: Mapping,
+                   use_ema: bool,
+                   ema_decay: float,
+                   collect_percentiles: bool):
+    stats_collector = ActivationRangesCollector(
+        use_ema=use_ema, ema_decay=ema_decay, record_ema_history=use_ema,
+        collect_percentiles=collect_percentiles)
+    for item in shard:
+        input_tensors = loader(item, **loader_kwargs) if loader else item
+        if isinstance(input_tensors, np.ndarray):
+            input_tensors = [input_tensors]
+        stats_collector.collect_stats(_WORKER_GRAPH, input_tensors)
+    return stats_collector.stats, stats_collector.peak_activation_bytes
+
+
+def shard_items(items: Sequence[Any], num_shards: int) -> Sequence[Sequence[Any]]:
+    """Splits items into at most num_shards consecutive shards of near equal size"""
+    num_shards = max(1, min(num_shards, len(items)))
+    shard_size, remainder = divmod(len(items), num_shards)
+    shards = []
+    start = 0
+    for shard_idx in range(num_shards):
+        end = start + shard_size + (1 if shard_idx < remainder else 0)
+        shards.append(items[start:end])
+        start = end
+    return shards
+
+
+def collect_stats_parallel(G,
+                           items: Sequence[Any],
+                           num_workers: Optional[int] = None,
+                           loader: Optional[Callable] = None,
+                           loader_kwargs: Optional[Mapping] = None,
+                           use_ema=False,
+                           ema_decay=0.999,
+                           collect_percentiles=False,
+                           collector_info: Optional[dict] = None):
+    """Collects activation statistics over a process pool
+
+    The items are split into consecutive shards, one per worker. Each worker runs its
+    own executer over its shard and the partial statistics are reduced in shard order
+    so the result is the same as serial collection with ActivationRangesCollector.
+
+    Args:
+        G: Graph to collect statistics on
+        items (Sequence[Any]): Either the input tensors for each run or, if loader is set, values
+            passed to loader in the worker to produce them (for example input file names)
+        num_workers (Optional[int], optional): Number of worker processes. Defaults to the cpu count.
+        loader (Optional[Callable], optional): Module level function returning the input tensors for an item.
+        loader_kwargs (Optional[Mapping], optional): Keyword arguments passed to loader.
+        use_ema (bool, optional): Collect ranges using an exponential moving average. Defaults to False.
+        ema_decay (float, optional): EMA decay. Defaults to 0.999.
+        collect_percentiles (bool, optional): Collect quantile sketches of the outputs. Defaults to False.
+        collector_info (Optional[dict], optional): If set filled with the number of shards and the
+            peak activation bytes of the workers.
+
+    Returns:
+        Mapping of statistics for each node's inputs and outputs
+    """
+    items = list(items)
+    if not items:
+        raise ValueError('no inputs to collect statistics on')
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if loader_kwargs is None:
+        loader_kwargs = {}
+    shards = shard_items(items, num_workers)
+    LOG.info("collecting statistics on %s inputs with %s workers",
+             len(items), len(shards))
+    if len(shards) == 1:
+        _init_worker(G)
+        try:
+            results = [_collect_shard(shards[0], loader, loader_kwargs, use_ema, ema_decay,
+                                      collect_percentiles)]
+        finally:
+            _init_worker(None)
+    else:
+        # fork avoids pickling the graph into every worker where it is available
+        if 'fork' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('fork')
+        else:
+            mp_context = None
+        with ProcessPoolExecutor(max_workers=len(shards),
+                                 mp_context=mp_context,
+                                 initializer=_init_worker,
+                                 initargs=(G,)) as executor:
+            futures = [executor.submit(_collect_shard, shard, loader, loader_kwargs, use_ema, ema_decay,
+                                       collect_percentiles)
+                       for shard in shards]
+            results = [future.result() for future in futures]
+    if collector_info is not None:
+        collector_info.update({
+            'shards': len(shards),
+            'peak_activation_bytes': max(peak for _, peak in results)
+        })
+    return ActivationRangesCollector.reduce_partial_stats(
+        [stats for stats, _ in results], use_ema=use_ema, ema_decay=ema_decay)
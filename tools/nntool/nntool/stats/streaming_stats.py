@@ -0,0 +1,240 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Single pass, mergeable accumulators for activation statistics
+
+All accumulators are fed whole tensors with push and can be combined with merge
+so that statistics collected on different shards of a calibration set, or in
+different runs, can be reduced into one.
+"""
+
+import math
+from abc import abstractmethod
+from typing import Sequence, Tuple
+
+import numpy as np
+from nntool.utils.json_serializable import JsonSerializable
+
+
+def tensor_moments(tensor: np.ndarray) -> Tuple[float, float, float]:
+    """Mean, standard deviation and mean absolute deviation of a tensor.
+
+    The tensor is centered once and the result is identical to np.mean(tensor),
+    np.std(tensor) and np.mean(np.abs(tensor - np.mean(tensor)))."""
+    mean = np.mean(tensor)
+    centered = tensor - mean
+    std = np.sqrt(np.mean(np.square(centered)))
+    mean_abs_dev = np.mean(np.abs(centered, out=centered))
+    return mean, std, mean_abs_dev
+
+
+def tensor_axis_ranges(tensor: np.ndarray) -> Tuple[Sequence[np.ndarray], Sequence[np.ndarray]]:
+    """Minimum and maximum along every axis of a tensor reducing all the other axes.
+
+    Only two full passes over the tensor are made for each of min and max whatever
+    the rank. The first axis is reduced from the tensor with its last axis already
+    reduced and the last axis directly from the tensor."""
+    rank = len(tensor.shape)
+    if rank == 0:
+        return [], []
+    if rank == 1:
+        return [tensor.copy()], [tensor.copy()]
+    inner_min = tensor.min(axis=-1)
+    inner_max = tensor.max(axis=-1)
+    mins, maxs = [], []
+    for axis in range(rank - 1):
+        other_axis = tuple(j for j in range(rank - 1) if j != axis)
+        mins.append(inner_min.min(axis=other_axis) if other_axis else inner_min)
+        maxs.append(inner_max.max(axis=other_axis) if other_axis else inner_max)
+    mins.append(tensor.min(axis=tuple(range(rank - 1))))
+    maxs.append(tensor.max(axis=tuple(range(rank - 1))))
+    return mins, maxs
+
+
+class StreamingStat(JsonSerializable):
+    @abstractmethod
+    def push(self, tensor: np.ndarray):
+        pass
+
+    @abstractmethod
+    def merge(self, other: 'StreamingStat'):
+        pass
+
+
+class PerAxisRange(StreamingStat):
+    """Minimum and maximum along every axis of the tensors pushed reducing all the other axes"""
+
+    def __init__(self) -> None:
+        self.mins = None
+        self.maxs = None
+
+    def push(self, tensor: np.ndarray):
+        self.push_ranges(*tensor_axis_ranges(tensor))
+
+    def push_ranges(self, mins: Sequence[np.ndarray], maxs: Sequence[np.ndarray]):
+        """Combine ranges already reduced from a tensor with tensor_axis_ranges"""
+        if self.mins is None:
+            self.mins, self.maxs = list(mins), list(maxs)
+        else:
+            self.mins = [np.minimum(a, b) for a, b in zip(self.mins, mins)]
+            self.maxs = [np.maximum(a, b) for a, b in zip(self.maxs, maxs)]
+
+    def merge(self, other: 'PerAxisRange'):
+        if other.mins is not None:
+            self.push_ranges(other.mins, other.maxs)
+
+    def _encapsulate(self):
+        if self.mins is None:
+            return None
+        return {'mins': [elem.tolist() for elem in self.mins],
+                'maxs': [elem.tolist() for elem in self.maxs]}
+
+    @classmethod
+    def _dencapsulate(cls, val):
+        res = cls()
+        if val is not None:
+            res.mins = [np.array(elem) for elem in val['mins']]
+            res.maxs = [np.array(elem) for elem in val['maxs']]
+        return res
+
+
+class QuantileSketch(StreamingStat):
+    """Relative error quantile sketch (DDSketch).
+
+    Values are counted in logarithmically spaced buckets whose boundaries do not
+    depend on the data so sketches merge exactly and in any order. Any quantile is
+    estimated within relative_accuracy of a value in the data."""
+
+    def __init__(self, relative_accuracy=0.01, min_indexable=1e-9) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.min_indexable = min_indexable
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.count = 0
+        self.zero_count = 0
+        self.min = float('inf')
+        self.max = float('-inf')
+        # dense bucket counts and the key of the first bucket for positive and negative values
+        self._pos = (np.zeros(0, dtype=np.int64), 0)
+        self._neg = (np.zeros(0, dtype=np.int64), 0)
+
+    def _keys(self, magnitudes: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    @staticmethod
+    def _add_counts(store, keys: np.ndarray, counts: np.ndarray = None):
+        bins, offset = store
+        if not len(keys):
+            return store
+        min_key, max_key = int(keys.min()), int(keys.max())
+        if not len(bins):
+            offset = min_key
+        new_offset = min(offset, min_key)
+        new_len = max(offset + len(bins), max_key + 1) - new_offset
+        if new_offset != offset or new_len != len(bins):
+            new_bins = np.zeros(new_len, dtype=np.int64)
+            new_bins[offset - new_offset:offset - new_offset + len(bins)] = bins
+            bins, offset = new_bins, new_offset
+        if counts is None:
+            bins += np.bincount(keys - offset, minlength=len(bins))
+        else:
+            np.add.at(bins, keys - offset, counts)
+        return bins, offset
+
+    def push(self, tensor: np.ndarray):
+        values = np.asarray(tensor, dtype=np.float64).ravel()
+        if not values.size:
+            return
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        pos = values[values > self.min_indexable]
+        neg = -values[values < -self.min_indexable]
+        self.zero_count += values.size - pos.size - neg.size
+        self._pos = self._add_counts(self._pos, self._keys(pos))
+        self._neg = self._add_counts(self._neg, self._keys(neg))
+
+    def merge(self, other: 'QuantileSketch'):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('cannot merge sketches with different accuracies')
+        self.count += other.count
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for name in ('_pos', '_neg'):
+            bins, offset = getattr(other, name)
+            nonzero = np.nonzero(bins)[0]
+            setattr(self, name, self._add_counts(
+                getattr(self, name), nonzero + offset, bins[nonzero]))
+
+    def _value(self, key: int) -> float:
+        return 2 * math.pow(self._gamma, key) / (self._gamma + 1)
+
+    def quantile(self, quantile: float) -> float:
+        """Estimate the value at quantile (0 to 1)"""
+        if not self.count:
+            return None
+        if quantile <= 0:
+            return self.min
+        if quantile >= 1:
+            return self.max
+        rank = quantile * (self.count - 1)
+        neg_bins, neg_offset = self._neg
+        neg_total = int(neg_bins.sum())
+        if rank < neg_total:
+            # negative buckets are walked from the largest magnitude down
+            cum = np.cumsum(neg_bins[::-1])
+            idx = int(np.searchsorted(cum, rank, side='right'))
+            key = neg_offset + len(neg_bins) - 1 - idx
+            value = -self._value(key)
+        elif rank < neg_total + self.zero_count:
+            value = 0.0
+        else:
+            pos_bins, pos_offset = self._pos
+            cum = np.cumsum(pos_bins)
+            idx = int(np.searchsorted(cum, rank - neg_total - self.zero_count, side='right'))
+            value = self._value(pos_offset + min(idx, len(pos_bins) - 1))
+        return min(max(value, self.min), self.max)
+
+    def quantiles(self, quantiles: Sequence[float]) -> Sequence[float]:
+        return [self.quantile(quantile) for quantile in quantiles]
+
+    def _encapsulate(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'min_indexable': self.min_indexable,
+            'count': self.count,
+            'zero_count': self.zero_count,
+            'min': self.min,
+            'max': self.max,
+            'pos': [self._pos[0].tolist(), self._pos[1]],
+            'neg': [self._neg[0].tolist(), self._neg[1]],
+        }
+
+    @classmethod
+    def _dencapsulate(cls, val):
+        res = cls(relative_accuracy=val['relative_accuracy'],
+                  min_indexable=val['min_indexable'])
+        res.count, res.zero_count = val['count'], val['zero_count']
+        res.min, res.max = val['min'], val['max']
+        res._pos = (np.array(val['pos'][0], dtype=np.int64), val['pos'][1])
+        res._neg = (np.array(val['neg'][0], dtype=np.int64), val['neg'][1])
+        return res
+
+    def __repr__(self) -> str:
+        if not self.count:
+            return 'QuantileSketch(empty)'
+        return 'QuantileSketch(count={}, p1={:.4g}, p50={:.4g}, p99={:.4g})'.format(
+            self.count, *self.quantiles([0.01, 0.5, 0.99]))
@@ -13,11 +13,16 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import hashlib
+import itertools
 import logging
 import os
-from collections.abc import Iterator
+import tempfile
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
-from typing import Sequence, Union
+from typing import Optional, Sequence, Union
 
 import numpy as np
 import scipy.io.wavfile as wav
@@ -44,6 +49,9 @@ VALID_IMAGE_EXTENSIONS = ['.pgm', '.png', '.ppm', '.jpg', '.jpeg']
 VALID_SOUND_EXTENSIONS = ['.wav', '.raw', '.pcm']
 VALID_DATA_IMPORT_EXTENSIONS = ['.npy', '.dat']
 
+# number of inputs imported ahead of the one being used
+DEFAULT_PREFETCH = 4
+
 def postprocess(img_in, h, w, c, **kwargs):
     if kwargs.get('transpose'):
         if len(img_in.shape) == 3:
@@ -176,6 +184,10 @@ def import_data(filename, **kwargs):
     LOG.debug("no import tool for file %s with extension %s", filename, ext)
     raise NotImplementedError('unknown file extension for import data')
 
+def import_data_files(filenames: Sequence[str], cache_dir: Optional[str] = None, **kwargs):
+    """Imports one file per graph input"""
+    return [import_cached_data(filename, cache_dir=cache_dir, **kwargs) for filename in filenames]
+
 class FileImporter(Iterator):
     """ Data generator for data from files
     """
@@ -212,3 +224,92 @@ class FileImporter(Iterator):
             raise StopIteration()
         self._idx += 1
         return self[idx]
+
+
+def input_cache_key(filename: str, importer_args) -> Optional[str]:
+    """Key of the imported value of filename in an input cache or None if the
+    importer arguments cannot be described"""
+    if any(callable(val) for val in importer_args.values()):
+        return None
+    stat = os.stat(filename)
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(f'{os.path.abspath(filename)}:{stat.st_size}:{stat.st_mtime_ns}:'.encode())
+    hasher.update(repr(sorted(importer_args.items())).encode())
+    return hasher.hexdigest()
+
+
+def import_cached_data(filename: str, cache_dir: Optional[str] = None, **kwargs):
+    """Imports filename reusing the tensor saved in cache_dir when the file was last
+    imported with the same arguments"""
+    key = input_cache_key(filename, kwargs) if cache_dir else None
+    if key is None:
+        return import_data(filename, **kwargs)
+    cache_path = os.path.join(cache_dir, f'{key}.npy')
+    try:
+        return np.load(cache_path, allow_pickle=False)
+    except (OSError, ValueError):
+        pass
+    data = import_data(filename, **kwargs)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # written to a temporary file and renamed so that concurrent imports
+        # never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fp:
+            np.save(fp, data, allow_pickle=False)
+        os.replace(tmp_path, cache_path)
+    except (OSError, ValueError) as ex:
+        LOG.debug('unable to cache input %s - %s', filename, ex)
+    return data
+
+
+class InputPipeline(Iterable):
+    """ Imports the files for each execution of a graph in background threads
+
+    Iterating yields the files and the imported tensors for each item of files.
+    Each item is a file or a sequence of files, one per graph input. Up to
+    prefetch items are imported ahead of the one being used. Decoding images and
+    numpy operations release the GIL so the imports overlap with graph execution.
+    If cache_dir is set the imported tensors are saved there and are reused while
+    the file and importer arguments are unchanged.
+    """
+    def __init__(self, files: Sequence[Union[str, Sequence[str]]],
+                 prefetch: int = DEFAULT_PREFETCH,
+                 num_workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None,
+                 **importer_args) -> None:
+        self._files = [[elem] if isinstance(elem, str) else list(elem) for elem in files]
+        self._prefetch = max(prefetch or 0, 0)
+        self._num_workers = num_workers or min(self._prefetch, os.cpu_count() or 1)
+        self._cache_dir = cache_dir or None
+        self._importer_args = importer_args
+
+    def __len__(self):
+        return len(self._files)
+
+    def load(self, files: Sequence[str]):
+        return [import_cached_data(filename, cache_dir=self._cache_dir, **self._importer_args)
+                for filename in files]
+
+    def __iter__(self):
+        if not self._prefetch:
+            for files in self._files:
+                yield files, self.load(files)
+            return
+        files_iter = iter(self._files)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self._num_workers)
+        try:
+            for files in itertools.islice(files_iter, self._prefetch):
+                pending.append((files, executor.submit(self.load, files)))
+            while pending:
+                files, future = pending.popleft()
+                for next_files in itertools.islice(files_iter, 1):
+                    pending.append((next_files, executor.submit(self.load, next_files)))
+                yield files, future.result()
+        finally:
+            # imports ahead of an abandoned iteration are not needed. they are cancelled
+            # here since shutdown only takes cancel_futures from python 3.9
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
@@ -67,6 +67,11 @@ class DiagCollectors():
     def active_set(self, name):
         self.cur_sets.append(self.stats.setdefault(name, OrderedDict()))
 
+    @property
+    def active(self):
+        """True if values passed to record are being collected"""
+        return bool(self.cur_sets)
+
     def record(self, name, val, scale=None, zero_point=0, node=None):
         if not self.cur_sets:
             return
@@ -89,6 +94,13 @@ class DiagCollectors():
                 node_set[name] = np.concatenate(
                     [node_set[name], np.expand_dims(val, 0)])
 
+    def record_each(self, name, vals, scale=None, zero_point=0, node=None):
+        """Records each entry of the first axis of vals as if they had been recorded one after the other"""
+        if not self.cur_sets:
+            return
+        for val in vals:
+            self.record(name, val, scale=scale, zero_point=zero_point, node=node)
+
     def record_ref(self, name, ref, node=None):
         if self.cur_sets is None:
             return
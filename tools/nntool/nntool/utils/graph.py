@@ -14,6 +14,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from collections.abc import Iterable, Mapping
+from contextlib import contextmanager
 from itertools import zip_longest
 from typing import Generic, Optional, Sequence, Set, Tuple, TypeVar, Union
 
@@ -296,6 +297,55 @@ class GraphView(Mapping):
         self._in_edges = {}
         self._nodes = {}
         self._attr = attr
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """Incremented every time a node or edge is added or removed. Used to detect that
+        anything derived from the structure of the graph is out of date."""
+        return getattr(self, '_version', 0)
+
+    def _changed(self, added_node: Node = None):
+        self._version = self.version + 1
+        added_nodes = getattr(self, '_added_nodes', None)
+        if added_node is not None and added_nodes is not None:
+            added_nodes[1].append((self._version, added_node))
+
+    def mark_changed(self):
+        """Increments the version of the graph. Used when nodes have been modified in place."""
+        self._changed()
+
+    @contextmanager
+    def track_added_nodes(self):
+        """Records the nodes added to the graph while active. Nested uses share the same record."""
+        if getattr(self, '_added_nodes', None) is not None:
+            yield
+            return
+        self._added_nodes = (self.version, [])
+        try:
+            yield
+        finally:
+            self._added_nodes = None
+
+    def added_nodes_since(self, version: int) -> Optional[Sequence[Node]]:
+        """Nodes added to the graph after version. Returns None if nodes were not being
+        tracked at that version."""
+        added_nodes = getattr(self, '_added_nodes', None)
+        if added_nodes is None or version < added_nodes[0]:
+            return None
+        res = []
+        for added_version, node in reversed(added_nodes[1]):
+            if added_version <= version:
+                break
+            res.append(node)
+        return res
+
+    def __getstate__(self):
+        # execution plans and tracked nodes are not copied or pickled
+        state = self.__dict__.copy()
+        state.pop('_execution_plan', None)
+        state.pop('_added_nodes', None)
+        return state
 
     @classmethod
     # pylint: disable=unused-argument
@@ -344,6 +394,7 @@ class GraphView(Mapping):
             self._in_edges.clear()
             self._out_edges.clear()
             self._nodes.clear()
+            self._changed()
 
     def clone(self) -> 'GraphView':
         '''Clones the GraphView'''
@@ -418,13 +469,16 @@ class GraphView(Mapping):
         elif edge.from_node.name not in self._nodes:
             assert edge.from_node not in self._nodes.values()
             self._nodes[edge.from_node.name] = edge.from_node
+            self._changed(edge.from_node)
         if isinstance(edge.to_node, str):
             edge = edge.clone(to_node=self._nodes[edge.to_node])
         elif edge.to_node.name not in self._nodes:
             assert edge.to_node not in self._nodes.values()
             self._nodes[edge.to_node.name] = edge.to_node
+            self._changed(edge.to_node)
         self.__add_in_edge(edge)
         self.__add_out_edge(edge)
+        self._changed()
 
     def node(self, node_name):
         '''Find a node by name. GraphView[node_name] also works'''
@@ -808,19 +862,32 @@ class GraphView(Mapping):
                                                stop_up_at=stop_up_at, visited=visited)
 
     def _topological_sort(self, node: Node, visited_edges):
+        # depth first with an explicit stack so that deep graphs do not recurse
         yield node
-        for edge_bundle in self.indexed_out_edges(node):
-            for edge in edge_bundle:
+        stack = [(edge for edge_bundle in self.indexed_out_edges(node) for edge in edge_bundle)]
+        while stack:
+            for edge in stack[-1]:
                 visited_edges.add(edge)
-                if set(self.in_edges(edge.to_node)).issubset(visited_edges):
-                    yield from self._topological_sort(edge.to_node, visited_edges)
+                if all(in_edge in visited_edges for in_edge in self.in_edges(edge.to_node)):
+                    yield edge.to_node
+                    stack.append(
+                        (edge for edge_bundle in self.indexed_out_edges(edge.to_node) for edge in edge_bundle))
+                    break
+            else:
+                stack.pop()
 
     def _topological_sort_reversed(self, node: Node, visited_edges):
         yield node
-        for edge in reversed(self.indexed_in_edges(node)):
-            visited_edges.add(edge)
-            if set(self.out_edges(edge.from_node)).issubset(visited_edges):
-                yield from self._topological_sort_reversed(edge.from_node, visited_edges)
+        stack = [reversed(self.indexed_in_edges(node))]
+        while stack:
+            for edge in stack[-1]:
+                visited_edges.add(edge)
+                if all(out_edge in visited_edges for out_edge in self.out_edges(edge.from_node)):
+                    yield edge.from_node
+                    stack.append(reversed(self.indexed_in_edges(edge.from_node)))
+                    break
+            else:
+                stack.pop()
 
     def topological_sort(self,
                          start_node_or_nodes: Optional[Union[str,
@@ -989,6 +1056,7 @@ class GraphView(Mapping):
         '''Removes a node and all its connected edges'''
         node_name = resolve_name(node_or_name)
         del self._nodes[node_name]
+        self._changed()
         node_names_to_look_at = set()
         if node_name in self._in_edges:
             node_names_to_look_at |= set(self._in_edges[node_name].keys())
@@ -1010,6 +1078,7 @@ class GraphView(Mapping):
             return not(x.to_node == edge.to_node and x.from_node == edge.from_node and
                        x.to_idx == edge.to_idx and x.from_idx == edge.from_idx)
         edge_list = self._in_edges[edge.to_node.name][edge.from_node.name]
+        self._changed()
         self._in_edges[edge.to_node.name][edge.from_node.name]\
             = list(filter(edge_match, edge_list))
         if not self._in_edges[edge.to_node.name][edge.from_node.name]:
@@ -1096,6 +1165,7 @@ class GraphView(Mapping):
         new_node = resolve_node(new_node)
         del self._nodes[node_name]
         self._nodes[new_node.name] = new_node
+        self._changed(new_node)
         for edge in self.out_edges(node_name):
             self.remove_edge(edge)
             self.add_edge(edge.clone(from_node=new_node))
@@ -1199,6 +1269,7 @@ class GraphView(Mapping):
             raise ValueError("node already in graph")
         assert node not in self._nodes.values()
         self._nodes[node.name] = node
+        self._changed(node)
 
     def inputs(self, ignore_names=None):
         if ignore_names is None:
@@ -55,7 +55,10 @@ class JsonSerializable(ABC):
 
 
 class JsonSerializableStateEncoder(json.JSONEncoder):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, array_store=None, **kwargs):
+        # if array_store is a list numeric arrays are appended to it and
+        # encoded as a reference rather than as a list of values
+        self._array_store = array_store
         super().__init__(*args, **kwargs)
 # pylint: disable=no-self-use, method-hidden
 
@@ -72,6 +75,12 @@ class JsonSerializableStateEncoder(json.JSONEncoder):
                 '__contents': list(o)
             }
         if isinstance(o, np.ndarray):
+            if self._array_store is not None and (o.dtype == bfloat16 or o.dtype.kind in 'biufc'):
+                self._array_store.append(o)
+                return {
+                    '__type': 'numpy.ndarray.ref',
+                    '__index': len(self._array_store) - 1
+                }
             return {
                 '__type': 'numpy.ndarray',
                 '__contents': o.tolist(),
@@ -112,7 +121,9 @@ class JsonSerializableStateEncoder(json.JSONEncoder):
 
 
 class JsonSerializableStateDecoder(json.JSONDecoder):
-    def __init__(self, *args, object_hook=None, **kwargs):
+    def __init__(self, *args, object_hook=None, arrays=None, **kwargs):
+        # arrays resolves array references written by an encoder with an array_store
+        self._arrays = arrays
         if object_hook is None:
             super(JsonSerializableStateDecoder, self).__init__(
                 object_hook=self.object_hook, *args, **kwargs)
@@ -136,6 +147,10 @@ class JsonSerializableStateDecoder(json.JSONDecoder):
                     for elem in obj['__contents'])
             if obj['__type'] == 'numpy.ndarray':
                 return np.array(obj['__contents'], dtype=np.dtype(obj['__dtype']))
+            if obj['__type'] == 'numpy.ndarray.ref':
+                if self._arrays is None:
+                    raise ValueError('array reference found but no arrays supplied')
+                return self._arrays[obj['__index']]
             if obj['__type'] == 'JsonSerializable':
                 return JsonSerializable.from_dict(obj)
         return obj
@@ -0,0 +1,62 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Read only memory maps of model files
+
+The importers read the constants of a model as views of a memory mapped file
+rather than copying them so opening a model does not need memory for all of
+its weights. Pages of the file are only read when a value is used.
+ConstantInputNode copies a mapped value the first time it is accessed so the
+value can be modified. The model file must not be rewritten in place while
+views of it are in use.
+"""
+
+import mmap
+from typing import Sequence, Union
+
+import numpy as np
+
+
+class MappedFile(mmap.mmap):
+    """Read only map of a file. It is pickled and copied as the bytes of the file."""
+
+    def __reduce__(self):
+        return (bytes, (self[:],))
+
+
+def map_file(filename: str) -> Union[MappedFile, bytes]:
+    """Map filename read only"""
+    with open(filename, 'rb') as fp:
+        try:
+            return MappedFile(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            return fp.read()
+
+
+def mapped_array(mapped: Union[MappedFile, bytes], dtype, shape: Sequence[int], offset: int = 0) -> np.ndarray:
+    """Read only view of shape elements of dtype at offset in mapped"""
+    count = int(np.prod(shape, dtype=np.int64))
+    return np.frombuffer(mapped, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+
+def is_mapped(arr: np.ndarray) -> bool:
+    """True if arr is a view of a memory mapped file"""
+    base = arr.base
+    while base is not None:
+        if isinstance(base, mmap.mmap):
+            return True
+        base = base.obj if isinstance(base, memoryview) else getattr(base, 'base', None)
+    return False
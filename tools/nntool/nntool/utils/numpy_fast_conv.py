@@ -1,5 +1,47 @@
 
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+def sliding_windows(
+    in_tensor: np.ndarray,
+    out_h,
+    out_w,
+    filt_h,
+    filt_w,
+    filt_dil_h,
+    filt_dil_w,
+    filt_str_h,
+    filt_str_w
+    ) -> np.ndarray:
+    """Returns a read only strided view of in_tensor (h, w, c) with shape
+    (out_h, out_w, filt_h, filt_w, c) containing the input window of every output
+    position. A leading batch axis (n, h, w, c) is kept in front of the view.
+    No data is copied."""
+    s_h, s_w, s_c = in_tensor.strides[-3:]
+    return as_strided(
+        in_tensor,
+        shape=in_tensor.shape[:-3] + (out_h, out_w, filt_h, filt_w, in_tensor.shape[-1]),
+        strides=in_tensor.strides[:-3] + (s_h * filt_str_h, s_w * filt_str_w,
+                                          s_h * filt_dil_h, s_w * filt_dil_w, s_c),
+        writeable=False)
+
+def im2col(
+    in_tensor: np.ndarray,
+    out_h,
+    out_w,
+    filt_h,
+    filt_w,
+    filt_dil_h,
+    filt_dil_w,
+    filt_str_h,
+    filt_str_w
+    ) -> np.ndarray:
+    """Builds the (out_h * out_w, filt_h * filt_w * c) patch matrix in a single copy.
+    With a leading batch axis the patches of all the samples are stacked in the rows.
+    The buffer is float64 as the accumulation has always been carried out in double."""
+    windows = sliding_windows(in_tensor, out_h, out_w, filt_h, filt_w,
+                              filt_dil_h, filt_dil_w, filt_str_h, filt_str_w)
+    return windows.astype(np.float64).reshape(-1, filt_h * filt_w * in_tensor.shape[-1])
 
 def do_conv_im2col(
     in_tensor_padded: np.ndarray,
@@ -25,21 +67,12 @@ def do_conv_im2col(
     in_tensor_padded = in_tensor_padded.astype(calc_dtype)
     weights_mat = weights.astype(calc_dtype).reshape(-1, out_c) #.transpose((1, 0))
 
-    im2col_buff = np.empty((out_h * out_w, filt_h*filt_w*in_c))
-    for o_h in range(out_h):
-        in_h_pointer_i = o_h * filt_str_h
-        in_h_pointer_e = o_h * filt_str_h + dilated_filter_h
-        for o_w in range(out_w):
-            in_w_pointer_i = o_w * filt_str_w
-            in_w_pointer_e = o_w * filt_str_w + dilated_filter_w
-            im2col_buff[o_h * out_w + o_w, :] = in_tensor_padded[
-                    in_h_pointer_i:in_h_pointer_e:filt_dil_h,
-                    in_w_pointer_i:in_w_pointer_e:filt_dil_w,
-                    :
-                    ].flatten()
-
-    result = np.matmul(im2col_buff, weights_mat).transpose((1, 0))
-    result = result.reshape(out_c, out_h, out_w) + bias
+    im2col_buff = im2col(in_tensor_padded, out_h, out_w, filt_h, filt_w,
+                         filt_dil_h, filt_dil_w, filt_str_h, filt_str_w)
+
+    lead_shape = in_tensor_padded.shape[:-3]
+    result = np.matmul(im2col_buff, weights_mat).reshape(lead_shape + (out_h, out_w, out_c))
+    result = np.moveaxis(result, -1, -3) + bias
 
     min_acc = np.min(result)
     max_acc = np.max(result)
@@ -69,28 +102,27 @@ def do_grouped_conv_im2col(
 
     in_c_per_group = in_c // groups
     out_c_per_group = out_c // groups
-    result = np.empty((out_c, out_h, out_w))
-    for group in range(groups):
-
-        in_tensor_padded_slice = in_tensor_padded[:,:,(in_c_per_group*group):(in_c_per_group*(group+1))].astype(calc_dtype)
-        weights_mat = weights.astype(calc_dtype).reshape(-1, out_c)[:,(out_c_per_group*group):(out_c_per_group*(group+1))] #.transpose((1, 0))
-
-        im2col_buff = np.empty((out_h * out_w, filt_h*filt_w*in_c_per_group))
-        for o_h in range(out_h):
-            in_h_pointer_i = o_h * filt_str_h
-            in_h_pointer_e = o_h * filt_str_h + dilated_filter_h
-            for o_w in range(out_w):
-                in_w_pointer_i = o_w * filt_str_w
-                in_w_pointer_e = o_w * filt_str_w + dilated_filter_w
-                im2col_buff[o_h * out_w + o_w, :] = in_tensor_padded_slice[
-                        in_h_pointer_i:in_h_pointer_e:filt_dil_h,
-                        in_w_pointer_i:in_w_pointer_e:filt_dil_w,
-                        :
-                        ].flatten()
-
-        partial_result = np.matmul(im2col_buff, weights_mat).transpose((1, 0))
-        partial_result = partial_result.reshape(out_c_per_group, out_h, out_w) + bias[(out_c_per_group*group):(out_c_per_group*(group+1)),:,:]
-        result[(out_c_per_group*group):(out_c_per_group*(group+1)),:,:] = partial_result
+
+    in_tensor_padded = in_tensor_padded.astype(calc_dtype)
+    lead_shape = in_tensor_padded.shape[:-3]
+    num_lead = len(lead_shape)
+    # ([n], out_h, out_w, filt_h, filt_w, groups, in_c_per_group) ->
+    # (groups, [n *] out_h * out_w, filt_h * filt_w * in_c_per_group)
+    windows = sliding_windows(in_tensor_padded, out_h, out_w, filt_h, filt_w,
+                              filt_dil_h, filt_dil_w, filt_str_h, filt_str_w)
+    windows = windows.reshape(lead_shape + (out_h, out_w, filt_h, filt_w, groups, in_c_per_group))
+    im2col_buff = np.moveaxis(windows, -2, 0).astype(np.float64).reshape(
+        groups, -1, filt_h * filt_w * in_c_per_group)
+    # (filt_h * filt_w * in_c_per_group, groups * out_c_per_group) -> (groups, filt_h * filt_w * in_c_per_group, out_c_per_group)
+    weights_mat = weights.astype(calc_dtype).reshape(-1, groups, out_c_per_group).transpose((1, 0, 2))
+
+    # stacked matmul runs one gemm per group exactly as the per group loop did
+    result = np.matmul(im2col_buff, weights_mat).reshape(
+        (groups, ) + lead_shape + (out_h, out_w, out_c_per_group))
+    # (groups, [n], out_h, out_w, out_c_per_group) -> ([n], groups, out_c_per_group, out_h, out_w)
+    result = result.transpose(tuple(range(1, num_lead + 1)) +
+                              (0, num_lead + 3, num_lead + 1, num_lead + 2))
+    result = result.reshape(lead_shape + (out_c, out_h, out_w)) + bias
 
     min_acc = np.min(result)
     max_acc = np.max(result)
@@ -121,11 +153,15 @@ def do_conv_depthwise(
     weights_mat = weights.astype(calc_dtype).reshape(filt_h, filt_w, out_c)
 
     result = bias.transpose((1, 2, 0))
+    if in_tensor_padded.ndim > 3:
+        # one accumulator per sample
+        result = np.broadcast_to(result, in_tensor_padded.shape[:-3] + result.shape).copy()
     #pylint: disable=not-an-iterable
     for cur_h in range(filt_h):
         for cur_w in range(filt_w):
             # selects all elements that the filter element needs to multiply
-            slabhw = np.multiply(in_tensor_padded[cur_h * filt_dil_h:
+            slabhw = np.multiply(in_tensor_padded[...,
+                                            cur_h * filt_dil_h:
                                             const_h + cur_h * filt_dil_h:
                                             filt_str_h,
                                             cur_w * filt_dil_w:
@@ -139,7 +175,7 @@ def do_conv_depthwise(
     min_acc = np.min(result)
     max_acc = np.max(result)
 
-    return result.transpose((2, 0, 1)).astype(calc_dtype), min_acc, max_acc
+    return np.moveaxis(result, -1, -3).astype(calc_dtype), min_acc, max_acc
 
 def fast_numpy_conv(
     in_tensor_padded: np.ndarray,
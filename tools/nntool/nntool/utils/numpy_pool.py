@@ -0,0 +1,123 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+def pool_windows(
+    in_tensor: np.ndarray,
+    h_axis: int,
+    w_axis: int,
+    out_h: int,
+    out_w: int,
+    filt_h: int,
+    filt_w: int,
+    filt_str_h: int = 1,
+    filt_str_w: int = 1,
+    filt_dil_h: int = 1,
+    filt_dil_w: int = 1
+    ) -> np.ndarray:
+    """Returns a read only strided view of in_tensor where the h and w axes are replaced
+    by out_h and out_w output positions and two axes of size filt_h and filt_w holding
+    the window of each output position are appended. No data is copied so any order
+    of the channel axis and any leading axes are supported."""
+    shape = list(in_tensor.shape)
+    strides = list(in_tensor.strides)
+    s_h, s_w = strides[h_axis], strides[w_axis]
+    shape[h_axis], shape[w_axis] = out_h, out_w
+    strides[h_axis], strides[w_axis] = s_h * filt_str_h, s_w * filt_str_w
+    return as_strided(
+        in_tensor,
+        shape=tuple(shape) + (filt_h, filt_w),
+        strides=tuple(strides) + (s_h * filt_dil_h, s_w * filt_dil_w),
+        writeable=False)
+
+
+def max_pool(in_tensor: np.ndarray, h_axis: int, w_axis: int,
+             out_h: int, out_w: int, filt_h: int, filt_w: int,
+             filt_str_h: int = 1, filt_str_w: int = 1,
+             filt_dil_h: int = 1, filt_dil_w: int = 1) -> np.ndarray:
+    """Maximum of each window of an already padded tensor
+
+    As in sum_pool the windows are reduced one filter position at a time over all
+    the outputs which is much faster than reducing the small trailing window axes."""
+    windows = pool_windows(in_tensor, h_axis, w_axis, out_h, out_w, filt_h, filt_w,
+                           filt_str_h, filt_str_w, filt_dil_h, filt_dil_w)
+    res = windows[..., 0, 0].copy()
+    for f_h in range(filt_h):
+        for f_w in range(filt_w):
+            if f_h or f_w:
+                np.maximum(res, windows[..., f_h, f_w], out=res)
+    return res
+
+
+def sum_pool(in_tensor: np.ndarray, h_axis: int, w_axis: int,
+             out_h: int, out_w: int, filt_h: int, filt_w: int,
+             filt_str_h: int = 1, filt_str_w: int = 1,
+             filt_dil_h: int = 1, filt_dil_w: int = 1,
+             calc_dtype=np.float32) -> np.ndarray:
+    """Sum of each window of an already padded tensor accumulated in calc_dtype.
+    Average pooling multiplies this by the pool factor so that padding is included in
+    the average and the quantized rounding is unchanged.
+
+    The window elements are added one filter position at a time over all the outputs
+    in row major filter order. This keeps the order of the float additions fixed
+    whatever the layout of the tensor."""
+    windows = pool_windows(in_tensor, h_axis, w_axis, out_h, out_w, filt_h, filt_w,
+                           filt_str_h, filt_str_w, filt_dil_h, filt_dil_w)
+    res = windows[..., 0, 0].astype(calc_dtype)
+    for f_h in range(filt_h):
+        for f_w in range(filt_w):
+            if f_h or f_w:
+                np.add(res, windows[..., f_h, f_w], out=res, dtype=calc_dtype)
+    return res
+
+
+def loop_pool(reduction, in_tensor: np.ndarray, h_axis: int, w_axis: int,
+              filt_h: int, filt_w: int, filt_str_h: int, filt_str_w: int, dtype) -> np.ndarray:
+    """Reference for max_pool and sum_pool. The per output position loop that the
+    pooling kernels used before this module. It is only used to test and time them."""
+    out_h = (in_tensor.shape[h_axis] - filt_h) // filt_str_h + 1
+    out_w = (in_tensor.shape[w_axis] - filt_w) // filt_str_w + 1
+    out_shape = list(in_tensor.shape)
+    out_shape[h_axis], out_shape[w_axis] = out_h, out_w
+    out_tensor = np.zeros(out_shape, dtype=dtype)
+    for o_h, h_idx in enumerate(range(0, out_h * filt_str_h, filt_str_h)):
+        for o_w, w_idx in enumerate(range(0, out_w * filt_str_w, filt_str_w)):
+            out_slice = [slice(None)] * in_tensor.ndim
+            out_slice[h_axis], out_slice[w_axis] = slice(o_h, o_h + 1), slice(o_w, o_w + 1)
+            in_slice = [slice(None)] * in_tensor.ndim
+            in_slice[h_axis] = slice(h_idx, h_idx + filt_h)
+            in_slice[w_axis] = slice(w_idx, w_idx + filt_w)
+            res_shape = out_tensor[tuple(out_slice)].shape
+            out_tensor[tuple(out_slice)] = reduction(
+                in_tensor[tuple(in_slice)], axis=(h_axis, w_axis)).reshape(res_shape)
+    return out_tensor
+
+
+def loop_max_pool(in_tensor: np.ndarray, h_axis: int, w_axis: int,
+                  filt_h: int, filt_w: int, filt_str_h: int, filt_str_w: int) -> np.ndarray:
+    return loop_pool(np.max, in_tensor, h_axis, w_axis, filt_h, filt_w, filt_str_h, filt_str_w,
+                     in_tensor.dtype)
+
+
+def loop_sum_pool(in_tensor: np.ndarray, h_axis: int, w_axis: int,
+                  filt_h: int, filt_w: int, filt_str_h: int, filt_str_w: int,
+                  calc_dtype) -> np.ndarray:
+    def reduction(window, axis):
+        return np.sum(window, dtype=calc_dtype, axis=axis)
+    return loop_pool(reduction, in_tensor, h_axis, w_axis, filt_h, filt_w, filt_str_h, filt_str_w,
+                     calc_dtype)
@@ -0,0 +1,64 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+
+def _read_only(*arrs):
+    for arr in arrs:
+        arr.flags.writeable = False
+    return arrs if len(arrs) > 1 else arrs[0]
+
+
+@lru_cache(maxsize=64)
+def fixed_bilinear_axis(in_sz: int, out_sz: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Offsets and 7 bit coefficients along one axis of the fixed point bilinear resizer.
+    The 16.16 position of output i is i * ((in_sz - 1) << 16) // out_sz which is what
+    the kernel reaches by adding the step once per output."""
+    coeff = np.arange(out_sz, dtype=np.int64) * (((in_sz - 1) << 16) // out_sz)
+    offset = (coeff >> 16).astype(np.intp)
+    coeff2 = ((coeff >> 9) & 127).astype(np.int32)
+    return _read_only(offset, 128 - coeff2, coeff2)
+
+
+@lru_cache(maxsize=64)
+def fixed_nearest_axis(in_sz: int, out_sz: int) -> np.ndarray:
+    """Rounded 16.16 source index of each output along one axis of the fixed point
+    nearest neighbour resizer"""
+    step = ((in_sz - 1) << 16) // (out_sz - 1)
+    return _read_only(((np.arange(out_sz, dtype=np.int64) * step + (1 << (16 - 1))) >> 16).astype(np.intp))
+
+
+@lru_cache(maxsize=64)
+def float_bilinear_axis(in_sz: int, out_sz: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Low and high source index and the float64 fraction between them of each output
+    along one axis of the float bilinear resizer"""
+    pos = ((in_sz - 1) / out_sz) * np.arange(out_sz)
+    low = np.floor(pos)
+    return _read_only(low.astype(np.intp), np.ceil(pos).astype(np.intp), pos - low)
+
+
+@lru_cache(maxsize=64)
+def float_nearest_axis(in_sz: int, out_sz: int) -> np.ndarray:
+    """Source index of each output along one axis of the float nearest neighbour resizer
+    rounding half to even"""
+    if in_sz == 1 and out_sz == 1:
+        step = 1
+    else:
+        step = (in_sz - 1) / (out_sz - 1)
+    return _read_only(np.round(step * np.arange(out_sz)).astype(np.intp))
@@ -63,3 +63,69 @@ def rect_union_area(box_cors_a, box_cors_b):
         area_a = x_a.astype(np.int32) * y_a
         area_b = x_b.astype(np.int32) * y_b
     return area_a + area_b - rect_intersect_area(box_cors_a, box_cors_b)
+
+def pairwise_intersect_areas(boxes_cors):
+    """Intersection areas of every pair of boxes with the same arithmetic as
+    rect_intersect_area"""
+    x = np.maximum(boxes_cors[:, None, XMIN_IDX], boxes_cors[None, :, XMIN_IDX])
+    y = np.maximum(boxes_cors[:, None, YMIN_IDX], boxes_cors[None, :, YMIN_IDX])
+    size_x = np.minimum(boxes_cors[:, None, XMAX_IDX], boxes_cors[None, :, XMAX_IDX]) - x
+    size_y = np.minimum(boxes_cors[:, None, YMAX_IDX], boxes_cors[None, :, YMAX_IDX]) - y
+    if size_x.dtype not in (np.float32, np.float64):
+        size_x = size_x.astype(np.int32)
+    # only the width is tested as in rect_intersect_area
+    return np.where(size_x <= 0, np.zeros_like(size_x), size_x * size_y)
+
+def pairwise_union_areas(boxes_cors, intersect_areas):
+    """Union areas of every pair of boxes with the same arithmetic as rect_union_area"""
+    size_x = np.abs(boxes_cors[:, XMAX_IDX] - boxes_cors[:, XMIN_IDX])
+    size_y = np.abs(boxes_cors[:, YMAX_IDX] - boxes_cors[:, YMIN_IDX])
+    if size_x.dtype not in (np.float32, np.float64):
+        size_x = size_x.astype(np.int32)
+    areas = size_x * size_y
+    return areas[:, None] + areas[None, :] - intersect_areas
+
+def sort_scores_descending(scores):
+    """Order of scores sorted in descending order keeping the original order of equal
+    scores like the bubble sort in the reference kernels"""
+    return np.argsort(-scores.astype(np.float64), kind='stable')
+
+def nms_alive(boxes_cors, suppress_fn, classes=None):
+    """Vectorized NMS over boxes sorted by descending score. Returns a mask of the boxes
+    that survive. suppress_fn(intersection, union) returns True where the second box of
+    a pair is suppressed by the first. As in the reference kernels a box is suppressed
+    by any higher scoring box of the same class whether or not that box survived."""
+    alive = np.ones(len(boxes_cors), dtype=bool)
+    if classes is None:
+        groups = [np.arange(len(boxes_cors))]
+    else:
+        groups = [np.flatnonzero(classes == class_id) for class_id in np.unique(classes)]
+    for group in groups:
+        if len(group) < 2:
+            continue
+        group_boxes = boxes_cors[group]
+        intersection = pairwise_intersect_areas(group_boxes)
+        union = pairwise_union_areas(group_boxes, intersection)
+        suppressed = np.triu(suppress_fn(intersection, union), k=1)
+        alive[group] = np.logical_not(np.any(suppressed, axis=0))
+    return alive
+
+def nms_indexes(boxes_cors, scores, score_threshold, max_output_boxes_per_class, suppress_fn):
+    """Vectorized NMS over each class of scores (classes, boxes) returning the
+    (batch, class, box) rows produced by the reference NMS kernels"""
+    n_classes = len(scores)
+    indexes = np.zeros((max_output_boxes_per_class*n_classes, 3))
+    idxs_count = 0
+    for class_id in range(n_classes):
+        class_scores = scores[class_id]
+        box_idx = np.flatnonzero(class_scores.astype(np.float64) > score_threshold)
+        box_idx = box_idx[sort_scores_descending(class_scores[box_idx])]
+        box_idx = box_idx[nms_alive(boxes_cors[box_idx], suppress_fn)]
+        # the reference kernels output up to one more box than max_output_boxes_per_class
+        box_idx = box_idx[:max_output_boxes_per_class + 1]
+        rows = np.arange(idxs_count, idxs_count + len(box_idx))
+        indexes[rows, 0] = 0
+        indexes[rows, 1] = class_id
+        indexes[rows, 2] = box_idx
+        idxs_count += len(box_idx)
+    return indexes
@@ -0,0 +1,283 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Binary store for graph tensors and saved states
+
+A store is a small JSON index followed by the raw buffers of all the arrays it
+contains. Every buffer starts on an ALIGNMENT byte boundary so the whole data
+section can be memory mapped and each array returned as a view on the mapping.
+Pages of an array are only read from disk when the array is accessed.
+
+Layout::
+
+    MAGIC | version (u32) | index length (u32) | index (utf-8 JSON) | pad | buffers
+
+Entries that are not plain numeric arrays are JSON encoded with any arrays
+they contain moved into the buffers. Anything that cannot be JSON encoded is
+pickled into a uint8 buffer.
+"""
+
+import json
+import logging
+import pickle
+import struct
+import zipfile
+from typing import Any, BinaryIO, Mapping, Sequence, Tuple
+
+import numpy as np
+from bfloat16 import bfloat16
+
+from nntool.utils.json_serializable import (JsonSerializableStateDecoder,
+                                            JsonSerializableStateEncoder)
+
+LOG = logging.getLogger(__name__)
+
+MAGIC = b'NNTSTORE'
+VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct('<8sII')
+ZIP_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+# extra field id used to pad zip entries so that their data is aligned
+ZIP_PAD_EXTRA_ID = 0xa11e
+
+
+def aligned(offset: int, alignment: int = ALIGNMENT) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def is_raw_array(val) -> bool:
+    """True if val can be stored as a raw buffer"""
+    return isinstance(val, np.ndarray) and (val.dtype == bfloat16 or val.dtype.kind in 'biufc')
+
+
+def dtype_to_str(dtype: np.dtype) -> str:
+    return 'bfloat16' if dtype == bfloat16 else dtype.str
+
+
+def str_to_dtype(val: str) -> np.dtype:
+    return np.dtype(bfloat16) if val == 'bfloat16' else np.dtype(val)
+
+
+class TensorStoreWriter():
+    """Lays out a store so that its size is known before it is written"""
+
+    def __init__(self, tensors: Mapping[Any, Any], meta: Any = None) -> None:
+        self._arrays = []
+        entries = []
+        for key, val in tensors.items():
+            entry = {'key': list(key) if isinstance(key, tuple) else key,
+                     'tuple': isinstance(key, tuple)}
+            if is_raw_array(val):
+                entry.update({'kind': 'array', 'array': self._add_array(val)})
+            else:
+                try:
+                    entry.update({'kind': 'json', 'value': self._encode(val)})
+                except (TypeError, ValueError):
+                    entry.update({'kind': 'pickle', 'array': self._add_array(
+                        np.frombuffer(pickle.dumps(val), dtype=np.uint8))})
+            entries.append(entry)
+        index = {
+            'entries': entries,
+            'meta': None if meta is None else self._encode(meta)
+        }
+        offset = 0
+        arrays = []
+        for arr in self._arrays:
+            arrays.append({'dtype': dtype_to_str(arr.dtype),
+                           'shape': list(arr.shape),
+                           'offset': offset,
+                           'nbytes': arr.nbytes})
+            offset = aligned(offset + arr.nbytes)
+        index['arrays'] = arrays
+        self._index = json.dumps(index).encode('utf-8')
+        self.data_offset = aligned(PREAMBLE.size + len(self._index))
+        self.size = self.data_offset + (
+            arrays[-1]['offset'] + arrays[-1]['nbytes'] if arrays else 0)
+
+    def _add_array(self, arr: np.ndarray) -> int:
+        self._arrays.append(arr)
+        return len(self._arrays) - 1
+
+    def _encode(self, val):
+        # the array refs are only kept if the complete value encodes
+        arrays = []
+        res = JsonSerializableStateEncoder(array_store=arrays).encode(val)
+        base = len(self._arrays)
+        self._arrays.extend(arrays)
+        return {'base': base, 'json': res}
+
+    def write(self, fp: BinaryIO):
+        fp.write(PREAMBLE.pack(MAGIC, VERSION, len(self._index)))
+        fp.write(self._index)
+        pos = PREAMBLE.size + len(self._index)
+        for arr in self._arrays:
+            pad = aligned(pos) - pos
+            if pad:
+                fp.write(bytes(pad))
+                pos += pad
+            fp.write(np.ascontiguousarray(arr).tobytes())
+            pos += arr.nbytes
+        return pos
+
+
+def write_tensor_store(filename: str, tensors: Mapping[Any, Any], meta: Any = None) -> int:
+    """Write tensors and optionally a JSON serializable meta value to a store file
+
+    Args:
+        filename (str): file to write
+        tensors (Mapping[Any, Any]): mapping of string or tuple keys to values
+        meta (Any, optional): value returned by TensorStore.meta. Defaults to None.
+
+    Returns:
+        int: size of the store in bytes
+    """
+    writer = TensorStoreWriter(tensors, meta=meta)
+    with open(filename, 'wb') as fp:
+        writer.write(fp)
+    return writer.size
+
+
+class TensorStore():
+    """A store opened for reading. Arrays are views on a copy on write memory
+    mapping of the file so they can be modified without altering the file.
+    If buffer is given the store is read from it rather than mapped."""
+
+    def __init__(self, filename: str = None, offset: int = 0, buffer: bytes = None) -> None:
+        if buffer is None:
+            with open(filename, 'rb') as fp:
+                fp.seek(offset)
+                preamble = fp.read(PREAMBLE.size)
+                index_len = self._check_preamble(preamble, filename)
+                index = fp.read(index_len)
+        else:
+            index_len = self._check_preamble(buffer[:PREAMBLE.size:], filename)
+            index = buffer[PREAMBLE.size:PREAMBLE.size + index_len:]
+        self._index = json.loads(index.decode('utf-8'))
+        data_offset = aligned(PREAMBLE.size + index_len)
+        arrays = self._index['arrays']
+        data_size = arrays[-1]['offset'] + arrays[-1]['nbytes'] if arrays else 0
+        if not data_size:
+            self._data = np.zeros(0, dtype=np.uint8)
+        elif buffer is None:
+            self._data = np.memmap(filename, dtype=np.uint8, mode='c',
+                                   offset=offset + data_offset, shape=(data_size,))
+        else:
+            self._data = np.frombuffer(buffer, dtype=np.uint8,
+                                       offset=data_offset, count=data_size).copy()
+        self._arrays = [None] * len(arrays)
+
+    @staticmethod
+    def _check_preamble(preamble: bytes, filename: str) -> int:
+        if len(preamble) != PREAMBLE.size:
+            raise ValueError(f'{filename} is not a tensor store')
+        magic, version, index_len = PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError(f'{filename} is not a tensor store')
+        if version > VERSION:
+            raise ValueError(f'{filename} was written by a newer version of NNTool')
+        return index_len
+
+    def array(self, idx: int) -> np.ndarray:
+        arr = self._arrays[idx]
+        if arr is None:
+            desc = self._index['arrays'][idx]
+            dtype = str_to_dtype(desc['dtype'])
+            arr = self._data[desc['offset']:desc['offset'] + desc['nbytes']:]
+            arr = arr.view(dtype).reshape(desc['shape'])
+            self._arrays[idx] = arr
+        return arr
+
+    def _decode(self, val):
+        if val is None:
+            return None
+        return json.loads(val['json'], cls=JsonSerializableStateDecoder,
+                          arrays=_ArrayRefs(self, val['base']))
+
+    def _entry_value(self, entry):
+        if entry['kind'] == 'array':
+            return self.array(entry['array'])
+        if entry['kind'] == 'json':
+            return self._decode(entry['value'])
+        return pickle.loads(self.array(entry['array']).tobytes())
+
+    @property
+    def meta(self) -> Any:
+        return self._decode(self._index['meta'])
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def keys(self) -> Sequence[Any]:
+        return [tuple(entry['key']) if entry['tuple'] else entry['key']
+                for entry in self._index['entries']]
+
+    def tensors(self) -> dict:
+        """Returns a dict of all the entries. Arrays are not read until accessed"""
+        return {
+            tuple(entry['key']) if entry['tuple'] else entry['key']: self._entry_value(entry)
+            for entry in self._index['entries']
+        }
+
+
+class _ArrayRefs():
+    def __init__(self, store: TensorStore, base: int) -> None:
+        self._store = store
+        self._base = base
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        return self._store.array(self._base + idx)
+
+
+def read_tensor_store(filename: str) -> Tuple[dict, Any]:
+    """Open a store file returning its tensors and meta value"""
+    store = TensorStore(filename)
+    return store.tensors(), store.meta
+
+
+def is_tensor_store(filename: str) -> bool:
+    with open(filename, 'rb') as fp:
+        return fp.read(len(MAGIC)) == MAGIC
+
+
+def write_zip_tensor_store(zip_file: zipfile.ZipFile, arcname: str, tensors: Mapping[Any, Any]):
+    """Write tensors as an uncompressed zip entry padded so that its buffers are aligned
+    in the archive and can be memory mapped directly from it."""
+    writer = TensorStoreWriter(tensors)
+    zinfo = zipfile.ZipInfo(arcname, date_time=(1980, 1, 1, 0, 0, 0))
+    zinfo.compress_type = zipfile.ZIP_STORED
+    zinfo.file_size = writer.size
+    header_end = zip_file.fp.tell() + ZIP_LOCAL_HEADER.size + len(arcname.encode('utf-8'))
+    # the extra field needs at least 4 bytes for its id and length
+    pad = aligned(header_end + 4) - header_end
+    zinfo.extra = struct.pack('<HH', ZIP_PAD_EXTRA_ID, pad - 4) + bytes(pad - 4)
+    with zip_file.open(zinfo, mode='w') as fp:
+        writer.write(fp)
+
+
+def read_zip_tensor_store(archive: str, arcname: str) -> dict:
+    """Read tensors from a zip entry written by write_zip_tensor_store memory mapping
+    them from the archive if the entry is not compressed."""
+    with zipfile.ZipFile(archive) as zip_file:
+        zinfo = zip_file.getinfo(arcname)
+        if zinfo.compress_type != zipfile.ZIP_STORED:
+            LOG.debug('%s is compressed in %s - reading into memory', arcname, archive)
+            return TensorStore(filename=arcname, buffer=zip_file.read(zinfo)).tensors()
+    with open(archive, 'rb') as fp:
+        fp.seek(zinfo.header_offset)
+        header = ZIP_LOCAL_HEADER.unpack(fp.read(ZIP_LOCAL_HEADER.size))
+    name_len, extra_len = header[-2], header[-1]
+    data_offset = zinfo.header_offset + ZIP_LOCAL_HEADER.size + name_len + extra_len
+    return TensorStore(filename=archive, offset=data_offset).tensors()
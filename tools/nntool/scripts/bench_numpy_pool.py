@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Times the numpy_pool max and sum pooling against the per output position loop
+they replaced. Run from the nntool directory:
+
+    PYTHONPATH=. python scripts/bench_numpy_pool.py --shape 112 112 64
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+from nntool.utils.numpy_pool import (loop_max_pool, loop_sum_pool, max_pool,
+                                     sum_pool)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shape', nargs=3, type=int, default=[112, 112, 64], metavar=('H', 'W', 'C'))
+    parser.add_argument('--filter', nargs=2, type=int, default=[3, 3], metavar=('H', 'W'))
+    parser.add_argument('--stride', nargs=2, type=int, default=[2, 2], metavar=('H', 'W'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    height, width, chans = args.shape
+    tensors = {
+        'float32': rng.standard_normal((height, width, chans)).astype(np.float32),
+        'int8': rng.integers(-128, 127, size=(height, width, chans), endpoint=True, dtype=np.int8),
+    }
+    filt_h, filt_w = args.filter
+    str_h, str_w = args.stride
+    out_h = (height - filt_h) // str_h + 1
+    out_w = (width - filt_w) // str_w + 1
+    for layout in ('hwc', 'chw'):
+        h_axis = layout.index('h')
+        w_axis = h_axis + 1
+        for dtype_name, tensor in tensors.items():
+            if layout == 'chw':
+                tensor = np.ascontiguousarray(tensor.transpose(2, 0, 1))
+            calc_dtype = np.float32 if dtype_name == 'float32' else np.int32
+            cases = {
+                'max': (lambda: loop_max_pool(tensor, h_axis, w_axis, filt_h, filt_w, str_h, str_w),
+                        lambda: max_pool(tensor, h_axis, w_axis, out_h, out_w, filt_h, filt_w, str_h, str_w)),
+                'sum': (lambda: loop_sum_pool(tensor, h_axis, w_axis, filt_h, filt_w, str_h, str_w, calc_dtype),
+                        lambda: sum_pool(tensor, h_axis, w_axis, out_h, out_w, filt_h, filt_w, str_h, str_w,
+                                         calc_dtype=calc_dtype)),
+            }
+            for name, (loop_func, pool_func) in cases.items():
+                loop_time = min(timeit.repeat(loop_func, number=1, repeat=args.repeat))
+                pool_time = min(timeit.repeat(pool_func, number=1, repeat=args.repeat))
+                print(f'{name} {layout} {dtype_name:8s} loop {loop_time * 1000:9.2f}ms '
+                      f'numpy_pool {pool_time * 1000:8.2f}ms x{loop_time / pool_time:6.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+from nntool.api import NNGraph
+from nntool.execution.activation_cache import ActivationCache
+from nntool.graph.types import LinearNode
+from nntool.interpreter.nntool_shell import NNToolShell
+from nntool.stats.error_stats_collector import ErrorStatsCollector
+
+onnx = pytest.importorskip('onnx')
+from onnx import TensorProto, helper, numpy_helper  # pylint: disable=wrong-import-position
+
+
+@pytest.fixture
+def quantized_graph(tmp_path):
+    rng = np.random.default_rng(2)
+    initializers = {
+        'w1': rng.standard_normal((8, 6)), 'b1': rng.standard_normal(8),
+        'w2': rng.standard_normal((4, 8)), 'b2': rng.standard_normal(4),
+    }
+    graph = helper.make_graph(
+        [
+            helper.make_node('Gemm', ['x', 'w1', 'b1'], ['h'], transB=1),
+            helper.make_node('Relu', ['h'], ['r']),
+            helper.make_node('Gemm', ['r', 'w2', 'b2'], ['y'], transB=1),
+        ], 'fc',
+        [helper.make_tensor_value_info('x', TensorProto.FLOAT, [1, 6])],
+        [helper.make_tensor_value_info('y', TensorProto.FLOAT, [1, 4])],
+        initializer=[numpy_helper.from_array(value.astype(np.float32), name)
+                     for name, value in initializers.items()])
+    path = tmp_path / 'fc.onnx'
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)]), str(path))
+    G = NNGraph.load_graph(str(path))
+    G.adjust_order()
+    samples = [rng.standard_normal((1, 6)).astype(np.float32) for _ in range(3)]
+    G.quantize(G.collect_statistics(samples), schemes=['scaled'])
+    G.adjust_order()
+    return G, samples
+
+
+def collect_errors(G, samples, activation_cache=None):
+    stats_collector = ErrorStatsCollector(activation_cache=activation_cache)
+    for sample in samples:
+        stats_collector.collect_stats(G, [sample])
+    return stats_collector.reduce_stats()
+
+
+def assert_same_errors(stats, expected):
+    assert stats.keys() == expected.keys()
+    for key, stat in stats.items():
+        for name, val in stat.items():
+            np.testing.assert_array_equal(val, expected[key][name], err_msg=f'{key} {name}')
+
+
+def test_repeated_qerror_hits_cache(quantized_graph):
+    G, samples = quantized_graph
+    cache = ActivationCache()
+    first = collect_errors(G, samples, activation_cache=cache)
+    hits, misses = cache.hits, cache.misses
+
+    second = collect_errors(G, samples, activation_cache=cache)
+    # every step of the second run is read from the cache
+    assert cache.hits == hits + hits + misses
+    assert cache.misses == misses
+    assert_same_errors(second, first)
+    assert_same_errors(second, collect_errors(G, samples))
+
+
+def test_qerror_after_qtune_reexecutes_changed_steps(quantized_graph):
+    G, samples = quantized_graph
+    cache = ActivationCache()
+    collect_errors(G, samples, activation_cache=cache)
+    hits, misses = cache.hits, cache.misses
+
+    last_linear = [node for node in G.nodes() if isinstance(node, LinearNode)][-1]
+    G.quantize(node_options={last_linear.name: {'force_output_size': 16}})
+    tuned = collect_errors(G, samples, activation_cache=cache)
+    # the steps above the tuned node are read from the cache
+    assert cache.hits > hits
+    assert cache.misses > misses
+    assert_same_errors(tuned, collect_errors(G, samples))
+
+
+def test_shell_keeps_cache_per_graph(quantized_graph):
+    G, _ = quantized_graph
+    shell = NNToolShell()
+    shell.G = G
+    cache = shell.activation_cache
+    assert shell.activation_cache is cache
+    shell.G = G
+    assert shell.activation_cache is not cache
@@ -0,0 +1,100 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+
+import numpy as np
+import pytest
+from nntool.api import NNGraph
+from nntool.execution.activation_cache import fingerprint
+from nntool.generation.gen_project.build_cache import (INDEX_FILE,
+                                                       BuildCacheEntry,
+                                                       build_key)
+from nntool.graph.manipulations.dimensions import add_dimensions
+from nntool.graph.types.base import NNEdge
+
+onnx = pytest.importorskip('onnx')
+from onnx import TensorProto, helper, numpy_helper  # pylint: disable=wrong-import-position
+
+SETTINGS = {'graph_warm_construct': True}
+
+
+@pytest.fixture
+def quantized_graph(tmp_path):
+    rng = np.random.default_rng(5)
+    initializers = {'w': rng.standard_normal((4, 6)), 'b': rng.standard_normal(4)}
+    graph = helper.make_graph(
+        [helper.make_node('Gemm', ['x', 'w', 'b'], ['y'], transB=1)], 'fc',
+        [helper.make_tensor_value_info('x', TensorProto.FLOAT, [1, 6])],
+        [helper.make_tensor_value_info('y', TensorProto.FLOAT, [1, 4])],
+        initializer=[numpy_helper.from_array(value.astype(np.float32), name)
+                     for name, value in initializers.items()])
+    path = tmp_path / 'fc.onnx'
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)]), str(path))
+    G = NNGraph.load_graph(str(path))
+    G.adjust_order()
+    G.quantize(G.collect_statistics([rng.standard_normal((1, 6)).astype(np.float32)]), schemes=['scaled'])
+    G.adjust_order()
+    return G
+
+
+def nodes_state(G):
+    return {node.name: fingerprint(vars(node)) for node in G.nodes()}
+
+
+def test_build_key_does_not_change_graph(quantized_graph):
+    G = quantized_graph
+    before = nodes_state(G)
+    key = build_key(G, SETTINGS, [], 'gap9_v2')
+    assert nodes_state(G) == before
+    # the numbering set by code generation does not change the key
+    for node in G.nodes():
+        if hasattr(node, '_index'):
+            node.index = None
+    assert nodes_state(G) != before
+    assert build_key(G, SETTINGS, [], 'gap9_v2') == key
+    add_dimensions(G.with_hidden_nodes(lambda node: node.exclude_from_generation, edge_class=NNEdge),
+                   update_graph=False)
+    assert nodes_state(G) == before
+    assert build_key(G, SETTINGS, [], 'gap9_v2') == key
+    assert build_key(G, dict(SETTINGS, graph_warm_construct=False), [], 'gap9_v2') != key
+
+
+def test_key_after_build_is_an_alias(quantized_graph, tmp_path):
+    G = quantized_graph
+    cache_dir = str(tmp_path / 'builds')
+    with BuildCacheEntry(G, SETTINGS, [], 'gap9_v2', cache_dir=cache_dir) as entry:
+        assert not entry.is_built
+        # values memoized by code generation change the key
+        next(iter(G.quantization.values())).cache['memoized'] = 1
+        entry.mark_built(at_log=['log'])
+    built_key = entry.key
+
+    entry = BuildCacheEntry(G, SETTINGS, [], 'gap9_v2', cache_dir=cache_dir)
+    assert entry.key == built_key
+    assert entry.is_built
+    assert entry.at_log == ['log']
+    with open(os.path.join(cache_dir, INDEX_FILE)) as fp:
+        aliases = json.load(fp)['aliases']
+    assert aliases == {build_key(G, SETTINGS, [], 'gap9_v2'): built_key}
+    assert not any(os.path.islink(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+
+    # aliases of pruned entries are removed from the index
+    with BuildCacheEntry(G, SETTINGS, ['other'], 'gap9_v2', cache_dir=cache_dir, max_entries=1):
+        pass
+    assert not os.path.exists(os.path.join(cache_dir, built_key))
+    with open(os.path.join(cache_dir, INDEX_FILE)) as fp:
+        assert json.load(fp)['aliases'] == {}
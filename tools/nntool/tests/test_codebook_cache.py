@@ -0,0 +1,76 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+compress = pytest.importorskip('nntool.quantization.compression.compress')
+
+
+@pytest.fixture
+def codebook_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(compress, 'CODEBOOK_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(compress, 'CODEBOOK_CACHE_BYTES', compress.CODEBOOK_CACHE_BYTES)
+    return tmp_path
+
+
+def save_codebooks(keys):
+    for idx, key in enumerate(keys):
+        compress.save_codebook(key, np.arange(256, dtype=np.float32), 1.0)
+        # distinct modification times whatever the resolution of the file system
+        os.utime(os.path.join(compress.CODEBOOK_CACHE_DIR, f'{key}.npz'),
+                 ns=(idx * 10**9, idx * 10**9))
+
+
+def test_cache_is_pruned_least_recently_used_first(codebook_cache):
+    save_codebooks(['a', 'b', 'c'])
+    entry_size = (codebook_cache / 'a.npz').stat().st_size
+    assert compress.load_codebook('a') is not None
+    compress.set_codebook_cache_dir(str(codebook_cache), max_bytes=3 * entry_size)
+    compress.save_codebook('d', np.arange(256, dtype=np.float32), 1.0)
+    # b was the least recently used
+    assert sorted(path.name for path in codebook_cache.iterdir()) == ['a.npz', 'c.npz', 'd.npz']
+    codebook, inertia = compress.load_codebook('d')
+    np.testing.assert_array_equal(codebook, np.arange(256, dtype=np.float32))
+    assert inertia == 1.0
+
+
+def test_cache_disabled(codebook_cache):
+    compress.set_codebook_cache_dir(None)
+    compress.save_codebook('a', np.arange(4, dtype=np.float32), None)
+    assert compress.load_codebook('a') is None
+    assert not list(codebook_cache.iterdir())
+
+
+def cache_dir_in_subprocess(env):
+    res = subprocess.run(
+        [sys.executable, '-c',
+         'from nntool.quantization.compression import compress; print(compress.CODEBOOK_CACHE_DIR)'],
+        env=env, capture_output=True, text=True, check=True)
+    return res.stdout.strip()
+
+
+def test_cache_is_off_by_default():
+    env = {k: v for k, v in os.environ.items() if k != 'NNTOOL_CODEBOOK_CACHE'}
+    assert cache_dir_in_subprocess(env) == 'None'
+
+
+def test_environment_variable_enables_cache(tmp_path):
+    assert cache_dir_in_subprocess(dict(os.environ, NNTOOL_CODEBOOK_CACHE=str(tmp_path))) == str(tmp_path)
+    assert cache_dir_in_subprocess(dict(os.environ, NNTOOL_CODEBOOK_CACHE='')) == 'None'
@@ -0,0 +1,127 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import itertools
+
+import numpy as np
+import pytest
+
+compress = pytest.importorskip('nntool.quantization.compression.compress')
+
+
+def weighted_sse(values, weights, labels):
+    return sum(np.sum(weights[labels == label] *
+                      np.square(values[labels == label] -
+                                np.average(values[labels == label], weights=weights[labels == label])))
+               for label in np.unique(labels))
+
+
+def brute_force_kmeans(values, weights, bins):
+    """Lowest weighted squared error over every assignment of the values to bins non
+    empty clusters"""
+    best = None
+    for labels in itertools.product(range(bins), repeat=values.size):
+        labels = np.array(labels)
+        if np.unique(labels).size != bins:
+            continue
+        sse = weighted_sse(values, weights, labels)
+        if best is None or sse < best:
+            best = sse
+    return best
+
+
+def brute_force_silhouette(values, labels):
+    """Mean silhouette coefficient from all the pairwise distances"""
+    dists = np.abs(values[:, None] - values[None, :])
+    sils = []
+    for idx in range(values.size):
+        same = labels == labels[idx]
+        if np.count_nonzero(same) == 1:
+            sils.append(0.0)
+            continue
+        intra = np.sum(dists[idx, same]) / (np.count_nonzero(same) - 1)
+        inter = min(np.mean(dists[idx, labels == label])
+                    for label in np.unique(labels) if label != labels[idx])
+        sils.append((inter - intra) / max(intra, inter))
+    return np.mean(sils)
+
+
+KMEANS_CASES = {
+    'uniform_weights': (np.array([-3.0, -1.0, 0.0, 0.5, 2.0, 7.0]), np.ones(6), 3),
+    'skewed_weights': (np.array([-2.0, -1.5, 0.0, 1.0, 1.25, 4.0, 4.5]),
+                       np.array([1, 40, 3, 7, 1, 2, 30]), 3),
+    'two_bins': (np.array([0.0, 0.1, 0.2, 5.0, 5.1, 9.0, 9.5]), np.array([5, 1, 1, 2, 9, 1, 1]), 2),
+    'one_value_per_bin': (np.array([-1.0, 0.0, 3.0, 4.0]), np.array([2, 1, 1, 5]), 4),
+    'random': (np.sort(np.random.default_rng(0).choice(np.arange(-20, 20), size=8, replace=False)) / 4,
+               np.random.default_rng(1).integers(1, 100, size=8), 3),
+}
+
+
+@pytest.mark.parametrize('values,weights,bins', KMEANS_CASES.values(), ids=KMEANS_CASES.keys())
+def test_kmeans_1d_weighted_is_optimal(values, weights, bins):
+    centroids, labels = compress.kmeans_1d_weighted(values, weights, bins)
+    assert centroids.size == bins
+    assert labels.shape == values.shape
+    # the centroids are the weighted means of their clusters
+    np.testing.assert_allclose(
+        centroids, [np.average(values[labels == label], weights=weights[labels == label])
+                    for label in range(bins)], rtol=1e-12)
+    np.testing.assert_allclose(weighted_sse(values, weights, labels),
+                               brute_force_kmeans(values, weights, bins), rtol=1e-9)
+
+
+def test_kmeans_1d_weighted_matches_clustering_every_value():
+    # a histogram clusters like the values it counts
+    values = np.array([-1.0, 0.0, 0.25, 2.0, 2.5])
+    weights = np.array([2, 1, 3, 1, 2])
+    centroids, labels = compress.kmeans_1d_weighted(values, weights, 3)
+    all_centroids, all_labels = compress.kmeans_1d_weighted(
+        np.repeat(values, weights), np.ones(weights.sum()), 3)
+    np.testing.assert_allclose(centroids, all_centroids, rtol=1e-12)
+    np.testing.assert_array_equal(np.repeat(labels, weights), all_labels)
+
+
+def nearest_codebook_labels(values, codebook):
+    return np.argmin(np.abs(values[:, None] - codebook[None, :]), axis=1)
+
+
+def silhouette_cases():
+    rng = np.random.default_rng(2)
+    normal = rng.standard_normal(200)
+    halves = rng.integers(-6, 6, size=150) / 2
+    outliers = np.concatenate([rng.standard_normal(50), [-10.0, 10.0]])
+    return {
+        'nearest_codebook': (normal, nearest_codebook_labels(normal, np.array([-1.0, 0.0, 0.5, 2.0]))),
+        'ties_and_duplicates': (halves, nearest_codebook_labels(halves, np.array([-2.0, 0.0, 1.0]))),
+        'single_value_clusters': (outliers,
+                                  nearest_codebook_labels(outliers, np.array([-10.0, -0.5, 0.5, 10.0]))),
+        'two_clusters': (normal, (normal > 0.3).astype(np.int64)),
+        # labels that are not intervals of the values fall back on sklearn
+        'not_intervals': (normal, rng.integers(0, 3, size=normal.size)),
+    }
+
+
+SILHOUETTE_CASES = silhouette_cases()
+
+
+@pytest.mark.parametrize('values,labels', SILHOUETTE_CASES.values(), ids=SILHOUETTE_CASES.keys())
+def test_silhouette_1d_matches_pairwise(values, labels):
+    np.testing.assert_allclose(compress.silhouette_1d(values, labels),
+                               brute_force_silhouette(values, labels), rtol=1e-12)
+
+
+def test_silhouette_1d_rejects_a_single_cluster():
+    with pytest.raises(ValueError):
+        compress.silhouette_1d(np.arange(5.0), np.zeros(5, dtype=np.int64))
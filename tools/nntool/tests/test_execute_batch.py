@@ -0,0 +1,200 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+from nntool.api import NNGraph
+from nntool.execution.kernels.float.fast_conv import Conv2DFloat32
+from nntool.execution.kernels.float.matrix_operations import MatMulFloat32
+from nntool.execution.kernels.float.pool import (AveragePoolingFloat,
+                                                 GlobalAveragePoolFloat32,
+                                                 MaxPoolingFloat)
+from nntool.execution.kernels.kernel_base import KernelBase
+from nntool.execution.kernels.quant.fast_conv import Conv2DSymmetric
+from nntool.execution.kernels.quant.linear import LinearSymmetric
+from nntool.execution.kernels.quant.matrix_operations import (MatMulScaled,
+                                                              MatMulSymmetric)
+from nntool.execution.kernels.quant.pool import (
+    AveragePoolingSymmetric, GlobalAveragePoolSymmetricPow2,
+    GlobalAveragePoolSymmetricScaled, MaxPoolingSymmetric)
+from nntool.quantization.new_qrec import AllFloatQRec, QRec
+from nntool.quantization.qtype import QType
+
+onnx = pytest.importorskip('onnx')
+from onnx import TensorProto, helper, numpy_helper  # pylint: disable=wrong-import-position
+
+BATCH_SIZE = 6
+
+BATCHED_KERNELS = [
+    Conv2DFloat32, MatMulFloat32,
+    AveragePoolingFloat, MaxPoolingFloat, GlobalAveragePoolFloat32,
+    Conv2DSymmetric, LinearSymmetric, MatMulScaled, MatMulSymmetric,
+    AveragePoolingSymmetric, MaxPoolingSymmetric,
+    GlobalAveragePoolSymmetricScaled, GlobalAveragePoolSymmetricPow2,
+]
+
+
+def save_model(path, nodes, inputs, output, initializers):
+    graph = helper.make_graph(
+        nodes, path.stem,
+        [helper.make_tensor_value_info(name, TensorProto.FLOAT, shape) for name, shape in inputs],
+        [helper.make_tensor_value_info(output[0], TensorProto.FLOAT, output[1])],
+        initializer=[numpy_helper.from_array(value.astype(np.float32), name)
+                     for name, value in initializers.items()])
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)]), str(path))
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def conv_model(tmp_path_factory):
+    """grouped conv, max pool, depthwise conv, average pool, global pool and linear on odd
+    shapes with asymmetric padding and strides"""
+    rng = np.random.default_rng(1)
+    return save_model(
+        tmp_path_factory.mktemp('models') / 'conv.onnx',
+        [
+            helper.make_node('Conv', ['x', 'w_group', 'b_group'], ['c1'], group=4, kernel_shape=[3, 3],
+                             strides=[2, 1], pads=[1, 0, 1, 2]),
+            helper.make_node('Relu', ['c1'], ['r1']),
+            helper.make_node('MaxPool', ['r1'], ['p1'], kernel_shape=[3, 2], strides=[1, 2], pads=[1, 0, 1, 1]),
+            helper.make_node('Conv', ['p1', 'w_dw', 'b_dw'], ['c2'], group=8, kernel_shape=[3, 3],
+                             pads=[1, 1, 1, 1]),
+            helper.make_node('AveragePool', ['c2'], ['p2'], kernel_shape=[2, 3], strides=[2, 1]),
+            helper.make_node('Conv', ['p2', 'w_pw', 'b_pw'], ['c3'], kernel_shape=[1, 1]),
+            helper.make_node('GlobalAveragePool', ['c3'], ['g']),
+            helper.make_node('Flatten', ['g'], ['f']),
+            helper.make_node('Gemm', ['f', 'w_fc', 'b_fc'], ['y'], transB=1),
+        ],
+        [('x', [1, 8, 11, 9])], ('y', [1, 5]),
+        {
+            'w_group': rng.standard_normal((8, 2, 3, 3)), 'b_group': rng.standard_normal(8),
+            'w_dw': rng.standard_normal((8, 1, 3, 3)), 'b_dw': rng.standard_normal(8),
+            'w_pw': rng.standard_normal((6, 8, 1, 1)), 'b_pw': rng.standard_normal(6),
+            'w_fc': rng.standard_normal((5, 6)), 'b_fc': rng.standard_normal(5),
+        })
+
+
+@pytest.fixture(scope='module')
+def matmul_model(tmp_path_factory):
+    """matmul by a constant with a bias followed by a matmul of two activations"""
+    rng = np.random.default_rng(2)
+    return save_model(
+        tmp_path_factory.mktemp('models') / 'matmul.onnx',
+        [
+            helper.make_node('MatMul', ['a', 'w'], ['m1']),
+            helper.make_node('Add', ['m1', 'b'], ['m2']),
+            helper.make_node('MatMul', ['m2', 'c'], ['y']),
+        ],
+        [('a', [1, 6, 5]), ('c', [1, 7, 3])], ('y', [1, 6, 3]),
+        {'w': rng.standard_normal((5, 7)), 'b': rng.standard_normal(7)})
+
+
+@pytest.fixture(scope='module')
+def matvec_model(tmp_path_factory):
+    """the matmuls of matmul_model on a single row with inner dimensions that are not
+    a multiple of the vector width"""
+    rng = np.random.default_rng(3)
+    return save_model(
+        tmp_path_factory.mktemp('models') / 'matvec.onnx',
+        [
+            helper.make_node('MatMul', ['a', 'w'], ['m1']),
+            helper.make_node('Add', ['m1', 'b'], ['m2']),
+            helper.make_node('MatMul', ['m2', 'c'], ['y']),
+        ],
+        [('a', [1, 1, 33]), ('c', [1, 17, 4])], ('y', [1, 1, 4]),
+        {'w': rng.standard_normal((33, 17)), 'b': rng.standard_normal(17)})
+
+
+def load_graph(model_path, scheme):
+    G = NNGraph.load_graph(model_path)
+    G.adjust_order()
+    G.fusions('scaled_match_group')
+    rng = np.random.default_rng(0)
+    samples = [[rng.standard_normal(node.out_dims[0].shape).astype(np.float32)
+                for node in G.input_nodes()]
+               for _ in range(BATCH_SIZE)]
+    G.quantize(G.collect_statistics(samples), schemes=[scheme])
+    return G, samples
+
+
+def spy_on_batched_kernels(monkeypatch):
+    """records for each execute of a batched kernel whether it processed the whole batch"""
+    calls = []
+    for kernel in BATCHED_KERNELS:
+        def spy(cls, params, in_tensors, qrec, execute=kernel.execute.__func__, **kwargs):
+            calls.append((cls.__name__, bool(kwargs.get('batched'))))
+            return execute(cls, params, in_tensors, qrec, **kwargs)
+        monkeypatch.setattr(kernel, 'execute', classmethod(spy))
+    return calls
+
+
+def check_batch_parity(G, samples, calls, **kwargs):
+    """compares execute_batch to execute on each sample and checks that the kernels
+    called by execute_batch did not fall back to running per sample"""
+    per_sample = [G.execute(sample, **kwargs) for sample in samples]
+    calls.clear()
+    batch = G.execute_batch([np.stack([sample[idx] for sample in samples])
+                             for idx in range(len(samples[0]))], **kwargs)
+    assert calls, 'no batched kernel was executed'
+    assert all(batched for _, batched in calls), f'executed per sample {calls}'
+    for node in G.nodes():
+        step_idx = node.step_idx
+        for out_idx, batch_output in enumerate(batch[step_idx]):
+            for sample_idx, outputs in enumerate(per_sample):
+                np.testing.assert_array_equal(
+                    batch_output[sample_idx], outputs[step_idx][out_idx],
+                    err_msg=f'{node.name} sample {sample_idx}')
+    return {name for name, _ in calls}
+
+
+@pytest.mark.parametrize('scheme', ['scaled', 'pow2'])
+@pytest.mark.parametrize('model', ['conv_model', 'matmul_model'])
+def test_quantized_batch_matches_per_sample(request, monkeypatch, model, scheme):
+    G, samples = load_graph(request.getfixturevalue(model), scheme)
+    calls = spy_on_batched_kernels(monkeypatch)
+    check_batch_parity(G, samples, calls, quantize=True)
+    check_batch_parity(G, samples, calls, dequantize=True)
+
+
+@pytest.mark.parametrize('model', ['conv_model', 'matmul_model', 'matvec_model'])
+def test_float_batch_matches_per_sample(request, monkeypatch, model):
+    G, samples = load_graph(request.getfixturevalue(model), 'scaled')
+    calls = spy_on_batched_kernels(monkeypatch)
+    check_batch_parity(G, samples, calls)
+
+
+def test_conv_kernels_are_batched(conv_model, monkeypatch):
+    G, samples = load_graph(conv_model, 'scaled')
+    calls = spy_on_batched_kernels(monkeypatch)
+    assert check_batch_parity(G, samples, calls, quantize=True) == {
+        'Conv2DSymmetric', 'MaxPoolingSymmetric', 'AveragePoolingSymmetric',
+        'GlobalAveragePoolSymmetricScaled', 'LinearSymmetric'}
+
+
+def test_unbatch_inputs():
+    qrec = AllFloatQRec()
+    in_tensor = np.zeros((4, 2))
+    weights = np.broadcast_to(np.ones((3, 2)), (4, 3, 2))
+    sample_in_tensors = KernelBase.unbatch_inputs([in_tensor, weights, None], qrec, (1, 2))
+    assert sample_in_tensors[0] is in_tensor
+    assert sample_in_tensors[1].shape == (3, 2)
+    assert sample_in_tensors[2] is None
+    # weights that differ between samples cannot be shared
+    assert KernelBase.unbatch_inputs([in_tensor, np.ones((4, 3, 2))], qrec, (1, )) is None
+    # per channel scales are laid out on the sample shape
+    channel_qtype = QType(dtype=np.int8, scale=np.array([0.1, 0.2]), quantized_dimension=0)
+    qrec = QRec.scaled(in_qs=[channel_qtype, QType(dtype=np.int8, scale=0.1)],
+                       out_qs=[QType(dtype=np.int8, scale=0.1)])
+    assert KernelBase.unbatch_inputs([in_tensor, weights], qrec, (1, )) is None
@@ -0,0 +1,202 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+from nntool.api import NNGraph
+from nntool.graph.matches.matcher import Matcher
+from nntool.graph.types.fusions import FusionNodeBase
+
+onnx = pytest.importorskip('onnx')
+from onnx import TensorProto, helper, numpy_helper  # pylint: disable=wrong-import-position
+
+
+def save_model(path, nodes, inputs, output, initializers):
+    graph = helper.make_graph(
+        nodes, path.stem,
+        [helper.make_tensor_value_info(name, TensorProto.FLOAT, shape) for name, shape in inputs],
+        [helper.make_tensor_value_info(output[0], TensorProto.FLOAT, output[1])],
+        # integer initializers are shapes and pads
+        initializer=[numpy_helper.from_array(value if value.dtype.kind == 'i' else value.astype(np.float32),
+                                             name)
+                     for name, value in initializers.items()])
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)]), str(path))
+    return str(path)
+
+
+def conv_model(path, rng):
+    """convolutions followed by pools and activations in both orders, batch norm, pad,
+    global pool and a linear layer with an activation"""
+    return save_model(
+        path,
+        [
+            helper.make_node('Pad', ['x', 'pads'], ['x_pad']),
+            helper.make_node('Conv', ['x_pad', 'w1', 'b1'], ['c1'], kernel_shape=[3, 3]),
+            helper.make_node('MaxPool', ['c1'], ['p1'], kernel_shape=[2, 2], strides=[2, 2]),
+            helper.make_node('Relu', ['p1'], ['r1']),
+            helper.make_node('Conv', ['r1', 'w2', 'b2'], ['c2'], kernel_shape=[3, 3], pads=[1, 1, 1, 1]),
+            helper.make_node('BatchNormalization', ['c2', 'bn_s', 'bn_b', 'bn_m', 'bn_v'], ['bn']),
+            helper.make_node('Relu', ['bn'], ['r2']),
+            helper.make_node('AveragePool', ['r2'], ['p2'], kernel_shape=[2, 2], strides=[2, 2]),
+            helper.make_node('Conv', ['p2', 'w3', 'b3'], ['c3'], kernel_shape=[1, 1]),
+            helper.make_node('GlobalAveragePool', ['c3'], ['g']),
+            helper.make_node('Flatten', ['g'], ['f']),
+            helper.make_node('Gemm', ['f', 'w_fc', 'b_fc'], ['fc'], transB=1),
+            helper.make_node('Relu', ['fc'], ['y']),
+        ],
+        [('x', [1, 3, 14, 14])], ('y', [1, 5]),
+        {
+            'pads': np.array([0, 0, 1, 1, 0, 0, 1, 1]),
+            'w1': rng.standard_normal((8, 3, 3, 3)), 'b1': rng.standard_normal(8),
+            'w2': rng.standard_normal((8, 8, 3, 3)), 'b2': rng.standard_normal(8),
+            'bn_s': rng.uniform(0.5, 1.5, 8), 'bn_b': rng.standard_normal(8),
+            'bn_m': rng.standard_normal(8), 'bn_v': rng.uniform(0.5, 1.5, 8),
+            'w3': rng.standard_normal((6, 8, 1, 1)), 'b3': rng.standard_normal(6),
+            'w_fc': rng.standard_normal((5, 6)), 'b_fc': rng.standard_normal(5),
+        })
+
+
+def residual_model(path, rng):
+    """residual adds, a hard sigmoid built from primitive operators, concats and
+    reshapes"""
+    return save_model(
+        path,
+        [
+            helper.make_node('Conv', ['x', 'w1', 'b1'], ['c1'], kernel_shape=[3, 3], pads=[1, 1, 1, 1]),
+            helper.make_node('Relu', ['c1'], ['r1']),
+            helper.make_node('Conv', ['r1', 'w2', 'b2'], ['c2'], kernel_shape=[3, 3], pads=[1, 1, 1, 1]),
+            helper.make_node('Add', ['c2', 'r1'], ['res']),
+            helper.make_node('Relu', ['res'], ['r2']),
+            helper.make_node('Add', ['r2', 'three'], ['hs1']),
+            helper.make_node('Clip', ['hs1', 'zero', 'six'], ['hs2']),
+            helper.make_node('Mul', ['r2', 'hs2'], ['hs3']),
+            helper.make_node('Div', ['hs3', 'six'], ['hs']),
+            helper.make_node('Conv', ['hs', 'w3', 'b3'], ['c3'], kernel_shape=[1, 1]),
+            helper.make_node('Concat', ['c3', 'hs'], ['cat'], axis=1),
+            helper.make_node('MaxPool', ['cat'], ['p'], kernel_shape=[2, 2], strides=[2, 2]),
+            helper.make_node('Reshape', ['p', 'shape1'], ['rs1']),
+            helper.make_node('Reshape', ['rs1', 'shape2'], ['rs2']),
+            helper.make_node('Gemm', ['rs2', 'w_fc', 'b_fc'], ['fc'], transB=1),
+            helper.make_node('Sigmoid', ['fc'], ['y']),
+        ],
+        [('x', [1, 4, 8, 8])], ('y', [1, 3]),
+        {
+            'w1': rng.standard_normal((4, 4, 3, 3)), 'b1': rng.standard_normal(4),
+            'w2': rng.standard_normal((4, 4, 3, 3)), 'b2': rng.standard_normal(4),
+            'three': np.array(3.0), 'zero': np.array(0.0), 'six': np.array(6.0),
+            'w3': rng.standard_normal((4, 4, 1, 1)), 'b3': rng.standard_normal(4),
+            'shape1': np.array([1, 8, 16]), 'shape2': np.array([1, 128]),
+            'w_fc': rng.standard_normal((3, 128)), 'b_fc': rng.standard_normal(3),
+        })
+
+
+def matmul_model(path, rng):
+    """matmuls with external biases and activations and an expression on the result"""
+    return save_model(
+        path,
+        [
+            helper.make_node('MatMul', ['a', 'w1'], ['m1']),
+            helper.make_node('Add', ['m1', 'b1'], ['m2']),
+            helper.make_node('Relu', ['m2'], ['r1']),
+            helper.make_node('MatMul', ['r1', 'w2'], ['m3']),
+            helper.make_node('Add', ['m3', 'b2'], ['m4']),
+            helper.make_node('Sigmoid', ['m4'], ['s']),
+            helper.make_node('Mul', ['m4', 's'], ['swish']),
+            helper.make_node('Mul', ['swish', 'scale'], ['e1']),
+            helper.make_node('Add', ['e1', 'a2'], ['y']),
+        ],
+        [('a', [1, 6, 5]), ('a2', [1, 6, 3])], ('y', [1, 6, 3]),
+        {
+            'w1': rng.standard_normal((5, 7)), 'b1': rng.standard_normal(7),
+            'w2': rng.standard_normal((7, 3)), 'b2': rng.standard_normal(3),
+            'scale': np.array(0.5),
+        })
+
+
+def external_bias_model(path, rng):
+    """the only convolution is followed by the add of its bias so the convolution fusions
+    find nothing until a later matcher folds the bias into the filter"""
+    return save_model(
+        path,
+        [
+            helper.make_node('Conv', ['x', 'w1'], ['c1'], kernel_shape=[3, 3], pads=[1, 1, 1, 1]),
+            helper.make_node('Add', ['c1', 'b1'], ['a1']),
+            helper.make_node('Relu', ['a1'], ['r1']),
+            helper.make_node('MaxPool', ['r1'], ['y'], kernel_shape=[2, 2], strides=[2, 2]),
+        ],
+        [('x', [1, 3, 8, 8])], ('y', [1, 6, 4, 4]),
+        {'w1': rng.standard_normal((6, 3, 3, 3)), 'b1': rng.standard_normal((1, 6, 1, 1))})
+
+
+MODELS = {
+    'conv': conv_model,
+    'external_bias': external_bias_model,
+    'residual': residual_model,
+    'matmul': matmul_model,
+}
+
+
+def graph_signature(G):
+    """Names, types and dimensions of the nodes and the edges of a graph and of the
+    subgraphs of its fusions"""
+    nodes = sorted((node.name, type(node).__name__, str(node.in_dims), str(node.out_dims))
+                   for node in G.nodes())
+    edges = sorted((edge.from_node.name, edge.from_idx, edge.to_node.name, edge.to_idx)
+                   for edge in G.edges())
+    fusions = {node.name: graph_signature(node.subgraph)
+               for node in G.nodes(node_classes=FusionNodeBase)}
+    return nodes, edges, fusions
+
+
+def quantization_signature(G):
+    return sorted((str(nid), str(qrec.in_qs), str(qrec.out_qs))
+                  for nid, qrec in G.quantization.items())
+
+
+def fused_graph(model_path, match_group, quantize):
+    G = NNGraph.load_graph(model_path)
+    G.adjust_order()
+    if quantize:
+        rng = np.random.default_rng(0)
+        samples = [[rng.standard_normal(node.out_dims[0].shape).astype(np.float32)
+                    for node in G.input_nodes()]
+                   for _ in range(2)]
+        G.quantize(G.collect_statistics(samples), schemes=['scaled'])
+    G.fusions(match_group)
+    return G
+
+
+@pytest.mark.parametrize('quantize', [False, True], ids=['float', 'quantized'])
+@pytest.mark.parametrize('match_group', ['scaled_match_group', 'pow2_match_group'])
+@pytest.mark.parametrize('make_model', MODELS.values(), ids=MODELS.keys())
+def test_skipping_matchers_gives_the_same_graph(tmp_path, monkeypatch, make_model,
+                                                match_group, quantize):
+    model_path = make_model(tmp_path / 'model.onnx', np.random.default_rng(1))
+    G = fused_graph(model_path, match_group, quantize)
+    # run every matcher every time but record whether it would have been skipped
+    skipped = []
+    can_skip = Matcher.can_skip
+
+    def never_skip(self, G):
+        skipped.append(can_skip(self, G))
+        return False
+    monkeypatch.setattr(Matcher, 'can_skip', never_skip)
+    G_no_skip = fused_graph(model_path, match_group, quantize)
+    # the fusions must have found something and skipping must have been possible
+    assert any(isinstance(node, FusionNodeBase) for node in G_no_skip.nodes())
+    assert any(skipped)
+    assert graph_signature(G) == graph_signature(G_no_skip)
+    if quantize:
+        assert quantization_signature(G) == quantization_signature(G_no_skip)
@@ -0,0 +1,49 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+import time
+
+from nntool.utils.data_importer import InputPipeline
+
+
+class RecordingPipeline(InputPipeline):
+    def __init__(self, files, **kwargs) -> None:
+        super().__init__(files, **kwargs)
+        self.loaded = []
+        self._lock = threading.Lock()
+
+    def load(self, files):
+        time.sleep(0.02)
+        with self._lock:
+            self.loaded.append(files[0])
+        return files
+
+
+def test_pipeline_yields_in_order():
+    files = [f'{idx}.npy' for idx in range(10)]
+    pipeline = RecordingPipeline(files, prefetch=3)
+    assert [loaded for _, loaded in pipeline] == [[name] for name in files]
+
+
+def test_abandoned_iteration_cancels_pending_imports():
+    files = [f'{idx}.npy' for idx in range(10)]
+    pipeline = RecordingPipeline(files, prefetch=4, num_workers=1)
+    iterator = iter(pipeline)
+    next(iterator)
+    iterator.close()
+    # only the running import completes after the iteration is abandoned
+    assert len(pipeline.loaded) <= 2
+    assert pipeline.loaded == files[:len(pipeline.loaded)]
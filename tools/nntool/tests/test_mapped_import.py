@@ -0,0 +1,113 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from nntool.api import NNGraph
+from nntool.graph.types import ConstantInputNode
+from nntool.utils.mapped_file import is_mapped
+
+onnx = pytest.importorskip('onnx')
+from onnx import TensorProto, helper, numpy_helper  # pylint: disable=wrong-import-position
+
+TFLITE_MODEL = Path(__file__).resolve().parents[3] / \
+    'examples' / 'gap8' / 'nn' / 'nntool' / 'mnist' / 'model' / 'mnist.tflite'
+
+
+def external_data_model(path):
+    """convolutions and a linear layer with weights above and below the size that is
+    mapped saved in one external data file"""
+    rng = np.random.default_rng(0)
+    initializers = {
+        'w1': rng.standard_normal((16, 3, 3, 3)), 'b1': rng.standard_normal(16),
+        'w2': rng.standard_normal((32, 16, 3, 3)), 'b2': rng.standard_normal(32),
+        'w_fc': rng.standard_normal((10, 32 * 4 * 4)), 'b_fc': rng.standard_normal(10),
+    }
+    graph = helper.make_graph(
+        [
+            helper.make_node('Conv', ['x', 'w1', 'b1'], ['c1'], kernel_shape=[3, 3], pads=[1, 1, 1, 1]),
+            helper.make_node('Relu', ['c1'], ['r1']),
+            helper.make_node('Conv', ['r1', 'w2', 'b2'], ['c2'], kernel_shape=[3, 3],
+                             pads=[1, 1, 1, 1], strides=[2, 2]),
+            helper.make_node('Relu', ['c2'], ['r2']),
+            helper.make_node('Flatten', ['r2'], ['f']),
+            helper.make_node('Gemm', ['f', 'w_fc', 'b_fc'], ['y'], transB=1),
+        ],
+        path.stem,
+        [helper.make_tensor_value_info('x', TensorProto.FLOAT, [1, 3, 8, 8])],
+        [helper.make_tensor_value_info('y', TensorProto.FLOAT, [1, 10])],
+        initializer=[numpy_helper.from_array(value.astype(np.float32), name)
+                     for name, value in initializers.items()])
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)]), str(path),
+              save_as_external_data=True, all_tensors_to_one_file=True, location='weights.bin',
+              size_threshold=0)
+    return str(path)
+
+
+def load(model):
+    G = NNGraph.load_graph(model)
+    G.adjust_order()
+    return G
+
+
+def constants(G):
+    return {node.name: node for node in G.nodes(node_classes=ConstantInputNode)}
+
+
+def check_same_constants(G_mapped, G_eager):
+    mapped, eager = constants(G_mapped), constants(G_eager)
+    assert mapped.keys() == eager.keys()
+    # only the mapped graph has views of the model file
+    assert any(is_mapped(node._value) for node in mapped.values())
+    assert not any(is_mapped(node._value) for node in eager.values())
+    for name, node in mapped.items():
+        value = node.value
+        assert not is_mapped(value)
+        assert value.dtype == eager[name].value.dtype
+        np.testing.assert_array_equal(value, eager[name].value)
+
+
+def check_writes_are_not_mapped(G, model_files):
+    """writing to the values of the constants of G must not change the files it was
+    loaded from"""
+    contents = {path: path.read_bytes() for path in model_files}
+    for node in constants(G).values():
+        node.value[...] = 0
+        assert not node.value.any()
+    for path, data in contents.items():
+        assert path.read_bytes() == data
+
+
+def test_onnx_external_data_mapped_and_eager(tmp_path):
+    model_path = external_data_model(tmp_path / 'model.onnx')
+    G_mapped = load(model_path)
+    G_eager = load(onnx.load(model_path))
+    check_same_constants(G_mapped, G_eager)
+    check_writes_are_not_mapped(load(model_path), [tmp_path / 'model.onnx', tmp_path / 'weights.bin'])
+    check_same_constants(load(model_path), G_eager)
+
+
+@pytest.mark.skipif(not TFLITE_MODEL.exists(), reason='example tflite model not found')
+def test_tflite_mapped_and_eager(monkeypatch):
+    G_mapped = load(str(TFLITE_MODEL))
+    with monkeypatch.context() as patch:
+        # the importer read the whole file before it was mapped
+        patch.setattr('nntool.importer.tflite2.tflite.map_file',
+                      lambda filename: Path(filename).read_bytes())
+        G_eager = load(str(TFLITE_MODEL))
+    check_same_constants(G_mapped, G_eager)
+    check_writes_are_not_mapped(load(str(TFLITE_MODEL)), [TFLITE_MODEL])
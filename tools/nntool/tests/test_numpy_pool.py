@@ -0,0 +1,101 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+from nntool.utils.at_norm import at_norm
+from nntool.utils.numpy_pool import (loop_max_pool, loop_sum_pool, max_pool,
+                                     sum_pool)
+
+
+def pad_hw(in_tensor, h_axis, w_axis, pad, value=0):
+    pad_shape = [(0, 0)] * in_tensor.ndim
+    pad_shape[h_axis], pad_shape[w_axis] = pad[:2], pad[2:]
+    return np.pad(in_tensor, pad_shape, mode='constant', constant_values=value)
+
+
+POOL_CASES = [
+    # shape without channels, filter, stride, padding (top, bottom, left, right)
+    ((7, 9), (3, 3), (1, 1), (0, 0, 0, 0)),
+    ((7, 9), (3, 2), (2, 1), (1, 1, 0, 1)),
+    ((11, 5), (2, 3), (2, 2), (0, 1, 1, 1)),
+    ((13, 13), (5, 4), (3, 2), (2, 2, 1, 2)),
+    ((5, 6), (5, 6), (1, 1), (0, 0, 0, 0)),
+    ((1, 8), (1, 3), (1, 3), (0, 0, 1, 1)),
+]
+
+
+def layout_tensor(rng, layout, spatial, n_chans, dtype):
+    shape = {'chw': (n_chans,) + spatial, 'hwc': spatial + (n_chans,)}[layout]
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        tensor = rng.integers(info.min, info.max, size=shape, endpoint=True, dtype=dtype)
+    else:
+        tensor = rng.standard_normal(shape).astype(dtype)
+    h_axis = layout.index('h')
+    return tensor, h_axis, h_axis + 1
+
+
+@pytest.mark.parametrize('layout', ['chw', 'hwc'])
+@pytest.mark.parametrize('dtype', [np.float32, np.int8, np.int16])
+@pytest.mark.parametrize('spatial,filt,stride,pad', POOL_CASES)
+def test_max_pool_matches_loop(layout, dtype, spatial, filt, stride, pad):
+    rng = np.random.default_rng(sum(spatial + filt + stride + pad))
+    in_tensor, h_axis, w_axis = layout_tensor(rng, layout, spatial, 5, dtype)
+    in_tensor = pad_hw(in_tensor, h_axis, w_axis, pad)
+    expected = loop_max_pool(in_tensor, h_axis, w_axis, *filt, *stride)
+    out_h, out_w = expected.shape[h_axis], expected.shape[w_axis]
+    np.testing.assert_array_equal(
+        max_pool(in_tensor, h_axis, w_axis, out_h, out_w, *filt, *stride), expected)
+
+
+@pytest.mark.parametrize('layout', ['chw', 'hwc'])
+@pytest.mark.parametrize('spatial,filt,stride,pad', POOL_CASES)
+def test_quantized_average_pool_matches_loop(layout, spatial, filt, stride, pad):
+    rng = np.random.default_rng(sum(spatial + filt + stride + pad))
+    in_tensor, h_axis, w_axis = layout_tensor(rng, layout, spatial, 5, np.int8)
+    in_tensor = pad_hw(in_tensor, h_axis, w_axis, pad, value=-3)
+    pool_factor = (1 << 16)//(filt[0] * filt[1])
+    expected = loop_sum_pool(in_tensor, h_axis, w_axis, *filt, *stride, np.int32)
+    out_h, out_w = expected.shape[h_axis], expected.shape[w_axis]
+    sum_filter = sum_pool(in_tensor, h_axis, w_axis, out_h, out_w, *filt, *stride, calc_dtype=np.int32)
+    np.testing.assert_array_equal(sum_filter, expected)
+    np.testing.assert_array_equal(
+        at_norm(np.multiply(sum_filter, pool_factor, dtype=np.int32), 16),
+        at_norm(np.multiply(expected, pool_factor, dtype=np.int32), 16))
+
+
+@pytest.mark.parametrize('layout', ['chw', 'hwc'])
+@pytest.mark.parametrize('spatial,filt,stride,pad', POOL_CASES)
+def test_float_average_pool_matches_loop(layout, spatial, filt, stride, pad):
+    rng = np.random.default_rng(sum(spatial + filt + stride + pad))
+    in_tensor, h_axis, w_axis = layout_tensor(rng, layout, spatial, 5, np.float32)
+    in_tensor = pad_hw(in_tensor, h_axis, w_axis, pad)
+    expected = loop_sum_pool(in_tensor, h_axis, w_axis, *filt, *stride, np.float32)
+    out_h, out_w = expected.shape[h_axis], expected.shape[w_axis]
+    sum_filter = sum_pool(in_tensor, h_axis, w_axis, out_h, out_w, *filt, *stride, calc_dtype=np.float32)
+    # the loop's reduction order depended on the layout so only hwc is bit exact
+    if layout == 'hwc':
+        np.testing.assert_array_equal(sum_filter, expected)
+    else:
+        np.testing.assert_allclose(sum_filter, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_pool_leading_batch_axis():
+    rng = np.random.default_rng(4)
+    in_tensor = rng.standard_normal((3, 9, 7, 4)).astype(np.float32)
+    batched = max_pool(in_tensor, 1, 2, 4, 3, 3, 3, 2, 2)
+    for idx, sample in enumerate(in_tensor):
+        np.testing.assert_array_equal(batched[idx], loop_max_pool(sample, 0, 1, 3, 3, 2, 2))
@@ -0,0 +1,211 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import math
+
+import numpy as np
+import pytest
+from nntool.execution.kernels.float.resize import (BilinearResizerFloat32,
+                                                   NearestNeighborResizerFloat32)
+from nntool.execution.kernels.quant.resize import (BilinearResizerSymmetric,
+                                                   NearestNeighbourResizerSymmetric)
+from nntool.graph.dim import Dim
+from nntool.graph.types import BilinearResizerNode, NearestNeighborResizerNode
+from nntool.quantization.new_qrec import QRec
+from nntool.quantization.qtype import QType
+
+# The per output pixel loops that the resizer kernels used before numpy_resize. They
+# work on hwc tensors.
+
+
+def loop_bilinear_float(in_tensor, h_out, w_out, out_dtype):
+    h_in, w_in, c_out = in_tensor.shape
+    wstep = (w_in - 1) / w_out
+    hstep = (h_in - 1) / h_out
+    out_tensor = np.empty((h_out, w_out, c_out))
+    for i in range(h_out):
+        y_l, y_h = math.floor(hstep * i), math.ceil(hstep * i)
+        hc = out_dtype((hstep * i) - y_l)
+        for j in range(w_out):
+            x_l, x_h = math.floor(wstep * j), math.ceil(wstep * j)
+            wc = out_dtype((wstep * j) - x_l)
+            P1 = in_tensor[y_l, x_l, :]
+            P2 = in_tensor[y_l, x_h, :]
+            P3 = in_tensor[y_h, x_l, :]
+            P4 = in_tensor[y_h, x_h, :]
+            out_tensor[i, j, :] = P1 * (out_dtype(1) - wc) * (out_dtype(1) - hc) \
+                + P2 * wc * (out_dtype(1) - hc) \
+                + P3 * (out_dtype(1) - wc) * hc \
+                + P4 * wc * hc
+    return out_tensor
+
+
+def loop_nearest_float(in_tensor, h_out, w_out):
+    h_in, w_in, c_out = in_tensor.shape
+    if w_in == 1 and w_out == 1:
+        wstep = 1
+    else:
+        wstep = (w_in - 1) / (w_out - 1)
+    if h_in == 1 and h_out == 1:
+        hstep = 1
+    else:
+        hstep = (h_in - 1) / (h_out - 1)
+    out_tensor = np.empty((h_out, w_out, c_out))
+    for i in range(h_out):
+        h_rounded = int(round(hstep * i))
+        for j in range(w_out):
+            w_rounded = int(round(wstep * j))
+            out_tensor[i, j, :] = in_tensor[h_rounded, w_rounded, :]
+    return out_tensor
+
+
+def loop_bilinear_fixed(in_tensor, h_out, w_out):
+    h_in, w_in, c_out = in_tensor.shape
+    wstep = ((w_in - 1) << 16) // w_out
+    hstep = ((h_in - 1) << 16) // h_out
+    hcoeff = wcoeff = 0
+    out_tensor = np.zeros((h_out, w_out, c_out), dtype=np.int32)
+    for i in range(h_out):
+        offsetY = hcoeff >> 16
+        hc2 = (hcoeff >> 9) & 127
+        hc1 = 128 - hc2
+        wcoeff = 0
+        for j in range(w_out):
+            offsetX = wcoeff >> 16
+            wc2 = (wcoeff >> 9) & 127
+            wc1 = 128 - wc2
+            P1 = in_tensor[offsetY, offsetX, :].astype(np.int32)
+            P2 = in_tensor[offsetY+1, offsetX, :].astype(np.int32)
+            P3 = in_tensor[offsetY, offsetX+1, :].astype(np.int32)
+            P4 = in_tensor[offsetY+1, offsetX+1, :].astype(np.int32)
+            out_tensor[i, j, :] = (P1 * wc1 * hc1
+                                   + P2 * wc1 * hc2
+                                   + P3 * wc2 * hc1
+                                   + P4 * wc2 * hc2).astype(np.int32) >> 14
+            wcoeff += wstep
+        hcoeff += hstep
+    return out_tensor
+
+
+def loop_nearest_fixed(in_tensor, h_out, w_out):
+    h_in, w_in, c_out = in_tensor.shape
+    wstep = ((w_in - 1) << 16) // (w_out - 1)
+    hstep = ((h_in - 1) << 16) // (h_out - 1)
+    out_tensor = np.zeros((h_out, w_out, c_out), dtype=np.int32)
+    for i in range(h_out):
+        h_rounded = ((hstep * i) + (1 << (16 - 1))) >> 16
+        for j in range(w_out):
+            w_rounded = ((wstep * j) + (1 << (16 - 1))) >> 16
+            out_tensor[i, j, :] = in_tensor[h_rounded, w_rounded, :]
+    return out_tensor
+
+
+RESIZE_CASES = {
+    'upscale_x2': ((5, 7), (10, 14)),
+    'upscale_non_integer': ((5, 7), (8, 11)),
+    'downscale_integer': ((12, 10), (4, 5)),
+    'downscale_non_integer': ((9, 7), (7, 4)),
+    'up_and_down': ((6, 8), (9, 3)),
+}
+
+# the kernels do not implement align corners or half pixel centers. The flags are
+# carried by the nodes so the kernels must give the same results as before whatever
+# their setting.
+COORDINATE_MODES = {
+    'default': dict(align_corners=False, halfpixel_centers=False),
+    'align_corners': dict(align_corners=True, halfpixel_centers=False),
+    'half_pixel': dict(align_corners=False, halfpixel_centers=True),
+}
+
+LAYOUTS = {
+    'chw': ('c', 'h', 'w'),
+    'hwc': ('h', 'w', 'c'),
+}
+
+
+def resizer(node_class, case, mode, layout, channels=3):
+    (h_in, w_in), (h_out, w_out) = case
+    node = node_class('resizer', new_shape=(h_out, w_out), **mode)
+    dims = {'c': channels, 'h': h_in, 'w': w_in}
+    node.in_dims = [Dim.named_ordered(**{k: dims[k] for k in layout})]
+    node.out_dims = node.get_output_size(node.in_dims)
+    return node
+
+
+def run_kernel(kernel, node, in_tensor_hwc, qrec):
+    in_dim = node.in_dims[0]
+    in_tensor = in_tensor_hwc.transpose(in_dim.transpose_from_order(('h', 'w', 'c')))
+    out_tensor = kernel.execute(node, [in_tensor], qrec)[0]
+    return out_tensor.transpose(node.out_dims[0].transpose_to_order(('h', 'w', 'c')))
+
+
+def parametrize_resize(func):
+    for name, values in (('layout', LAYOUTS), ('mode', COORDINATE_MODES), ('case', RESIZE_CASES)):
+        func = pytest.mark.parametrize(name, values.values(), ids=values.keys())(func)
+    return func
+
+
+@parametrize_resize
+@pytest.mark.parametrize('dtype', [np.float32, np.float16])
+def test_bilinear_float_matches_loop(case, mode, layout, dtype):
+    node = resizer(BilinearResizerNode, case, mode, layout)
+    in_tensor = np.random.default_rng(0).uniform(
+        -4, 4, size=case[0] + (3,)).astype(dtype)
+    qrec = QRec.float(in_qs=[QType(dtype=dtype)], out_qs=[QType(dtype=dtype)])
+    out_tensor = run_kernel(BilinearResizerFloat32, node, in_tensor, qrec)
+    ref_tensor = loop_bilinear_float(in_tensor, *case[1], dtype)
+    assert out_tensor.dtype == ref_tensor.dtype
+    np.testing.assert_array_equal(out_tensor, ref_tensor)
+
+
+@parametrize_resize
+def test_nearest_float_matches_loop(case, mode, layout):
+    node = resizer(NearestNeighborResizerNode, case, mode, layout)
+    in_tensor = np.random.default_rng(1).uniform(
+        -4, 4, size=case[0] + (3,)).astype(np.float32)
+    out_tensor = run_kernel(NearestNeighborResizerFloat32, node, in_tensor, None)
+    ref_tensor = loop_nearest_float(in_tensor, *case[1])
+    assert out_tensor.dtype == ref_tensor.dtype
+    np.testing.assert_array_equal(out_tensor, ref_tensor)
+
+
+@parametrize_resize
+@pytest.mark.parametrize('dtype', [np.int8, np.int16])
+def test_bilinear_quantized_matches_loop(case, mode, layout, dtype):
+    node = resizer(BilinearResizerNode, case, mode, layout)
+    iinfo = np.iinfo(dtype)
+    in_tensor = np.random.default_rng(2).integers(
+        iinfo.min, iinfo.max, size=case[0] + (3,), endpoint=True).astype(dtype)
+    qrec = QRec.symmetric(in_qs=[QType(scale=1, dtype=dtype)],
+                          out_qs=[QType(scale=1, dtype=dtype)])
+    out_tensor = run_kernel(BilinearResizerSymmetric, node, in_tensor, qrec)
+    ref_tensor = qrec.out_qs[0].clip(loop_bilinear_fixed(in_tensor, *case[1]))
+    assert out_tensor.dtype == ref_tensor.dtype
+    np.testing.assert_array_equal(out_tensor, ref_tensor)
+
+
+@parametrize_resize
+@pytest.mark.parametrize('dtype', [np.int8, np.int16])
+def test_nearest_quantized_matches_loop(case, mode, layout, dtype):
+    node = resizer(NearestNeighborResizerNode, case, mode, layout)
+    iinfo = np.iinfo(dtype)
+    in_tensor = np.random.default_rng(3).integers(
+        iinfo.min, iinfo.max, size=case[0] + (3,), endpoint=True).astype(dtype)
+    qrec = QRec.symmetric(in_qs=[QType(scale=1, dtype=dtype)],
+                          out_qs=[QType(scale=1, dtype=dtype)])
+    out_tensor = run_kernel(NearestNeighbourResizerSymmetric, node, in_tensor, qrec)
+    ref_tensor = qrec.out_qs[0].clip(loop_nearest_fixed(in_tensor, *case[1]))
+    assert out_tensor.dtype == ref_tensor.dtype
+    np.testing.assert_array_equal(out_tensor, ref_tensor)
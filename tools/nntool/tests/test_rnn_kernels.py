@@ -0,0 +1,106 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+from nntool.api import NNGraph
+from nntool.graph.types import RNNNodeBase
+from nntool.utils.diag_collector import DiagCollector
+
+onnx = pytest.importorskip('onnx')
+from onnx import TensorProto, helper, numpy_helper  # pylint: disable=wrong-import-position
+
+N_CELLS, N_INPUTS, N_STATES = 5, 4, 6
+
+KERNEL_OPTIONS = {
+    '8_8': {},
+    '16_8': {'force_external_size': 16, 'force_input_size': 16, 'force_output_size': 16},
+    'ne16_8': {'use_ne16': True},
+    'ne16_16': {'use_ne16': True, 'force_external_size': 16},
+}
+
+# the value that each kernel records from the input contribution of every cell
+INPUT_DIAGNOSTIC = {
+    ('RNN', '8_8'): None,
+    ('RNN', '16_8'): None,
+    ('RNN', 'ne16_8'): 'input_in_statescale',
+    ('RNN', 'ne16_16'): 'input_preact',
+    ('GRU', '8_8'): 'z_gate_inp',
+    ('GRU', '16_8'): 'z_gate_inp',
+    ('GRU', 'ne16_8'): 'z_gate_inp',
+    ('GRU', 'ne16_16'): 'z_gate_inp_after_scale',
+    ('LSTM', '8_8'): 'f_gate_i',
+    ('LSTM', '16_8'): 'f_gate_i',
+    ('LSTM', 'ne16_8'): 'input_f_in_statescale',
+    ('LSTM', 'ne16_16'): 'input_f_in_statescale',
+}
+
+
+def rnn_model(path, op, rng, **attrs):
+    n_gates = {'RNN': 1, 'GRU': 3, 'LSTM': 4}[op]
+    initializers = {
+        'W': rng.standard_normal((1, n_gates * N_STATES, N_INPUTS)) * 0.5,
+        'R': rng.standard_normal((1, n_gates * N_STATES, N_STATES)) * 0.5,
+        'B': rng.standard_normal((1, 2 * n_gates * N_STATES)) * 0.3,
+        'h0': np.zeros((1, 1, N_STATES)),
+    }
+    inputs = ['x', 'W', 'R', 'B', '', 'h0']
+    if op == 'LSTM':
+        initializers['c0'] = np.zeros((1, 1, N_STATES))
+        inputs.append('c0')
+    graph = helper.make_graph(
+        [helper.make_node(op, inputs, ['y', 'y_h'], hidden_size=N_STATES, **attrs)], path.stem,
+        [helper.make_tensor_value_info('x', TensorProto.FLOAT, [N_CELLS, 1, N_INPUTS])],
+        [helper.make_tensor_value_info('y', TensorProto.FLOAT, [N_CELLS, 1, 1, N_STATES])],
+        initializer=[numpy_helper.from_array(value.astype(np.float32), name)
+                     for name, value in initializers.items()])
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)]), str(path))
+    return str(path)
+
+
+@pytest.mark.parametrize('kernel', list(KERNEL_OPTIONS))
+@pytest.mark.parametrize('op,attrs', [
+    ('RNN', {}),
+    ('GRU', {'linear_before_reset': 0}),
+    ('GRU', {'linear_before_reset': 1}),
+    ('LSTM', {}),
+])
+def test_diagnostics_record_each_cell(tmp_path, op, attrs, kernel):
+    rng = np.random.default_rng(3)
+    G = NNGraph.load_graph(rnn_model(tmp_path / f'{op.lower()}.onnx', op, rng, **attrs))
+    G.adjust_order()
+    samples = [rng.standard_normal((N_CELLS, 1, N_INPUTS)).astype(np.float32) for _ in range(3)]
+    G.quantize(G.collect_statistics(samples), schemes=['scaled'], graph_options=KERNEL_OPTIONS[kernel])
+    rnn_node = next(node for node in G.nodes() if isinstance(node, RNNNodeBase))
+
+    outputs = G.execute([samples[0]], quantize=True)
+    DiagCollector.clear()
+    DiagCollector.active_set('test')
+    try:
+        diag_outputs = G.execute([samples[0]], quantize=True)
+    finally:
+        DiagCollector.deactivate()
+    recorded = DiagCollector.stats['test'][rnn_node.name]
+    DiagCollector.clear()
+
+    # collecting diagnostics does not change the result
+    for node_outputs, node_diag_outputs in zip(outputs, diag_outputs):
+        for output, diag_output in zip(node_outputs, node_diag_outputs):
+            np.testing.assert_array_equal(output, diag_output)
+    # the input contributions are recorded once per cell like the values recorded by the step kernels
+    assert recorded['h_state_out' if op != 'LSTM' else 'output'].shape == (N_CELLS, N_STATES)
+    input_diagnostic = INPUT_DIAGNOSTIC[(op, kernel)]
+    if input_diagnostic is not None:
+        assert recorded[input_diagnostic].shape == (N_CELLS, N_STATES)
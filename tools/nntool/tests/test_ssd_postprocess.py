@@ -0,0 +1,179 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+from nntool.execution.kernels.float.ssd_postprocess import (NMSKernelFloat32,
+                                                            SSDDetectorFloat32)
+from nntool.execution.kernels.quant.ssd_postprocess import (NMSKernelSymmetric,
+                                                            SSDDetectorSymmetric)
+from nntool.graph.types import NMSNode, SSDDetectorNode
+from nntool.quantization.new_qrec import QRec
+from nntool.quantization.qtype import QType
+
+# boxes are given as [ymin, xmin, ymax, xmax] with the scores of each class, background
+# first for the SSD detector. All the values are exact in float and on the power of 2
+# scales used for the quantized kernels so that the edge cases survive quantization.
+
+
+def corners(ymin, xmin, ymax, xmax):
+    # the quantized kernels expect coordinates normalized to the image
+    return [ymin / 8, xmin / 8, ymax / 8, xmax / 8]
+
+
+def random_case(seed, n_boxes, n_classes):
+    rand = np.random.default_rng(seed)
+    mins = rand.integers(0, 16, size=(n_boxes, 2)) / 32
+    sizes = rand.integers(1, 16, size=(n_boxes, 2)) / 32
+    boxes = np.concatenate([mins, mins + sizes], axis=1)
+    # few distinct scores so that there are many ties
+    scores = rand.integers(0, 8, size=(n_boxes, n_classes)) / 8
+    return boxes.tolist(), scores.tolist()
+
+
+SSD_CASES = {
+    'ties_in_scores': dict(
+        boxes=[corners(0, 0, 1, 1), corners(2, 2, 3, 3), corners(0, 0, 1, 1), corners(2, 0, 3, 1)],
+        scores=[[0, 0.5], [0, 0.5], [0, 0.5], [0, 0.5]],
+        detections=3),
+    'iou_at_threshold': dict(
+        # box 0 overlaps boxes 1 and 2 with an IoU of exactly 0.5
+        boxes=[corners(0, 0, 1, 2), corners(0, 0, 1, 1), corners(0, 1, 1, 2), corners(2, 0, 3, 1)],
+        scores=[[0, 0.75], [0, 0.5], [0, 0.25], [0, 0.625]],
+        nms_iou_threshold=0.5,
+        detections=2),
+    'max_detections_reached': dict(
+        boxes=[corners(0, idx / 2, 0.25, idx / 2 + 0.25) for idx in range(6)],
+        scores=[[0, 0.125 * (idx + 1)] for idx in range(6)],
+        max_detections=3,
+        detections=3),
+    'empty_class': dict(
+        boxes=[corners(0, 0, 1, 1), corners(1, 1, 2, 2), corners(0, 0, 0.5, 1)],
+        # class 2 has no score above the threshold
+        scores=[[0, 0.5, 0.0625, 0.75], [0, 0.75, 0, 0.75], [0, 0.625, 0.0625, 0.5]],
+        detections=4),
+    'no_detections': dict(
+        boxes=[corners(0, 0, 1, 1), corners(1, 1, 2, 2)],
+        scores=[[0, 0.0625], [0, 0]],
+        detections=0),
+    'max_bb_before_nms_reached': dict(
+        # the candidates of class 2 are dropped
+        boxes=[corners(0, idx, 1, idx + 0.5) for idx in range(8)],
+        scores=[[0, 0.5, 0.25]] * 8,
+        max_bb_before_nms=5,
+        detections=6),
+    'random': dict(zip(('boxes', 'scores'), random_case(0, 40, 4)), nms_iou_threshold=0.25,
+                   decode_offsets=True),
+}
+
+NMS_CASES = {
+    'ties_in_scores': SSD_CASES['ties_in_scores'],
+    'iou_at_threshold': SSD_CASES['iou_at_threshold'],
+    'max_output_boxes_reached': dict(
+        boxes=[corners(0, idx / 2, 0.25, idx / 2 + 0.25) for idx in range(6)],
+        scores=[[0.125 * (idx + 1), 0] for idx in range(6)],
+        max_output_boxes_per_class=3),
+    'empty_class': SSD_CASES['empty_class'],
+    'random': dict(zip(('boxes', 'scores'), random_case(1, 40, 3)), nms_iou_threshold=0.25,
+                   max_output_boxes_per_class=40),
+}
+
+
+def ssd_inputs(case):
+    boxes = np.array(case['boxes'], dtype=np.float32)
+    anchors = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2,
+                        boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]], axis=1)
+    # zero offsets decode to the anchors so the boxes keep their exact overlaps
+    offsets = np.zeros_like(anchors)
+    if case.get('decode_offsets'):
+        offsets[1::3] = 0.25
+        offsets[2::3] = -0.5
+    scores = np.array(case['scores'], dtype=np.float32)
+    return [offsets, scores, anchors]
+
+
+def ssd_node(case):
+    params = {
+        'x_scale': 8.0, 'y_scale': 8.0, 'w_scale': 4.0, 'h_scale': 4.0,
+        'max_bb_before_nms': case.get('max_bb_before_nms', 100),
+        'max_detections': case.get('max_detections', 10),
+        'max_classes_per_detection': 1,
+        'nms_score_threshold': 0.1,
+        'nms_iou_threshold': case.get('nms_iou_threshold', 0.5),
+    }
+    return SSDDetectorNode('ssd', parameters=params)
+
+
+def nms_node(case):
+    n_classes = len(case['scores'][0])
+    params = {
+        'max_output_boxes_per_class': case.get('max_output_boxes_per_class', 10),
+        'num_classes': n_classes,
+        'center_point_box': 0,
+        'nms_score_threshold': 0.1,
+        'nms_iou_threshold': case.get('nms_iou_threshold', 0.5),
+    }
+    return NMSNode('nms', parameters=params)
+
+
+def check_parity(kernel, params, in_tensors, qrec):
+    outputs = kernel.execute(params, in_tensors, qrec)
+    ref_outputs = kernel.execute_reference(params, in_tensors, qrec)
+    assert len(outputs) == len(ref_outputs)
+    for output, ref_output in zip(outputs, ref_outputs):
+        assert output.dtype == ref_output.dtype
+        np.testing.assert_array_equal(output, ref_output)
+    return outputs
+
+
+@pytest.mark.parametrize('case', SSD_CASES.values(), ids=SSD_CASES.keys())
+def test_ssd_detector_float_matches_reference(case):
+    outputs = check_parity(SSDDetectorFloat32, ssd_node(case), ssd_inputs(case), None)
+    if 'detections' in case:
+        assert outputs[3][0] == case['detections']
+
+
+@pytest.mark.parametrize('case', SSD_CASES.values(), ids=SSD_CASES.keys())
+def test_ssd_detector_quantized_matches_reference(case):
+    params = ssd_node(case)
+    in_qs = [QType(scale=2**-3, dtype=np.int8),
+             QType(scale=2**-7, dtype=np.int8),
+             QType(scale=2**-5, dtype=np.int8)]
+    out_qs = [QType(scale=2**-14, dtype=np.int16),
+              QType(scale=1, dtype=np.int8),
+              QType(scale=2**-7, dtype=np.int8),
+              QType(scale=1, dtype=np.int32)]
+    in_tensors = [in_q.quantize(tensor) for in_q, tensor in zip(in_qs, ssd_inputs(case))]
+    outputs = check_parity(SSDDetectorSymmetric, params, in_tensors,
+                           QRec.scaled(in_qs=in_qs, out_qs=out_qs))
+    if 'detections' in case:
+        assert outputs[3][0] == case['detections']
+
+
+@pytest.mark.parametrize('case', NMS_CASES.values(), ids=NMS_CASES.keys())
+def test_nms_float_matches_reference(case):
+    boxes = np.array(case['boxes'], dtype=np.float32)[np.newaxis]
+    scores = np.array(case['scores'], dtype=np.float32).T[np.newaxis]
+    check_parity(NMSKernelFloat32, nms_node(case), [boxes, scores], None)
+
+
+@pytest.mark.parametrize('case', NMS_CASES.values(), ids=NMS_CASES.keys())
+def test_nms_quantized_matches_reference(case):
+    in_qs = [QType(scale=2**-5, dtype=np.int8),
+             QType(scale=2**-7, dtype=np.int8)]
+    boxes = in_qs[0].quantize(np.array(case['boxes'], dtype=np.float32)[np.newaxis])
+    scores = in_qs[1].quantize(np.array(case['scores'], dtype=np.float32).T[np.newaxis])
+    check_parity(NMSKernelSymmetric, nms_node(case), [boxes, scores],
+                 QRec.scaled(in_qs=in_qs, out_qs=[QType(scale=1, dtype=np.int16)]))
@@ -0,0 +1,68 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+
+import numpy as np
+from nntool.stats.streaming_stats import (PerAxisRange, QuantileSketch,
+                                          tensor_axis_ranges, tensor_moments)
+from nntool.utils.json_serializable import (JsonSerializableStateDecoder,
+                                            JsonSerializableStateEncoder)
+
+
+def test_tensor_moments_and_ranges():
+    tensor = np.random.default_rng(0).standard_normal((3, 4, 5)).astype(np.float32)
+    mean, std, mean_abs_dev = tensor_moments(tensor)
+    np.testing.assert_allclose(mean, np.mean(tensor), rtol=1e-6)
+    np.testing.assert_allclose(std, np.std(tensor), rtol=1e-6)
+    np.testing.assert_allclose(mean_abs_dev, np.mean(np.abs(tensor - np.mean(tensor))), rtol=1e-6)
+    mins, maxs = tensor_axis_ranges(tensor)
+    for axis in range(3):
+        other_axis = tuple(j for j in range(3) if j != axis)
+        np.testing.assert_array_equal(mins[axis], tensor.min(axis=other_axis))
+        np.testing.assert_array_equal(maxs[axis], tensor.max(axis=other_axis))
+
+
+def test_per_axis_range_merges_shards():
+    rng = np.random.default_rng(1)
+    tensors = [rng.standard_normal((3, 4, 5)) for _ in range(5)]
+    first, second = PerAxisRange(), PerAxisRange()
+    for tensor in tensors[:2]:
+        first.push(tensor)
+    for tensor in tensors[2:]:
+        second.push(tensor)
+    first.merge(second)
+    first = json.loads(json.dumps(first, cls=JsonSerializableStateEncoder),
+                       cls=JsonSerializableStateDecoder)
+    stacked = np.stack(tensors)
+    for axis in range(3):
+        other_axis = tuple(j for j in range(4) if j != axis + 1)
+        np.testing.assert_array_equal(first.mins[axis], stacked.min(axis=other_axis))
+        np.testing.assert_array_equal(first.maxs[axis], stacked.max(axis=other_axis))
+
+
+def test_quantile_sketch_merges_shards():
+    values = np.random.default_rng(2).laplace(size=20000)
+    whole, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    whole.push(values)
+    first.push(values[:5000])
+    second.push(values[5000:])
+    first.merge(second)
+    sorted_values = np.sort(values)
+    for quantile in (0.001, 0.01, 0.5, 0.99, 0.999):
+        assert first.quantile(quantile) == whole.quantile(quantile)
+        # within the relative accuracy of the value at the quantile's rank
+        expected = sorted_values[int(quantile * (len(values) - 1))]
+        np.testing.assert_allclose(first.quantile(quantile), expected, rtol=first.relative_accuracy)
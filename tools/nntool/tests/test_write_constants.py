@@ -0,0 +1,109 @@
+# Copyright (C) 2022  GreenWaves Technologies, SAS
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+
+import numpy as np
+from nntool.generation.at_types.constant_info import ConstantInfo
+from nntool.generation.at_types.tc_arg_info import GlobalArgInfo
+from nntool.generation.write_constants import MANIFEST_FILE, write_constants
+from nntool.quantization.qtype import QType
+
+
+def global_recs(constants):
+    return [GlobalArgInfo('signed char', file_name,
+                          const_info=ConstantInfo(file_name, QType(dtype=dtype), contents=contents))
+            for file_name, (contents, dtype) in constants.items()]
+
+
+def file_states(directory, file_names):
+    return {file_name: (os.stat(directory / file_name).st_ino, os.stat(directory / file_name).st_mtime_ns)
+            for file_name in file_names}
+
+
+def read(path, dtype):
+    return np.fromfile(path, dtype=dtype)
+
+
+def test_unchanged_constants_are_not_rewritten(tmp_path):
+    rng = np.random.default_rng(0)
+    weights = rng.integers(-128, 128, size=100).astype(np.int8)
+    float_weights = rng.standard_normal(50).astype(np.float32)
+    constants = {
+        'a.tensor': (weights, np.int8),
+        # identical to a so a hard link to it
+        'b.tensor': (weights.copy(), np.int8),
+        # converted on write
+        'c.tensor': (float_weights * 10, np.int16),
+        'd.tensor': (np.arange(10, dtype=np.int32), np.int32),
+    }
+    emitter = write_constants(global_recs(constants), tensor_directory=str(tmp_path))
+    assert (emitter.written, emitter.linked, emitter.skipped) == (3, 1, 0)
+    assert (tmp_path / MANIFEST_FILE).exists()
+    assert os.stat(tmp_path / 'a.tensor').st_ino == os.stat(tmp_path / 'b.tensor').st_ino
+    np.testing.assert_array_equal(read(tmp_path / 'c.tensor', np.int16),
+                                  (float_weights * 10).astype(np.int16))
+    before = file_states(tmp_path, constants)
+
+    # nothing changed so nothing is written
+    emitter = write_constants(global_recs(constants), tensor_directory=str(tmp_path))
+    assert (emitter.written, emitter.linked, emitter.skipped) == (0, 0, 4)
+    assert file_states(tmp_path, constants) == before
+
+    # a changes. it is written to a new file so b which was linked to it keeps its
+    # contents and the other files are untouched
+    new_weights = rng.integers(-128, 128, size=100).astype(np.int8)
+    constants['a.tensor'] = (new_weights, np.int8)
+    emitter = write_constants(global_recs(constants), tensor_directory=str(tmp_path))
+    assert (emitter.written, emitter.linked, emitter.skipped) == (1, 0, 3)
+    after = file_states(tmp_path, constants)
+    assert after['a.tensor'] != before['a.tensor']
+    assert {k: v for k, v in after.items() if k != 'a.tensor'} == \
+        {k: v for k, v in before.items() if k != 'a.tensor'}
+    np.testing.assert_array_equal(read(tmp_path / 'a.tensor', np.int8), new_weights)
+    np.testing.assert_array_equal(read(tmp_path / 'b.tensor', np.int8), weights)
+
+    # b changes to the new contents of a so becomes a link to it again
+    constants['b.tensor'] = (new_weights.copy(), np.int8)
+    emitter = write_constants(global_recs(constants), tensor_directory=str(tmp_path))
+    assert (emitter.written, emitter.linked, emitter.skipped) == (0, 1, 3)
+    assert os.stat(tmp_path / 'a.tensor').st_ino == os.stat(tmp_path / 'b.tensor').st_ino
+    assert file_states(tmp_path, ['c.tensor', 'd.tensor']) == \
+        {k: v for k, v in before.items() if k in ('c.tensor', 'd.tensor')}
+
+
+def test_file_changed_outside_generation_is_rewritten(tmp_path):
+    constants = {'a.tensor': (np.arange(16, dtype=np.int8), np.int8)}
+    write_constants(global_recs(constants), tensor_directory=str(tmp_path))
+    (tmp_path / 'a.tensor').write_bytes(b'\0' * 8)
+    emitter = write_constants(global_recs(constants), tensor_directory=str(tmp_path))
+    assert emitter.written == 1
+    np.testing.assert_array_equal(read(tmp_path / 'a.tensor', np.int8), np.arange(16, dtype=np.int8))
+
+
+def test_no_manifest_without_tensor_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('tensors')
+    constants = {
+        os.path.join('tensors', 'a.tensor'): (np.arange(16, dtype=np.int8), np.int8),
+        os.path.join('tensors', 'b.tensor'): (np.arange(16, dtype=np.int8), np.int8),
+    }
+    emitter = write_constants(global_recs(constants))
+    assert (emitter.written, emitter.linked) == (1, 1)
+    emitter = write_constants(global_recs(constants))
+    # without a manifest every file is written again
+    assert (emitter.written, emitter.linked, emitter.skipped) == (1, 1, 0)
+    assert sorted(os.listdir('.')) == ['tensors']
+    assert sorted(os.listdir('tensors')) == ['a.tensor', 'b.tensor']